@@ -0,0 +1,277 @@
+"""
+admin_users.py — StudyTracker
+Admin user browser backed by server-side filtering:
+  - search / status / plan / state filters and sort run in the database
+  - one page of approved_emails rows per request (count="exact" for paging)
+  - trial + plan expiry state computed in SQL (admin_user_grid view)
+Falls back to the bare approved_emails table (same filters, state derived
+for the current page only) until ADMIN_USERS_SQL has been run.
+Bulk approve / extend / revoke / delete write N rows per request and report
+per-email outcomes instead of stopping at the first failure.
+"""
+
+from __future__ import annotations
+from datetime import date
+import streamlit as st
+from modules.entitlements import parse_subscription
+
+
+def _sb():
+    """Return sb_admin from Streamlit session — injected at app startup."""
+    return st.session_state.get("_sb_admin")
+
+
+# ── Schema (run once in Supabase SQL editor) ──────────────────────────────────
+ADMIN_USERS_SQL = """
+create extension if not exists pg_trgm;
+create index if not exists approved_emails_status_idx    on approved_emails (status, approved_at desc);
+create index if not exists approved_emails_plan_end_idx  on approved_emails (plan_end);
+create index if not exists approved_emails_email_trgm    on approved_emails using gin (email gin_trgm_ops);
+
+create or replace view admin_user_grid as
+with cfg as (
+  select coalesce((select (value::jsonb ->> 'free_trial_days')::int
+                   from app_config where key = 'pricing'), 7) as trial_days
+), base as (
+  select ae.*,
+         coalesce(nullif(lower(ae.plan_key), ''),
+                  case when ae.note ilike '%life%' then 'life'
+                       when ae.note ilike '%1yr%'  then '1yr'
+                       when ae.note ilike '%3mo%'  then '3mo' end) as eff_plan
+  from approved_emails ae
+)
+select b.id, b.email, b.status, b.note, b.approved_at, b.plan_start, b.plan_end,
+       b.eff_plan                                                          as plan_key,
+       greatest(0, cfg.trial_days
+                   - coalesce(current_date - b.approved_at::date, 0))     as trial_days_left,
+       case when b.eff_plan is null                       then 'none'
+            when b.eff_plan in ('life', 'lifetime')       then 'lifetime'
+            when b.plan_end is null                       then 'active'
+            when b.plan_end::date < current_date          then 'expired'
+            when b.plan_end::date - current_date <= 7     then 'expiring'
+            else 'active' end                                              as plan_state,
+       case when b.eff_plan in ('life', 'lifetime')       then 99999
+            when b.plan_end is null                       then 0
+            else greatest(0, b.plan_end::date - current_date) end         as days_remaining
+from base b cross join cfg;
+
+revoke all on admin_user_grid from anon, authenticated;
+
+-- bulk approve upserts on email
+create unique index if not exists approved_emails_email_key on approved_emails (email);
+"""
+
+ADMIN_PAGE_SIZE = 25
+
+STATUS_FILTERS = ["all", "pending", "approved", "revoked"]
+STATE_FILTERS  = {
+    "all":      "Any state",
+    "in_trial": "🕐 In trial",
+    "trial_over": "⌛ Trial over",
+    "active":   "✅ Plan active",
+    "expiring": "⚠️ Expiring ≤7d",
+    "expired":  "❌ Plan expired",
+    "lifetime": "🏆 Lifetime",
+    "none":     "— No plan",
+}
+SORTS = {
+    "newest":   ("Newest first",     "approved_at", True),
+    "oldest":   ("Oldest first",     "approved_at", False),
+    "email":    ("Email A–Z",        "email",       False),
+    "expiring": ("Expiring soonest", "plan_end",    False),
+}
+
+_GRID_COLS = ("id,email,status,note,approved_at,plan_start,plan_end,plan_key,"
+              "trial_days_left,plan_state,days_remaining")
+_BASE_COLS = "id,email,status,note,approved_at,plan_start,plan_end,plan_key"
+
+
+def derive_user_state(row: dict, trial_days: int) -> dict:
+    """Python twin of the view's computed columns (fallback path, one page only)."""
+    sub = parse_subscription(row)
+    try:
+        since = (date.today() - date.fromisoformat(str(row.get("approved_at"))[:10])).days
+    except Exception:
+        since = 0
+    pk = sub.get("plan_key") or None
+    if not pk:
+        state = "none"
+    elif sub.get("is_lifetime"):
+        state = "lifetime"
+    elif not sub.get("active"):
+        state = "expired"
+    elif sub.get("plan_end") and sub.get("days_remaining", 0) <= 7:
+        state = "expiring"
+    else:
+        state = "active"
+    return {**row, "plan_key": pk,
+            "trial_days_left": max(0, trial_days - since),
+            "plan_state": state,
+            "days_remaining": sub.get("days_remaining", 0)}
+
+
+def _apply_filters(q, search: str, status: str, plan: str, state: str, grid: bool):
+    if search:
+        q = q.ilike("email", f"%{search.strip().lower()}%")
+    if status != "all":
+        q = q.eq("status", status)
+    if plan != "all":
+        q = q.is_("plan_key", "null") if plan == "none" else q.eq("plan_key", plan)
+    if grid and state != "all":
+        if state == "in_trial":
+            q = q.gt("trial_days_left", 0)
+        elif state == "trial_over":
+            q = q.eq("trial_days_left", 0)
+        else:
+            q = q.eq("plan_state", state)
+    return q
+
+
+def fetch_user_page(search: str = "", status: str = "all", plan: str = "all",
+                    state: str = "all", sort: str = "newest", page: int = 0,
+                    page_size: int = ADMIN_PAGE_SIZE, trial_days: int = 7) -> tuple[list[dict], int, bool]:
+    """
+    One page of users matching the filters.
+    Returns (rows, total_matching, state_filter_supported).
+    """
+    _, col, desc = SORTS.get(sort, SORTS["newest"])
+    lo, hi = page * page_size, page * page_size + page_size - 1
+    sb = _sb()
+    try:
+        q = sb.table("admin_user_grid").select(_GRID_COLS, count="exact")
+        q = _apply_filters(q, search, status, plan, state, grid=True)
+        res = q.order(col, desc=desc, nullsfirst=False).order("email").range(lo, hi).execute()
+        return res.data or [], res.count or 0, True
+    except Exception:
+        pass
+    q = sb.table("approved_emails").select(_BASE_COLS, count="exact")
+    q = _apply_filters(q, search, status, plan, state, grid=False)
+    res = q.order(col, desc=desc).order("email").range(lo, hi).execute()
+    return [derive_user_state(r, trial_days) for r in (res.data or [])], res.count or 0, False
+
+
+def fetch_status_counts() -> dict:
+    """{pending, approved, revoked} exact counts — three head-sized queries."""
+    sb = _sb()
+    out = {}
+    for s in ("pending", "approved", "revoked"):
+        try:
+            out[s] = sb.table("approved_emails").select("id", count="exact") \
+                       .eq("status", s).limit(1).execute().count or 0
+        except Exception:
+            out[s] = 0
+    return out
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# BULK ACTIONS — one write per chunk of emails, idempotent, partial-failure aware
+# ══════════════════════════════════════════════════════════════════════════════
+BULK_CHUNK = 200   # emails per .in_() / upsert request
+
+
+def _clean(emails) -> list[str]:
+    """Lower-cased, de-duplicated, order preserved."""
+    return list(dict.fromkeys(e.strip().lower() for e in emails if e and e.strip()))
+
+
+def _report(action: str) -> dict:
+    return {"action": action, "done": [], "skipped": [], "failed": {}}
+
+
+def _chunks(items: list):
+    for i in range(0, len(items), BULK_CHUNK):
+        yield items[i:i + BULK_CHUNK]
+
+
+def _plan_payload(plan_key: str, start: date, end: date | None, note: str) -> dict:
+    return {
+        "plan_key":   plan_key,
+        "plan_start": start.isoformat(),
+        "plan_end":   end.isoformat() if end else None,   # NULL = lifetime
+        "note":       note,
+    }
+
+
+def _apply_update(rep: dict, emails: list, payload: dict) -> dict:
+    """Update matching rows; emails with no row are reported as skipped."""
+    sb = _sb()
+    for chunk in _chunks(emails):
+        try:
+            res = sb.table("approved_emails").update(payload).in_("email", chunk).execute()
+            hit = {r["email"] for r in (res.data or [])}
+            rep["done"]    += [e for e in chunk if e in hit]
+            rep["skipped"] += [e for e in chunk if e not in hit]
+        except Exception as e:
+            rep["failed"].update({em: str(e) for em in chunk})
+    return rep
+
+
+def bulk_approve(emails, plan_key: str, start: date, end: date | None, note: str = "") -> dict:
+    """
+    Approve every email on plan_key (inserting missing rows) — one upsert per
+    chunk. Re-running with the same arguments leaves the table unchanged.
+    Before the unique index exists, falls back to update-existing + insert-missing.
+    """
+    emails = _clean(emails)
+    rep    = _report("approve")
+    sb     = _sb()
+    base   = {"status": "approved", "approved_at": date.today().isoformat(),
+              **_plan_payload(plan_key, start, end, note)}
+    for chunk in _chunks(emails):
+        try:
+            sb.table("approved_emails").upsert(
+                [{**base, "email": e} for e in chunk], on_conflict="email").execute()
+            rep["done"] += chunk
+            continue
+        except Exception:
+            pass
+        try:
+            have = {r["email"] for r in (sb.table("approved_emails").select("email")
+                                           .in_("email", chunk).execute().data or [])}
+            if have:
+                sb.table("approved_emails").update(base).in_("email", list(have)).execute()
+            new = [e for e in chunk if e not in have]
+            if new:
+                sb.table("approved_emails").insert([{**base, "email": e} for e in new]).execute()
+            rep["done"] += chunk
+        except Exception as e:
+            rep["failed"].update({em: str(e) for em in chunk})
+    return rep
+
+
+def bulk_extend(emails, plan_key: str, start: date, end: date | None, note: str = "") -> dict:
+    """Set a new plan window for existing users — one update per chunk."""
+    return _apply_update(_report("extend"), _clean(emails),
+                         {"status": "approved", **_plan_payload(plan_key, start, end, note)})
+
+
+def bulk_revoke(emails) -> dict:
+    """Mark users revoked (rows kept for audit) — one update per chunk."""
+    return _apply_update(_report("revoke"), _clean(emails), {"status": "revoked"})
+
+
+def bulk_delete(emails) -> dict:
+    """Remove approved_emails rows — one delete per chunk; missing rows are skipped."""
+    emails = _clean(emails)
+    rep    = _report("delete")
+    sb     = _sb()
+    for chunk in _chunks(emails):
+        try:
+            res = sb.table("approved_emails").delete().in_("email", chunk).execute()
+            hit = {r["email"] for r in (res.data or [])}
+            rep["done"]    += [e for e in chunk if e in hit]
+            rep["skipped"] += [e for e in chunk if e not in hit]
+        except Exception as e:
+            rep["failed"].update({em: str(e) for em in chunk})
+    return rep
+
+
+def bulk_summary(rep: dict) -> tuple[bool, str]:
+    """(all_ok, one-line message) for a bulk report."""
+    n_ok, n_skip, n_fail = len(rep["done"]), len(rep["skipped"]), len(rep["failed"])
+    msg = f"{rep['action'].title()}: {n_ok} done"
+    if n_skip:
+        msg += f" · {n_skip} not found"
+    if n_fail:
+        msg += f" · {n_fail} failed"
+    return n_fail == 0, msg
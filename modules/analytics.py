@@ -0,0 +1,950 @@
+"""
+analytics.py — StudyTracker
+Pure analytics engine shared by the app, the PDF export and batch jobs:
+  - CGSM revision gap model
+  - AIR / RPI / FRP / PWDAM / stress / consistency / projections
+  - Revision pendency builder, dashboard KPIs and achievements
+Functions take data + profile explicitly; the only session fallbacks are
+for callers that pass prof=None / exam_date=None from inside the app.
+"""
+
+from __future__ import annotations
+from datetime import date, timedelta
+import pandas as pd
+import streamlit as st
+from modules.course_config import SUBJECTS, TARGET_HRS, TOPICS
+from modules.timing import timed
+
+_DEFAULT_EXAM_DATE = date(2027, 1, 1)
+_EXAM_MONTHS = {"January": 1, "May": 5, "September": 9}
+
+
+def _session_exam_date() -> date:
+    return st.session_state.get("exam_date", _DEFAULT_EXAM_DATE)
+
+
+def exam_date_from_profile(prof: dict) -> date:
+    """Exam date (1st of the exam month) from profile exam_month/exam_year."""
+    exam_m = _EXAM_MONTHS.get(prof.get("exam_month", "January"), 1)
+    exam_y = int(prof.get("exam_year", 2027))
+    return date(exam_y, exam_m, 1)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# REVISION ENGINE — Controlled Growth Spaced Model (CGSM)
+# Based on the mathematical framework from the Study Strategy document.
+#
+# Core formula (non-exploding linear acceleration):
+#   d    = g2 − g1            (increment)
+#   Gap1 = g1                 (R1 gap, user-defined)
+#   Gap2 = g2                 (R2 gap, user-defined)
+#   Gapₙ = Gapₙ₋₁ + d × f   (controlled growth, f = growth factor)
+#
+# Hard guards:
+#   MaxGap ≤ min(120, DaysLeft/2)
+#   No revision beyond AttemptDate − 15 days
+# ══════════════════════════════════════════════════════════════════════════════
+
+def get_cgsm_gaps(g1: int, g2: int, num_rev: int, growth_factor: float = 1.30,
+                  max_gap: int = 120, days_left: int = None) -> list:
+    """
+    Controlled Growth Spaced Model — returns list of gap values (days) for R1..RN.
+
+    g1          : days gap before R1 (user-defined)
+    g2          : days gap before R2 (user-defined, measured from R1 date)
+    num_rev     : total number of revision rounds (1–10)
+    growth_factor: linear acceleration factor f (default 1.30)
+    max_gap     : hard cap on any single gap (default 120 days)
+    days_left   : if set, also caps at days_left/2
+
+    Returns: list of integer gap values, length = num_rev
+    """
+    if num_rev == 0:
+        return []
+    if num_rev == 1:
+        return [max(g1, 1)]
+
+    # Effective max gap: the tighter of the two caps
+    eff_max = max_gap
+    if days_left is not None and days_left > 0:
+        eff_max = min(eff_max, max(int(days_left / 2), g1 + 1))
+
+    d = g2 - g1   # base increment
+
+    gaps = [g1, g2]
+    for _ in range(2, num_rev):
+        next_gap = round(gaps[-1] + d * growth_factor)
+        next_gap = max(next_gap, gaps[-1] + 1)   # always strictly increasing
+        next_gap = min(next_gap, eff_max)          # hard ceiling
+        gaps.append(next_gap)
+
+    return gaps[:num_rev]
+
+
+def get_revision_interval(n: int, prof: dict = None, days_left: int = None) -> int:
+    """
+    Return gap (days) before revision round n (1-based).
+    Uses CGSM formula when profile has r1_days/r2_days/growth_factor.
+    Falls back to classic intervals for legacy profiles.
+    """
+    if prof is None:
+        prof = st.session_state.get("profile", {})
+
+    g1             = int(prof.get("r1_days", 3))
+    g2             = int(prof.get("r2_days", 7))
+    growth_factor  = float(prof.get("growth_factor", 1.30))
+    num_rev        = int(prof.get("num_revisions", 6))
+    max_gap        = int(prof.get("max_gap_days", 120))
+
+    gaps = get_cgsm_gaps(g1, g2, max(n, num_rev), growth_factor, max_gap, days_left)
+    if n <= len(gaps):
+        return gaps[n - 1]
+    return gaps[-1] if gaps else 7  # fallback
+
+
+def get_revision_ratios(r1_ratio: float, r2_ratio: float, num_rev: int) -> list:
+    """
+    Returns list of ratios (as decimals) for R1..RN.
+    R1, R2 set by user. R3+ decrease by 0.15× factor (later revisions are faster).
+    Min ratio = 0.10 (10% of TFR — always meaningful).
+    """
+    if num_rev == 0:
+        return []
+    ratios = [r1_ratio]
+    if num_rev >= 2:
+        ratios.append(r2_ratio)
+    for i in range(2, num_rev):
+        # Each subsequent revision is faster — decay by 15% of previous
+        next_r = round(ratios[-1] * 0.85, 4)
+        next_r = max(next_r, 0.10)   # floor at 10%
+        ratios.append(next_r)
+    return ratios
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# CA-GRADE ANALYTICS ENGINE
+# Implements: AIR Preparedness Index, RPI, PWDAM, Stress Index,
+#             Phase Detection, Retention Density, Subject Balance Detector
+# ══════════════════════════════════════════════════════════════════════════════
+
+@timed("analytics.frp")
+def compute_frp(log_df: pd.DataFrame, prof: dict) -> float:
+    """
+    First Read Progress Ratio (FRP).
+    FRP = TotalFirstReadHoursCompleted / TotalFirstReadHoursRequired
+    Range: 0.0 → 1.0  (can exceed 1.0 if user overshot target; capped at 1.0)
+    """
+    if log_df.empty:
+        return 0.0
+    # Only reading sessions (not revision)
+    if "session_type" in log_df.columns:
+        read_log = log_df[log_df["session_type"] != "revision"]
+    else:
+        read_log = log_df
+
+    total_read_hrs = float(read_log["hours"].sum()) if not read_log.empty else 0.0
+    total_req_hrs  = sum(
+        int(prof.get(f"target_hrs_{s.lower()}", TARGET_HRS[s]))
+        for s in SUBJECTS
+    )
+    if total_req_hrs <= 0:
+        return 0.0
+    return min(total_read_hrs / total_req_hrs, 1.0)
+
+
+def compute_pwdam(frp: float, study_hours_today: float, phase: str) -> dict:
+    """
+    Progress-Weighted Dynamic Allocation Model (PWDAM).
+    Computes how to split today's study hours between revision and first read.
+
+    Formula (non-linear, exam-aligned):
+      RevisionShare = Base + (Max − Base) × FRP^1.3
+
+    Articleship:  Base=0.25, Max=0.70
+    Post-Art:     Base=0.40, Max=1.00
+
+    Returns dict with revision_hrs, first_read_hrs, revision_share_pct
+    """
+    if phase == "articleship":
+        base, max_share = 0.25, 0.70
+    else:
+        base, max_share = 0.40, 1.00
+
+    revision_share  = base + (max_share - base) * (frp ** 1.3)
+    revision_share  = min(revision_share, 1.0)
+    revision_hrs    = round(study_hours_today * revision_share, 2)
+    first_read_hrs  = round(max(study_hours_today - revision_hrs, 0.0), 2)
+
+    return {
+        "revision_share_pct": round(revision_share * 100, 1),
+        "revision_hrs":       revision_hrs,
+        "first_read_hrs":     first_read_hrs,
+    }
+
+
+def detect_study_phase(prof: dict) -> str:
+    """
+    Returns 'articleship' or 'post_articleship' based on profile settings.
+    Checks articleship_end_date; falls back to manual phase setting.
+    """
+    phase_manual = prof.get("study_phase", "articleship")
+    art_end = prof.get("articleship_end_date")
+    if art_end:
+        try:
+            end_dt = date.fromisoformat(str(art_end)[:10])
+            if date.today() >= end_dt:
+                return "post_articleship"
+            else:
+                return "articleship"
+        except:
+            pass
+    return phase_manual
+
+
+@timed("analytics.air_index")
+def compute_air_index(log_df: pd.DataFrame, rev_df: pd.DataFrame,
+                      rev_sess_df: pd.DataFrame, pend_df: pd.DataFrame,
+                      prof: dict) -> dict:
+    """
+    AIR Preparedness Index — per-subject and overall.
+
+    AIR = 0.35×Coverage + 0.30×RevisionDepth + 0.20×Consistency + 0.15×Balance
+    (normalized 0–100)
+
+    Returns dict with:
+      overall: float 0–100
+      per_subject: {s: float 0–100}
+      components: {coverage, revision_depth, consistency, balance}
+      color: hex string
+      label: text label
+    """
+    all_topics  = sum(len(v) for v in TOPICS.values())
+    num_rev     = int(prof.get("num_revisions", 6))
+
+    # ── Coverage Score: completed topics / total topics ────────────────────────
+    completed_count = 0
+    if not rev_df.empty and "topic_status" in rev_df.columns:
+        completed_count = int((rev_df["topic_status"] == "completed").sum())
+    coverage = completed_count / all_topics if all_topics > 0 else 0.0
+
+    # ── Revision Depth Score: completed revisions / max possible revisions ─────
+    total_rev_done = len(rev_sess_df) if not rev_sess_df.empty else 0
+    max_possible   = completed_count * num_rev
+    rev_depth      = min(total_rev_done / max_possible, 1.0) if max_possible > 0 else 0.0
+
+    # ── Consistency Score: 1 − (overdue / total_due) ───────────────────────────
+    overdue_count = 0
+    total_due     = 0
+    if not pend_df.empty:
+        total_due     = len(pend_df)
+        overdue_count = int((pend_df["days_overdue"] > 0).sum())
+    consistency   = (1 - overdue_count / total_due) if total_due > 0 else 1.0
+
+    # ── Balance Score: 1 − subject imbalance deviation ─────────────────────────
+    # Measure how evenly distributed revision effort is across subjects
+    if not rev_sess_df.empty and "subject" in rev_sess_df.columns and total_rev_done > 0:
+        subj_shares = {s: len(rev_sess_df[rev_sess_df["subject"] == s]) / total_rev_done
+                       for s in SUBJECTS}
+        ideal_share  = 1.0 / len(SUBJECTS)
+        deviation    = sum(abs(subj_shares.get(s, 0) - ideal_share) for s in SUBJECTS) / len(SUBJECTS)
+        balance      = max(0.0, 1.0 - deviation * 2)
+    else:
+        balance = 0.5  # neutral — no data yet
+
+    # ── Overall AIR ────────────────────────────────────────────────────────────
+    overall_raw = 0.35 * coverage + 0.30 * rev_depth + 0.20 * consistency + 0.15 * balance
+    overall     = round(overall_raw * 100, 1)
+
+    # ── Per-subject AIR ────────────────────────────────────────────────────────
+    per_subject = {}
+    for s in SUBJECTS:
+        n_topics  = len(TOPICS.get(s, []))
+        s_comp    = 0
+        if not rev_df.empty and "topic_status" in rev_df.columns:
+            s_comp = int(((rev_df["subject"] == s) & (rev_df["topic_status"] == "completed")).sum())
+        s_cov     = s_comp / n_topics if n_topics > 0 else 0.0
+
+        s_rev_done = len(rev_sess_df[rev_sess_df["subject"] == s]) if not rev_sess_df.empty and "subject" in rev_sess_df.columns else 0
+        s_max_rev  = s_comp * num_rev
+        s_depth    = min(s_rev_done / s_max_rev, 1.0) if s_max_rev > 0 else 0.0
+
+        s_overdue = 0
+        s_total_d = 0
+        if not pend_df.empty:
+            sp = pend_df[pend_df["subject"] == s]
+            s_total_d = len(sp)
+            s_overdue = int((sp["days_overdue"] > 0).sum())
+        s_cons = (1 - s_overdue / s_total_d) if s_total_d > 0 else 1.0
+
+        s_air = round((0.35 * s_cov + 0.30 * s_depth + 0.20 * s_cons + 0.15 * balance) * 100, 1)
+        per_subject[s] = s_air
+
+    # ── Color & label ──────────────────────────────────────────────────────────
+    if overall >= 80:
+        color, label = "#34D399", "STRONG"
+    elif overall >= 60:
+        color, label = "#FBBF24", "MODERATE"
+    elif overall >= 40:
+        color, label = "#F97316", "AT RISK"
+    else:
+        color, label = "#F87171", "CRITICAL"
+
+    return {
+        "overall":      overall,
+        "per_subject":  per_subject,
+        "components":   {
+            "coverage":      round(coverage * 100, 1),
+            "revision_depth":round(rev_depth * 100, 1),
+            "consistency":   round(consistency * 100, 1),
+            "balance":       round(balance * 100, 1),
+        },
+        "color": color,
+        "label": label,
+    }
+
+
+@timed("analytics.rpi")
+def compute_rpi(log_df: pd.DataFrame, rev_df: pd.DataFrame,
+                rev_sess_df: pd.DataFrame, pend_df: pd.DataFrame,
+                prof: dict, exam_date: date = None) -> dict:
+    """
+    Readiness Probability Index (RPI) — the elite-level exam readiness score.
+
+    RPI = 0.30×C + 0.30×RD + 0.20×RDen + 0.10×Cons + 0.10×(1−ExpRisk)
+    (Range 0–1, displayed as 0–100)
+
+    C    = Coverage ratio
+    RD   = Revision Depth ratio
+    RDen = Retention Density (avg revision touches per topic)
+    Cons = Execution Consistency (days studied / elapsed days)
+    ExpRisk = Exposure Risk (% of completed topics not seen in >30 days)
+    """
+    all_topics  = sum(len(v) for v in TOPICS.values())
+    num_rev     = int(prof.get("num_revisions", 6))
+
+    # C — Coverage
+    completed_count = 0
+    if not rev_df.empty and "topic_status" in rev_df.columns:
+        completed_count = int((rev_df["topic_status"] == "completed").sum())
+    C = completed_count / all_topics if all_topics > 0 else 0.0
+
+    # RD — Revision Depth
+    total_rev_done = len(rev_sess_df) if not rev_sess_df.empty else 0
+    max_possible   = completed_count * num_rev
+    RD = min(total_rev_done / max_possible, 1.0) if max_possible > 0 else 0.0
+
+    # RDen — Retention Density (average touches per topic)
+    # Target: ≥4.0 by exam day
+    RDen_raw = total_rev_done / all_topics if all_topics > 0 else 0.0
+    # Normalize against target of 4.0
+    RDen = min(RDen_raw / 4.0, 1.0)
+
+    # Cons — Execution Consistency
+    if not log_df.empty and "date" in log_df.columns:
+        days_active    = log_df["date"].dt.date.nunique()
+        first_day      = log_df["date"].dt.date.min()
+        elapsed_days   = max((date.today() - first_day).days, 1)
+        Cons = min(days_active / elapsed_days, 1.0)
+    else:
+        Cons = 0.0
+
+    # ExpRisk — Exposure Risk
+    # % of completed topics whose last revision/read was >30 days ago
+    if not pend_df.empty and not pend_df.empty:
+        high_overdue   = int((pend_df["days_overdue"] > 30).sum()) if "days_overdue" in pend_df.columns else 0
+        tracked_topics = len(pend_df)
+        ExpRisk = high_overdue / tracked_topics if tracked_topics > 0 else 0.0
+    else:
+        ExpRisk = 0.0
+
+    # RPI formula
+    rpi_raw = 0.30 * C + 0.30 * RD + 0.20 * RDen + 0.10 * Cons + 0.10 * (1 - ExpRisk)
+    rpi     = round(rpi_raw * 100, 1)
+
+    # Interpretation
+    if rpi >= 80:
+        label, color = "HIGH CLEARANCE STABILITY", "#34D399"
+    elif rpi >= 65:
+        label, color = "COMPETITIVE — RISK EXISTS", "#60A5FA"
+    elif rpi >= 50:
+        label, color = "UNSTABLE", "#FBBF24"
+    else:
+        label, color = "STRUCTURALLY UNSAFE", "#F87171"
+
+    # Retention density value for milestone checking
+    # exam_date is passed explicitly when running outside the script thread
+    days_left = max(((exam_date or _session_exam_date()) - date.today()).days, 0)
+    rden_milestone = None
+    if days_left <= 45:
+        rden_milestone = ("Exam − 45d target", 3.0)
+    elif days_left <= 90:
+        rden_milestone = ("Exam − 90d target", 2.0)
+    else:
+        rden_milestone = ("Exam day target", 4.0)
+
+    return {
+        "rpi":           rpi,
+        "label":         label,
+        "color":         color,
+        "components":    {
+            "coverage":     round(C * 100, 1),
+            "revision_depth": round(RD * 100, 1),
+            "retention_density": round(RDen_raw, 2),
+            "consistency":  round(Cons * 100, 1),
+            "exposure_risk":round(ExpRisk * 100, 1),
+        },
+        "rden_actual":   round(RDen_raw, 2),
+        "rden_milestone":rden_milestone,
+    }
+
+
+@timed("analytics.stress_index")
+def compute_stress_index(pend_df: pd.DataFrame, log_df: pd.DataFrame,
+                          daily_cap: int) -> dict:
+    """
+    Stress Index = PlannedWork / RollingCapacity (14-day average)
+    > 1.3 → Plan is aggressive (warn)
+    > 1.5 → Critical — insufficient pace
+
+    Returns dict with stress_index, level ('normal'/'warn'/'critical'), message
+    """
+    # 14-day rolling average study hours
+    if log_df.empty:
+        rolling_avg = 0.0
+    else:
+        cutoff      = date.today() - timedelta(days=14)
+        recent      = log_df[log_df["date"].dt.date >= cutoff]
+        rolling_avg = float(recent["hours"].sum()) / 14.0 if not recent.empty else 0.0
+
+    # Planned daily work (overdue + today's due revisions)
+    planned_daily = 0
+    if not pend_df.empty:
+        overdue_count = int((pend_df["days_overdue"] >= 0).sum())
+        planned_daily = min(overdue_count, daily_cap)
+
+    # Stress = planned_daily / rolling_avg
+    stress = planned_daily / rolling_avg if rolling_avg > 0 else (1.0 if planned_daily == 0 else 2.0)
+
+    if stress >= 1.5:
+        level   = "critical"
+        color   = "#F87171"
+        message = "⚠️ Current pace insufficient for structured 2nd revision cycle"
+    elif stress >= 1.3:
+        level   = "warn"
+        color   = "#FBBF24"
+        message = "Plan may be aggressive — consider adjusting daily cap or revision settings"
+    else:
+        level   = "normal"
+        color   = "#34D399"
+        message = "Workload is sustainable"
+
+    return {
+        "stress_index":   round(stress, 2),
+        "rolling_avg_hrs":round(rolling_avg, 1),
+        "level":          level,
+        "color":          color,
+        "message":        message,
+    }
+
+
+@timed("analytics.execution_consistency")
+def compute_execution_consistency(log_df: pd.DataFrame) -> dict:
+    """
+    Execution Consistency = DaysStudied / ElapsedDays
+    Brutally factual — no sugarcoating.
+    """
+    if log_df.empty:
+        return {"pct": 0, "days_studied": 0, "elapsed": 0, "color": "#F87171"}
+
+    days_studied = log_df["date"].dt.date.nunique()
+    first_day    = log_df["date"].dt.date.min()
+    elapsed      = max((date.today() - first_day).days + 1, 1)
+    pct          = round(days_studied / elapsed * 100, 1)
+
+    color = "#34D399" if pct >= 70 else "#FBBF24" if pct >= 50 else "#F87171"
+    return {"pct": pct, "days_studied": days_studied, "elapsed": elapsed, "color": color}
+
+
+@timed("analytics.phase_info")
+def compute_phase_info(prof: dict, log_df: pd.DataFrame, days_left: int) -> dict:
+    """
+    Determine current preparation phase (A/B/C) and what it means.
+
+    Phase A — Coverage Phase:   FRP < 0.80
+    Phase B — Consolidation:    FRP >= 0.80
+    Phase C — Compression:      Last 60 days (auto, not optional)
+    """
+    frp   = compute_frp(log_df, prof)
+    phase = detect_study_phase(prof)
+
+    if days_left <= 60:
+        prep_phase = "C"
+        label      = "🔴 Phase C — COMPRESSION"
+        desc       = "Last 60 days: max gap ≤ 15 days, no new first reads, full revision intensity"
+        color      = "#F87171"
+    elif frp >= 0.80:
+        prep_phase = "B"
+        label      = "🟡 Phase B — CONSOLIDATION"
+        desc       = "Syllabus ≥80% done: revision dominant, gaps tightening, mock cycles increasing"
+        color      = "#FBBF24"
+    else:
+        prep_phase = "A"
+        label      = "🔵 Phase A — COVERAGE"
+        desc       = "First read priority, revision grows automatically with syllabus progress"
+        color      = "#60A5FA"
+
+    # Apply compression-mode gap cap in Phase C
+    effective_max_gap = 15 if prep_phase == "C" else int(prof.get("max_gap_days", 120))
+
+    return {
+        "prep_phase":        prep_phase,
+        "label":             label,
+        "desc":              desc,
+        "color":             color,
+        "frp":               frp,
+        "study_phase":       phase,
+        "effective_max_gap": effective_max_gap,
+    }
+
+
+@timed("analytics.weekly_subject_balance")
+def compute_weekly_subject_balance(rev_sess_df: pd.DataFrame) -> dict:
+    """
+    Weekly Subject Imbalance Detector — runs post-articleship only.
+    Checks if any subject's weekly revision share deviates >20% from ideal.
+
+    Returns list of flags: [{subject, share_pct, ideal_pct, flag, color}]
+    """
+    ideal = 1.0 / len(SUBJECTS)   # 20% each
+    result = {}
+
+    if rev_sess_df.empty or "subject" not in rev_sess_df.columns:
+        for s in SUBJECTS:
+            result[s] = {"share_pct": 0, "ideal_pct": ideal * 100,
+                          "flag": "no_data", "color": "#94A3B8"}
+        return result
+
+    # Last 7 days
+    cutoff  = date.today() - timedelta(days=7)
+    if "date" in rev_sess_df.columns:
+        try:
+            dates_col = pd.to_datetime(rev_sess_df["date"]).dt.date
+            weekly    = rev_sess_df[dates_col >= cutoff]
+        except:
+            weekly = rev_sess_df
+    else:
+        weekly = rev_sess_df
+
+    total_weekly = len(weekly) if not weekly.empty else 0
+
+    for s in SUBJECTS:
+        if total_weekly == 0:
+            share = 0.0
+        else:
+            s_count = len(weekly[weekly["subject"] == s]) if not weekly.empty else 0
+            share   = s_count / total_weekly
+
+        deviation = share - ideal
+        if deviation < -0.20:
+            flag, color = "under_revised", "#F87171"
+        elif deviation > 0.20:
+            flag, color = "over_focused", "#FBBF24"
+        else:
+            flag, color = "balanced", "#34D399"
+
+        result[s] = {
+            "share_pct": round(share * 100, 1),
+            "ideal_pct": round(ideal * 100, 1),
+            "flag":      flag,
+            "color":     color,
+        }
+
+    return result
+
+
+@timed("analytics.exam_projection")
+def compute_exam_projection(log_df: pd.DataFrame, rev_df: pd.DataFrame,
+                             prof: dict, days_left: int) -> dict:
+    """
+    Exam Readiness Projection — at current pace, what happens by exam day?
+
+    Returns:
+      - projected_frp_at_exam (0–1)
+      - projected_cycles_at_exam
+      - status: 'on_track' | 'at_risk' | 'critical'
+      - message: human readable summary
+    """
+    all_topics = sum(len(v) for v in TOPICS.values())
+
+    if log_df.empty or days_left <= 0:
+        return {
+            "status": "no_data",
+            "message": "Start logging study sessions to see your exam projection.",
+            "projected_frp": 0.0,
+            "projected_cycles": 0,
+        }
+
+    # 14-day rolling avg reading hours/day
+    if "session_type" in log_df.columns:
+        read_log = log_df[log_df["session_type"] != "revision"]
+    else:
+        read_log = log_df
+
+    cutoff       = date.today() - timedelta(days=14)
+    recent_read  = read_log[read_log["date"].dt.date >= cutoff]
+    daily_read_avg = float(recent_read["hours"].sum()) / 14.0 if not recent_read.empty else 0.0
+
+    # Current FRP and projected
+    frp_now      = compute_frp(log_df, prof)
+    total_req    = sum(int(prof.get(f"target_hrs_{s.lower()}", TARGET_HRS[s])) for s in SUBJECTS)
+    hrs_done     = frp_now * total_req
+    hrs_remaining= max(total_req - hrs_done, 0)
+
+    days_to_finish_fr = (hrs_remaining / daily_read_avg) if daily_read_avg > 0 else 9999
+    proj_frp     = min(frp_now + daily_read_avg * days_left / total_req, 1.0) if total_req > 0 else frp_now
+
+    # Revision cycles at exam
+    completed_count = int((rev_df["topic_status"] == "completed").sum()) if not rev_df.empty and "topic_status" in rev_df.columns else 0
+    num_rev         = int(prof.get("num_revisions", 6))
+    cutoff_rev      = date.today() - timedelta(days=14)
+    recent_rev      = log_df[(log_df.get("session_type") == "revision") if "session_type" in log_df.columns else pd.Series([False]*len(log_df))]
+    daily_rev_avg   = float(recent_rev["hours"].sum()) / 14.0 if not recent_rev.empty else 0.0
+    proj_rev_hrs    = daily_rev_avg * days_left
+    est_cycles      = round(proj_rev_hrs / max(completed_count * 1.5, 1), 1) if completed_count > 0 else 0.0
+
+    # Determine status
+    if proj_frp < 0.9 and days_left < 120:
+        status = "critical"
+        color  = "#F87171"
+        msg    = f"⚠️ At current pace, syllabus will be only {proj_frp*100:.0f}% complete by exam. Insufficient time for 2nd revision cycle."
+    elif days_to_finish_fr > days_left - 60:
+        status = "at_risk"
+        color  = "#FBBF24"
+        msg    = f"First read may complete too late — leaving < 60 days for consolidation. Increase daily reading hours."
+    elif est_cycles < 2:
+        status = "at_risk"
+        color  = "#FBBF24"
+        msg    = f"Projected only {est_cycles:.1f} revision cycles before exam. Most exams need minimum 3. Increase revision pace."
+    else:
+        status = "on_track"
+        color  = "#34D399"
+        msg    = f"On track — projected {est_cycles:.1f} revision cycles and {proj_frp*100:.0f}% first read by exam."
+
+    return {
+        "status":          status,
+        "color":           color,
+        "message":         msg,
+        "projected_frp":   round(proj_frp * 100, 1),
+        "projected_cycles":round(est_cycles, 1),
+        "daily_read_avg":  round(daily_read_avg, 1),
+        "days_to_finish_fr": int(days_to_finish_fr),
+    }
+
+
+def compute_revision_schedule(tfr: float, r1_ratio: float, r2_ratio: float,
+                               num_rev: int, completion_date: date,
+                               prof: dict = None, days_left: int = None) -> list:
+    """
+    Given TFR (hours), ratios, num revisions, and topic completion date,
+    returns list of dicts using CGSM gap formula:
+      {round: 1, duration_hrs: X, due_date: date, interval_days: N}
+    Uses get_cgsm_gaps() for non-exploding interval calculation.
+    """
+    if prof is None:
+        prof = st.session_state.get("profile", {})
+    g1            = int(prof.get("r1_days", 3))
+    g2            = int(prof.get("r2_days", 7))
+    growth_factor = float(prof.get("growth_factor", 1.30))
+    max_gap       = int(prof.get("max_gap_days", 120))
+    gaps      = get_cgsm_gaps(g1, g2, num_rev, growth_factor, max_gap, days_left)
+    ratios    = get_revision_ratios(r1_ratio, r2_ratio, num_rev)
+    schedule  = []
+    prev_date = completion_date
+    for i, ratio in enumerate(ratios):
+        rn        = i + 1
+        interval  = gaps[i] if i < len(gaps) else gaps[-1]
+        due       = prev_date + timedelta(days=interval)
+        duration  = round(tfr * ratio, 2)
+        schedule.append({
+            "round":         rn,
+            "label":         f"R{rn}",
+            "duration_hrs":  max(duration, 0.5),
+            "due_date":      due,
+            "interval_days": interval,
+            "ratio":         ratio,
+        })
+        prev_date = due
+    return schedule
+
+
+def get_topic_status(subject: str, topic: str, rev_df: pd.DataFrame) -> str:
+    """Returns 'not_started' | 'reading' | 'completed'"""
+    if rev_df.empty:
+        return "not_started"
+    row = rev_df[(rev_df["subject"] == subject) & (rev_df["topic"] == topic)]
+    if row.empty:
+        return "not_started"
+    status = row.iloc[0].get("topic_status", "not_started")
+    return status if status else "not_started"
+
+
+def get_tfr(subject: str, topic: str, log_df: pd.DataFrame) -> float:
+    """Returns Total First Reading hours (sum of all Reading sessions)."""
+    if log_df.empty:
+        return 0.0
+    mask = (
+        (log_df["subject"] == subject) &
+        (log_df["topic"]   == topic) &
+        ((log_df["session_type"] != "revision" if "session_type" in log_df.columns else pd.Series([True]*len(log_df))))
+    )
+    return float(log_df[mask]["hours"].sum())
+
+
+def get_completed_revisions(subject: str, topic: str, rev_sessions_df: pd.DataFrame) -> list:
+    """Returns list of completed revision dicts sorted by round."""
+    if rev_sessions_df.empty:
+        return []
+    rows = rev_sessions_df[
+        (rev_sessions_df["subject"] == subject) &
+        (rev_sessions_df["topic"]   == topic) &
+        (rev_sessions_df["status"]  == "completed")
+    ].sort_values("round")
+    return rows.to_dict("records")
+
+
+def memory_strength(revisions_done: int, last_revision_date, num_rev: int) -> tuple:
+    """
+    Memory Strength Indicator based on recency + depth.
+    Returns (strength_pct, label, color)
+    """
+    if revisions_done == 0 or last_revision_date is None:
+        return (0, "🧠 Unrevised", "#F87171")
+    # Days since last revision
+    if isinstance(last_revision_date, str):
+        last_dt = date.fromisoformat(last_revision_date[:10])
+    else:
+        last_dt = last_revision_date
+    days_ago   = (date.today() - last_dt).days
+    depth_pct  = min(revisions_done / num_rev * 100, 100)
+    # Decay: lose 1% per day since last revision, floored at 20%
+    decay      = max(0, days_ago * 0.8)
+    strength   = max(20.0, depth_pct - decay)
+    if strength >= 80:
+        return (strength, "💚 Strong",    "#34D399")
+    elif strength >= 55:
+        return (strength, "🔵 Moderate",  "#60A5FA")
+    elif strength >= 30:
+        return (strength, "🟡 Fading",    "#FBBF24")
+    else:
+        return (strength, "🔴 Weak",      "#F87171")
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# REVISION PENDENCIES
+# ══════════════════════════════════════════════════════════════════════════════
+
+@timed("analytics.build_revision_pendencies")
+def build_revision_pendencies(rows_data: list, prof: dict) -> pd.DataFrame:
+    """
+    Pendency table from daily_log rows (dicts with subject, topic, date,
+    hours, session_type, topic_status, completion_date).
+    Only topics with status='completed' are eligible for revision scheduling.
+    """
+    today = date.today()
+    rows  = []
+
+    from collections import defaultdict
+    topic_sessions = defaultdict(list)
+    topic_status_map = {}
+    topic_completion_date = {}
+    topic_tfr = defaultdict(float)
+
+    for r in rows_data:
+        key = (r["subject"], r["topic"])
+        d   = date.fromisoformat(str(r["date"])[:10])
+        st_type = r.get("session_type", "reading")
+        ts      = r.get("topic_status", "reading")
+        topic_status_map[key]  = ts
+        if st_type != "revision":
+            topic_tfr[key] += float(r.get("hours", 0))
+        if ts == "completed" and r.get("completion_date"):
+            topic_completion_date[key] = date.fromisoformat(r["completion_date"][:10])
+        topic_sessions[key].append((d, st_type))
+
+    _g1   = int(prof.get("r1_days", 3))
+    _g2   = int(prof.get("r2_days", 7))
+    _gf   = float(prof.get("growth_factor", 1.30))
+    _mgap = int(prof.get("max_gap_days", 120))
+    _nrev = int(prof.get("num_revisions", 6))
+
+    for key, session_list in topic_sessions.items():
+        subj, topic = key
+        status = topic_status_map.get(key, "reading")
+
+        # Only schedule revisions for COMPLETED topics
+        if status != "completed":
+            continue
+
+        comp_date = topic_completion_date.get(key)
+        if not comp_date:
+            # Infer completion date as last reading session date
+            reading_dates = [d for d, st in session_list if st != "revision"]
+            if not reading_dates:
+                continue
+            comp_date = max(reading_dates)
+
+        # Count completed revisions
+        rev_dates = sorted([d for d, st in session_list if st == "revision"])
+        revs_done = len(rev_dates)
+
+        # Next due: apply CGSM schedule from completion_date
+        _nr           = max(_nrev, revs_done + 1)
+        _gaps         = get_cgsm_gaps(_g1, _g2, _nr, _gf, _mgap)
+        _round_idx    = revs_done  # 0-based index for next round
+        interval      = _gaps[_round_idx] if _round_idx < len(_gaps) else _gaps[-1]
+        base_date     = rev_dates[-1] if rev_dates else comp_date
+        due_date  = base_date + timedelta(days=interval)
+        days_diff = (today - due_date).days
+
+        rows.append({
+            "subject":        subj,
+            "topic":          topic,
+            "revisions_done": revs_done,
+            "completion_date": str(comp_date),
+            "last_studied":   base_date,
+            "due_date":       due_date,
+            "days_overdue":   days_diff,
+            "interval_days":  interval,
+            "round_label":    f"R{revs_done + 1}",
+            "status": (
+                "🔴 OVERDUE"    if days_diff > 0
+                else "🟡 DUE TODAY" if days_diff == 0
+                else "🟢 UPCOMING"
+            )
+        })
+
+    if not rows:
+        return pd.DataFrame()
+    df = pd.DataFrame(rows)
+    df = df.sort_values("days_overdue", ascending=False).reset_index(drop=True)
+    return df
+
+
+def pendency_log_json(log_df: pd.DataFrame) -> str:
+    """
+    daily_log frame → compact JSON records for build_revision_pendencies().
+    JSON (not dicts) so it doubles as a hashable cache key; NaN → null.
+    """
+    cols = [c for c in ["subject","topic","date","hours","session_type",
+                         "topic_status","completion_date"] if c in log_df.columns]
+    log_mini = log_df[cols].copy()
+    if "date" in log_mini.columns:
+        log_mini["date"] = log_mini["date"].dt.strftime("%Y-%m-%d")
+    return log_mini.to_json(orient="records")
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# DASHBOARD KPIs — same numbers the dashboard header and PDF report show
+# ══════════════════════════════════════════════════════════════════════════════
+
+@timed("analytics.dashboard_kpis")
+def compute_dashboard_kpis(log: pd.DataFrame, tst: pd.DataFrame,
+                           rev_sess: pd.DataFrame, prof: dict,
+                           days_left: int) -> dict:
+    """
+    Returns dict: total_reading_hrs, total_rev_hrs, avg_score, dpd, days_studied.
+    Reading hours exclude revision sessions; dpd = hours/day still needed
+    to reach the profile's per-subject targets.
+    """
+    prof_targets = {s: int(prof.get(f"target_hrs_{s.lower()}", TARGET_HRS[s])) for s in SUBJECTS}
+
+    if not log.empty and "session_type" in log.columns:
+        read_log = log[log["session_type"] != "revision"]
+    else:
+        read_log = log
+
+    total_reading_hrs = float(read_log["hours"].sum()) if not read_log.empty else 0.0
+    avg_score    = float(tst["score_pct"].mean()) if not tst.empty else 0.0
+    need         = max(sum(prof_targets.values()) - total_reading_hrs, 0)
+    dpd          = round(need / days_left, 1) if days_left > 0 else 0
+    days_studied = log["date"].dt.date.nunique() if not log.empty else 0
+    total_rev_hrs = (float(rev_sess["hours"].sum())
+                     if not rev_sess.empty and "hours" in rev_sess.columns else 0.0)
+
+    return {
+        "total_reading_hrs": total_reading_hrs,
+        "total_rev_hrs":     total_rev_hrs,
+        "avg_score":         avg_score,
+        "dpd":               dpd,
+        "days_studied":      days_studied,
+    }
+
+
+@timed("analytics.report_analytics")
+def compute_report_analytics(log: pd.DataFrame, rev: pd.DataFrame,
+                             rev_sess: pd.DataFrame, pend: pd.DataFrame,
+                             prof: dict, days_left: int, exam_date: date) -> dict:
+    """Analytics block consumed by modules.pdf_report.render_dashboard_pdf()."""
+    num_rev = int(prof.get("num_revisions", 6))
+    return {
+        "air":  compute_air_index(log, rev, rev_sess, pend, prof),
+        "rpi":  compute_rpi(log, rev, rev_sess, pend, prof, exam_date=exam_date),
+        "cons": compute_execution_consistency(log),
+        "frp":  compute_frp(log, prof),
+        "gaps": get_cgsm_gaps(int(prof.get("r1_days", 3)), int(prof.get("r2_days", 7)),
+                              num_rev, float(prof.get("growth_factor", 1.30)),
+                              int(prof.get("max_gap_days", 120)), days_left),
+    }
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# ACHIEVEMENT SYSTEM
+# ══════════════════════════════════════════════════════════════════════════════
+ACHIEVEMENTS = {
+    "topics": [
+        {"id":"t1",  "icon":"📖", "name":"First Chapter",   "desc":"Complete your first topic",          "req": 1,  "type":"completed_topics"},
+        {"id":"t2",  "icon":"📚", "name":"Bookworm",         "desc":"Complete 5 topics",                  "req": 5,  "type":"completed_topics"},
+        {"id":"t3",  "icon":"🎓", "name":"Scholar",          "desc":"Complete 10 topics",                 "req":10,  "type":"completed_topics"},
+        {"id":"t4",  "icon":"🏛️", "name":"Academician",     "desc":"Complete 25 topics",                 "req":25,  "type":"completed_topics"},
+        {"id":"t5",  "icon":"👑", "name":"Grand Scholar",    "desc":"Complete all 86 topics",             "req":86,  "type":"completed_topics"},
+    ],
+    "revisions": [
+        {"id":"r1",  "icon":"🔄", "name":"First Revision",  "desc":"Complete your first revision",       "req": 1,  "type":"total_revisions"},
+        {"id":"r2",  "icon":"🔁", "name":"Revisionist",     "desc":"Complete 10 revisions",              "req":10,  "type":"total_revisions"},
+        {"id":"r3",  "icon":"💪", "name":"Iron Memory",     "desc":"Complete 25 revisions",              "req":25,  "type":"total_revisions"},
+        {"id":"r4",  "icon":"🧠", "name":"Mastermind",      "desc":"Complete 50 revisions",              "req":50,  "type":"total_revisions"},
+        {"id":"r5",  "icon":"⚡", "name":"Revision King",   "desc":"Complete 100 revisions",             "req":100, "type":"total_revisions"},
+    ],
+    "tests": [
+        {"id":"ts1", "icon":"✍️",  "name":"Test Pilot",     "desc":"Attempt your first mock test",       "req": 1,  "type":"total_tests"},
+        {"id":"ts2", "icon":"🎯",  "name":"Sharp Shooter",  "desc":"Score 60%+ on any test",             "req": 60, "type":"max_score"},
+        {"id":"ts3", "icon":"🏅",  "name":"Consistent",     "desc":"Attempt 5 tests",                    "req": 5,  "type":"total_tests"},
+        {"id":"ts4", "icon":"🥇",  "name":"Top Scorer",     "desc":"Score 80%+ on any test",             "req": 80, "type":"max_score"},
+        {"id":"ts5", "icon":"🏆",  "name":"Exam Ready",     "desc":"Avg score 70%+ across 10 tests",     "req": 70, "type":"avg_score_10"},
+    ],
+}
+
+def compute_achievements(log_df, rev_df, rev_sess_df, test_df):
+    """Returns dict of achievement_id -> bool (unlocked)."""
+    unlocked = {}
+    # Topics
+    completed_topics = 0
+    if not rev_df.empty and "topic_status" in rev_df.columns:
+        completed_topics = int((rev_df["topic_status"] == "completed").sum())
+    total_revisions = len(rev_sess_df) if not rev_sess_df.empty else 0
+    total_tests     = len(test_df) if not test_df.empty else 0
+    max_score       = float(test_df["score_pct"].max()) if not test_df.empty and "score_pct" in test_df.columns else 0
+    avg_score_10    = float(test_df["score_pct"].tail(10).mean()) if not test_df.empty and len(test_df) >= 10 else 0
+
+    vals = {
+        "completed_topics": completed_topics,
+        "total_revisions":  total_revisions,
+        "total_tests":      total_tests,
+        "max_score":        max_score,
+        "avg_score_10":     avg_score_10,
+    }
+    for cat, items in ACHIEVEMENTS.items():
+        for item in items:
+            v = vals.get(item["type"], 0)
+            unlocked[item["id"]] = v >= item["req"]
+    return unlocked, vals
@@ -0,0 +1,165 @@
+"""
+app_config.py — StudyTracker
+Process-wide cache for app_config rows (pricing, feature flags …):
+  - every row carries a version number, bumped on each write (trigger)
+  - readers check the version at most every CONFIG_CHECK_SEC with a
+    one-column select, and reload the value only when it changed
+  - between checks a config read is a dictionary lookup
+Before APP_CONFIG_SQL is run the value itself is re-read every
+CONFIG_FALLBACK_TTL seconds (the old st.cache_data behaviour).
+"""
+
+from __future__ import annotations
+import json
+import threading
+import time
+import streamlit as st
+
+
+def _sb():
+    """Return sb_admin from Streamlit session — injected at app startup."""
+    return st.session_state.get("_sb_admin")
+
+
+# ── Schema (run once in Supabase SQL editor) ──────────────────────────────────
+APP_CONFIG_SQL = """
+alter table app_config add column if not exists version    bigint      not null default 1;
+alter table app_config add column if not exists updated_at timestamptz not null default now();
+
+create or replace function app_config_bump_version() returns trigger
+language plpgsql as $$
+begin
+  new.version    := greatest(coalesce(new.version, 0), old.version + 1);
+  new.updated_at := now();
+  return new;
+end $$;
+
+drop trigger if exists app_config_version_trg on app_config;
+create trigger app_config_version_trg before update on app_config
+  for each row execute function app_config_bump_version();
+"""
+
+CONFIG_CHECK_SEC    = 5     # max staleness across processes once versioned
+CONFIG_FALLBACK_TTL = 120   # full re-read interval when the version column is missing
+
+
+@st.cache_resource
+def _config_state() -> dict:
+    """key → {version, raw, built, checked}; shared by all sessions."""
+    return {"lock": threading.Lock(), "entries": {}, "versioned": True}
+
+
+def _read_row(key: str, cols: str) -> dict | None:
+    res = _sb().table("app_config").select(cols).eq("key", key).limit(1).execute()
+    return res.data[0] if res.data else None
+
+
+def _missing_column(e: Exception) -> bool:
+    """True only when the error says a column (version) doesn't exist yet."""
+    msg = str(e)
+    return ("42703" in msg or "PGRST204" in msg
+            or ("column" in msg and "does not exist" in msg))
+
+
+def _load(state: dict, key: str) -> dict:
+    """Fetch value (+ version) as a fresh entry. Runs without the lock."""
+    row = None
+    if state["versioned"]:
+        try:
+            row = _read_row(key, "value,version")
+        except Exception as e:
+            if not _missing_column(e):
+                raise
+            state["versioned"] = False
+    if not state["versioned"]:
+        row = _read_row(key, "value")
+    raw = json.loads(row["value"]) if row and row.get("value") else None
+    return {"version": (row or {}).get("version", 0), "raw": raw,
+            "built": {}, "checked": time.time()}
+
+
+def _fresh_entry(key: str) -> dict:
+    state = _config_state()
+    entry = state["entries"].get(key)
+    now   = time.time()
+    ttl   = CONFIG_CHECK_SEC if state["versioned"] else CONFIG_FALLBACK_TTL
+    if entry and now - entry["checked"] < ttl:
+        return entry
+    with state["lock"]:
+        entry = state["entries"].get(key)
+        if entry and time.time() - entry["checked"] < ttl:
+            return entry                       # another session refreshed it
+        if entry:
+            entry["checked"] = time.time()     # claim the refresh — others keep serving entry
+    # database round trips happen outside the lock
+    try:
+        if entry and state["versioned"]:
+            try:
+                row = _read_row(key, "version")
+            except Exception as e:
+                if not _missing_column(e):
+                    raise
+                state["versioned"] = False
+            else:
+                if (row or {}).get("version", 0) == entry["version"]:
+                    return entry
+        new = _load(state, key)
+    except Exception:
+        # DB hiccup — serve what we have
+        return entry or {"version": 0, "raw": None, "built": {}, "checked": 0.0}
+    with state["lock"]:
+        cur = state["entries"].get(key)
+        if cur is entry or (cur is not None and new["version"] >= cur["version"]):
+            state["entries"][key] = new
+    return new
+
+
+def get_config(key: str, build=None):
+    """
+    Parsed JSON value of app_config[key] (None if missing).
+    build(raw) → derived object, computed once per version and cached, so
+    callers that merge with defaults don't redo it on every read.
+    """
+    entry = _fresh_entry(key)
+    if build is None:
+        return entry["raw"]
+    built = entry["built"]
+    if build not in built:
+        built[build] = build(entry["raw"])
+    return built[build]
+
+
+def invalidate_config(key: str = None):
+    """Force the next read of key (or all keys) to hit the database."""
+    state = _config_state()
+    with state["lock"]:
+        if key is None:
+            state["entries"].clear()
+        else:
+            state["entries"].pop(key, None)
+
+
+def save_config(key: str, value) -> tuple[bool, str]:
+    """Write app_config[key]; the version bump makes every process reload it."""
+    sb = _sb()
+    payload = json.dumps(value)
+    try:
+        state = _config_state()
+        try:
+            row = _read_row(key, "version" if state["versioned"] else "key")
+        except Exception as e:
+            if not _missing_column(e):
+                raise
+            state["versioned"] = False
+            row = _read_row(key, "key")
+        data = {"value": payload}
+        if row is not None:
+            if state["versioned"]:
+                data["version"] = int(row.get("version") or 0) + 1
+            sb.table("app_config").update(data).eq("key", key).execute()
+        else:
+            sb.table("app_config").insert({"key": key, **data}).execute()
+        invalidate_config(key)
+        return True, "✅ Config saved"
+    except Exception as e:
+        return False, f"Error: {e}"
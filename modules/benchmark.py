@@ -0,0 +1,183 @@
+"""
+benchmark.py — StudyTracker
+Analytics / PDF benchmark on synthetic users at several data scales:
+
+    python -m modules.benchmark                       # 1x, 10x, 100x
+    python -m modules.benchmark --scales 1 10 --repeat 7 --skip dashboard_pdf
+    python -m modules.benchmark --compare             # diff vs the previous stored run
+
+Each case runs the same call the app makes (pendencies go through the JSON
+round trip of get_pendencies; the PDF through compute_report_analytics +
+render_dashboard_pdf like generate_dashboard_pdf). Results are appended as
+one JSON line per run to --out (default .bench/analytics.jsonl) so runs can
+be compared across commits.
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import date, datetime, timezone
+
+from modules.analytics import (
+    build_revision_pendencies, pendency_log_json, compute_air_index, compute_rpi,
+    compute_exam_projection, compute_stress_index, compute_achievements,
+    compute_dashboard_kpis, compute_report_analytics, exam_date_from_profile,
+)
+from modules.synthetic import synth_user, dataset_shape
+
+DEFAULT_OUT    = os.path.join(".bench", "analytics.jsonl")
+DEFAULT_SCALES = (1, 10, 100)
+
+
+def _pendencies(d):
+    return build_revision_pendencies(json.loads(pendency_log_json(d["log"])), d["profile"])
+
+
+def _dashboard_pdf(d):
+    from modules.pdf_report import render_dashboard_pdf
+    kpi = compute_dashboard_kpis(d["log"], d["tst"], d["rev_sess"], d["profile"], d["days_left"])
+    return render_dashboard_pdf(
+        d["log"], d["tst"], d["rev"], d["rev_sess"], d["pend"], d["profile"],
+        days_left=d["days_left"], exam_date=d["exam_date"],
+        total_reading_hrs=kpi["total_reading_hrs"], total_rev_hrs=kpi["total_rev_hrs"],
+        avg_score=kpi["avg_score"], days_studied=kpi["days_studied"], dpd=kpi["dpd"],
+        **compute_report_analytics(d["log"], d["rev"], d["rev_sess"], d["pend"],
+                                   d["profile"], d["days_left"], d["exam_date"]),
+    )
+
+
+CASES = {
+    "revision_pendencies": _pendencies,
+    "air_index":       lambda d: compute_air_index(d["log"], d["rev"], d["rev_sess"], d["pend"], d["profile"]),
+    "rpi":             lambda d: compute_rpi(d["log"], d["rev"], d["rev_sess"], d["pend"], d["profile"],
+                                             exam_date=d["exam_date"]),
+    "exam_projection": lambda d: compute_exam_projection(d["log"], d["rev"], d["profile"], d["days_left"]),
+    "stress_index":    lambda d: compute_stress_index(d["pend"], d["log"],
+                                                      int(d["profile"].get("daily_rev_cap", 5))),
+    "achievements":    lambda d: compute_achievements(d["log"], d["rev"], d["rev_sess"], d["tst"]),
+    "dashboard_pdf":   _dashboard_pdf,
+}
+
+
+def prepare(scale: float, years: float, seed: int) -> dict:
+    d = synth_user(scale=scale, years=years, seed=seed)
+    d["exam_date"] = exam_date_from_profile(d["profile"])
+    d["days_left"] = max((d["exam_date"] - date.today()).days, 0)
+    d["pend"]      = _pendencies(d)
+    return d
+
+
+def time_case(fn, data: dict, repeat: int) -> dict:
+    """One warm-up call, then `repeat` timed calls (ms)."""
+    fn(data)
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(data)
+        runs.append((time.perf_counter() - t0) * 1000)
+    return {"median_ms": round(statistics.median(runs), 3), "min_ms": round(min(runs), 3),
+            "mean_ms": round(statistics.fmean(runs), 3), "max_ms": round(max(runs), 3),
+            "repeat": repeat}
+
+
+def run(scales=DEFAULT_SCALES, repeat: int = 5, years: float = 2.0, seed: int = 0,
+        only=None, skip=(), log=print) -> dict:
+    cases = {k: v for k, v in CASES.items() if (not only or k in only) and k not in skip}
+    result = {"scales": {}}
+    for scale in scales:
+        t0 = time.perf_counter()
+        data = prepare(scale, years, seed)
+        gen_ms = (time.perf_counter() - t0) * 1000
+        entry = {"rows": dataset_shape(data), "generate_ms": round(gen_ms, 1), "cases": {}}
+        log(f"── {scale}x  {entry['rows']}  (generated in {gen_ms:.0f} ms)")
+        for name, fn in cases.items():
+            # the PDF is seconds at 100x — cap its repeats so a run stays short
+            n = min(repeat, 3) if name == "dashboard_pdf" else repeat
+            entry["cases"][name] = time_case(fn, data, n)
+            log(f"   {name:<20} {entry['cases'][name]['median_ms']:>10.2f} ms  (median of {n})")
+        result["scales"][str(scale)] = entry
+    return result
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# STORED RESULTS
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, timeout=5).stdout.strip()
+    except Exception:
+        return ""
+
+
+def store(result: dict, path: str, args: dict) -> dict:
+    record = {
+        "at":       datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git":      _git_rev(),
+        "python":   platform.python_version(),
+        "machine":  f"{platform.system()} {platform.machine()}",
+        "args":     args,
+        **result,
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+    return record
+
+
+def load_runs(path: str) -> list[dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare(old: dict, new: dict) -> list[str]:
+    """Median change per scale/case: '10x rpi  12.40 → 9.81 ms  (-20.9%)'."""
+    lines = []
+    for scale, entry in new["scales"].items():
+        prev = old.get("scales", {}).get(scale, {}).get("cases", {})
+        for name, cur in entry["cases"].items():
+            if name not in prev:
+                continue
+            a, b = prev[name]["median_ms"], cur["median_ms"]
+            pct = (b - a) / a * 100 if a else 0.0
+            lines.append(f"{scale + 'x':>5} {name:<20} {a:>10.2f} → {b:>10.2f} ms  ({pct:+.1f}%)")
+    return lines
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark analytics + PDF on synthetic data.")
+    ap.add_argument("--scales", type=float, nargs="+", default=list(DEFAULT_SCALES))
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--years", type=float, default=2.0, help="history length per user (1–3)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--only", nargs="+", choices=list(CASES))
+    ap.add_argument("--skip", nargs="+", choices=list(CASES), default=[])
+    ap.add_argument("--out", default=DEFAULT_OUT, help="JSONL file results are appended to")
+    ap.add_argument("--compare", action="store_true", help="print the change vs the previous run")
+    ap.add_argument("--no-store", action="store_true")
+    args = ap.parse_args(argv)
+
+    scales = [int(s) if float(s).is_integer() else s for s in args.scales]
+    result = run(scales, args.repeat, args.years, args.seed, args.only, args.skip)
+    previous = load_runs(args.out)
+    if not args.no_store:
+        store(result, args.out, {k: v for k, v in vars(args).items() if k != "out"})
+        print(f"\nStored in {args.out}")
+    if args.compare:
+        if previous:
+            print(f"\nvs run of {previous[-1]['at']} ({previous[-1].get('git') or 'no git rev'}):")
+            print("\n".join(compare(previous[-1], result)) or "  no overlapping cases")
+        else:
+            print("\nNo previous run to compare against.")
+
+
+if __name__ == "__main__":
+    main()
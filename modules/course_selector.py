@@ -13,11 +13,13 @@ from modules.course_config import (
     LEGACY_COURSE_ID, LEGACY_CA_FINAL_LEVEL
 )
 from modules.level_progression import (
-    get_enrolled_courses, enroll_course, remove_course, pause_course,
+    get_enrolled_courses, enroll_course, remove_course, pause_course, resume_course,
     migrate_legacy_ca_final_user, get_level_history, clear_level_and_advance,
     get_active_course_for_session
 )
 from modules.subject_manager import fetch_subjects, fetch_topics
+from modules.app_config import get_config
+from modules.legacy_migration import LEGACY_DATA_TABLE, MIGRATION_CONFIG_KEY
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -241,13 +243,9 @@ def render_course_settings(user_id: str):
                             if ok: st.rerun()
                     else:
                         if st.button("▶️ Resume Course", key=f"resume_{cid}", use_container_width=True):
-                            from modules.level_progression import _sb as _lp_sb
-                            try:
-                                _lp_sb().table("user_courses").update({"status": "active"}) \
-                                    .eq("user_id", user_id).eq("course_id", cid).execute()
-                                st.rerun()
-                            except Exception as e:
-                                st.error(str(e))
+                            ok, msg = resume_course(user_id, cid)
+                            if ok: st.rerun()
+                            else:  st.error(msg)
                 with pc2:
                     if st.button("🗑 Remove Course", key=f"remove_{cid}", use_container_width=True,
                                  help="Frees up a slot. Your study data is preserved."):
@@ -347,17 +345,26 @@ def needs_course_setup(user_id: str) -> bool:
     return len(enrolled) == 0
 
 
+def legacy_migration_done() -> bool:
+    """True once the batch migration has recorded completion in app_config."""
+    try:
+        return bool(get_config(MIGRATION_CONFIG_KEY))
+    except Exception:
+        return False
+
+
 def ensure_legacy_migration(user_id: str):
     """
     For existing CA Final users — auto-enroll in ca/ca_final on first run.
-    Called right after login.
+    Called right after login. A no-op once `python -m modules.legacy_migration`
+    has enrolled everyone in bulk.
     """
-    if not needs_course_setup(user_id):
+    if legacy_migration_done() or not needs_course_setup(user_id):
         return
-    # Check if they have study data (study_log) — if yes, they're legacy CA Final users
+    # Check if they have study data — if yes, they're legacy CA Final users
     try:
         sb = st.session_state.get("_sb_admin")
-        rows = sb.table("study_log").select("id").eq("user_id", user_id).limit(1).execute()
+        rows = sb.table(LEGACY_DATA_TABLE).select("user_id").eq("user_id", user_id).limit(1).execute()
         if rows.data:
             # Legacy user — migrate silently
             migrate_legacy_ca_final_user(user_id)
@@ -0,0 +1,111 @@
+"""
+downsample.py — StudyTracker
+Bounded-size series for date-indexed Plotly charts.
+  - lttb()            Largest-Triangle-Three-Buckets for line/scatter traces
+  - minmax_indices()  min/max per bucket (keeps spikes, cheaper than LTTB)
+  - downsample_xy()   apply either to a DataFrame trace
+  - bucket_daily()    aggregate daily bars into day/week/month buckets
+Whatever the history length, a trace never ships more than max_points.
+"""
+
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+
+MAX_CHART_POINTS = 400   # per line/scatter trace
+MAX_CHART_BARS   = 120   # per bar trace (bars are wider than points)
+
+
+def _as_float(x) -> np.ndarray:
+    """Dates → epoch ns floats so triangle areas can be computed."""
+    arr = np.asarray(x)
+    if np.issubdtype(arr.dtype, np.datetime64):
+        return arr.astype("datetime64[ns]").astype(np.int64).astype(float)
+    if arr.dtype == object:
+        return pd.to_datetime(pd.Series(arr)).astype("int64").to_numpy(dtype=float)
+    return arr.astype(float)
+
+
+def lttb(x, y, n_out: int) -> np.ndarray:
+    """
+    Indices of the n_out points LTTB keeps from (x, y), x sorted ascending.
+    First and last points are always kept.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    xf = _as_float(x)
+    yf = np.asarray(y, dtype=float)
+
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)   # n_out−2 middle buckets
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # average of the *next* bucket (or the last point)
+        nlo, nhi = edges[i + 1], (edges[i + 2] if i + 2 < len(edges) else n)
+        avg_x = xf[nlo:nhi].mean() if nhi > nlo else xf[-1]
+        avg_y = yf[nlo:nhi].mean() if nhi > nlo else yf[-1]
+        bx, by = xf[lo:hi], yf[lo:hi]
+        area = np.abs((xf[a] - avg_x) * (by - yf[a]) - (xf[a] - bx) * (avg_y - yf[a]))
+        a = lo + int(area.argmax()) if len(area) else lo
+        idx[i + 1] = a
+    return idx
+
+
+def minmax_indices(y, n_out: int) -> np.ndarray:
+    """Indices of the min and max of each equal bucket (+ endpoints), ≤ n_out total."""
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+    yf = np.asarray(y, dtype=float)
+    keep = {0, n - 1}
+    for chunk in np.array_split(np.arange(n), max((n_out - 2) // 2, 1)):
+        if len(chunk):
+            keep.add(int(chunk[yf[chunk].argmin()]))
+            keep.add(int(chunk[yf[chunk].argmax()]))
+    return np.array(sorted(keep))
+
+
+def downsample_xy(df: pd.DataFrame, x_col: str, y_col: str,
+                  max_points: int = MAX_CHART_POINTS, method: str = "lttb") -> pd.DataFrame:
+    """Rows of df (sorted by x_col) reduced to ≤ max_points for plotting."""
+    if len(df) <= max_points:
+        return df
+    df = df.sort_values(x_col)
+    if method == "minmax":
+        keep = minmax_indices(df[y_col].to_numpy(), max_points)
+    else:
+        keep = lttb(df[x_col].to_numpy(), df[y_col].to_numpy(), max_points)
+    return df.iloc[keep]
+
+
+def bucket_daily(df: pd.DataFrame, date_col: str, value_col: str, group_col: str = None,
+                 max_bars: int = MAX_CHART_BARS) -> tuple[pd.DataFrame, str]:
+    """
+    Sum value_col per (bucket, group) where the bucket is the smallest of
+    day / week / month that keeps ≤ max_bars buckets. Values are returned as
+    an average per calendar day of the bucket, so daily targets stay comparable.
+    Returns (frame[Date, group_col?, value_col], bucket_label).
+    """
+    if df.empty:
+        return df, "day"
+    d = pd.to_datetime(df[date_col]).dt.normalize()
+    span = (d.max() - d.min()).days + 1
+    if span <= max_bars:
+        period, label, days = "D", "day", 1
+    elif span / 7 <= max_bars:
+        period, label, days = "W-SUN", "week", 7      # Mon–Sun weeks
+    else:
+        period, label, days = "M", "month", None
+
+    keys = [d.dt.to_period(period).dt.start_time.rename("Date")]
+    if group_col:
+        keys.append(df[group_col])
+    out = df.groupby(keys)[value_col].sum().reset_index()
+    if days is None:
+        out[value_col] = out[value_col] / out["Date"].dt.days_in_month
+    elif days > 1:
+        out[value_col] = out[value_col] / days
+    return out, label
@@ -0,0 +1,159 @@
+"""
+entitlements.py — StudyTracker
+Subscription / plan entitlements derived from the approved_emails row.
+  - parse_subscription / resolve_entitlement: pure, usable from batch jobs
+  - get_entitlement: one approved_emails read per user, session-cached
+    with a short TTL; invalidate_entitlement() on approve / revoke
+"""
+
+from __future__ import annotations
+import time
+from datetime import date
+import streamlit as st
+
+
+def parse_subscription(row: dict) -> dict:
+    """
+    Parse plan_key, plan_start, plan_end, is_lifetime from the approved_emails row.
+    Stores dates in columns plan_start (DATE) and plan_end (DATE | NULL for lifetime).
+    Falls back to parsing legacy note field if columns missing.
+    Returns dict with keys: plan_key, plan_start, plan_end, is_lifetime, days_remaining, active
+    """
+    from datetime import datetime as _dt
+    plan_key   = (row.get("plan_key") or "").strip().lower()
+    plan_start = row.get("plan_start") or ""
+    plan_end   = row.get("plan_end")   or None
+
+    # Legacy fallback: parse note field
+    if not plan_key:
+        note = (row.get("note") or "").lower()
+        for k in ("life", "lifetime", "1yr", "3mo"):
+            if k in note:
+                plan_key = "life" if k in ("life","lifetime") else k
+                break
+
+    is_lifetime = plan_key in ("life", "lifetime")
+
+    # Parse plan_end date
+    end_dt = None
+    if plan_end and not is_lifetime:
+        try:
+            end_dt = _dt.fromisoformat(str(plan_end)[:10]).date()
+        except Exception:
+            pass
+
+    today = date.today()
+    if is_lifetime:
+        active        = bool(plan_key)
+        days_remaining = 99999
+    elif end_dt:
+        active        = today <= end_dt
+        days_remaining = max(0, (end_dt - today).days)
+    else:
+        # No expiry date stored — treat as active if plan_key present (legacy)
+        active        = bool(plan_key)
+        days_remaining = 0
+
+    return {
+        "plan_key":      plan_key,
+        "plan_start":    str(plan_start)[:10] if plan_start else "",
+        "plan_end":      str(end_dt) if end_dt else ("∞" if is_lifetime else ""),
+        "is_lifetime":   is_lifetime,
+        "days_remaining": days_remaining,
+        "active":        active,
+    }
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# ENTITLEMENT RESOLVER — one approved_emails read per user per TTL
+# ══════════════════════════════════════════════════════════════════════════════
+ENTITLEMENT_TTL = 60   # seconds a resolved entitlement is reused in a session
+
+
+def _sb():
+    """Return sb_admin from Streamlit session — injected at app startup."""
+    return st.session_state.get("_sb_admin")
+
+
+def _days_since(approved_at) -> int:
+    """Days since the approved_at date (trial start); 0 if missing/unparseable."""
+    if not approved_at:
+        return 0
+    try:
+        return (date.today() - date.fromisoformat(str(approved_at)[:10])).days
+    except Exception:
+        return 0
+
+
+def resolve_entitlement(row: dict, email: str, trial_days: int, admin_email: str = "") -> dict:
+    """
+    Derive every access fact from a single approved_emails row (or {} if none).
+    Returns dict: email, row, approved, is_admin, days_since_signup, in_trial,
+                  trial_days_left, sub, has_plan, can_access
+    """
+    email_clean = email.strip().lower()
+    is_admin    = bool(admin_email) and email_clean == admin_email
+    days_since  = _days_since(row.get("approved_at")) if row else 0
+    sub         = parse_subscription(row) if row else {}
+    approved    = is_admin or (row.get("status") == "approved" if row else False)
+    in_trial    = days_since < trial_days
+    has_plan    = bool(sub.get("active", False))
+    return {
+        "email":             email_clean,
+        "row":               row,
+        "approved":          approved,
+        "is_admin":          is_admin,
+        "days_since_signup": days_since,
+        "in_trial":          in_trial,
+        "trial_days_left":   max(0, trial_days - days_since),
+        "sub":               sub,
+        "has_plan":          has_plan,
+        "can_access":        in_trial or (approved and has_plan),
+    }
+
+
+@st.cache_resource
+def _entitlement_versions() -> dict:
+    """
+    Process-wide invalidation counters: email → version, plus "*" for all.
+    Admin actions run in the admin's session, so a per-session pop alone
+    would never reach the affected user's session — the version bump does.
+    """
+    return {"*": 0}
+
+
+def invalidate_entitlement(email: str = None):
+    """Drop cached entitlements for one email (or everyone if email is None)."""
+    versions = _entitlement_versions()
+    k = email.strip().lower() if email else "*"
+    versions[k] = versions.get(k, 0) + 1
+    if email is None:
+        st.session_state.pop("_entitlements", None)
+    else:
+        st.session_state.get("_entitlements", {}).pop(k, None)
+
+
+def get_entitlement(email: str, trial_days: int, admin_email: str = "") -> dict:
+    """
+    Session-cached entitlement for email. Hits approved_emails at most once
+    per ENTITLEMENT_TTL, or sooner after invalidate_entitlement().
+    On DB error the row is treated as missing (same as the old lookups).
+    """
+    email_clean = email.strip().lower()
+    versions    = _entitlement_versions()
+    ver         = (versions.get("*", 0), versions.get(email_clean, 0), trial_days)
+    cache       = st.session_state.setdefault("_entitlements", {})
+    hit         = cache.get(email_clean)
+    if hit and hit["ver"] == ver and time.time() - hit["at"] < ENTITLEMENT_TTL:
+        return hit["ent"]
+
+    row = {}
+    try:
+        res = _sb().table("approved_emails").select("*").eq("email", email_clean).execute()
+        if res.data:
+            row = res.data[0]
+    except Exception:
+        pass
+    ent = resolve_entitlement(row, email_clean, trial_days, admin_email)
+    cache[email_clean] = {"ent": ent, "ver": ver, "at": time.time()}
+    return ent
@@ -0,0 +1,120 @@
+"""
+legacy_migration.py — StudyTracker
+One-shot enrollment of pre-course-module CA Final users into ca/ca_final.
+
+    python -m modules.legacy_migration [--dry-run]
+
+  - finds every user with study data but no user_courses row in one query
+  - enrolls them all with one bulk insert (server function when available)
+  - records completion in app_config['legacy_migration'] so the per-login
+    probe in course_selector.ensure_legacy_migration is skipped entirely
+"""
+
+from __future__ import annotations
+import argparse
+import json
+from datetime import date, datetime, timezone
+
+from modules.course_config import LEGACY_COURSE_ID, LEGACY_CA_FINAL_LEVEL
+
+LEGACY_DATA_TABLE = "daily_log"         # where pre-upgrade users have study rows
+MIGRATION_CONFIG_KEY = "legacy_migration"
+_PAGE  = 1000
+_CHUNK = 500
+
+# ── Schema (run once in Supabase SQL editor) ──────────────────────────────────
+LEGACY_MIGRATION_SQL = """
+create or replace function migrate_legacy_ca_final_users(p_dry_run boolean default false)
+returns table (migrated_user_id uuid)
+language plpgsql security definer as $$
+begin
+  if p_dry_run then
+    return query
+      select distinct d.user_id from daily_log d
+      where not exists (select 1 from user_courses uc where uc.user_id = d.user_id);
+  else
+    return query
+      insert into user_courses (user_id, course_id, current_level, status, enrolled_at, custom_name, slot)
+      select distinct d.user_id, 'ca', 'ca_final', 'active', current_date, '', 1
+      from daily_log d
+      where not exists (select 1 from user_courses uc where uc.user_id = d.user_id)
+      on conflict do nothing
+      returning user_courses.user_id;
+  end if;
+end $$;
+
+revoke all on function migrate_legacy_ca_final_users(boolean) from anon, authenticated;
+"""
+
+
+def _distinct_user_ids(sb, table: str) -> set:
+    """user_id of every row in table, paged (fallback path only)."""
+    ids, start = set(), 0
+    while True:
+        batch = sb.table(table).select("user_id").order("user_id") \
+                  .range(start, start + _PAGE - 1).execute().data or []
+        ids.update(r["user_id"] for r in batch)
+        if len(batch) < _PAGE:
+            return ids
+        start += _PAGE
+
+
+def _rpc_missing(e: Exception) -> bool:
+    """True when LEGACY_MIGRATION_SQL has not been run on this database."""
+    msg = str(e)
+    return "PGRST202" in msg or "Could not find the function" in msg
+
+
+def find_and_enroll(sb, dry_run: bool = False) -> list[str]:
+    """Enroll every legacy user; returns the affected user ids."""
+    try:
+        res = sb.rpc("migrate_legacy_ca_final_users", {"p_dry_run": dry_run}).execute()
+        return [r["migrated_user_id"] for r in (res.data or [])]
+    except Exception as e:
+        if not _rpc_missing(e):
+            raise
+    pending = sorted(_distinct_user_ids(sb, LEGACY_DATA_TABLE) - _distinct_user_ids(sb, "user_courses"))
+    if dry_run:
+        return pending
+    today = date.today().isoformat()
+    for i in range(0, len(pending), _CHUNK):
+        sb.table("user_courses").upsert([{
+            "user_id":       uid,
+            "course_id":     LEGACY_COURSE_ID,
+            "current_level": LEGACY_CA_FINAL_LEVEL,
+            "status":        "active",
+            "enrolled_at":   today,
+            "custom_name":   "",
+            "slot":          1,
+        } for uid in pending[i:i + _CHUNK]], on_conflict="user_id,course_id", ignore_duplicates=True).execute()
+    return pending
+
+
+def record_completion(sb, migrated: int):
+    """Mark the migration done for every app process (versioned app_config row)."""
+    value = json.dumps({"done_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                        "migrated": migrated})
+    existing = sb.table("app_config").select("key").eq("key", MIGRATION_CONFIG_KEY).execute()
+    if existing.data:
+        sb.table("app_config").update({"value": value}).eq("key", MIGRATION_CONFIG_KEY).execute()
+    else:
+        sb.table("app_config").insert({"key": MIGRATION_CONFIG_KEY, "value": value}).execute()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Enroll legacy CA Final users in ca/ca_final.")
+    ap.add_argument("--dry-run", action="store_true", help="list users without writing")
+    args = ap.parse_args(argv)
+
+    from modules.weekly_digest import _admin_client
+    sb  = _admin_client()
+    ids = find_and_enroll(sb, dry_run=args.dry_run)
+    if args.dry_run:
+        print(f"{len(ids)} legacy user(s) would be enrolled in {LEGACY_COURSE_ID}/{LEGACY_CA_FINAL_LEVEL}")
+        return
+    record_completion(sb, len(ids))
+    print(f"Enrolled {len(ids)} legacy user(s); per-login migration check disabled.")
+
+
+if __name__ == "__main__":
+    main()
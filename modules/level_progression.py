@@ -5,12 +5,15 @@ Handles:
   - Level progression: clear → freeze → advance
   - Level history snapshots
   - Active course/level resolution
+Enrolled courses are cached in session_state per user and dropped by every
+enrollment write, so a normal rerun makes no user_courses queries.
 """
 
 from __future__ import annotations
 from datetime import date, datetime
 import json
 import streamlit as st
+from modules.subject_manager import invalidate_subject_tree
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -95,13 +98,76 @@ CREATE POLICY user_subjects_own  ON user_subjects  FOR ALL USING (auth.uid() = u
 CREATE POLICY user_topics_own    ON user_topics    FOR ALL USING (auth.uid() = user_id);
 """
 
+# Level promotion as one transaction (run once after MIGRATION_SQL).
+# Contract: returns 'advanced' or 'completed'; any failure rolls back every write.
+LEVEL_RPC_SQL = """
+CREATE OR REPLACE FUNCTION clear_level_and_advance(
+    p_user_id    UUID,
+    p_course_id  TEXT,
+    p_level_key  TEXT,
+    p_next_level TEXT,
+    p_notes      TEXT DEFAULT ''
+) RETURNS TEXT
+LANGUAGE plpgsql SECURITY DEFINER
+SET search_path = public, pg_temp AS $$
+BEGIN
+    INSERT INTO level_history (user_id, course_id, level_key, cleared_at, cleared, notes)
+    VALUES (p_user_id, p_course_id, p_level_key, CURRENT_DATE, TRUE, p_notes)
+    ON CONFLICT (user_id, course_id, level_key)
+    DO UPDATE SET cleared_at = EXCLUDED.cleared_at, cleared = TRUE, notes = EXCLUDED.notes;
+
+    UPDATE user_subjects SET frozen = TRUE
+     WHERE user_id = p_user_id AND course_id = p_course_id AND level_key = p_level_key;
+    UPDATE user_topics   SET frozen = TRUE
+     WHERE user_id = p_user_id AND course_id = p_course_id AND level_key = p_level_key;
+
+    IF p_next_level IS NOT NULL THEN
+        UPDATE user_courses SET current_level = p_next_level, status = 'active'
+         WHERE user_id = p_user_id AND course_id = p_course_id;
+        IF NOT FOUND THEN
+            RAISE EXCEPTION 'not enrolled in course %', p_course_id;
+        END IF;
+        RETURN 'advanced';
+    END IF;
+
+    UPDATE user_courses SET status = 'completed', completed_at = CURRENT_DATE
+     WHERE user_id = p_user_id AND course_id = p_course_id;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'not enrolled in course %', p_course_id;
+    END IF;
+    RETURN 'completed';
+END $$;
+
+REVOKE ALL ON FUNCTION clear_level_and_advance(UUID, TEXT, TEXT, TEXT, TEXT) FROM anon, authenticated;
+"""
+
 
 # ══════════════════════════════════════════════════════════════════════════════
 # ENROLLMENT
 # ══════════════════════════════════════════════════════════════════════════════
 
+_ENROLL_CACHE = "_enrolled_courses"   # session_state key: {user_id: rows}
+
+
+def invalidate_enrollment(user_id: str = None):
+    """Forget the cached enrollment rows for user_id (or every user in this session)."""
+    cache = st.session_state.get(_ENROLL_CACHE)
+    if cache is None:
+        return
+    if user_id is None:
+        cache.clear()
+    else:
+        cache.pop(user_id, None)
+
+
 def get_enrolled_courses(user_id: str) -> list[dict]:
-    """Return list of active/paused user_courses rows, ordered by slot."""
+    """
+    Return list of active/paused user_courses rows, ordered by slot.
+    Cached in session_state; failed reads are not cached.
+    """
+    cache = st.session_state.setdefault(_ENROLL_CACHE, {})
+    if user_id in cache:
+        return list(cache[user_id])
     try:
         rows = _sb().table("user_courses") \
             .select("*") \
@@ -109,7 +175,8 @@ def get_enrolled_courses(user_id: str) -> list[dict]:
             .in_("status", ["active", "paused"]) \
             .order("slot") \
             .execute()
-        return rows.data or []
+        cache[user_id] = rows.data or []
+        return list(cache[user_id])
     except Exception:
         return []
 
@@ -150,6 +217,7 @@ def enroll_course(user_id: str, course_id: str, start_level_key: str,
             "custom_name":   custom_name or "",
             "slot":          slot,
         }).execute()
+        invalidate_enrollment(user_id)
         return True, "Enrolled successfully!"
     except Exception as e:
         return False, f"Enrollment failed: {e}"
@@ -159,16 +227,28 @@ def pause_course(user_id: str, course_id: str) -> tuple[bool, str]:
     try:
         _sb().table("user_courses").update({"status": "paused"}) \
             .eq("user_id", user_id).eq("course_id", course_id).execute()
+        invalidate_enrollment(user_id)
         return True, "Course paused."
     except Exception as e:
         return False, str(e)
 
 
+def resume_course(user_id: str, course_id: str) -> tuple[bool, str]:
+    try:
+        _sb().table("user_courses").update({"status": "active"}) \
+            .eq("user_id", user_id).eq("course_id", course_id).execute()
+        invalidate_enrollment(user_id)
+        return True, "Course resumed."
+    except Exception as e:
+        return False, str(e)
+
+
 def remove_course(user_id: str, course_id: str) -> tuple[bool, str]:
     """Remove a course enrollment (frees up a slot)."""
     try:
         _sb().table("user_courses").delete() \
             .eq("user_id", user_id).eq("course_id", course_id).execute()
+        invalidate_enrollment(user_id)
         return True, "Course removed."
     except Exception as e:
         return False, str(e)
@@ -197,50 +277,83 @@ def is_level_cleared(user_id: str, course_id: str, level_key: str) -> bool:
     return any(h["level_key"] == level_key and h.get("cleared") for h in history)
 
 
+def _rpc_missing(e: Exception) -> bool:
+    """True when the server function has not been created yet (LEVEL_RPC_SQL)."""
+    msg = str(e)
+    return "PGRST202" in msg or "Could not find the function" in msg
+
+
+def _clear_level_stepwise(user_id: str, course_id: str, current_level_key: str,
+                          next_level_key: str | None, notes: str) -> str:
+    """Pre-migration fallback: the same writes as separate requests (not atomic)."""
+    # 1. Record level clear in history
+    _sb().table("level_history").upsert({
+        "user_id":    user_id,
+        "course_id":  course_id,
+        "level_key":  current_level_key,
+        "cleared_at": date.today().isoformat(),
+        "cleared":    True,
+        "notes":      notes,
+    }, on_conflict="user_id,course_id,level_key").execute()
+
+    # 2. Freeze all subjects & topics for this level
+    _sb().table("user_subjects").update({"frozen": True}) \
+        .eq("user_id", user_id) \
+        .eq("course_id", course_id) \
+        .eq("level_key", current_level_key).execute()
+    _sb().table("user_topics").update({"frozen": True}) \
+        .eq("user_id", user_id) \
+        .eq("course_id", course_id) \
+        .eq("level_key", current_level_key).execute()
+
+    # 3. Advance or mark complete
+    if next_level_key:
+        _sb().table("user_courses").update({
+            "current_level": next_level_key,
+            "status": "active",
+        }).eq("user_id", user_id).eq("course_id", course_id).execute()
+        return "advanced"
+    _sb().table("user_courses").update({
+        "status":       "completed",
+        "completed_at": date.today().isoformat(),
+    }).eq("user_id", user_id).eq("course_id", course_id).execute()
+    return "completed"
+
+
 def clear_level_and_advance(user_id: str, course_id: str,
                              current_level_key: str, next_level_key: str | None,
                              notes: str = "") -> tuple[bool, str]:
     """
     Mark current level as cleared (freeze data), advance to next level.
     If next_level_key is None → course is complete.
+    One round trip: the clear_level_and_advance() server function does all
+    writes in a single transaction — it fully commits or fully rolls back.
     """
+    params = {
+        "p_user_id":    user_id,
+        "p_course_id":  course_id,
+        "p_level_key":  current_level_key,
+        "p_next_level": next_level_key,
+        "p_notes":      notes or "",
+    }
     try:
-        # 1. Record level clear in history
-        _sb().table("level_history").upsert({
-            "user_id":    user_id,
-            "course_id":  course_id,
-            "level_key":  current_level_key,
-            "cleared_at": date.today().isoformat(),
-            "cleared":    True,
-            "notes":      notes,
-        }, on_conflict="user_id,course_id,level_key").execute()
-
-        # 2. Freeze all subjects & topics for this level
-        _sb().table("user_subjects").update({"frozen": True}) \
-            .eq("user_id", user_id) \
-            .eq("course_id", course_id) \
-            .eq("level_key", current_level_key).execute()
-        _sb().table("user_topics").update({"frozen": True}) \
-            .eq("user_id", user_id) \
-            .eq("course_id", course_id) \
-            .eq("level_key", current_level_key).execute()
-
-        # 3. Advance or mark complete
-        if next_level_key:
-            _sb().table("user_courses").update({
-                "current_level": next_level_key,
-                "status": "active",
-            }).eq("user_id", user_id).eq("course_id", course_id).execute()
-            return True, f"Level cleared and frozen! ✅ Advanced to next level."
-        else:
-            _sb().table("user_courses").update({
-                "status":       "completed",
-                "completed_at": date.today().isoformat(),
-            }).eq("user_id", user_id).eq("course_id", course_id).execute()
-            return True, "🎉 Congratulations! Course completed!"
-
+        try:
+            res    = _sb().rpc("clear_level_and_advance", params).execute()
+            result = res.data
+        except Exception as e:
+            if not _rpc_missing(e):
+                raise
+            result = _clear_level_stepwise(user_id, course_id, current_level_key,
+                                           next_level_key, notes)
     except Exception as e:
         return False, f"Error: {e}"
+    finally:
+        invalidate_enrollment(user_id)
+        invalidate_subject_tree(user_id, course_id, current_level_key)
+
+    if result == "completed":
+        return True, "🎉 Congratulations! Course completed!"
+    return True, "Level cleared and frozen! ✅ Advanced to next level."
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -0,0 +1,420 @@
+"""
+loadtest.py — StudyTracker
+Concurrent-session load test of the real app script on the local backend:
+
+    python -m modules.loadtest --sessions 20 --concurrency 5
+    python -m modules.loadtest --sessions 8 --scale 10 --no-pdf --out .bench/loadtest.jsonl
+
+  - seeds N synthetic students into a fresh local_db file (BACKEND=local)
+  - drives each one through Streamlit's AppTest in a pool of --concurrency
+    worker processes: login → dashboard → log session → revision →
+    add score → PDF export
+  - reports throughput of clean flows, per-step latency percentiles of
+    clean steps, failures (separately), memory per session,
+    st.cache_data / st.cache_resource hit rates, DB queries per rerun and
+    the app's own phase timings (modules.timing); exits 1 if any step failed
+
+AppTest compiles and runs the script in the calling process and is not safe
+to drive from several threads at once, so each worker is its own process
+(warmed up once, then one session at a time) sharing the SQLite file — like
+several single-user Streamlit processes on one database. Tab switches don't
+rerun a Streamlit app, so "dashboard" and "revision" are the reruns a user
+triggers there (refresh / a filter).
+"""
+
+from __future__ import annotations
+import argparse
+import functools
+import json
+import os
+import multiprocessing
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timezone
+
+APP_PATH     = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            "streamlit_app.py")
+DEFAULT_DB   = os.path.join(".bench", "loadtest.db")
+PASSWORD     = "loadtest-pass"
+STEP_TIMEOUT = 120      # seconds per AppTest run
+PDF_TIMEOUT  = 180      # seconds to wait for a background PDF
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# CACHE HIT COUNTERS — wrap st.cache_data / st.cache_resource before the app loads
+# ══════════════════════════════════════════════════════════════════════════════
+
+_CACHE_LOCK  = threading.Lock()
+CACHE_STATS: dict = {}      # "kind:qualname" → {"calls": n, "misses": n}
+
+
+def _bump(key: str, field: str):
+    with _CACHE_LOCK:
+        s = CACHE_STATS.setdefault(key, {"calls": 0, "misses": 0})
+        s[field] += 1
+
+
+class _CountingCache:
+    """Stands in for st.cache_data / st.cache_resource: same API, counts calls + misses."""
+
+    def __init__(self, api, kind: str):
+        self._api, self._kind = api, kind
+
+    def _wrap(self, fn, **kwargs):
+        key = f"{self._kind}:{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def body(*args, **kw):
+            _bump(key, "misses")             # only runs when the cache misses
+            return fn(*args, **kw)
+
+        cached = self._api(body, **kwargs) if kwargs else self._api(body)
+
+        @functools.wraps(fn)
+        def outer(*args, **kw):
+            _bump(key, "calls")
+            return cached(*args, **kw)
+
+        outer.clear = cached.clear
+        return outer
+
+    def __call__(self, func=None, **kwargs):
+        if func is None:
+            return lambda f: self._wrap(f, **kwargs)
+        return self._wrap(func, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._api, name)
+
+
+def install_cache_counters():
+    import streamlit as st
+    if not isinstance(st.cache_data, _CountingCache):
+        st.cache_data     = _CountingCache(st.cache_data, "data")
+        st.cache_resource = _CountingCache(st.cache_resource, "resource")
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# SEEDING
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _email(i: int) -> str:
+    return f"load{i:04d}@example.com"
+
+
+def seed_users(db_path: str, n: int, scale: float, years: float) -> list[str]:
+    """N approved, enrolled students with synthetic history; returns their emails."""
+    from modules.local_db import create_local_client
+    from modules.synthetic import synth_user, default_profile
+    from modules.course_config import LEGACY_COURSE_ID, LEGACY_CA_FINAL_LEVEL
+
+    sb = create_local_client(db_path)
+    sb.table("app_config").upsert({"key": "legacy_migration",
+                                   "value": json.dumps({"done_at": "loadtest"})}).execute()
+    emails = []
+    for i in range(n):
+        email = _email(i)
+        uid = sb.auth.sign_up({"email": email, "password": PASSWORD}).user.id
+        sb.table("profiles").upsert({**default_profile(uid, f"load{i:04d}"), "email": email}).execute()
+        sb.table("approved_emails").upsert({
+            "email": email, "status": "approved", "approved_at": date.today().isoformat(),
+            "plan_key": "life", "plan_start": date.today().isoformat(), "plan_end": None,
+            "note": "loadtest",
+        }, on_conflict="email").execute()
+        sb.table("user_courses").insert({
+            "user_id": uid, "course_id": LEGACY_COURSE_ID,
+            "current_level": LEGACY_CA_FINAL_LEVEL, "status": "active", "slot": 1,
+        }).execute()
+        data = synth_user(scale=scale, years=years, seed=i, user_id=uid)
+        for table, rows in data["rows"].items():
+            if rows:
+                sb.table(table).insert([{**r, "user_id": uid} for r in rows]).execute()
+        emails.append(email)
+    return emails
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# ONE SIMULATED SESSION
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _widget(at, kind: str, key: str):
+    try:
+        return getattr(at, kind)(key=key)
+    except KeyError:
+        return None
+
+
+def _step(at, steps: list, name: str, fn):
+    t0 = time.perf_counter()
+    error = ""
+    try:
+        fn()
+        if at.exception:
+            error = at.exception[0].value.splitlines()[0][:200]
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"[:200]
+    steps.append({"step": name, "ms": (time.perf_counter() - t0) * 1000, "error": error})
+    return not error
+
+
+def run_session(email: str, with_pdf: bool = True) -> dict:
+    from streamlit.testing.v1 import AppTest
+    from modules.pdf_jobs import get_pdf_job
+
+    at = AppTest.from_file(APP_PATH, default_timeout=STEP_TIMEOUT)
+    steps: list = []
+    t0 = time.perf_counter()
+
+    def login():
+        at.run()
+        _widget(at, "text_input", "login_email").input(email)
+        _widget(at, "text_input", "login_password").input(PASSWORD)
+        _widget(at, "button", "login_submit").click()
+        at.run()
+        if not at.session_state["logged_in"]:
+            raise RuntimeError("login failed")
+
+    def dashboard():
+        at.run()                                         # refresh / revisit
+
+    def log_session():
+        topic = _widget(at, "selectbox", f"log_topic_{at.session_state['log_subj']}")
+        if topic is not None:                            # late-syllabus topic → still being read
+            topic.select(topic.options[-1])
+            at.run()
+        hours = _widget(at, "number_input", "log_hours")
+        if hours is not None:
+            hours.set_value(1.5)
+        _widget(at, "button", "log_save").click()
+        at.run()
+
+    def revision():
+        sel = _widget(at, "selectbox", "hist_subj_v2") or _widget(at, "selectbox", "rev_donut_filter")
+        if sel is not None and len(sel.options) > 1:
+            sel.select(sel.options[-1])
+        at.run()
+
+    def add_score():
+        _widget(at, "number_input", "score_marks").set_value(64)
+        _widget(at, "text_input", "score_name").input(f"Load mock {time.time():.0f}")
+        _widget(at, "button", "score_save").click()
+        at.run()
+
+    def pdf():
+        _widget(at, "button", "dash_pdf").click()
+        at.run()
+        job_id = at.session_state["dash_pdf_job"]
+        deadline = time.time() + PDF_TIMEOUT
+        while True:
+            job = get_pdf_job(job_id) or {}
+            if job.get("status") in ("done", "error"):
+                break
+            if time.time() > deadline:
+                raise TimeoutError("PDF job did not finish")
+            time.sleep(0.05)
+        if job["status"] == "error":
+            raise RuntimeError(job.get("error", "PDF failed"))
+        at.run()
+
+    flow = [("login", login), ("dashboard", dashboard), ("log_session", log_session),
+            ("revision", revision), ("add_score", add_score)]
+    if with_pdf:
+        flow.append(("pdf", pdf))
+    for name, fn in flow:
+        if not _step(at, steps, name, fn) and name == "login":
+            break
+    return {"email": email, "steps": steps, "ms": (time.perf_counter() - t0) * 1000, "app": at}
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# WORKER PROCESSES
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _init_worker(db_path: str):
+    """Point the app at the seeded database, count caches, compile + import it once."""
+    os.environ["STUDYTRACKER_BACKEND"] = "local"
+    os.environ["STUDYTRACKER_LOCAL_DB_PATH"] = db_path
+    install_cache_counters()
+    from streamlit.testing.v1 import AppTest
+    AppTest.from_file(APP_PATH, default_timeout=STEP_TIMEOUT).run()
+
+
+def _reset_worker_stats():
+    from modules.query_trace import _trace_state
+    from modules.timing import reset_spans
+    with _CACHE_LOCK:
+        CACHE_STATS.clear()
+    state = _trace_state()
+    with state["lock"]:
+        state["recent"].clear()
+    reset_spans()
+
+
+def _session_worker(email: str, with_pdf: bool) -> dict:
+    """One session in this worker; returns picklable results + this session's stats."""
+    from modules.query_trace import recent_runs
+    from modules.timing import phase_stats
+
+    _reset_worker_stats()
+    rss_before = _rss_mb()
+    started = time.time()
+    sess = run_session(email, with_pdf)
+    finished = time.time()
+    rss_after = _rss_mb()                  # AppTest still alive → session memory included
+    del sess["app"]
+    with _CACHE_LOCK:
+        caches = {k: dict(v) for k, v in CACHE_STATS.items()}
+    return {**sess, "started": started, "finished": finished, "pid": os.getpid(),
+            "rss_before": rss_before, "rss_after": rss_after, "caches": caches,
+            "queries_per_rerun": [r["queries"] for r in recent_runs()],
+            "phases": {k: v["samples"] for k, v in phase_stats(with_samples=True).items()}}
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# REPORT
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _rss_mb() -> float:
+    """Current resident set size (Linux /proc), else peak RSS from getrusage."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _pcts(values: list) -> dict:
+    if not values:
+        return {}
+    v = sorted(values)
+    q = statistics.quantiles(v, n=100, method="inclusive") if len(v) > 1 else v * 99
+    return {"n": len(v), "p50": round(q[49], 1), "p95": round(q[94], 1),
+            "p99": round(q[98], 1), "max": round(v[-1], 1)}
+
+
+def build_report(sessions: list, args: dict) -> dict:
+    """Latency / throughput from clean steps and flows only; failures reported apart."""
+    clean = [s for sess in sessions for s in sess["steps"] if not s["error"]]
+    ok_sessions = [sess for sess in sessions if not any(s["error"] for s in sess["steps"])]
+    by_step: dict = {}
+    for s in clean:
+        by_step.setdefault(s["step"], []).append(s["ms"])
+    errors = [dict(session=sess["email"], **s) for sess in sessions for s in sess["steps"] if s["error"]]
+    failed_steps: dict = {}
+    for e in errors:
+        failed_steps[e["step"]] = failed_steps.get(e["step"], 0) + 1
+    wall_s = (max(sess["finished"] for sess in sessions) - min(sess["started"] for sess in sessions)
+              if sessions else 0.0) or 1e-9
+
+    merged: dict = {}
+    for sess in sessions:
+        for k, v in sess["caches"].items():
+            m = merged.setdefault(k, {"calls": 0, "misses": 0})
+            m["calls"] += v["calls"]
+            m["misses"] += v["misses"]
+    caches = {k: {**v, "hit_rate": round(1 - v["misses"] / v["calls"], 3) if v["calls"] else None}
+              for k, v in sorted(merged.items())}
+    data_calls  = sum(v["calls"] for k, v in caches.items() if k.startswith("data:"))
+    data_misses = sum(v["misses"] for k, v in caches.items() if k.startswith("data:"))
+
+    phases: dict = {}
+    for sess in sessions:
+        for k, samples in sess["phases"].items():
+            phases.setdefault(k, []).extend(samples)
+    deltas = [sess["rss_after"] - sess["rss_before"] for sess in sessions]
+    return {
+        "at":          datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "args":        args,
+        "sessions":    len(sessions),
+        "flows_ok":    len(ok_sessions),
+        "wall_s":      round(wall_s, 2),
+        "throughput":  {"flows_per_s": round(len(ok_sessions) / wall_s, 3),
+                        "steps_per_s": round(len(clean) / wall_s, 2)},
+        "latency_ms":  {"all": _pcts([s["ms"] for s in clean]),
+                        **{k: _pcts(v) for k, v in by_step.items()},
+                        "flow": _pcts([sess["ms"] for sess in ok_sessions])},
+        "memory_mb":   {"worker_rss_max": round(max((sess["rss_after"] for sess in sessions), default=0), 1),
+                        "per_session": round(statistics.fmean(deltas), 2) if deltas else None},
+        "cache":       {"data_hit_rate": round(1 - data_misses / data_calls, 3) if data_calls else None,
+                        "functions": caches},
+        "queries_per_rerun": _pcts([q for sess in sessions for q in sess["queries_per_rerun"]]),
+        "phases_ms":   {k: {f: v[f] for f in ("n", "p50", "p95", "p99")}
+                        for k, v in sorted((k, _pcts(v)) for k, v in phases.items()) if v},
+        "failures":    {"flows": len(sessions) - len(ok_sessions), "steps": failed_steps,
+                        "errors": errors[:50]},
+    }
+
+
+def print_report(rep: dict):
+    print(f"\n{rep['sessions']} sessions ({rep['flows_ok']} clean) in {rep['wall_s']} s — "
+          f"{rep['throughput']['flows_per_s']} clean flows/s, "
+          f"{rep['throughput']['steps_per_s']} clean reruns/s")
+    print(f"\n{'step':<14}{'n':>6}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}   (ms, clean steps)")
+    for name, p in rep["latency_ms"].items():
+        if p:
+            print(f"{name:<14}{p['n']:>6}{p['p50']:>10}{p['p95']:>10}{p['p99']:>10}{p['max']:>10}")
+    m = rep["memory_mb"]
+    print(f"\nRSS per worker ≤ {m['worker_rss_max']} MB  ≈ {m['per_session']} MB per session")
+    print(f"st.cache_data hit rate: {rep['cache']['data_hit_rate']}")
+    for k, v in rep["cache"]["functions"].items():
+        if v["calls"]:
+            print(f"   {k:<42} {v['calls']:>6} calls  {v['misses']:>5} misses  hit {v['hit_rate']}")
+    q = rep["queries_per_rerun"]
+    if q:
+        print(f"DB queries per rerun: p50 {q['p50']}  p95 {q['p95']}  max {q['max']}")
+    f = rep["failures"]
+    if f["errors"]:
+        print(f"\nFAILED: {f['flows']} flow(s); failed steps {f['steps']}")
+        for e in f["errors"][:10]:
+            print(f"   {e['session']:<24} {e['step']:<12} {e['error']}")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Concurrent AppTest sessions on the local backend.")
+    ap.add_argument("--sessions", type=int, default=10)
+    ap.add_argument("--concurrency", type=int, default=4, help="worker processes")
+    ap.add_argument("--scale", type=float, default=1.0, help="synthetic data scale per student")
+    ap.add_argument("--years", type=float, default=1.0)
+    ap.add_argument("--db", default=DEFAULT_DB, help="local database file (recreated)")
+    ap.add_argument("--no-pdf", action="store_true", help="skip the PDF export step")
+    ap.add_argument("--out", help="append the JSON report to this JSONL file")
+    args = ap.parse_args(argv)
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.db + suffix):
+            os.remove(args.db + suffix)
+    os.makedirs(os.path.dirname(args.db) or ".", exist_ok=True)
+
+    t0 = time.perf_counter()
+    emails = seed_users(args.db, args.sessions, args.scale, args.years)
+    print(f"Seeded {len(emails)} students in {time.perf_counter() - t0:.1f} s")
+
+    # spawn, not fork: the parent holds an open SQLite connection from seeding.
+    # Workers are referenced through the importable module because AppTest
+    # swaps sys.modules["__main__"] for the app script inside each worker.
+    from modules import loadtest
+    with ProcessPoolExecutor(max_workers=args.concurrency,
+                             mp_context=multiprocessing.get_context("spawn"),
+                             initializer=loadtest._init_worker, initargs=(args.db,)) as pool:
+        futures = [pool.submit(loadtest._session_worker, e, not args.no_pdf) for e in emails]
+        sessions = [f.result() for f in futures]
+
+    rep = build_report(sessions, {k: v for k, v in vars(args).items() if k not in ("out", "db")})
+    print_report(rep)
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rep) + "\n")
+        print(f"\nReport appended to {args.out}")
+    return 1 if rep["failures"]["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
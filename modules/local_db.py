@@ -0,0 +1,795 @@
+"""
+local_db.py — StudyTracker
+SQLite stand-in for the Supabase schema and server functions, for offline
+development, checks and benchmarks:
+  - LOCAL_SCHEMA_SQL mirrors the app tables (course / level tables of
+    MIGRATION_SQL plus profiles, logs, tracker, referrals, app_config)
+  - LOCAL_RPCS implements the server functions with the same contract
+    (arguments, return value, all-or-nothing transaction)
+  - LocalClient speaks the subset of the supabase-py API the app uses
+    (table().select/insert/upsert/update/delete + filters, rpc, auth)
+
+    conn = connect()                       # in-memory by default
+    call_rpc(conn, "clear_level_and_advance", {...})
+
+    sb = create_local_client("studytracker_local.db")
+    sb.table("daily_log").select("*", count="exact").eq("user_id", uid).execute()
+
+Selected in the app with BACKEND = "local" (st.secrets or the
+STUDYTRACKER_BACKEND environment variable); LOCAL_DB_PATH sets the file.
+Views and server functions that only exist in Postgres (admin_user_grid,
+user_subject_tree, referral_totals …) raise, so the app takes the same
+fallback paths it uses before the SQL has been run in Supabase.
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+import secrets
+import sqlite3
+import threading
+from datetime import date, datetime
+from types import SimpleNamespace
+
+
+# ── Schema (SQLite dialect of level_progression.MIGRATION_SQL) ────────────────
+LOCAL_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS user_courses (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id         TEXT NOT NULL,
+    course_id       TEXT NOT NULL,
+    current_level   TEXT NOT NULL,
+    status          TEXT NOT NULL DEFAULT 'active',
+    enrolled_at     TEXT NOT NULL DEFAULT CURRENT_DATE,
+    completed_at    TEXT,
+    custom_name     TEXT,
+    slot            INTEGER NOT NULL DEFAULT 1,
+    UNIQUE(user_id, course_id),
+    UNIQUE(user_id, slot)
+);
+
+CREATE TABLE IF NOT EXISTS level_history (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id         TEXT NOT NULL,
+    course_id       TEXT NOT NULL,
+    level_key       TEXT NOT NULL,
+    cleared_at      TEXT NOT NULL DEFAULT CURRENT_DATE,
+    cleared         INTEGER NOT NULL DEFAULT 1,
+    notes           TEXT,
+    UNIQUE(user_id, course_id, level_key)
+);
+
+CREATE TABLE IF NOT EXISTS user_subjects (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id         TEXT NOT NULL,
+    course_id       TEXT NOT NULL,
+    level_key       TEXT NOT NULL,
+    subject_key     TEXT NOT NULL,
+    label           TEXT NOT NULL,
+    target_hrs      INTEGER NOT NULL DEFAULT 120,
+    color           TEXT NOT NULL DEFAULT '#7DD3FC',
+    position        INTEGER NOT NULL DEFAULT 0,
+    frozen          INTEGER NOT NULL DEFAULT 0,
+    UNIQUE(user_id, course_id, level_key, subject_key)
+);
+
+CREATE TABLE IF NOT EXISTS user_topics (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id         TEXT NOT NULL,
+    course_id       TEXT NOT NULL,
+    level_key       TEXT NOT NULL,
+    subject_key     TEXT NOT NULL,
+    topic           TEXT NOT NULL,
+    position        INTEGER NOT NULL DEFAULT 0,
+    frozen          INTEGER NOT NULL DEFAULT 0,
+    UNIQUE(user_id, course_id, level_key, subject_key, topic)
+);
+
+-- ── App tables (Supabase dashboard schema) ──────────────────────────────────
+CREATE TABLE IF NOT EXISTS auth_users (
+    id              TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
+    email           TEXT NOT NULL UNIQUE,
+    password_hash   TEXT NOT NULL,
+    created_at      TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS profiles (
+    id                   TEXT PRIMARY KEY,
+    username             TEXT UNIQUE,
+    full_name            TEXT,
+    email                TEXT,
+    phone                TEXT,
+    dob                  TEXT,
+    gender               TEXT,
+    srn_no               TEXT,
+    exam_month           TEXT    DEFAULT 'January',
+    exam_year            INTEGER DEFAULT 2027,
+    study_phase          TEXT    DEFAULT 'articleship',
+    prep_mode            TEXT    DEFAULT 'clearance',
+    articleship_end_date TEXT,
+    daily_study_hours    REAL    DEFAULT 6,
+    num_revisions        INTEGER DEFAULT 6,
+    daily_rev_cap        INTEGER DEFAULT 5,
+    max_gap_days         INTEGER DEFAULT 120,
+    growth_factor        REAL    DEFAULT 1.30,
+    r1_days              INTEGER DEFAULT 3,
+    r2_days              INTEGER DEFAULT 7,
+    r1_ratio             REAL    DEFAULT 0.25,
+    r2_ratio             REAL    DEFAULT 0.25,
+    target_hrs_fr        INTEGER DEFAULT 200,
+    target_hrs_afm       INTEGER DEFAULT 160,
+    target_hrs_aa        INTEGER DEFAULT 150,
+    target_hrs_dt        INTEGER DEFAULT 200,
+    target_hrs_idt       INTEGER DEFAULT 180,
+    allow_backdate       BOOLEAN DEFAULT 0,
+    leaderboard_opt_in   BOOLEAN DEFAULT 0,
+    custom_syllabus      JSON,
+    created_at           TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS approved_emails (
+    id              TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
+    email           TEXT NOT NULL UNIQUE,
+    status          TEXT NOT NULL DEFAULT 'pending',
+    note            TEXT,
+    approved_at     TEXT DEFAULT CURRENT_DATE,
+    plan_key        TEXT,
+    plan_start      TEXT,
+    plan_end        TEXT
+);
+
+CREATE TABLE IF NOT EXISTS daily_log (
+    id              TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
+    user_id         TEXT NOT NULL,
+    date            TEXT NOT NULL,
+    subject         TEXT,
+    topic           TEXT,
+    hours           REAL DEFAULT 0,
+    pages_done      INTEGER DEFAULT 0,
+    difficulty      INTEGER,
+    notes           TEXT,
+    session_type    TEXT,
+    topic_status    TEXT,
+    completion_date TEXT,
+    created_at      TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS daily_log_user_date ON daily_log (user_id, date);
+
+CREATE TABLE IF NOT EXISTS test_scores (
+    id              TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
+    user_id         TEXT NOT NULL,
+    date            TEXT NOT NULL,
+    subject         TEXT,
+    test_name       TEXT,
+    marks           REAL,
+    max_marks       REAL,
+    score_pct       REAL,
+    weak_areas      TEXT,
+    strong_areas    TEXT,
+    action_plan     TEXT,
+    created_at      TEXT DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS test_scores_user_date ON test_scores (user_id, date);
+
+CREATE TABLE IF NOT EXISTS revision_tracker (
+    id                       TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
+    user_id                  TEXT NOT NULL,
+    subject                  TEXT NOT NULL,
+    topic                    TEXT NOT NULL,
+    first_read               BOOLEAN DEFAULT 0,
+    first_read_date          TEXT,
+    revision_count           INTEGER DEFAULT 0,
+    last_revision_date       TEXT,
+    topic_status             TEXT,
+    total_first_reading_time REAL DEFAULT 0,
+    completion_date          TEXT,
+    UNIQUE(user_id, subject, topic)
+);
+
+CREATE TABLE IF NOT EXISTS revision_sessions (
+    id              TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
+    user_id         TEXT NOT NULL,
+    subject         TEXT,
+    topic           TEXT,
+    round           INTEGER,
+    date            TEXT,
+    hours           REAL DEFAULT 0,
+    difficulty      INTEGER,
+    notes           TEXT,
+    status          TEXT
+);
+CREATE INDEX IF NOT EXISTS revision_sessions_user ON revision_sessions (user_id, date);
+
+CREATE TABLE IF NOT EXISTS referral_codes (
+    id              TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
+    user_id         TEXT NOT NULL,
+    code            TEXT NOT NULL UNIQUE,
+    created_at      TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS referral_uses (
+    id              TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
+    referral_code   TEXT,
+    referred_email  TEXT,
+    referrer_email  TEXT,
+    user_id         TEXT,
+    note            TEXT,
+    used_at         TEXT DEFAULT CURRENT_TIMESTAMP,
+    validated       BOOLEAN DEFAULT 0,
+    validated_at    TEXT,
+    plan_used       TEXT
+);
+
+CREATE TABLE IF NOT EXISTS app_config (
+    key             TEXT PRIMARY KEY,
+    value           TEXT,
+    version         INTEGER NOT NULL DEFAULT 1,
+    updated_at      TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TRIGGER IF NOT EXISTS app_config_version_trg AFTER UPDATE OF value ON app_config
+WHEN new.version <= old.version
+BEGIN
+    UPDATE app_config SET version = old.version + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE key = new.key;
+END;
+
+CREATE VIEW IF NOT EXISTS leaderboard AS
+SELECT p.username, p.full_name,
+       COALESCE((SELECT SUM(d.hours) FROM daily_log d WHERE d.user_id = p.id), 0)      AS total_hours,
+       (SELECT COUNT(DISTINCT d.date) FROM daily_log d WHERE d.user_id = p.id)         AS days_studied,
+       (SELECT ROUND(AVG(t.score_pct), 1) FROM test_scores t WHERE t.user_id = p.id)   AS avg_score
+FROM profiles p
+WHERE p.leaderboard_opt_in = 1;
+"""
+
+
+def connect(path: str = ":memory:") -> sqlite3.Connection:
+    """Open (and create) a local database with the schema applied."""
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA case_sensitive_like = ON")   # like() vs ilike() as in Postgres
+    if path != ":memory:":
+        conn.execute("PRAGMA journal_mode = WAL")
+    conn.executescript(LOCAL_SCHEMA_SQL)
+    return conn
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# SERVER FUNCTIONS — same names, arguments and results as the Postgres ones
+# ══════════════════════════════════════════════════════════════════════════════
+
+def rpc_clear_level_and_advance(conn: sqlite3.Connection, p_user_id: str, p_course_id: str,
+                                p_level_key: str, p_next_level: str | None,
+                                p_notes: str = "") -> str:
+    """
+    level_progression.LEVEL_RPC_SQL on SQLite: history upsert, freeze,
+    advance/complete in one transaction. Returns 'advanced' | 'completed';
+    raises (after rolling back) if the user is not enrolled in the course.
+    """
+    today = date.today().isoformat()
+    scope = (p_user_id, p_course_id, p_level_key)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(
+            "INSERT INTO level_history (user_id, course_id, level_key, cleared_at, cleared, notes) "
+            "VALUES (?, ?, ?, ?, 1, ?) "
+            "ON CONFLICT (user_id, course_id, level_key) "
+            "DO UPDATE SET cleared_at = excluded.cleared_at, cleared = 1, notes = excluded.notes",
+            (*scope, today, p_notes))
+        conn.execute("UPDATE user_subjects SET frozen = 1 "
+                     "WHERE user_id = ? AND course_id = ? AND level_key = ?", scope)
+        conn.execute("UPDATE user_topics SET frozen = 1 "
+                     "WHERE user_id = ? AND course_id = ? AND level_key = ?", scope)
+        if p_next_level is not None:
+            cur = conn.execute("UPDATE user_courses SET current_level = ?, status = 'active' "
+                               "WHERE user_id = ? AND course_id = ?",
+                               (p_next_level, p_user_id, p_course_id))
+            result = "advanced"
+        else:
+            cur = conn.execute("UPDATE user_courses SET status = 'completed', completed_at = ? "
+                               "WHERE user_id = ? AND course_id = ?",
+                               (today, p_user_id, p_course_id))
+            result = "completed"
+        if cur.rowcount == 0:
+            raise sqlite3.IntegrityError(f"not enrolled in course {p_course_id}")
+        conn.execute("COMMIT")
+        return result
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+LOCAL_RPCS = {
+    "clear_level_and_advance": rpc_clear_level_and_advance,
+}
+
+
+def call_rpc(conn: sqlite3.Connection, name: str, params: dict):
+    """Dispatch a supabase-style .rpc(name, params) call to the local implementation."""
+    try:
+        fn = LOCAL_RPCS[name]
+    except KeyError:
+        raise LookupError(f"PGRST202: Could not find the function {name}") from None
+    return fn(conn, **params)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# CLIENT — supabase-py compatible subset over one shared SQLite connection
+# ══════════════════════════════════════════════════════════════════════════════
+
+class LocalAPIError(Exception):
+    """Raised like postgrest.APIError: str() carries the Postgres-style code."""
+
+    def __init__(self, message: str, code: str = ""):
+        super().__init__(f"{code}: {message}" if code else message)
+        self.message, self.code = message, code
+
+
+class LocalAuthError(Exception):
+    """Raised like gotrue.AuthApiError (the app matches on its message)."""
+
+
+_DATABASES: dict = {}                    # path → {conn, lock, meta}, shared by all clients
+_DATABASES_LOCK = threading.Lock()
+
+
+def _database(path: str) -> dict:
+    with _DATABASES_LOCK:
+        if path not in _DATABASES:
+            _DATABASES[path] = {"conn": connect(path), "lock": threading.RLock(), "meta": {}}
+        return _DATABASES[path]
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _to_sql(v):
+    """Python value → SQLite parameter (bool → 0/1, dict/list → JSON text)."""
+    if isinstance(v, bool):
+        return int(v)
+    if isinstance(v, (dict, list)):
+        return json.dumps(v)
+    if isinstance(v, (date, datetime)):
+        return v.isoformat()
+    return v
+
+
+# PostgREST operator → SQL template ({} = column) for or_() filter strings
+_OR_OPS = {
+    "eq": "{} = ?", "neq": "{} <> ?", "gt": "{} > ?", "gte": "{} >= ?",
+    "lt": "{} < ?", "lte": "{} <= ?", "like": "{} LIKE ?", "ilike": "lower({}) LIKE lower(?)",
+}
+
+
+def _split_top(s: str, sep: str = ",") -> list[str]:
+    """Split on sep outside parentheses and double quotes: 'a.in.(1,2),b.eq.3'."""
+    parts, depth, quoted, cur = [], 0, False, ""
+    for ch in s:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        if ch == sep and depth == 0 and not quoted:
+            parts.append(cur)
+            cur = ""
+        else:
+            cur += ch
+    parts.append(cur)
+    return [p.strip() for p in parts if p.strip()]
+
+
+class _Response(SimpleNamespace):
+    """Same shape as postgrest's APIResponse (.data, .count)."""
+
+
+class _Query:
+    """One table request, built fluently and run by execute()."""
+
+    def __init__(self, client: "LocalClient", table: str):
+        self._client, self._table = client, table
+        self._op, self._cols, self._count = "select", "*", None
+        self._payload, self._on_conflict, self._ignore = None, "", False
+        self._where, self._params, self._order = [], [], []
+        self._limit = self._offset = None
+
+    # ── verbs ─────────────────────────────────────────────────────────────────
+    def select(self, columns: str = "*", count: str | None = None, **_):
+        self._op, self._cols, self._count = "select", columns, count
+        return self
+
+    def insert(self, rows, **_):
+        self._op, self._payload = "insert", rows
+        return self
+
+    def upsert(self, rows, on_conflict: str = "", ignore_duplicates: bool = False, **_):
+        self._op, self._payload = "upsert", rows
+        self._on_conflict, self._ignore = on_conflict, ignore_duplicates
+        return self
+
+    def update(self, data: dict, **_):
+        self._op, self._payload = "update", data
+        return self
+
+    def delete(self, **_):
+        self._op = "delete"
+        return self
+
+    # ── filters / modifiers ───────────────────────────────────────────────────
+    def _filter(self, col: str, sql: str, *params):
+        self._where.append(((col,), sql))
+        self._params.extend(_to_sql(p) for p in params)
+        return self
+
+    def eq(self, col, v):    return self._filter(col, "{} = ?", v)
+    def neq(self, col, v):   return self._filter(col, "{} <> ?", v)
+    def gt(self, col, v):    return self._filter(col, "{} > ?", v)
+    def gte(self, col, v):   return self._filter(col, "{} >= ?", v)
+    def lt(self, col, v):    return self._filter(col, "{} < ?", v)
+    def lte(self, col, v):   return self._filter(col, "{} <= ?", v)
+    def like(self, col, v):  return self._filter(col, "{} LIKE ?", v)
+    def ilike(self, col, v): return self._filter(col, "lower({}) LIKE lower(?)", v)
+
+    def is_(self, col, v):
+        v = {"null": None, "true": True, "false": False}.get(str(v).lower(), v)
+        if v is None:
+            return self._filter(col, "{} IS NULL")
+        return self._filter(col, "{} IS ?", v)
+
+    def in_(self, col, values):
+        values = list(values)
+        if not values:
+            return self._filter(col, "0")
+        return self._filter(col, "{} IN (" + ",".join("?" * len(values)) + ")", *values)
+
+    def or_(self, filters: str, **_):
+        """PostgREST or=(…): 'col.op.value' conditions, comma separated, any may match."""
+        cols, parts, params = [], [], []
+        for cond in _split_top(filters):
+            col, op, val = (cond.split(".", 2) + ["", ""])[:3]
+            negate = op == "not"
+            if negate:
+                op, val = (val.split(".", 1) + [""])[:2]
+            if self._columns().get(col) == "BOOLEAN" and val.lower() in ("true", "false"):
+                val = val.lower() == "true"
+            if op in _OR_OPS:
+                sql = _OR_OPS[op]
+                params.append(_to_sql(val.replace("*", "%") if op in ("like", "ilike") else val))
+            elif op == "is":
+                v = {"null": None, "true": True, "false": False}.get(str(val).lower(), val)
+                sql = "{} IS NULL" if v is None else "{} IS ?"
+                params += [] if v is None else [_to_sql(v)]
+            elif op == "in" and val.startswith("(") and val.endswith(")"):
+                values = [v.strip('"') for v in _split_top(val[1:-1])]
+                sql = "{} IN (" + ",".join("?" * len(values)) + ")" if values else "0"
+                params += values
+            else:
+                raise LocalAPIError(f"unsupported or_ condition '{cond}'", "PGRST100")
+            cols.append(col)
+            parts.append(f"NOT ({sql})" if negate else sql)
+        if not parts:
+            raise LocalAPIError("or_ needs at least one condition", "PGRST100")
+        self._where.append((tuple(cols), "(" + " OR ".join(parts) + ")"))
+        self._params.extend(params)
+        return self
+
+    def order(self, col: str, desc: bool = False, nullsfirst: bool | None = None, **_):
+        nulls = "" if nullsfirst is None else (" NULLS FIRST" if nullsfirst else " NULLS LAST")
+        self._order.append((col, ("DESC" if desc else "ASC") + nulls))
+        return self
+
+    def limit(self, n: int, **_):
+        self._limit = int(n)
+        return self
+
+    def range(self, start: int, end: int, **_):
+        self._offset, self._limit = int(start), int(end) - int(start) + 1
+        return self
+
+    def execute(self) -> _Response:
+        with self._client._lock:
+            try:
+                return getattr(self, f"_run_{self._op}")()
+            except LocalAPIError:
+                raise
+            except sqlite3.IntegrityError as e:
+                raise LocalAPIError(str(e), "23505" if "UNIQUE" in str(e) else "23502") from None
+            except sqlite3.OperationalError as e:
+                raise LocalAPIError(str(e), "42P01" if "no such table" in str(e) else "42703") from None
+
+    # ── SQL generation ────────────────────────────────────────────────────────
+    def _columns(self) -> dict:
+        return self._client._columns(self._table)
+
+    def _check(self, cols) -> None:
+        known = self._columns()
+        for c in cols:
+            if c not in known:
+                raise LocalAPIError(f"column {self._table}.{c} does not exist", "42703")
+
+    def _where_sql(self) -> str:
+        self._check(c for cols, _ in self._where for c in cols)
+        if not self._where:
+            return ""
+        return " WHERE " + " AND ".join(sql.format(*map(_quote, cols)) for cols, sql in self._where)
+
+    def _rows(self, cur) -> list[dict]:
+        types = self._columns()
+        out = []
+        for r in cur.fetchall():
+            row = {}
+            for k in r.keys():
+                v, t = r[k], types.get(k, "")
+                if v is not None and t == "BOOLEAN":
+                    v = bool(v)
+                elif v is not None and t in ("JSON", "JSONB") and isinstance(v, str):
+                    try:
+                        v = json.loads(v)
+                    except ValueError:
+                        pass
+                row[k] = v
+            out.append(row)
+        return out
+
+    def _run_select(self) -> _Response:
+        if not self._columns():
+            raise LocalAPIError(f"relation public.{self._table} does not exist", "42P01")
+        cols = [c.strip() for c in self._cols.split(",") if c.strip()]
+        if cols == ["*"]:
+            col_sql = "*"
+        else:
+            self._check(cols)
+            col_sql = ", ".join(_quote(c) for c in cols)
+        where = self._where_sql()
+        conn, tbl = self._client._conn, _quote(self._table)
+        count = None
+        if self._count:
+            count = conn.execute(f"SELECT COUNT(*) FROM {tbl}{where}", self._params).fetchone()[0]
+        sql = f"SELECT {col_sql} FROM {tbl}{where}"
+        if self._order:
+            self._check(c for c, _ in self._order)
+            sql += " ORDER BY " + ", ".join(f"{_quote(c)} {d}" for c, d in self._order)
+        limit, cap = self._limit, self._client.max_rows
+        if cap and (limit is None or limit > cap):
+            limit = cap                     # PostgREST db-max-rows silently truncates
+        if limit is not None:
+            sql += f" LIMIT {limit}"
+            if self._offset:
+                sql += f" OFFSET {self._offset}"
+        return _Response(data=self._rows(conn.execute(sql, self._params)), count=count)
+
+    def _payload_rows(self) -> list[dict]:
+        rows = self._payload if isinstance(self._payload, list) else [self._payload]
+        rows = [dict(r) for r in rows]
+        for r in rows:
+            self._client._check_write_columns(self._table, r)
+        return rows
+
+    def _write_rows(self, rows: list[dict], conflict) -> list[dict]:
+        """INSERT grouped by key set, so absent keys keep their column defaults."""
+        conn, tbl, out = self._client._conn, _quote(self._table), []
+        groups: dict = {}
+        for r in rows:
+            groups.setdefault(tuple(r), []).append(r)
+        for keys, group in groups.items():
+            cols = ", ".join(_quote(k) for k in keys)
+            ph = ", ".join("?" * len(keys))
+            for r in group:
+                cur = conn.execute(f"INSERT INTO {tbl} ({cols}) VALUES ({ph}) "
+                                   f"{conflict(keys)} RETURNING *",
+                                   [_to_sql(r[k]) for k in keys])
+                out += self._rows(cur)
+        return out
+
+    def _in_transaction(self, fn):
+        conn = self._client._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn()
+            conn.execute("COMMIT")
+            return result
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _run_insert(self) -> _Response:
+        rows = self._payload_rows()
+        return _Response(data=self._in_transaction(lambda: self._write_rows(rows, lambda _: "")),
+                         count=None)
+
+    def _conflict_clause(self, keys: tuple) -> str:
+        target = [c.strip() for c in self._on_conflict.split(",") if c.strip()] or \
+                 self._client._primary_key(self._table)
+        if self._ignore:
+            return f"ON CONFLICT ({', '.join(map(_quote, target))}) DO NOTHING"
+        sets = [k for k in keys if k not in target]
+        if not sets:
+            return f"ON CONFLICT ({', '.join(map(_quote, target))}) DO NOTHING"
+        return (f"ON CONFLICT ({', '.join(map(_quote, target))}) DO UPDATE SET "
+                + ", ".join(f"{_quote(k)} = excluded.{_quote(k)}" for k in sets))
+
+    def _run_upsert(self) -> _Response:
+        rows = self._payload_rows()
+        return _Response(data=self._in_transaction(lambda: self._write_rows(rows, self._conflict_clause)),
+                         count=None)
+
+    def _require_filter(self, verb: str) -> None:
+        """PostgREST refuses an unfiltered UPDATE / DELETE instead of touching every row."""
+        if not self._where:
+            raise LocalAPIError(f"{verb} requires a WHERE clause", "21000")
+
+    def _run_update(self) -> _Response:
+        self._require_filter("UPDATE")
+        data = self._payload_rows()[0]
+        if not data:
+            return _Response(data=[], count=None)
+        sets = ", ".join(f"{_quote(k)} = ?" for k in data)
+        where = self._where_sql()
+        cur = self._client._conn.execute(
+            f"UPDATE {_quote(self._table)} SET {sets}{where} RETURNING *",
+            [_to_sql(v) for v in data.values()] + self._params)
+        return _Response(data=self._rows(cur), count=None)
+
+    def _run_delete(self) -> _Response:
+        self._require_filter("DELETE")
+        where = self._where_sql()
+        cur = self._client._conn.execute(f"DELETE FROM {_quote(self._table)}{where} RETURNING *",
+                                         self._params)
+        return _Response(data=self._rows(cur), count=None)
+
+
+class _RpcCall:
+    def __init__(self, client: "LocalClient", name: str, params: dict):
+        self._client, self._name, self._params = client, name, params or {}
+
+    def execute(self) -> _Response:
+        with self._client._lock:
+            try:
+                data = call_rpc(self._client._conn, self._name, self._params)
+            except LookupError as e:
+                raise LocalAPIError(str(e).split(": ", 1)[-1], "PGRST202") from None
+            except sqlite3.Error as e:
+                raise LocalAPIError(str(e), "P0001") from None
+        return _Response(data=data, count=None)
+
+
+# ── Auth (email + password only) ──────────────────────────────────────────────
+_PBKDF2_ROUNDS = 100_000
+
+
+def _hash_password(password: str, salt: str | None = None) -> str:
+    salt = salt or secrets.token_hex(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), _PBKDF2_ROUNDS)
+    return f"{salt}${digest.hex()}"
+
+
+class _LocalAuthAdmin:
+    def __init__(self, client: "LocalClient"):
+        self._client = client
+
+    def get_user_by_id(self, user_id: str):
+        return SimpleNamespace(user=self._client.auth._user("id", user_id))
+
+
+class _LocalAuth:
+    def __init__(self, client: "LocalClient", confirm_email: bool):
+        self._client, self._confirm = client, confirm_email
+        self.admin = _LocalAuthAdmin(client)
+
+    def _row(self, col: str, val: str):
+        with self._client._lock:
+            return self._client._conn.execute(
+                f"SELECT id, email, password_hash, created_at FROM auth_users WHERE {col} = ?",
+                (val,)).fetchone()
+
+    def _user(self, col: str, val: str):
+        row = self._row(col, val)
+        if row is None:
+            return None
+        return SimpleNamespace(id=row["id"], email=row["email"], created_at=row["created_at"])
+
+    def _session(self, user):
+        return SimpleNamespace(access_token=secrets.token_urlsafe(24), user=user)
+
+    def sign_up(self, credentials: dict):
+        email = credentials["email"].strip().lower()
+        if len(credentials.get("password") or "") < 6:
+            raise LocalAuthError("Password should be at least 6 characters")
+        with self._client._lock:
+            try:
+                self._client._conn.execute(
+                    "INSERT INTO auth_users (email, password_hash) VALUES (?, ?)",
+                    (email, _hash_password(credentials["password"])))
+            except sqlite3.IntegrityError:
+                raise LocalAuthError("User already registered") from None
+        user = self._user("email", email)
+        return SimpleNamespace(user=user, session=None if self._confirm else self._session(user))
+
+    def sign_in_with_password(self, credentials: dict):
+        row = self._row("email", credentials["email"].strip().lower())
+        stored = row["password_hash"] if row else ""
+        if not row or not secrets.compare_digest(
+                _hash_password(credentials["password"], stored.split("$", 1)[0]), stored):
+            raise LocalAuthError("Invalid login credentials")
+        user = self._user("id", row["id"])
+        return SimpleNamespace(user=user, session=self._session(user))
+
+    def sign_out(self, *_):
+        return None
+
+
+class LocalClient:
+    """Drop-in for supabase.Client (the parts StudyTracker calls)."""
+
+    def __init__(self, path: str = ":memory:", confirm_email: bool = False,
+                 max_rows: int | None = None):
+        self.path, self.max_rows = path, max_rows
+        db = _database(path)
+        self._conn, self._lock, self._meta = db["conn"], db["lock"], db["meta"]
+        self.auth = _LocalAuth(self, confirm_email)
+
+    def table(self, name: str) -> _Query:
+        return _Query(self, name)
+
+    from_ = table
+
+    def rpc(self, name: str, params: dict | None = None) -> _RpcCall:
+        return _RpcCall(self, name, params)
+
+    # ── schema introspection (cached per database) ──────────────────────────────
+    def _columns(self, table: str) -> dict:
+        """column → declared type ('' for a relation that does not exist)."""
+        if table not in self._meta:
+            info = self._conn.execute(f"PRAGMA table_info({_quote(table)})").fetchall()
+            self._meta[table] = ({r["name"]: (r["type"] or "").upper() for r in info},
+                                 [r["name"] for r in sorted(info, key=lambda r: r["pk"]) if r["pk"]])
+        return self._meta[table][0]
+
+    def _primary_key(self, table: str) -> list[str]:
+        self._columns(table)
+        return self._meta[table][1]
+
+    def _check_write_columns(self, table: str, row: dict) -> None:
+        """Reject keys the schema lacks, as PostgREST does (PGRST204) — the app's
+        column fallbacks then run exactly as against an unmigrated database."""
+        known = self._columns(table)
+        if not known:
+            raise LocalAPIError(f"relation public.{table} does not exist", "42P01")
+        for k in row:
+            if k not in known:
+                raise LocalAPIError(f"Could not find the '{k}' column of '{table}' "
+                                    "in the schema cache", "PGRST204")
+
+
+def create_local_client(path: str = ":memory:", confirm_email: bool = False,
+                        max_rows: int | None = None) -> LocalClient:
+    """
+    Clients for the same path share one connection (sb and sb_admin see the same data).
+    max_rows caps every select like PostgREST's db-max-rows (Supabase: 1000); off by default.
+    """
+    return LocalClient(path, confirm_email, max_rows)
+
+
+DEFAULT_LOCAL_DB = "studytracker_local.db"
+
+
+def local_backend_path(secrets_map=None) -> str | None:
+    """
+    LOCAL_DB_PATH when the local backend is selected (BACKEND = "local" in
+    st.secrets, or STUDYTRACKER_BACKEND=local in the environment), else None.
+    """
+    def _get(key):
+        if os.environ.get(f"STUDYTRACKER_{key}"):
+            return os.environ[f"STUDYTRACKER_{key}"]
+        try:
+            return (secrets_map or {}).get(key)
+        except Exception:
+            return None
+
+    if str(_get("BACKEND") or "").lower() != "local":
+        return None
+    return _get("LOCAL_DB_PATH") or DEFAULT_LOCAL_DB
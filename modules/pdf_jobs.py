@@ -0,0 +1,195 @@
+"""
+pdf_jobs.py — StudyTracker
+Background PDF export:
+  - Renders run on a small process-wide thread pool, never in the script thread
+  - Each export gets a job id; the UI polls its progress from session_state
+  - Finished PDFs are cached per (user, data version, date) — an unchanged
+    dashboard downloads instantly the second time
+"""
+
+from __future__ import annotations
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pandas as pd
+import streamlit as st
+
+from modules.query_trace import begin_fragment_run
+from modules.timing import span
+
+PDF_WORKERS       = 2      # concurrent renders per process
+MAX_CACHED_PDFS   = 64     # LRU bound on finished PDFs kept in memory
+JOB_RETENTION_SEC = 3600   # finished job records are dropped after 1 h
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PROCESS-WIDE STATE — one pool, one job table, one result cache
+# ══════════════════════════════════════════════════════════════════════════════
+
+@st.cache_resource
+def _pdf_state() -> dict:
+    """Shared across all sessions of this server process."""
+    return {
+        "pool":    ThreadPoolExecutor(max_workers=PDF_WORKERS,
+                                      thread_name_prefix="pdf-export"),
+        "lock":    threading.Lock(),
+        "jobs":    {},             # job_id → job dict
+        "results": OrderedDict(),  # (user_id, version, day) → pdf bytes
+    }
+
+
+def pdf_data_version(*frames: pd.DataFrame, extra=None) -> str:
+    """
+    Content hash of everything a dashboard PDF is rendered from.
+    Any new log / score / revision row changes the version.
+    """
+    h = hashlib.sha1()
+    for df in frames:
+        if df is None or df.empty:
+            h.update(b"empty|")
+            continue
+        h.update(",".join(map(str, df.columns)).encode())
+        h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+        h.update(b"|")
+    if extra is not None:
+        h.update(repr(extra).encode())
+    return h.hexdigest()[:16]
+
+
+def _prune_jobs(state: dict):
+    """Drop finished job records older than JOB_RETENTION_SEC (lock held)."""
+    cutoff = time.time() - JOB_RETENTION_SEC
+    stale = [jid for jid, j in state["jobs"].items()
+             if j["status"] in ("done", "error") and j["finished"] < cutoff]
+    for jid in stale:
+        state["jobs"].pop(jid, None)
+
+
+def _run_job(job: dict, render_fn, args, kwargs):
+    state = _pdf_state()
+
+    def _progress(frac: float, stage: str = ""):
+        job["progress"] = max(0.0, min(float(frac), 1.0))
+        if stage:
+            job["stage"] = stage
+
+    job["status"] = "running"
+    job["stage"]  = "Starting…"
+    try:
+        with span("pdf.render"):
+            pdf = render_fn(*args, progress=_progress, **kwargs)
+        with state["lock"]:
+            state["results"][job["key"]] = pdf
+            state["results"].move_to_end(job["key"])
+            while len(state["results"]) > MAX_CACHED_PDFS:
+                state["results"].popitem(last=False)
+        job.update(status="done", progress=1.0, stage="Ready")
+    except Exception as e:
+        job.update(status="error", error=str(e), stage="Failed")
+    finally:
+        job["finished"] = time.time()
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PUBLIC API
+# ══════════════════════════════════════════════════════════════════════════════
+
+def submit_pdf_job(user_id: str, version: str, render_fn, *args, **kwargs) -> str:
+    """
+    Queue render_fn(*args, progress=cb, **kwargs) on the PDF pool.
+    Returns a job id immediately. A cached PDF for the same
+    (user, version, today) yields an already-finished job; an identical
+    job still in flight is reused instead of rendering twice.
+    """
+    state = _pdf_state()
+    key   = (user_id, version, date.today().isoformat())
+    now   = time.time()
+    with state["lock"]:
+        _prune_jobs(state)
+        for jid, j in state["jobs"].items():
+            if j["key"] == key and j["status"] in ("queued", "running"):
+                return jid
+
+        job_id = uuid.uuid4().hex[:12]
+        job = {
+            "id": job_id, "key": key, "status": "queued",
+            "progress": 0.0, "stage": "Queued", "error": "",
+            "started": now, "finished": 0.0,
+        }
+        state["jobs"][job_id] = job
+
+        if key in state["results"]:
+            state["results"].move_to_end(key)
+            job.update(status="done", progress=1.0, stage="Ready (cached)",
+                       finished=now)
+            return job_id
+
+    state["pool"].submit(_run_job, job, render_fn, args, kwargs)
+    return job_id
+
+
+def get_pdf_job(job_id: str) -> dict | None:
+    """Snapshot of a job's status/progress, or None if unknown/expired."""
+    job = _pdf_state()["jobs"].get(job_id)
+    return dict(job) if job else None
+
+
+def get_pdf_result(job_id: str) -> bytes | None:
+    """PDF bytes of a finished job (served from the result cache)."""
+    state = _pdf_state()
+    job = state["jobs"].get(job_id)
+    if not job or job["status"] != "done":
+        return None
+    with state["lock"]:
+        return state["results"].get(job["key"])
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# UI — progress poller + download button
+# ══════════════════════════════════════════════════════════════════════════════
+
+@st.fragment(run_every=1)
+def _poll_pdf_job(job_id: str):
+    """Re-runs only this fragment every second until the job finishes."""
+    begin_fragment_run("poll.pdf_job")
+    job = get_pdf_job(job_id)
+    if job is None or job["status"] in ("done", "error"):
+        st.rerun()   # full rerun swaps the poller for the final widget
+    st.progress(job["progress"], text=job["stage"])
+
+
+def render_pdf_job(job_id: str, file_name: str, key: str, state_key: str | None = None):
+    """
+    Render progress, error, or download button for a PDF job.
+    state_key: the session_state key holding job_id — dropped once the job
+    is gone or its error has been shown, so the banner appears once and the
+    next export starts clean.
+    """
+    job = get_pdf_job(job_id)
+    if job is None or job["status"] == "error":
+        if state_key:
+            st.session_state.pop(state_key, None)
+    if job is None:
+        return
+    if job["status"] == "error":
+        st.error(f"PDF error: {job['error']}")
+    elif job["status"] == "done":
+        pdf = get_pdf_result(job_id)
+        if pdf is None:
+            st.caption("PDF expired — export again.")
+            return
+        st.download_button(
+            label="📥 Download PDF",
+            data=pdf,
+            file_name=file_name,
+            mime="application/pdf",
+            key=key,
+            use_container_width=True,
+        )
+    else:
+        _poll_pdf_job(job_id)
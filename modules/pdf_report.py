@@ -0,0 +1,899 @@
+"""
+pdf_report.py — StudyTracker
+Dashboard PDF renderer (ReportLab).
+Imports, palette, paragraph styles and reusable flowables are built once
+per process at import time; render_dashboard_pdf() takes only data —
+frames, profile and pre-computed analytics — and returns PDF bytes.
+"""
+
+from __future__ import annotations
+import io
+import threading
+from datetime import date
+
+import pandas as pd
+from reportlab.lib.pagesizes import A4
+from reportlab.lib import colors
+from reportlab.lib.units import cm, mm
+from reportlab.platypus import (
+    SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle,
+    HRFlowable
+)
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.enums import TA_CENTER
+from reportlab.graphics.shapes import Drawing, Circle, String
+from reportlab.platypus.flowables import Flowable
+
+from modules.course_config import SUBJECTS, SUBJ_FULL, TARGET_HRS, TOPICS
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PALETTE
+# ══════════════════════════════════════════════════════════════════════════════
+BG     = colors.HexColor("#020B18")
+CARD   = colors.HexColor("#061434")
+CARD2  = colors.HexColor("#071838")
+NAVY2  = colors.HexColor("#0A1F55")
+CYAN   = colors.HexColor("#38BDF8")
+CYAN_L = colors.HexColor("#7DD3FC")
+GREEN  = colors.HexColor("#34D399")
+GOLD   = colors.HexColor("#FBBF24")
+RED    = colors.HexColor("#F87171")
+PURPLE = colors.HexColor("#818CF8")
+ORANGE = colors.HexColor("#F97316")
+BLUE   = colors.HexColor("#60A5FA")
+MUTED  = colors.HexColor("#6B91B8")
+BODY   = colors.HexColor("#B8D4F0")
+BORDER = colors.HexColor("#0E3C8C")
+WHITE  = colors.HexColor("#FFFFFF")
+DKRED  = colors.HexColor("#2A0808")
+DKRED2 = colors.HexColor("#180606")
+LTRED  = colors.HexColor("#FFB3B3")
+TRACK  = colors.HexColor("#0E2040")   # progress bar background track
+
+SUBJ_CLR = {"FR": CYAN_L, "AFM": GREEN, "AA": GOLD, "DT": RED, "IDT": BLUE}
+
+_HEX_CACHE: dict = {}
+
+
+def _hex(value):
+    """HexColor for a '#RRGGBB' string (memoised); Color objects pass through."""
+    if not isinstance(value, str):
+        return value
+    c = _HEX_CACHE.get(value)
+    if c is None:
+        c = _HEX_CACHE[value] = colors.HexColor(value)
+    return c
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PAGE SETUP
+# ══════════════════════════════════════════════════════════════════════════════
+PW, PH = A4
+LM = RM = 1.4 * cm
+TM = BM = 1.6 * cm
+W  = PW - LM - RM
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# STYLES — ParagraphStyles are immutable once built, so one instance per
+# (name, overrides) is shared by every render in the process.
+# ══════════════════════════════════════════════════════════════════════════════
+_STYLE_CACHE: dict = {}
+_STYLE_LOCK = threading.Lock()
+
+
+def PS(name, **kw):
+    key = (name, tuple(sorted(kw.items())))
+    try:
+        style = _STYLE_CACHE.get(key)
+    except TypeError:   # unhashable override — build uncached
+        key, style = None, None
+    if style is not None:
+        return style
+    base = dict(fontName="Helvetica", fontSize=8.5, textColor=BODY,
+                leading=12, spaceAfter=0, spaceBefore=0)
+    base.update(kw)
+    style = ParagraphStyle(name, **base)
+    if key is not None:
+        with _STYLE_LOCK:
+            _STYLE_CACHE.setdefault(key, style)
+    return style
+
+
+S_H1   = PS("h1",  fontName="Helvetica-Bold", fontSize=18, textColor=CYAN_L, leading=22)
+S_H2   = PS("h2",  fontName="Helvetica-Bold", fontSize=10, textColor=CYAN, spaceBefore=6, spaceAfter=3)
+S_H3   = PS("h3",  fontName="Helvetica-Bold", fontSize=9,  textColor=CYAN_L, spaceAfter=3)
+S_BODY = PS("bd",  fontSize=8,  textColor=BODY,  leading=12)
+S_SML  = PS("sm",  fontSize=7,  textColor=MUTED, leading=10)
+S_LBL  = PS("lb",  fontName="Helvetica-Bold", fontSize=7, textColor=MUTED)
+S_MONO = PS("mn",  fontName="Courier-Bold",   fontSize=8, textColor=CYAN_L)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# FLOWABLES & HELPERS
+# ══════════════════════════════════════════════════════════════════════════════
+def sp(h=5): return Spacer(1, h)
+
+
+class ProgressBar(Flowable):
+    """Renders a real filled rect progress bar, not ASCII art."""
+    def __init__(self, pct, width, height=7, clr=None, track_clr=None, radius=3):
+        Flowable.__init__(self)
+        self.pct       = max(0.0, min(pct, 100.0))
+        self.bar_width = width
+        self.height    = height
+        self.clr       = clr or CYAN
+        self.track_clr = track_clr or TRACK
+        self.radius    = radius
+
+    def draw(self):
+        c = self.canv
+        # Track (background)
+        c.setFillColor(self.track_clr)
+        c.roundRect(0, 0, self.bar_width, self.height,
+                    self.radius, fill=1, stroke=0)
+        # Fill
+        fill_w = max(self.bar_width * self.pct / 100, self.height if self.pct > 0 else 0)
+        if fill_w > 0:
+            c.setFillColor(self.clr)
+            c.roundRect(0, 0, fill_w, self.height,
+                        self.radius, fill=1, stroke=0)
+        # Percentage label
+        c.setFillColor(WHITE)
+        c.setFont("Helvetica-Bold", 5.5)
+        lbl = f"{self.pct:.0f}%"
+        c.drawCentredString(self.bar_width / 2, 1.3, lbl)
+
+    def wrap(self, *args):
+        return (self.bar_width, self.height)
+
+
+def sec(title):
+    """Section header: rule + H2 title."""
+    return [
+        sp(6),
+        HRFlowable(width=W, color=BORDER, thickness=0.5),
+        sp(3),
+        Paragraph(title, S_H2),
+    ]
+
+
+_CTABLE_BASE = [
+    ("BACKGROUND",    (0,0),(-1,-1), CARD),
+    ("GRID",          (0,0),(-1,-1), 0.5, BORDER),
+    ("LEFTPADDING",   (0,0),(-1,-1), 8),
+    ("RIGHTPADDING",  (0,0),(-1,-1), 8),
+    ("TOPPADDING",    (0,0),(-1,-1), 7),
+    ("BOTTOMPADDING", (0,0),(-1,-1), 7),
+    ("VALIGN",        (0,0),(-1,-1), "TOP"),
+]
+
+
+def ctable(data, cw, extras=None):
+    """Card-styled table."""
+    t = Table(data, cw)
+    t.setStyle(TableStyle(_CTABLE_BASE + list(extras or [])))
+    return t
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# RENDER
+# ══════════════════════════════════════════════════════════════════════════════
+def render_dashboard_pdf(log, tst, rev, rev_sess, pend, prof, *,
+                         days_left, exam_date, total_reading_hrs,
+                         total_rev_hrs, avg_score, days_studied, dpd,
+                         air, rpi, cons, frp, gaps, progress=None) -> bytes:
+    """
+    Render the dashboard PDF from data only — no session or DB access.
+    air / rpi / cons / frp / gaps are the outputs of the app's analytics
+    engine; progress(frac, stage) is an optional stage callback.
+    """
+    def _step(frac, stage):
+        if progress:
+            progress(frac, stage)
+
+    # ── Pre-compute accurate stats ─────────────────────────────────────────────
+    name_str  = prof.get("full_name", "Student")
+    uname_str = prof.get("username", "")
+    num_rev   = int(prof.get("num_revisions", 6))
+
+    prof_tgt  = {s: int(prof.get(f"target_hrs_{s.lower()}", TARGET_HRS[s]))
+                 for s in SUBJECTS}
+
+    # Reading hours (exclude revision sessions)
+    rlog = (log[log["session_type"] != "revision"]
+            if not log.empty and "session_type" in log.columns else log)
+    sh   = (rlog.groupby("subject")["hours"].sum()
+            if not rlog.empty else pd.Series(dtype=float))
+
+    # Topics studied (unique topics in reading log per subject)
+    topics_studied_by_subj = {}
+    if not rlog.empty:
+        for s in SUBJECTS:
+            topics_studied_by_subj[s] = rlog[rlog["subject"] == s]["topic"].nunique()
+    else:
+        topics_studied_by_subj = {s: 0 for s in SUBJECTS}
+
+    # Completed topics per subject (from revision_tracker)
+    comp_by_s = {s: 0 for s in SUBJECTS}
+    if not rev.empty and "topic_status" in rev.columns:
+        for s in SUBJECTS:
+            comp_by_s[s] = int(
+                ((rev["subject"]==s) & (rev["topic_status"]=="completed")).sum())
+
+    comp_total = sum(comp_by_s.values())
+    all_topics = sum(len(v) for v in TOPICS.values())
+    ov_cnt     = int((pend["days_overdue"] > 0).sum()) if not pend.empty else 0
+
+    # Unique topics revised per subject (from pend / rev_sess)
+    topics_revised_by_subj = {s: 0 for s in SUBJECTS}
+    if not pend.empty and "revisions_done" in pend.columns:
+        for s in SUBJECTS:
+            s_pend = pend[pend["subject"] == s]
+            topics_revised_by_subj[s] = int((s_pend["revisions_done"] > 0).sum())
+    elif not rev_sess.empty and "subject" in rev_sess.columns:
+        for s in SUBJECTS:
+            topics_revised_by_subj[s] = rev_sess[rev_sess["subject"] == s]["topic"].nunique()
+
+    # Revision depth per subject: avg(revisions_done / num_rev) across completed topics
+    rev_depth_by_subj = {s: 0.0 for s in SUBJECTS}
+    if not pend.empty and "revisions_done" in pend.columns:
+        for s in SUBJECTS:
+            s_pend = pend[(pend["subject"] == s) & (pend["revisions_done"] > 0)]
+            if len(s_pend) > 0 and num_rev > 0:
+                avg_rounds = s_pend["revisions_done"].mean()
+                rev_depth_by_subj[s] = min(avg_rounds / num_rev * 100, 100)
+
+    _step(0.40, "Laying out sections…")
+
+    g1   = int(prof.get("r1_days", 3))
+    g2   = int(prof.get("r2_days", 7))
+    gf   = float(prof.get("growth_factor", 1.30))
+    mgap = int(prof.get("max_gap_days", 120))
+
+    rpi_val  = rpi["rpi"]
+    rpi_clr  = _hex(rpi["color"])
+    rcomp    = rpi["components"]
+    rden     = rpi["rden_actual"]
+    rmile    = rpi["rden_milestone"]
+    cons_clr = _hex(cons["color"])
+
+    # ── Page background ────────────────────────────────────────────────────────
+    def dark_page(cv, doc_obj):
+        cv.saveState()
+        cv.setFillColor(BG)
+        cv.rect(0, 0, PW, PH, fill=1, stroke=0)
+        cv.setFillColor(CYAN)
+        cv.rect(0, PH - 2.5*mm, PW, 2.5*mm, fill=1, stroke=0)
+        cv.setFillColor(NAVY2)
+        cv.rect(0, 0, PW, 9*mm, fill=1, stroke=0)
+        cv.setFillColor(MUTED)
+        cv.setFont("Helvetica", 6.5)
+        cv.drawString(LM, 3*mm,
+            f"StudyTracker  |  {name_str}  |  "
+            f"Generated {date.today().strftime('%d %B %Y')}")
+        cv.drawRightString(PW - RM, 3*mm, f"Page {doc_obj.page}")
+        cv.restoreState()
+
+    story = []
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # 1. HEADER
+    # ══════════════════════════════════════════════════════════════════════════
+    initial = name_str[0].upper() if name_str else "S"
+    av = Drawing(44, 44)
+    av.add(Circle(22, 22, 21, fillColor=_hex("#1A4E8A"),
+                  strokeColor=CYAN, strokeWidth=2))
+    av.add(String(22, 14, initial, fontSize=20, fontName="Helvetica-Bold",
+                  fillColor=WHITE, textAnchor="middle"))
+
+    hdr_data = [[
+        av,
+        [
+            Paragraph(name_str, S_H1),
+            Paragraph(f"@{uname_str}  |  StudyTracker Dashboard Report",
+                      PS("hs", fontSize=8, textColor=MUTED)),
+            sp(2),
+            Paragraph(f"Exam: <b>{exam_date.strftime('%B %Y')}</b>  |  "
+                      f"Generated: {date.today().strftime('%d %b %Y')}",
+                      PS("hd", fontSize=8, textColor=BODY)),
+        ],
+        [
+            Paragraph("DAYS LEFT", S_LBL),
+            Paragraph(str(days_left),
+                      PS("dl", fontName="Helvetica-Bold", fontSize=28,
+                         textColor=WHITE, leading=32, alignment=TA_CENTER)),
+            Paragraph(exam_date.strftime("%b %Y").upper(),
+                      PS("dm", fontSize=8, textColor=CYAN, alignment=TA_CENTER)),
+        ],
+    ]]
+    hdr_t = Table(hdr_data, colWidths=[55, W-55-90, 90])
+    hdr_t.setStyle(TableStyle([
+        ("BACKGROUND",    (0,0),(-1,-1), CARD),
+        ("BACKGROUND",    (2,0),(2,0),   NAVY2),
+        ("GRID",          (0,0),(-1,-1), 0.5, BORDER),
+        ("VALIGN",        (0,0),(-1,-1), "MIDDLE"),
+        ("ALIGN",         (2,0),(2,0),   "CENTER"),
+        ("LEFTPADDING",   (0,0),(-1,-1), 8),
+        ("RIGHTPADDING",  (0,0),(-1,-1), 8),
+        ("TOPPADDING",    (0,0),(-1,-1), 10),
+        ("BOTTOMPADDING", (0,0),(-1,-1), 10),
+        ("LINEABOVE",     (0,0),(-1,0),  3, CYAN),
+    ]))
+    story.append(hdr_t)
+    story.append(sp(8))
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # 2. KPI CARDS
+    # ══════════════════════════════════════════════════════════════════════════
+    story += sec("Key Performance Metrics")
+
+    sc_clr = (GREEN if avg_score >= 60 else GOLD if avg_score >= 40 else RED)
+    kpi_row = [[
+        [Paragraph("Days Left", S_LBL),
+         Paragraph(str(days_left), PS("kv1",fontName="Helvetica-Bold",fontSize=18,textColor=CYAN_L,leading=22)),
+         Paragraph("to exam", S_SML)],
+        [Paragraph("Reading Hours", S_LBL),
+         Paragraph(f"{total_reading_hrs:.0f}h", PS("kv2",fontName="Helvetica-Bold",fontSize=18,textColor=CYAN_L,leading=22)),
+         Paragraph(f"{dpd}h/day needed", S_SML)],
+        [Paragraph("Revision Hours", S_LBL),
+         Paragraph(f"{total_rev_hrs:.1f}h", PS("kv3",fontName="Helvetica-Bold",fontSize=18,textColor=GREEN,leading=22)),
+         Paragraph("logged", S_SML)],
+        [Paragraph("Avg Test Score", S_LBL),
+         Paragraph(f"{avg_score:.1f}%", PS("kv4",fontName="Helvetica-Bold",fontSize=18,textColor=sc_clr,leading=22)),
+         Paragraph("Target 60%+", S_SML)],
+        [Paragraph("Topics Completed", S_LBL),
+         Paragraph(f"{comp_total}", PS("kv5",fontName="Helvetica-Bold",fontSize=18,textColor=CYAN_L,leading=22)),
+         Paragraph(f"of {all_topics} total", S_SML)],
+    ]]
+    kpi_t = Table(kpi_row, colWidths=[W/5]*5)
+    kpi_t.setStyle(TableStyle([
+        ("BACKGROUND",    (0,0),(-1,-1), CARD),
+        ("GRID",          (0,0),(-1,-1), 0.5, BORDER),
+        ("VALIGN",        (0,0),(-1,-1), "TOP"),
+        ("LEFTPADDING",   (0,0),(-1,-1), 9),
+        ("RIGHTPADDING",  (0,0),(-1,-1), 6),
+        ("TOPPADDING",    (0,0),(-1,-1), 9),
+        ("BOTTOMPADDING", (0,0),(-1,-1), 9),
+        ("LINEABOVE",     (0,0),(-1,0),  2.5, CYAN),
+    ]))
+    story.append(kpi_t)
+    story.append(sp(8))
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # 3. SUBJECT READING PROGRESS — with real graphical progress bars
+    # ══════════════════════════════════════════════════════════════════════════
+    story += sec("First Reading Progress by Subject")
+
+    sub_hdr = [[
+        Paragraph("Subject",         PS("sh1",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
+        Paragraph("Hours Done",      PS("sh2",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
+        Paragraph("Target",          PS("sh3",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
+        Paragraph("Reading Progress",PS("sh4",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
+        Paragraph("Topics",          PS("sh5",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
+        Paragraph("Completed",       PS("sh6",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
+    ]]
+    BAR_W_SUB = W * 0.30  # width available for the progress bar column
+    sub_cw  = [W*0.25, W*0.09, W*0.08, BAR_W_SUB, W*0.12, W*0.16]
+    sub_rows = []
+
+    for s in SUBJECTS:
+        done   = float(sh.get(s, 0)) if hasattr(sh, "get") else 0.0
+        tgt    = prof_tgt[s]
+        hrs_pct = min(done / tgt * 100, 100) if tgt > 0 else 0
+        n_c    = comp_by_s.get(s, 0)
+        n_t    = len(TOPICS.get(s, []))
+        n_stud = topics_studied_by_subj.get(s, 0)
+        clr    = SUBJ_CLR[s]
+        # Dual bar: hours % in bar, show studied topics count as context
+        sub_rows.append([
+            Paragraph(f'<b>{SUBJ_FULL[s]}</b>', PS(f"sn{s}", fontSize=8.5, textColor=clr)),
+            Paragraph(f"{done:.0f}h",   S_BODY),
+            Paragraph(f"{tgt}h",        S_BODY),
+            ProgressBar(hrs_pct, BAR_W_SUB - 14, height=9, clr=clr),
+            Paragraph(f"{n_stud}/{n_t}", S_BODY),
+            Paragraph(f"{n_c} done",
+                      PS(f"sc{s}", fontName="Helvetica-Bold", fontSize=8.5,
+                         textColor=GREEN if n_c == n_t else (GOLD if n_c > 0 else MUTED))),
+        ])
+
+    sub_t = Table(sub_hdr + sub_rows, colWidths=sub_cw)
+    sub_t.setStyle(TableStyle([
+        ("BACKGROUND",    (0,0),(-1,0),  NAVY2),
+        ("BACKGROUND",    (0,1),(-1,-1), CARD),
+        ("ROWBACKGROUNDS",(0,1),(-1,-1), [CARD, CARD2]),
+        ("GRID",          (0,0),(-1,-1), 0.5, BORDER),
+        ("FONTNAME",      (0,0),(-1,0),  "Helvetica-Bold"),
+        ("TEXTCOLOR",     (0,0),(-1,0),  CYAN),
+        ("FONTSIZE",      (0,0),(-1,0),  7.5),
+        ("VALIGN",        (0,0),(-1,-1), "MIDDLE"),
+        ("LEFTPADDING",   (0,0),(-1,-1), 7),
+        ("RIGHTPADDING",  (0,0),(-1,-1), 7),
+        ("TOPPADDING",    (0,0),(-1,-1), 7),
+        ("BOTTOMPADDING", (0,0),(-1,-1), 7),
+        ("ALIGN",         (1,0),(-1,-1), "CENTER"),
+        ("LINEABOVE",     (0,0),(-1,0),  2, CYAN),
+    ]))
+    story.append(sub_t)
+    story.append(sp(8))
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # 4. AIR PREPAREDNESS INDEX
+    # ══════════════════════════════════════════════════════════════════════════
+    story += sec("AIR Preparedness Index")
+
+    air_comp = air["components"]
+    ov_air   = air["overall"]
+    ov_air_clr = (GREEN if ov_air>=80 else GOLD if ov_air>=60 else ORANGE if ov_air>=40 else RED)
+
+    air_cells = []
+    for s in SUBJECTS:
+        s_air = air["per_subject"].get(s, 0)
+        clr   = (GREEN if s_air>=80 else GOLD if s_air>=60 else ORANGE if s_air>=40 else RED)
+        sl    = ("STRONG" if s_air>=80 else "MODERATE" if s_air>=60 else "AT RISK" if s_air>=40 else "CRITICAL")
+        air_cells.append([
+            Paragraph(s, PS(f"as{s}", fontName="Helvetica-Bold", fontSize=11, textColor=clr, alignment=TA_CENTER)),
+            Paragraph(f"{s_air:.0f}",
+                      PS(f"av{s}", fontName="Helvetica-Bold", fontSize=22, textColor=WHITE, leading=26, alignment=TA_CENTER)),
+            Paragraph(sl,  PS(f"al{s}", fontName="Helvetica-Bold", fontSize=7, textColor=clr, alignment=TA_CENTER)),
+            sp(3),
+            ProgressBar(s_air, W/5 - 14, height=8, clr=clr),
+        ])
+
+    air_row = Table([air_cells], colWidths=[W/5]*5)
+    air_row_ts = [
+        ("BACKGROUND",    (0,0),(-1,-1), CARD),
+        ("GRID",          (0,0),(-1,-1), 0.5, BORDER),
+        ("VALIGN",        (0,0),(-1,-1), "TOP"),
+        ("TOPPADDING",    (0,0),(-1,-1), 8),
+        ("BOTTOMPADDING", (0,0),(-1,-1), 10),
+        ("LEFTPADDING",   (0,0),(-1,-1), 7),
+        ("RIGHTPADDING",  (0,0),(-1,-1), 7),
+    ]
+    for i, s in enumerate(SUBJECTS):
+        air_row_ts.append(("LINEABOVE", (i,0),(i,0), 3, SUBJ_CLR[s]))
+    air_row.setStyle(TableStyle(air_row_ts))
+    story.append(air_row)
+    story.append(sp(4))
+
+    # Overall AIR summary with bars
+    AIR_BAR_W = W * 0.13
+    air_sum = [[
+        Paragraph("OVERALL AIR", PS("oa_lbl",fontName="Helvetica-Bold",fontSize=7.5,textColor=MUTED)),
+        Paragraph("Coverage",    PS("oa_c1", fontName="Helvetica-Bold",fontSize=7,textColor=MUTED)),
+        Paragraph("Rev Depth",   PS("oa_c2", fontName="Helvetica-Bold",fontSize=7,textColor=MUTED)),
+        Paragraph("Consistency", PS("oa_c3", fontName="Helvetica-Bold",fontSize=7,textColor=MUTED)),
+        Paragraph("Balance",     PS("oa_c4", fontName="Helvetica-Bold",fontSize=7,textColor=MUTED)),
+        Paragraph("Label",       PS("oa_c5", fontName="Helvetica-Bold",fontSize=7,textColor=MUTED)),
+    ],[
+        [Paragraph(f"{ov_air:.0f}/100",
+                  PS("oa_v",fontName="Helvetica-Bold",fontSize=14,textColor=ov_air_clr)),
+         sp(3),
+         ProgressBar(ov_air, W*0.16, height=8, clr=ov_air_clr)],
+        [Paragraph(f"{air_comp['coverage']:.0f}%",
+                  PS("oa_cv",fontName="Helvetica-Bold",fontSize=11,textColor=CYAN_L)),
+         sp(3),
+         ProgressBar(air_comp['coverage'], AIR_BAR_W, height=7, clr=CYAN_L)],
+        [Paragraph(f"{air_comp['revision_depth']:.0f}%",
+                  PS("oa_rv",fontName="Helvetica-Bold",fontSize=11,textColor=GREEN)),
+         sp(3),
+         ProgressBar(air_comp['revision_depth'], AIR_BAR_W, height=7, clr=GREEN)],
+        [Paragraph(f"{air_comp['consistency']:.0f}%",
+                  PS("oa_cs",fontName="Helvetica-Bold",fontSize=11,textColor=GOLD)),
+         sp(3),
+         ProgressBar(air_comp['consistency'], AIR_BAR_W, height=7, clr=GOLD)],
+        [Paragraph(f"{air_comp.get('balance',0):.0f}%",
+                  PS("oa_bl",fontName="Helvetica-Bold",fontSize=11,textColor=PURPLE)),
+         sp(3),
+         ProgressBar(air_comp.get('balance',0), AIR_BAR_W, height=7, clr=PURPLE)],
+        Paragraph(air["label"],
+                  PS("oa_ll",fontName="Helvetica-Bold",fontSize=9,textColor=ov_air_clr)),
+    ]]
+    air_sum_t = Table(air_sum, colWidths=[W*0.18,W*0.15,W*0.15,W*0.15,W*0.15,W*0.22])
+    air_sum_t.setStyle(TableStyle([
+        ("BACKGROUND",    (0,0),(-1,0),  NAVY2),
+        ("BACKGROUND",    (0,1),(-1,1),  CARD2),
+        ("GRID",          (0,0),(-1,-1), 0.5, BORDER),
+        ("FONTNAME",      (0,0),(-1,0),  "Helvetica-Bold"),
+        ("VALIGN",        (0,0),(-1,-1), "MIDDLE"),
+        ("LEFTPADDING",   (0,0),(-1,-1), 8),
+        ("TOPPADDING",    (0,0),(-1,-1), 7),
+        ("BOTTOMPADDING", (0,0),(-1,-1), 10),
+        ("LINEABOVE",     (0,0),(-1,0),  2, ov_air_clr),
+    ]))
+    story.append(air_sum_t)
+    story.append(sp(8))
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # 5. RPI + ANALYTICS with graphical bars
+    # ══════════════════════════════════════════════════════════════════════════
+    story += sec("Readiness Probability Index (RPI) & Analytics")
+
+    frp_pct = frp * 100
+    ov_clr  = RED if ov_cnt > 0 else GREEN
+    COMP_BAR_W = W * 0.24
+
+    rpi_data = [[
+        # Card A: RPI score
+        [
+            Paragraph("RPI SCORE", S_LBL),
+            Paragraph(f"{rpi_val:.0f}",
+                      PS("rv",fontName="Helvetica-Bold",fontSize=30,textColor=WHITE,leading=34)),
+            Paragraph("/ 100", PS("r100",fontSize=8,textColor=MUTED)),
+            sp(4),
+            ProgressBar(rpi_val, W*0.20, height=10, clr=rpi_clr),
+            sp(3),
+            Paragraph(rpi["label"],
+                      PS("rl",fontName="Helvetica-Bold",fontSize=8,textColor=rpi_clr)),
+            Paragraph(f"Ret Density: {rden:.2f}  target: {rmile[1]:.1f}", S_SML),
+        ],
+        # Card B: components with bars
+        [
+            Paragraph("COMPONENTS", S_LBL),
+            sp(4),
+            Paragraph(f"Coverage:    {rcomp['coverage']:.0f}%",
+                      PS("rc1",fontName="Courier",fontSize=8,textColor=CYAN_L)),
+            ProgressBar(rcomp['coverage'], COMP_BAR_W, height=7, clr=CYAN_L),
+            sp(3),
+            Paragraph(f"Rev Depth:   {rcomp['revision_depth']:.0f}%",
+                      PS("rc2",fontName="Courier",fontSize=8,textColor=GREEN)),
+            ProgressBar(rcomp['revision_depth'], COMP_BAR_W, height=7, clr=GREEN),
+            sp(3),
+            Paragraph(f"Consistency: {rcomp['consistency']:.0f}%",
+                      PS("rc3",fontName="Courier",fontSize=8,textColor=GOLD)),
+            ProgressBar(rcomp['consistency'], COMP_BAR_W, height=7, clr=GOLD),
+            sp(3),
+            Paragraph(f"Exp Risk:    {rcomp['exposure_risk']:.0f}%",
+                      PS("rc4",fontName="Courier",fontSize=8,textColor=RED)),
+            ProgressBar(rcomp['exposure_risk'], COMP_BAR_W, height=7, clr=RED),
+        ],
+        # Card C: consistency
+        [
+            Paragraph("CONSISTENCY", S_LBL),
+            Paragraph(f"{cons['pct']:.0f}%",
+                      PS("cv",fontName="Helvetica-Bold",fontSize=26,textColor=cons_clr,leading=30)),
+            Paragraph("Execution Rate", PS("cle",fontSize=7,textColor=MUTED)),
+            sp(4),
+            ProgressBar(cons['pct'], W*0.20, height=10, clr=cons_clr),
+            sp(5),
+            Paragraph(f"{cons['days_studied']} days studied", S_SML),
+            Paragraph(f"of {cons['elapsed']} days elapsed",  S_SML),
+        ],
+        # Card D: FRP + overdue
+        [
+            Paragraph("SYLLABUS & OVERDUE", S_LBL),
+            sp(2),
+            Paragraph(f"{frp_pct:.0f}%",
+                      PS("fv",fontName="Helvetica-Bold",fontSize=22,textColor=CYAN_L,leading=26)),
+            Paragraph("First Read Progress", PS("fl",fontSize=7,textColor=MUTED)),
+            ProgressBar(frp_pct, W*0.22, height=9, clr=CYAN_L),
+            sp(5),
+            Paragraph(str(ov_cnt),
+                      PS("ov",fontName="Helvetica-Bold",fontSize=22,textColor=ov_clr,leading=26)),
+            Paragraph("Overdue Revisions" if ov_cnt > 0 else "All On Track",
+                      PS("ovl",fontName="Helvetica-Bold",fontSize=7,textColor=ov_clr)),
+            Paragraph(f"{comp_total}/{all_topics} topics done",
+                      PS("td",fontSize=7,textColor=MUTED)),
+        ],
+    ]]
+
+    rpi_t = Table(rpi_data, colWidths=[W*0.22, W*0.28, W*0.24, W*0.26])
+    rpi_ts = [
+        ("BACKGROUND",    (0,0),(-1,-1), CARD),
+        ("GRID",          (0,0),(-1,-1), 0.5, BORDER),
+        ("VALIGN",        (0,0),(-1,-1), "TOP"),
+        ("LEFTPADDING",   (0,0),(-1,-1), 9),
+        ("RIGHTPADDING",  (0,0),(-1,-1), 9),
+        ("TOPPADDING",    (0,0),(-1,-1), 9),
+        ("BOTTOMPADDING", (0,0),(-1,-1), 9),
+        ("LINEABOVE",     (0,0),(0,0),   3, rpi_clr),
+        ("LINEABOVE",     (1,0),(1,0),   3, CYAN),
+        ("LINEABOVE",     (2,0),(2,0),   3, cons_clr),
+        ("LINEABOVE",     (3,0),(3,0),   3, PURPLE),
+    ]
+    rpi_t.setStyle(TableStyle(rpi_ts))
+    story.append(rpi_t)
+    story.append(sp(8))
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # 6. REVISION PROGRESS — accurate: topics revised / topics completed
+    # ══════════════════════════════════════════════════════════════════════════
+    story += sec("Revision Progress by Subject")
+
+    rv_hdr = [[
+        Paragraph("Subject",        PS("rvh1",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
+        Paragraph("Completed",      PS("rvh2",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
+        Paragraph("Revised ≥1×",   PS("rvh3",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
+        Paragraph("Revision Depth", PS("rvh4",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
+        Paragraph("Overdue",        PS("rvh5",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
+        Paragraph("Coverage",       PS("rvh6",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
+    ]]
+    REV_BAR_W = W * 0.22
+    rv_cw = [W*0.22, W*0.10, W*0.11, W*0.10, W*0.10, REV_BAR_W + W*0.02]
+    rv_rows = []
+
+    for s in SUBJECTS:
+        s_comp    = comp_by_s.get(s, 0)
+        s_revised = topics_revised_by_subj.get(s, 0)
+        s_depth   = rev_depth_by_subj.get(s, 0.0)
+        # coverage = how many completed topics have been revised at least once
+        s_cov_pct = min(s_revised / s_comp * 100, 100) if s_comp > 0 else 0
+        s_ov      = int((pend[pend["subject"]==s]["days_overdue"] > 0).sum()) if not pend.empty else 0
+        clr       = SUBJ_CLR[s]
+        ov_c      = RED if s_ov > 0 else GREEN
+
+        rv_rows.append([
+            Paragraph(f'<b>{SUBJ_FULL[s]}</b>', PS(f"rvs{s}", fontSize=8.5, textColor=clr)),
+            Paragraph(f"{s_comp}", S_BODY),
+            Paragraph(f"{s_revised}/{s_comp}",
+                      PS(f"rvr{s}", fontName="Helvetica-Bold", fontSize=8,
+                         textColor=GREEN if s_revised == s_comp and s_comp > 0 else BODY)),
+            Paragraph(f"{s_depth:.0f}%",
+                      PS(f"rvd{s}", fontName="Helvetica-Bold", fontSize=8, textColor=clr)),
+            Paragraph(f"{'⚠ ' if s_ov>0 else ''}{s_ov}",
+                      PS(f"rvo{s}", fontName="Helvetica-Bold", fontSize=8, textColor=ov_c)),
+            ProgressBar(s_cov_pct, REV_BAR_W, height=9, clr=clr),
+        ])
+
+    rv_all = Table(rv_hdr + rv_rows, colWidths=rv_cw)
+    rv_all.setStyle(TableStyle([
+        ("BACKGROUND",    (0,0),(-1,0),  NAVY2),
+        ("BACKGROUND",    (0,1),(-1,-1), CARD),
+        ("ROWBACKGROUNDS",(0,1),(-1,-1), [CARD, CARD2]),
+        ("GRID",          (0,0),(-1,-1), 0.5, BORDER),
+        ("FONTNAME",      (0,0),(-1,0),  "Helvetica-Bold"),
+        ("TEXTCOLOR",     (0,0),(-1,0),  CYAN),
+        ("FONTSIZE",      (0,0),(-1,0),  7.5),
+        ("VALIGN",        (0,0),(-1,-1), "MIDDLE"),
+        ("LEFTPADDING",   (0,0),(-1,-1), 7),
+        ("RIGHTPADDING",  (0,0),(-1,-1), 7),
+        ("TOPPADDING",    (0,0),(-1,-1), 7),
+        ("BOTTOMPADDING", (0,0),(-1,-1), 7),
+        ("ALIGN",         (1,0),(4,-1),  "CENTER"),
+        ("LINEABOVE",     (0,0),(-1,0),  2, GREEN),
+    ]))
+    story.append(rv_all)
+    story.append(sp(8))
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # 7. DANGER ZONE
+    # ══════════════════════════════════════════════════════════════════════════
+    story += sec("Danger Zone — Needs Immediate Attention")
+
+    if not pend.empty:
+        overdue_df = pend[pend["days_overdue"] > 0].nlargest(10, "days_overdue")
+    else:
+        overdue_df = pd.DataFrame()
+
+    never_rev = pd.DataFrame()
+    if not rev.empty and "revision_count" in rev.columns and "topic_status" in rev.columns:
+        never_rev = rev[(rev["topic_status"]=="completed") & (rev["revision_count"]==0)]
+
+    if overdue_df.empty and never_rev.empty:
+        story.append(ctable(
+            [[Paragraph("All on track — no overdue revisions!", S_BODY)]], [W],
+            extras=[("LINEABOVE",(0,0),(-1,0),3,GREEN)]))
+    else:
+        if not overdue_df.empty:
+            story.append(Paragraph("Overdue Revisions", S_H3))
+            story.append(sp(3))
+            dz_hdr = [[
+                Paragraph("Topic",     PS("dzh1",fontName="Helvetica-Bold",fontSize=8,textColor=RED)),
+                Paragraph("Subject",   PS("dzh2",fontName="Helvetica-Bold",fontSize=8,textColor=RED)),
+                Paragraph("Round",     PS("dzh3",fontName="Helvetica-Bold",fontSize=8,textColor=RED)),
+                Paragraph("Days Late", PS("dzh4",fontName="Helvetica-Bold",fontSize=8,textColor=RED)),
+                Paragraph("Urgency",   PS("dzh5",fontName="Helvetica-Bold",fontSize=8,textColor=RED)),
+            ]]
+            dz_cw = [W*0.44,W*0.13,W*0.12,W*0.14,W*0.17]
+            dz_rows = []
+            for _, row in overdue_df.iterrows():
+                dov = int(row["days_overdue"])
+                urg = ("CRITICAL" if dov>14 else "HIGH" if dov>7 else "MEDIUM")
+                uc  = (RED if dov>14 else GOLD if dov>7 else ORANGE)
+                sc  = SUBJ_CLR.get(str(row["subject"]), BODY)
+                dz_rows.append([
+                    Paragraph(str(row["topic"])[:55], S_BODY),
+                    Paragraph(str(row["subject"]),
+                              PS(f"dzs{dov}", fontName="Helvetica-Bold", fontSize=8, textColor=sc)),
+                    Paragraph(str(row["round_label"]), S_BODY),
+                    Paragraph(f"{dov}d",
+                              PS(f"dzd{dov}", fontName="Helvetica-Bold", fontSize=9, textColor=uc)),
+                    Paragraph(urg,
+                              PS(f"dzu{dov}", fontName="Helvetica-Bold", fontSize=7.5, textColor=uc)),
+                ])
+            dz_t = Table(dz_hdr+dz_rows, colWidths=dz_cw)
+            dz_t.setStyle(TableStyle([
+                ("BACKGROUND",    (0,0),(-1,0),  DKRED),
+                ("BACKGROUND",    (0,1),(-1,-1), DKRED2),
+                ("ROWBACKGROUNDS",(0,1),(-1,-1), [DKRED2, _hex("#120404")]),
+                ("GRID",          (0,0),(-1,-1), 0.5, _hex("#3A1010")),
+                ("TEXTCOLOR",     (0,1),(-1,-1), LTRED),
+                ("FONTNAME",      (0,0),(-1,0),  "Helvetica-Bold"),
+                ("VALIGN",        (0,0),(-1,-1), "MIDDLE"),
+                ("LEFTPADDING",   (0,0),(-1,-1), 7),
+                ("RIGHTPADDING",  (0,0),(-1,-1), 7),
+                ("TOPPADDING",    (0,0),(-1,-1), 6),
+                ("BOTTOMPADDING", (0,0),(-1,-1), 6),
+                ("ALIGN",         (1,0),(-1,-1), "CENTER"),
+                ("LINEABOVE",     (0,0),(-1,0),  3, RED),
+            ]))
+            story.append(dz_t)
+            story.append(sp(6))
+
+        if not never_rev.empty:
+            story.append(Paragraph("Completed Topics — Never Revised", S_H3))
+            story.append(sp(3))
+            nr_hdr = [[
+                Paragraph("Topic",   PS("nrh1",fontName="Helvetica-Bold",fontSize=8,textColor=GOLD)),
+                Paragraph("Subject", PS("nrh2",fontName="Helvetica-Bold",fontSize=8,textColor=GOLD)),
+            ]]
+            nr_rows = []
+            for _, row in never_rev.head(10).iterrows():
+                sc = SUBJ_CLR.get(str(row.get("subject","")), BODY)
+                nr_rows.append([
+                    Paragraph(str(row.get("topic",""))[:65], S_BODY),
+                    Paragraph(str(row.get("subject","")),
+                              PS(f"nrs_{row.get('subject','')}", fontName="Helvetica-Bold",
+                                 fontSize=8, textColor=sc)),
+                ])
+            nr_t = Table(nr_hdr+nr_rows, colWidths=[W*0.72,W*0.28])
+            nr_t.setStyle(TableStyle([
+                ("BACKGROUND",    (0,0),(-1,0),  _hex("#2A1A00")),
+                ("BACKGROUND",    (0,1),(-1,-1), _hex("#140E00")),
+                ("ROWBACKGROUNDS",(0,1),(-1,-1), [_hex("#140E00"),_hex("#0E0900")]),
+                ("GRID",          (0,0),(-1,-1), 0.5, _hex("#3A2800")),
+                ("TEXTCOLOR",     (0,1),(-1,-1), _hex("#FFD580")),
+                ("VALIGN",        (0,0),(-1,-1), "MIDDLE"),
+                ("LEFTPADDING",   (0,0),(-1,-1), 7),
+                ("TOPPADDING",    (0,0),(-1,-1), 6),
+                ("BOTTOMPADDING", (0,0),(-1,-1), 6),
+                ("LINEABOVE",     (0,0),(-1,0),  3, GOLD),
+            ]))
+            story.append(nr_t)
+
+    story.append(sp(8))
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # 8. TEST SCORES
+    # ══════════════════════════════════════════════════════════════════════════
+    story += sec("Test Score History")
+
+    if tst.empty:
+        story.append(ctable([[Paragraph("No test scores logged yet.", S_BODY)]], [W]))
+    else:
+        ts_hdr = [[
+            Paragraph("Date",      PS("tsh1",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
+            Paragraph("Subject",   PS("tsh2",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
+            Paragraph("Test Name", PS("tsh3",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
+            Paragraph("Marks",     PS("tsh4",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
+            Paragraph("Score",     PS("tsh5",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
+            Paragraph("Bar",       PS("tsh6",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
+        ]]
+        SCORE_BAR_W = W * 0.14
+        ts_cw = [W*0.11, W*0.09, W*0.34, W*0.13, W*0.11, SCORE_BAR_W + W*0.02]
+        ts_rows = []
+        for _, row in tst.sort_values("date", ascending=False).iterrows():
+            sc   = float(row.get("score_pct", 0))
+            sc_c = (GREEN if sc >= 60 else GOLD if sc >= 40 else RED)
+            sc2  = SUBJ_CLR.get(str(row.get("subject","")), BODY)
+            ts_rows.append([
+                Paragraph(str(row["date"])[:10], S_BODY),
+                Paragraph(str(row.get("subject","")),
+                          PS(f"tss{sc:.0f}", fontName="Helvetica-Bold", fontSize=8, textColor=sc2)),
+                Paragraph(str(row.get("test_name",""))[:40], S_BODY),
+                Paragraph(f"{row.get('marks','')}/{row.get('max_marks','')}", S_BODY),
+                Paragraph(f"{sc:.0f}%",
+                          PS(f"tsv{sc:.0f}", fontName="Helvetica-Bold", fontSize=9, textColor=sc_c)),
+                ProgressBar(sc, SCORE_BAR_W, height=8, clr=sc_c),
+            ])
+        ts_t = Table(ts_hdr+ts_rows, colWidths=ts_cw)
+        ts_t.setStyle(TableStyle([
+            ("BACKGROUND",    (0,0),(-1,0),  NAVY2),
+            ("BACKGROUND",    (0,1),(-1,-1), CARD),
+            ("ROWBACKGROUNDS",(0,1),(-1,-1), [CARD,CARD2]),
+            ("GRID",          (0,0),(-1,-1), 0.5, BORDER),
+            ("FONTNAME",      (0,0),(-1,0),  "Helvetica-Bold"),
+            ("TEXTCOLOR",     (0,0),(-1,0),  CYAN),
+            ("FONTSIZE",      (0,0),(-1,0),  7.5),
+            ("VALIGN",        (0,0),(-1,-1), "MIDDLE"),
+            ("LEFTPADDING",   (0,0),(-1,-1), 7),
+            ("RIGHTPADDING",  (0,0),(-1,-1), 7),
+            ("TOPPADDING",    (0,0),(-1,-1), 6),
+            ("BOTTOMPADDING", (0,0),(-1,-1), 6),
+            ("ALIGN",         (1,0),(4,-1),  "CENTER"),
+            ("LINEABOVE",     (0,0),(-1,0),  2, CYAN),
+        ]))
+        story.append(ts_t)
+        story.append(sp(4))
+
+        scores_list = [float(r.get("score_pct",0)) for _,r in tst.iterrows()]
+        best   = max(scores_list); worst = min(scores_list)
+        passed = sum(1 for s in scores_list if s>=60)
+        stat_data = [[
+            Paragraph(f"Tests: {len(ts_rows)}", PS("st1",fontName="Helvetica-Bold",fontSize=8,textColor=BODY)),
+            Paragraph(f"Best: {best:.0f}%",    PS("st2",fontName="Helvetica-Bold",fontSize=8,textColor=GREEN)),
+            Paragraph(f"Worst: {worst:.0f}%",  PS("st3",fontName="Helvetica-Bold",fontSize=8,textColor=RED)),
+            Paragraph(f"Passed: {passed}/{len(ts_rows)}",
+                      PS("st4",fontName="Helvetica-Bold",fontSize=8,
+                         textColor=(GREEN if passed==len(ts_rows) else GOLD))),
+            Paragraph(f"Average: {avg_score:.1f}%",
+                      PS("st5",fontName="Helvetica-Bold",fontSize=8,textColor=sc_clr)),
+        ]]
+        stat_t = Table(stat_data, colWidths=[W*0.2]*5)
+        stat_t.setStyle(TableStyle([
+            ("BACKGROUND",    (0,0),(-1,-1), CARD2),
+            ("GRID",          (0,0),(-1,-1), 0.5, BORDER),
+            ("LEFTPADDING",   (0,0),(-1,-1), 8),
+            ("TOPPADDING",    (0,0),(-1,-1), 6),
+            ("BOTTOMPADDING", (0,0),(-1,-1), 6),
+            ("VALIGN",        (0,0),(-1,-1), "MIDDLE"),
+        ]))
+        story.append(stat_t)
+
+    story.append(sp(8))
+
+    # ══════════════════════════════════════════════════════════════════════════
+    # 9. CGSM REVISION GAP SCHEDULE
+    # ══════════════════════════════════════════════════════════════════════════
+    story += sec("CGSM Revision Gap Schedule")
+
+    cfg_data = [[
+        Paragraph(f"R1 Gap: {g1}d",      S_MONO),
+        Paragraph(f"R2 Gap: {g2}d",      S_MONO),
+        Paragraph(f"Growth: {gf}x",      S_MONO),
+        Paragraph(f"Max Cap: {mgap}d",   S_MONO),
+        Paragraph(f"Mode: {prof.get('prep_mode','clearance').upper()}", S_MONO),
+    ]]
+    cfg_t = Table(cfg_data, colWidths=[W/5]*5)
+    cfg_t.setStyle(TableStyle([
+        ("BACKGROUND",    (0,0),(-1,-1), CARD2),
+        ("GRID",          (0,0),(-1,-1), 0.5, BORDER),
+        ("LEFTPADDING",   (0,0),(-1,-1), 8),
+        ("TOPPADDING",    (0,0),(-1,-1), 7),
+        ("BOTTOMPADDING", (0,0),(-1,-1), 7),
+        ("VALIGN",        (0,0),(-1,-1), "MIDDLE"),
+    ]))
+    story.append(cfg_t)
+    story.append(sp(5))
+
+    gap_clrs = [CYAN if g<30 else GOLD if g<60 else ORANGE for g in gaps]
+    GAP_BAR_W = W / max(len(gaps), 1) - 14
+    gap_cells = []
+    for i,(g,gc) in enumerate(zip(gaps,gap_clrs)):
+        gap_cells.append([
+            Paragraph(f"R{i+1}", PS(f"gr{i}",fontName="Helvetica-Bold",fontSize=9,textColor=gc,alignment=TA_CENTER)),
+            Paragraph(str(g),    PS(f"gv{i}",fontName="Helvetica-Bold",fontSize=20,textColor=WHITE,leading=24,alignment=TA_CENTER)),
+            Paragraph("days",    PS(f"gd{i}",fontSize=7,textColor=MUTED,alignment=TA_CENTER)),
+            sp(2),
+            ProgressBar(min(g/mgap*100,100), GAP_BAR_W, height=6, clr=gc),
+        ])
+
+    gap_t = Table([gap_cells], colWidths=[W/len(gaps)]*len(gaps))
+    gap_ts = [
+        ("BACKGROUND",    (0,0),(-1,-1), CARD),
+        ("GRID",          (0,0),(-1,-1), 0.5, BORDER),
+        ("VALIGN",        (0,0),(-1,-1), "TOP"),
+        ("TOPPADDING",    (0,0),(-1,-1), 9),
+        ("BOTTOMPADDING", (0,0),(-1,-1), 9),
+        ("LEFTPADDING",   (0,0),(-1,-1), 7),
+        ("RIGHTPADDING",  (0,0),(-1,-1), 7),
+    ]
+    for i,gc in enumerate(gap_clrs):
+        gap_ts.append(("LINEABOVE",(i,0),(i,0),3,gc))
+    gap_t.setStyle(TableStyle(gap_ts))
+    story.append(gap_t)
+    story.append(sp(5))
+    story.append(Paragraph(
+        "  →  ".join([f"R{i+1}: {g}d" for i,g in enumerate(gaps)]),
+        S_MONO))
+
+    # ── Build ──────────────────────────────────────────────────────────────────
+    _step(0.75, "Rendering pages…")
+    buf = io.BytesIO()
+    doc = SimpleDocTemplate(buf, pagesize=A4,
+                             leftMargin=LM, rightMargin=RM,
+                             topMargin=TM,  bottomMargin=BM)
+    doc.build(story, onFirstPage=dark_page, onLaterPages=dark_page)
+    buf.seek(0)
+    return buf.read()
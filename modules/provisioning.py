@@ -0,0 +1,169 @@
+"""
+provisioning.py — StudyTracker
+Background account provisioning after signup:
+  - profile upsert + revision_tracker seeding run on a small process-wide
+    thread pool, never in the script thread
+  - retries use exponential backoff with full jitter (FK race while the
+    auth.users row commits, transient network errors)
+  - tracker rows are seeded with ONE bulk upsert per attempt
+  - the UI polls the job by user id from session_state
+"""
+
+from __future__ import annotations
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from modules.query_trace import begin_fragment_run
+
+PROVISION_WORKERS   = 2
+PROFILE_ATTEMPTS    = 8
+SEED_ATTEMPTS       = 6
+BACKOFF_BASE        = 0.5    # seconds — first retry waits up to this
+BACKOFF_CAP         = 8.0    # seconds — no single wait exceeds this
+JOB_RETENTION_SEC   = 3600
+
+RLS_HINT = (
+    "❌ Database permission error (RLS policy blocked the insert).\n\n"
+    "**To fix:** Run `fix_rls_signup.sql` in Supabase → SQL Editor, "
+    "then try signing up again."
+)
+
+
+@st.cache_resource
+def _prov_state() -> dict:
+    """Shared across all sessions of this server process."""
+    return {
+        "pool": ThreadPoolExecutor(max_workers=PROVISION_WORKERS,
+                                   thread_name_prefix="provision"),
+        "lock": threading.Lock(),
+        "jobs": {},   # user_id → job dict
+    }
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff: uniform(0, min(cap, base·2^attempt))."""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+
+def _is_rls_error(e: Exception) -> bool:
+    s = str(e)
+    return "42501" in s or "row-level security" in s.lower()
+
+
+def _retry(job: dict, stage: str, attempts: int, fn):
+    """Run fn() until it succeeds; RLS errors are not retried."""
+    for attempt in range(attempts):
+        job["stage"], job["attempt"] = stage, attempt + 1
+        try:
+            return fn()
+        except Exception as e:
+            if _is_rls_error(e):
+                raise
+            if attempt == attempts - 1:
+                raise
+            time.sleep(backoff_delay(attempt))
+
+
+def _run_provisioning(job: dict, sb_admin, profile: dict, rows: list[dict]):
+    job["status"] = "running"
+    try:
+        _retry(job, "Creating profile", PROFILE_ATTEMPTS,
+               lambda: sb_admin.table("profiles").upsert(profile).execute())
+        job["progress"] = 0.5
+        try:
+            _retry(job, "Preparing revision tracker", SEED_ATTEMPTS,
+                   lambda: sb_admin.table("revision_tracker")
+                                   .upsert(rows, on_conflict="user_id,subject,topic")
+                                   .execute())
+        except Exception as e:
+            # Non-fatal — tracker rows are re-seeded lazily on first use
+            job["warning"] = f"Revision tracker not seeded: {e}"
+        job.update(status="done", progress=1.0, stage="Ready")
+    except Exception as e:
+        job.update(status="error", stage="Failed",
+                   error=RLS_HINT if _is_rls_error(e) else
+                   f"Profile setup failed after retries — please contact admin. ({e})")
+    finally:
+        job["finished"] = time.time()
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PUBLIC API
+# ══════════════════════════════════════════════════════════════════════════════
+
+def start_provisioning(sb_admin, profile: dict, topics: dict) -> str:
+    """
+    Queue profile + tracker setup for profile["id"] and return immediately.
+    A job already queued/running for the same user is reused.
+    `topics` is snapshotted here, on the caller's thread — the app passes the
+    live TOPICS dict, which a concurrent login may clear and refill.
+    """
+    state   = _prov_state()
+    uid     = profile["id"]
+    profile = dict(profile)
+    topics  = {s: list(tlist) for s, tlist in topics.items()}
+    rows    = [{"user_id": uid, "subject": s, "topic": t}
+               for s, tlist in topics.items() for t in tlist]
+    with state["lock"]:
+        cutoff = time.time() - JOB_RETENTION_SEC
+        for k in [k for k, j in state["jobs"].items()
+                  if j["status"] in ("done", "error") and j["finished"] < cutoff]:
+            state["jobs"].pop(k, None)
+        cur = state["jobs"].get(uid)
+        if cur and cur["status"] in ("queued", "running"):
+            return uid
+        job = {
+            "id": uid, "status": "queued", "stage": "Queued", "progress": 0.0,
+            "attempt": 0, "error": "", "warning": "", "started": time.time(),
+            "finished": 0.0, "args": (profile, topics),
+        }
+        state["jobs"][uid] = job
+    state["pool"].submit(_run_provisioning, job, sb_admin, profile, rows)
+    return uid
+
+
+def get_provisioning(user_id: str) -> dict | None:
+    """Snapshot of the user's provisioning job, or None if unknown/expired."""
+    job = _prov_state()["jobs"].get(user_id)
+    return dict(job) if job else None
+
+
+def retry_provisioning(sb_admin, user_id: str) -> bool:
+    """Re-queue a failed job with its original arguments. False if unknown."""
+    job = get_provisioning(user_id)
+    if not job or job["status"] != "error":
+        return False
+    start_provisioning(sb_admin, *job["args"])
+    return True
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# UI — status poller
+# ══════════════════════════════════════════════════════════════════════════════
+
+@st.fragment(run_every=1)
+def _poll_provisioning(user_id: str):
+    """Re-runs only this fragment every second until the job finishes."""
+    begin_fragment_run("poll.provisioning")
+    job = get_provisioning(user_id)
+    if job is None or job["status"] in ("done", "error"):
+        st.rerun()   # full rerun swaps the poller for the final message
+    suffix = f" (attempt {job['attempt']})" if job["attempt"] > 1 else ""
+    st.progress(job["progress"], text=f"⚙️ {job['stage']}…{suffix}")
+
+
+def render_provisioning_status(user_id: str):
+    """Progress while setting up, then a ready / error line."""
+    job = get_provisioning(user_id)
+    if job is None:
+        return
+    if job["status"] == "error":
+        st.error(job["error"])
+    elif job["status"] == "done":
+        st.caption("✅ Your study workspace is ready.")
+    else:
+        _poll_provisioning(user_id)
@@ -0,0 +1,311 @@
+"""
+query_trace.py — StudyTracker
+Per-rerun database query tracer:
+  - trace_client(sb) wraps a supabase (or local_db) client; every
+    .table(…)…execute() and .rpc(…).execute() is recorded with table,
+    operation, filters, row count, latency and the calling app line
+  - queries are grouped per script run in session_state; begin_run() at the
+    top of the script closes the previous run and starts a new one, and
+    begin_fragment_run() does the same at the top of a fragment that reruns
+    on its own (pollers), so those queries aren't charged to the full rerun
+  - each closed run is logged as one JSON line (logger "studytracker.queries")
+    and kept in a small process-wide ring for the admin Diagnostics tab
+  - QUERY_BUDGET (secrets or STUDYTRACKER_QUERY_BUDGET) logs a warning for any
+    rerun that issues more queries than the budget; QUERY_TRACE = "off"
+    disables tracing entirely (clients are returned unwrapped)
+Background threads (provisioning, PDF jobs) have no script run: their
+queries go to the DEBUG log only.
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+import streamlit as st
+
+RECENT_RUNS   = 200    # closed runs kept process-wide for the admin view
+_MAX_VALUE    = 60     # characters of a filter value kept in the trace
+_APP_ROOT     = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_TRACE_KEY    = "_query_trace"
+_LAST_KEY     = "_query_trace_last"
+_VERBS        = ("select", "insert", "upsert", "update", "delete", "rpc")
+
+log = logging.getLogger("studytracker.queries")
+
+
+def _setting(key: str, default=None):
+    """STUDYTRACKER_<key> env var, then st.secrets[key], then default."""
+    env = os.environ.get(f"STUDYTRACKER_{key}")
+    if env is not None:
+        return env
+    try:
+        return st.secrets.get(key, default)
+    except Exception:
+        return default
+
+
+def tracing_enabled() -> bool:
+    return str(_setting("QUERY_TRACE", "on")).lower() not in ("off", "0", "false", "no")
+
+
+def query_budget() -> int:
+    """Max queries per rerun before a warning is logged (0 = no budget)."""
+    try:
+        return int(_setting("QUERY_BUDGET", 0) or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+@st.cache_resource
+def _trace_state() -> dict:
+    """Shared across all sessions of this server process."""
+    if not log.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+        log.addHandler(handler)
+        log.propagate = False
+    log.setLevel(str(_setting("QUERY_LOG_LEVEL", "WARNING")).upper())
+    return {"lock": threading.Lock(), "recent": deque(maxlen=RECENT_RUNS)}
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# RECORDING
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _short(v) -> str:
+    s = repr(v)
+    return s if len(s) <= _MAX_VALUE else s[:_MAX_VALUE - 1] + "…"
+
+
+def _caller() -> str:
+    """First app frame outside this module: 'streamlit_app.py:5812 get_logs'."""
+    f = sys._getframe(1)
+    while f is not None:
+        fn = f.f_code.co_filename
+        if fn.startswith(_APP_ROOT) and not fn.endswith("query_trace.py"):
+            return f"{os.path.relpath(fn, _APP_ROOT)}:{f.f_lineno} {f.f_code.co_name}"
+        f = f.f_back
+    return "?"
+
+
+def _current_run() -> dict | None:
+    """This session's open run, or None outside a script thread."""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    try:
+        return st.session_state.get(_TRACE_KEY)
+    except Exception:
+        return None
+
+
+def _record(entry: dict) -> None:
+    run = _current_run()
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug(json.dumps({"event": "query", **{k: v for k, v in entry.items()
+                                                    if k != "fingerprint"}}))
+    if run is None:
+        return
+    run["queries"].append(entry)
+    budget = run["budget"]
+    if budget and len(run["queries"]) == budget + 1:
+        log.warning(json.dumps({"event": "query_budget_exceeded", "budget": budget,
+                                "session": run["session"], "caller": entry["caller"]}))
+
+
+class _TracedQuery:
+    """Proxy over a postgrest request builder; records the chain, times execute()."""
+
+    __slots__ = ("_inner", "_table", "_client", "_calls")
+
+    def __init__(self, inner, table: str, client: str, calls: tuple = ()):
+        self._inner, self._table, self._client, self._calls = inner, table, client, calls
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+        if not callable(attr):
+            return attr
+
+        def _chain(*args, **kwargs):
+            return _TracedQuery(attr(*args, **kwargs), self._table, self._client,
+                                self._calls + ((name, args, kwargs),))
+        return _chain
+
+    def execute(self):
+        t0, res, error = time.perf_counter(), None, ""
+        try:
+            res = self._inner.execute()
+            return res
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            ms = (time.perf_counter() - t0) * 1000
+            data = getattr(res, "data", None)
+            rows = len(data) if isinstance(data, list) else (0 if data is None else 1)
+            op = next((n for n, _, _ in self._calls if n in _VERBS), "select")
+            filters = " ".join(f"{n}({_short(a[0]) if a else ''})" for n, a, _ in self._calls
+                               if n not in _VERBS)
+            _record({
+                "client":      self._client,
+                "table":       self._table,
+                "op":          op,
+                "filters":     filters,
+                "rows":        rows,
+                "count":       getattr(res, "count", None),
+                "ms":          round(ms, 2),
+                "error":       error,
+                "caller":      _caller(),
+                "fingerprint": hashlib.sha1(repr((self._table, self._calls)).encode(),
+                                            usedforsecurity=False).hexdigest()[:12],
+            })
+
+
+class TracedClient:
+    """Wraps a supabase Client; table()/from_()/rpc() are traced, the rest passes through."""
+
+    def __init__(self, client, label: str):
+        self._client, self._label = client, label
+
+    def table(self, name: str) -> _TracedQuery:
+        return _TracedQuery(self._client.table(name), name, self._label)
+
+    from_ = table
+
+    def rpc(self, fn: str, params: dict | None = None, **kwargs) -> _TracedQuery:
+        return _TracedQuery(self._client.rpc(fn, params or {}, **kwargs), f"rpc:{fn}",
+                            self._label, (("rpc", (fn,), {}),))
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def trace_client(client, label: str):
+    """The client wrapped for tracing, or unchanged when QUERY_TRACE is off."""
+    if client is None or not tracing_enabled() or isinstance(client, TracedClient):
+        return client
+    return TracedClient(client, label)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# RUN BOUNDARIES + SUMMARIES
+# ══════════════════════════════════════════════════════════════════════════════
+
+def summarize(run: dict) -> dict:
+    """Totals for one run: queries, ms, rows, per-table counts, duplicate requests."""
+    qs = run["queries"]
+    by_table: dict = {}
+    seen: dict = {}
+    for q in qs:
+        by_table[q["table"]] = by_table.get(q["table"], 0) + 1
+        seen[q["fingerprint"]] = seen.get(q["fingerprint"], 0) + 1
+    return {
+        "session":    run["session"],
+        "fragment":   run.get("fragment") or "",
+        "started":    run["started"],
+        "queries":    len(qs),
+        "ms":         round(sum(q["ms"] for q in qs), 1),
+        "rows":       sum(q["rows"] for q in qs),
+        "errors":     sum(1 for q in qs if q["error"]),
+        "duplicates": sum(n - 1 for n in seen.values() if n > 1),
+        "by_table":   dict(sorted(by_table.items(), key=lambda kv: -kv[1])),
+        "budget":     run["budget"],
+        "over_budget": bool(run["budget"]) and len(qs) > run["budget"],
+    }
+
+
+def begin_run(fragment: str | None = None) -> None:
+    """Close this session's previous run (log + keep it) and open a new one."""
+    if not tracing_enabled():
+        return
+    state = _trace_state()
+    prev  = st.session_state.get(_TRACE_KEY)
+    if prev is not None and prev["queries"]:
+        summary = summarize(prev)
+        log.info(json.dumps({"event": "rerun_queries", **summary}))
+        if not prev.get("fragment"):           # the detail view is for full reruns
+            st.session_state[_LAST_KEY] = {"summary": summary, "queries": prev["queries"]}
+        with state["lock"]:
+            state["recent"].append(summary)
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx(suppress_warning=True)
+    st.session_state[_TRACE_KEY] = {
+        "session":  (ctx.session_id[:8] if ctx else "-"),
+        "fragment": fragment,
+        "started":  time.time(),
+        "budget":   query_budget(),
+        "queries":  [],
+    }
+
+
+def begin_fragment_run(name: str) -> None:
+    """
+    Call first thing in an @st.fragment body. On a fragment-only rerun
+    (run_every / a widget inside it) this opens a run of its own; when the
+    fragment executes as part of a full rerun it is a no-op.
+    """
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is not None and getattr(ctx, "fragment_ids_this_run", None):
+        begin_run(fragment=name)
+
+
+def current_queries() -> list[dict]:
+    run = st.session_state.get(_TRACE_KEY)
+    return list(run["queries"]) if run else []
+
+
+def recent_runs() -> list[dict]:
+    state = _trace_state()
+    with state["lock"]:
+        return list(state["recent"])
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# UI — admin Diagnostics tab
+# ══════════════════════════════════════════════════════════════════════════════
+
+def render_query_trace_panel():
+    """Last completed rerun of this session in detail + recent reruns process-wide."""
+    import pandas as pd
+
+    st.markdown("#### 🔎 Database queries per rerun")
+    if not tracing_enabled():
+        st.info("Query tracing is off (QUERY_TRACE = \"off\").")
+        return
+    last = st.session_state.get(_LAST_KEY)
+    if not last:
+        st.caption("No completed rerun traced yet — interact with the app and come back.")
+    else:
+        s = last["summary"]
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Queries", s["queries"],
+                  help=f"Budget {s['budget']}" if s["budget"] else "No QUERY_BUDGET set")
+        c2.metric("DB time", f"{s['ms']:.0f} ms")
+        c3.metric("Rows", s["rows"])
+        c4.metric("Duplicates", s["duplicates"])
+        if s["over_budget"]:
+            st.warning(f"⚠️ Previous rerun issued {s['queries']} queries — budget is {s['budget']}.")
+        df = pd.DataFrame(last["queries"])
+        df["dup"] = df.duplicated("fingerprint", keep=False)
+        st.dataframe(df[["client", "table", "op", "filters", "rows", "ms", "caller", "dup", "error"]],
+                     use_container_width=True, hide_index=True)
+        st.download_button("⬇️ Download trace (JSON)",
+                           json.dumps(last, default=str, indent=1),
+                           file_name="query_trace.json", mime="application/json",
+                           key="qtrace_dl")
+
+    runs = recent_runs()
+    if runs:
+        st.markdown(f"**Recent reruns (all sessions, last {len(runs)})**")
+        rdf = pd.DataFrame(runs)
+        rdf["started"] = pd.to_datetime(rdf["started"], unit="s").dt.strftime("%H:%M:%S")
+        st.dataframe(rdf[["started", "session", "fragment", "queries", "ms", "rows", "duplicates",
+                          "errors", "over_budget"]].iloc[::-1],
+                     use_container_width=True, hide_index=True)
@@ -0,0 +1,214 @@
+"""
+referrals.py — StudyTracker
+Referral lookups backed by indexed, server-side queries:
+  - code → referrer email + status in one round trip (referral_code_lookup view)
+  - small in-process cache so repeated signups with the same code skip the DB
+  - per-code used / validated / pending counts aggregated by the database
+    (referral_code_stats view, referral_totals() RPC)
+  - paginated recent-uses feed — payload size independent of table size
+"""
+
+from __future__ import annotations
+import threading
+import time
+import streamlit as st
+
+
+def _sb():
+    """Return sb_admin from Streamlit session — injected at app startup."""
+    return st.session_state.get("_sb_admin")
+
+
+# ── Schema (run once in Supabase SQL editor) ──────────────────────────────────
+REFERRAL_SQL = """
+-- referral_codes.code is UNIQUE (btree index) and profiles.id is the PK;
+-- this covers the remaining join key
+create index if not exists approved_emails_email_idx on approved_emails (email);
+
+-- code → referrer in one indexed lookup (service role only)
+create or replace view referral_code_lookup as
+select rc.code,
+       rc.user_id,
+       lower(p.email)                    as referrer_email,
+       coalesce(ae.status, 'unknown')    as referrer_status
+from referral_codes rc
+left join profiles        p  on p.id     = rc.user_id
+left join approved_emails ae on ae.email = lower(p.email);
+
+revoke all on referral_code_lookup from anon, authenticated;
+
+-- aggregated stats: feeds the user's referral card and the admin tab
+create index if not exists referral_uses_code_idx    on referral_uses (referral_code);
+create index if not exists referral_uses_used_at_idx on referral_uses (used_at desc);
+
+create or replace view referral_code_stats as
+select rc.code,
+       rc.user_id,
+       rc.created_at,
+       count(ru.id)                                           as used,
+       count(ru.id) filter (where ru.validated)               as validated,
+       count(ru.id) filter (where not coalesce(ru.validated, false)) as pending
+from referral_codes rc
+left join referral_uses ru on ru.referral_code = rc.code
+group by rc.code, rc.user_id, rc.created_at;
+
+revoke all on referral_code_stats from anon, authenticated;
+
+create or replace function referral_totals()
+returns table (codes bigint, uses bigint, validated bigint, pending bigint)
+language sql stable security definer as $$
+  select (select count(*) from referral_codes),
+         count(*),
+         count(*) filter (where validated),
+         count(*) filter (where not coalesce(validated, false))
+  from referral_uses;
+$$;
+"""
+
+REFERRAL_CACHE_TTL = 600   # seconds a resolved code is reused in-process
+
+
+@st.cache_resource
+def _referral_cache() -> dict:
+    """Process-wide code → (resolved_at, info) map shared by all sessions."""
+    return {"lock": threading.Lock(), "codes": {}}
+
+
+def invalidate_referral_code(code: str = None):
+    """Forget one cached code (or all) — call when codes are created/changed."""
+    cache = _referral_cache()
+    with cache["lock"]:
+        if code is None:
+            cache["codes"].clear()
+        else:
+            cache["codes"].pop(code.strip().upper(), None)
+
+
+def _lookup_referral_code(code: str) -> dict | None:
+    """
+    One round trip via the view. Falls back to referral_codes + auth admin
+    (two trips) when the view is not migrated yet or the profile has no email.
+    """
+    sb = _sb()
+    try:
+        res = sb.table("referral_code_lookup") \
+                .select("code,user_id,referrer_email,referrer_status") \
+                .eq("code", code).limit(1).execute()
+        if not res.data:
+            return None
+        info = res.data[0]
+        if info.get("referrer_email"):
+            return info
+        user_id = info["user_id"]
+    except Exception:
+        res = sb.table("referral_codes").select("user_id").eq("code", code).limit(1).execute()
+        if not res.data:
+            return None
+        user_id = res.data[0]["user_id"]
+        info = {"code": code, "user_id": user_id, "referrer_status": "unknown"}
+
+    try:
+        auth_user = sb.auth.admin.get_user_by_id(user_id)
+        email = auth_user.user.email if auth_user.user else ""
+    except Exception:
+        email = ""
+    info["referrer_email"] = (email or "").lower()
+    return info
+
+
+def resolve_referral_code(code: str) -> dict | None:
+    """
+    code → {code, user_id, referrer_email, referrer_status}, or None if the
+    code does not exist. Cached per process for REFERRAL_CACHE_TTL; unknown
+    codes are not cached so a freshly created code resolves immediately.
+    Raises on DB errors so the caller can report them.
+    """
+    code_clean = code.strip().upper()
+    cache = _referral_cache()
+    hit = cache["codes"].get(code_clean)
+    if hit and time.time() - hit[0] < REFERRAL_CACHE_TTL:
+        return hit[1]
+
+    info = _lookup_referral_code(code_clean)
+    if info and info.get("referrer_email"):
+        with cache["lock"]:
+            cache["codes"][code_clean] = (time.time(), info)
+    return info
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# AGGREGATED STATS — counted in the database, never in Python
+# ══════════════════════════════════════════════════════════════════════════════
+REFERRAL_PAGE_SIZE = 25
+_EMPTY_STATS = {"code": None, "used": 0, "validated": 0, "pending": 0}
+
+
+def _count(query) -> int:
+    """Exact row count of a filtered select(…, count="exact") query."""
+    return query.limit(1).execute().count or 0
+
+
+def get_code_stats(user_id: str) -> dict:
+    """
+    {code, used, validated, pending} for the user's referral code.
+    One view read; falls back to exact-count queries before migration.
+    """
+    sb = _sb()
+    try:
+        res = sb.table("referral_code_stats").select("code,used,validated,pending") \
+                .eq("user_id", user_id).limit(1).execute()
+        return res.data[0] if res.data else dict(_EMPTY_STATS)
+    except Exception:
+        pass
+    res = sb.table("referral_codes").select("code").eq("user_id", user_id).limit(1).execute()
+    if not res.data:
+        return dict(_EMPTY_STATS)
+    code = res.data[0]["code"]
+    used = _count(sb.table("referral_uses").select("id", count="exact").eq("referral_code", code))
+    val  = _count(sb.table("referral_uses").select("id", count="exact")
+                    .eq("referral_code", code).eq("validated", True))
+    return {"code": code, "used": used, "validated": val, "pending": used - val}
+
+
+def get_referral_totals() -> dict:
+    """Programme-wide {codes, uses, validated, pending}."""
+    sb = _sb()
+    try:
+        res = sb.rpc("referral_totals", {}).execute()
+        if res.data:
+            return res.data[0]
+    except Exception:
+        pass
+    uses = _count(sb.table("referral_uses").select("id", count="exact"))
+    val  = _count(sb.table("referral_uses").select("id", count="exact").eq("validated", True))
+    return {
+        "codes":     _count(sb.table("referral_codes").select("id", count="exact")),
+        "uses":      uses,
+        "validated": val,
+        "pending":   uses - val,
+    }
+
+
+def get_code_stats_page(page: int = 0, page_size: int = REFERRAL_PAGE_SIZE) -> tuple[list[dict], int]:
+    """Per-code stats, most-used first. Returns (rows, total_codes)."""
+    lo = page * page_size
+    res = _sb().table("referral_code_stats") \
+            .select("code,user_id,created_at,used,validated,pending", count="exact") \
+            .order("used", desc=True).order("code") \
+            .range(lo, lo + page_size - 1).execute()
+    return res.data or [], res.count or 0
+
+
+def get_recent_uses(page: int = 0, page_size: int = REFERRAL_PAGE_SIZE,
+                    code: str = None, pending_only: bool = False) -> tuple[list[dict], int]:
+    """Newest referral_uses first, one page at a time. Returns (rows, total)."""
+    q = _sb().table("referral_uses").select(
+        "id,referral_code,referred_email,referrer_email,used_at,validated,validated_at,plan_used",
+        count="exact")
+    if code:
+        q = q.eq("referral_code", code)
+    if pending_only:
+        q = q.or_("validated.is.null,validated.eq.false")
+    lo  = page * page_size
+    res = q.order("used_at", desc=True).range(lo, lo + page_size - 1).execute()
+    return res.data or [], res.count or 0
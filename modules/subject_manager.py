@@ -3,9 +3,12 @@ subject_manager.py — StudyTracker
 Manages fully custom subjects & topics per user per course+level.
 Users can add, rename, reorder, delete subjects and topics.
 Frozen data (cleared levels) is read-only.
+The whole subject → topics tree of a level is read in one query
+(user_subject_tree view) and cached per (user, course, level).
 """
 
 from __future__ import annotations
+import pandas as pd
 import streamlit as st
 from modules.course_config import get_default_subjects, COURSES
 
@@ -23,73 +26,130 @@ def _uid() -> str | None:
     return st.session_state.get("user_id")
 
 
+# ── Schema (run once in Supabase SQL editor) ──────────────────────────────────
+SUBJECT_TREE_SQL = """
+-- one row per subject with its ordered topic list
+create or replace view user_subject_tree with (security_invoker = true) as
+select s.*,
+       coalesce((select jsonb_agg(t.topic order by t.position, t.topic)
+                 from user_topics t
+                 where t.user_id     = s.user_id
+                   and t.course_id   = s.course_id
+                   and t.level_key   = s.level_key
+                   and t.subject_key = s.subject_key), '[]'::jsonb) as topics
+from user_subjects s;
+
+create index if not exists user_topics_tree_idx
+  on user_topics (user_id, course_id, level_key, subject_key, position);
+"""
+
+
 # ══════════════════════════════════════════════════════════════════════════════
-# SUBJECT CRUD
+# SUBJECT TREE — subjects with nested, ordered topics
 # ══════════════════════════════════════════════════════════════════════════════
 
-@st.cache_data(ttl=60)
-def fetch_subjects(user_id: str, course_id: str, level_key: str) -> list[dict]:
-    """
-    Fetch user's custom subjects for a course+level.
-    Falls back to seeding defaults if none exist yet.
-    """
+def _query_tree(user_id: str, course_id: str, level_key: str) -> list[dict]:
+    """One view read; two plain reads (subjects + all topics) before migration."""
     try:
-        rows = _sb().table("user_subjects") \
+        rows = _sb().table("user_subject_tree") \
             .select("*") \
             .eq("user_id", user_id) \
             .eq("course_id", course_id) \
             .eq("level_key", level_key) \
             .order("position") \
             .execute()
-        if rows.data:
-            return rows.data
-        # Seed defaults
+        return rows.data or []
+    except Exception:
+        pass
+    subjects = _sb().table("user_subjects") \
+        .select("*") \
+        .eq("user_id", user_id) \
+        .eq("course_id", course_id) \
+        .eq("level_key", level_key) \
+        .order("position") \
+        .execute().data or []
+    topics = _sb().table("user_topics") \
+        .select("subject_key,topic") \
+        .eq("user_id", user_id) \
+        .eq("course_id", course_id) \
+        .eq("level_key", level_key) \
+        .order("position") \
+        .execute().data or []
+    by_subj: dict[str, list[str]] = {}
+    for t in topics:
+        by_subj.setdefault(t["subject_key"], []).append(t["topic"])
+    return [{**s, "topics": by_subj.get(s["subject_key"], [])} for s in subjects]
+
+
+@st.cache_data(ttl=60)
+def fetch_subject_tree(user_id: str, course_id: str, level_key: str) -> list[dict]:
+    """
+    User's subjects for a course+level, ordered by position, each with a
+    "topics" list in position order. Seeds defaults if none exist yet.
+    """
+    try:
+        tree = _query_tree(user_id, course_id, level_key)
+        if tree:
+            return tree
         return _seed_subjects(user_id, course_id, level_key)
     except Exception:
         return []
 
 
+def invalidate_subject_tree(user_id: str, course_id: str, level_key: str):
+    """Drop only this user's cached tree for one course+level."""
+    fetch_subject_tree.clear(user_id, course_id, level_key)
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# SUBJECT CRUD
+# ══════════════════════════════════════════════════════════════════════════════
+
+def fetch_subjects(user_id: str, course_id: str, level_key: str) -> list[dict]:
+    """Subject rows for a course+level (served from fetch_subject_tree)."""
+    return fetch_subject_tree(user_id, course_id, level_key)
+
+
 def _seed_subjects(user_id: str, course_id: str, level_key: str) -> list[dict]:
-    """Insert default subjects+topics from course_config into DB."""
+    """
+    Insert default subjects+topics from course_config into DB.
+    Two bulk upserts (all subjects, then all topics) — the subject upsert
+    returns the stored rows, so no re-select is needed. Returns tree rows.
+    """
     defaults = get_default_subjects(course_id, level_key)
     if not defaults:
         return []
+    scope = {"user_id": user_id, "course_id": course_id, "level_key": level_key}
+    subject_rows = [{
+        **scope,
+        "subject_key": subj["key"],
+        "label":       subj["label"],
+        "target_hrs":  subj["target_hrs"],
+        "color":       subj["color"],
+        "position":    i,
+        "frozen":      False,
+    } for i, subj in enumerate(defaults)]
+    topic_rows = [{
+        **scope,
+        "subject_key": subj["key"],
+        "topic":       topic,
+        "position":    j,
+        "frozen":      False,
+    } for subj in defaults for j, topic in enumerate(subj.get("topics", []))]
     try:
-        for i, subj in enumerate(defaults):
-            _sb().table("user_subjects").upsert({
-                "user_id":     user_id,
-                "course_id":   course_id,
-                "level_key":   level_key,
-                "subject_key": subj["key"],
-                "label":       subj["label"],
-                "target_hrs":  subj["target_hrs"],
-                "color":       subj["color"],
-                "position":    i,
-                "frozen":      False,
-            }, on_conflict="user_id,course_id,level_key,subject_key").execute()
-            # Seed topics
-            for j, topic in enumerate(subj.get("topics", [])):
-                _sb().table("user_topics").upsert({
-                    "user_id":     user_id,
-                    "course_id":   course_id,
-                    "level_key":   level_key,
-                    "subject_key": subj["key"],
-                    "topic":       topic,
-                    "position":    j,
-                    "frozen":      False,
-                }, on_conflict="user_id,course_id,level_key,subject_key,topic").execute()
-
-        fetch_subjects.clear()
-        fetch_topics.clear()
-
-        rows = _sb().table("user_subjects") \
-            .select("*") \
-            .eq("user_id", user_id) \
-            .eq("course_id", course_id) \
-            .eq("level_key", level_key) \
-            .order("position") \
+        res = _sb().table("user_subjects") \
+            .upsert(subject_rows, on_conflict="user_id,course_id,level_key,subject_key") \
             .execute()
-        return rows.data or []
+        if topic_rows:
+            _sb().table("user_topics") \
+                .upsert(topic_rows, on_conflict="user_id,course_id,level_key,subject_key,topic") \
+                .execute()
+
+        by_subj: dict[str, list[str]] = {}
+        for t in topic_rows:
+            by_subj.setdefault(t["subject_key"], []).append(t["topic"])
+        return [{**r, "topics": by_subj.get(r["subject_key"], [])}
+                for r in sorted(res.data or [], key=lambda r: r.get("position", 0))]
     except Exception:
         return []
 
@@ -111,7 +171,7 @@ def add_subject(user_id: str, course_id: str, level_key: str,
             "position":    pos,
             "frozen":      False,
         }).execute()
-        fetch_subjects.clear()
+        invalidate_subject_tree(user_id, course_id, level_key)
         return True, f"Subject '{label}' added."
     except Exception as e:
         return False, str(e)
@@ -124,7 +184,7 @@ def update_subject(user_id: str, course_id: str, level_key: str,
             "label": label, "target_hrs": target_hrs, "color": color,
         }).eq("user_id", user_id).eq("course_id", course_id) \
          .eq("level_key", level_key).eq("subject_key", subject_key).execute()
-        fetch_subjects.clear()
+        invalidate_subject_tree(user_id, course_id, level_key)
         return True, "Subject updated."
     except Exception as e:
         return False, str(e)
@@ -138,8 +198,7 @@ def delete_subject(user_id: str, course_id: str, level_key: str, subject_key: st
         _sb().table("user_topics").delete() \
             .eq("user_id", user_id).eq("course_id", course_id) \
             .eq("level_key", level_key).eq("subject_key", subject_key).execute()
-        fetch_subjects.clear()
-        fetch_topics.clear()
+        invalidate_subject_tree(user_id, course_id, level_key)
         return True, "Subject deleted."
     except Exception as e:
         return False, str(e)
@@ -149,21 +208,12 @@ def delete_subject(user_id: str, course_id: str, level_key: str, subject_key: st
 # TOPIC CRUD
 # ══════════════════════════════════════════════════════════════════════════════
 
-@st.cache_data(ttl=60)
 def fetch_topics(user_id: str, course_id: str, level_key: str, subject_key: str) -> list[str]:
-    """Return list of topic strings for a subject."""
-    try:
-        rows = _sb().table("user_topics") \
-            .select("topic") \
-            .eq("user_id", user_id) \
-            .eq("course_id", course_id) \
-            .eq("level_key", level_key) \
-            .eq("subject_key", subject_key) \
-            .order("position") \
-            .execute()
-        return [r["topic"] for r in (rows.data or [])]
-    except Exception:
-        return []
+    """Return list of topic strings for a subject (served from fetch_subject_tree)."""
+    for subj in fetch_subject_tree(user_id, course_id, level_key):
+        if subj["subject_key"] == subject_key:
+            return list(subj.get("topics") or [])
+    return []
 
 
 def add_topic(user_id: str, course_id: str, level_key: str,
@@ -182,7 +232,7 @@ def add_topic(user_id: str, course_id: str, level_key: str,
             "position":    pos,
             "frozen":      False,
         }).execute()
-        fetch_topics.clear()
+        invalidate_subject_tree(user_id, course_id, level_key)
         return True, f"Topic added."
     except Exception as e:
         return False, str(e)
@@ -195,7 +245,7 @@ def rename_topic(user_id: str, course_id: str, level_key: str,
             .eq("user_id", user_id).eq("course_id", course_id) \
             .eq("level_key", level_key).eq("subject_key", subject_key) \
             .eq("topic", old_topic).execute()
-        fetch_topics.clear()
+        invalidate_subject_tree(user_id, course_id, level_key)
         return True, "Topic renamed."
     except Exception as e:
         return False, str(e)
@@ -208,16 +258,102 @@ def delete_topic(user_id: str, course_id: str, level_key: str,
             .eq("user_id", user_id).eq("course_id", course_id) \
             .eq("level_key", level_key).eq("subject_key", subject_key) \
             .eq("topic", topic).execute()
-        fetch_topics.clear()
+        invalidate_subject_tree(user_id, course_id, level_key)
         return True, "Topic deleted."
     except Exception as e:
         return False, str(e)
 
 
+# ══════════════════════════════════════════════════════════════════════════════
+# BATCH SYLLABUS EDITS — one bulk write + one cache invalidation per save
+# ══════════════════════════════════════════════════════════════════════════════
+
+def reorder_subjects(user_id: str, course_id: str, level_key: str,
+                     ordered_keys: list[str]) -> tuple[bool, str]:
+    """Set every subject's position from ordered_keys — one upsert."""
+    current = {s["subject_key"]: s for s in fetch_subject_tree(user_id, course_id, level_key)}
+    if sorted(ordered_keys) != sorted(current):
+        return False, "Order must list each subject exactly once."
+    cols = ("user_id", "course_id", "level_key", "subject_key", "label", "target_hrs", "color", "frozen")
+    rows = [{**{c: current[k][c] for c in cols}, "position": i} for i, k in enumerate(ordered_keys)]
+    try:
+        _sb().table("user_subjects") \
+            .upsert(rows, on_conflict="user_id,course_id,level_key,subject_key").execute()
+        invalidate_subject_tree(user_id, course_id, level_key)
+        return True, "Subjects reordered."
+    except Exception as e:
+        return False, str(e)
+
+
+def _scoped(q, scope: dict):
+    for k, v in scope.items():
+        q = q.eq(k, v)
+    return q
+
+
+def edit_topics(user_id: str, course_id: str, level_key: str, subject_key: str,
+                topics: list[str], renames: dict[str, str] | None = None) -> tuple[bool, str]:
+    """
+    Make a subject's topic list exactly `topics` (in that order).
+    renames maps old → new names: each is an update of the existing row's
+    topic (id, frozen and other columns are kept). Then one upsert writes
+    topic + position for every topic, and topics missing from the list are
+    deleted last. A pure reorder is the single upsert.
+    """
+    clean   = [t.strip() for t in topics if t and t.strip()]
+    if len(set(clean)) != len(clean):
+        return False, "Topic names must be unique."
+    current = fetch_topics(user_id, course_id, level_key, subject_key)
+    kept    = set(clean)
+    renames = {o: n.strip() for o, n in (renames or {}).items()
+               if o in current and n and n.strip() in kept and o != n.strip()}
+    for o, n in renames.items():
+        if n in current and n not in renames:
+            return False, f"Can't rename '{o}' to '{n}' — that topic already exists."
+    scope = {"user_id": user_id, "course_id": course_id,
+             "level_key": level_key, "subject_key": subject_key}
+
+    def _rename(old: str, new: str):
+        _scoped(_sb().table("user_topics").update({"topic": new}), scope) \
+            .eq("topic", old).execute()
+
+    try:
+        # renames in dependency order; a swap (a → b, b → a) goes via a temporary name
+        names, pending = set(current), dict(renames)
+        while pending:
+            ready = [o for o, n in pending.items() if n not in names]
+            if not ready:
+                old = next(iter(pending))
+                tmp, k = f"{old} (renaming)", 1
+                while tmp in names or tmp in kept:
+                    tmp, k = f"{old} (renaming {k})", k + 1
+                _rename(old, tmp)
+                names.discard(old); names.add(tmp)
+                pending[tmp] = pending.pop(old)
+                continue
+            for old in ready:
+                new = pending.pop(old)
+                _rename(old, new)
+                names.discard(old); names.add(new)
+        rows = [{**scope, "topic": t, "position": i} for i, t in enumerate(clean)]
+        if rows:
+            _sb().table("user_topics") \
+                .upsert(rows, on_conflict="user_id,course_id,level_key,subject_key,topic").execute()
+        gone = [t for t in names if t not in kept]
+        if gone:
+            _scoped(_sb().table("user_topics").delete(), scope).in_("topic", gone).execute()
+        return True, (f"Topics saved — {len(clean)} topic(s)"
+                      + (f", {len(renames)} renamed" if renames else "")
+                      + (f", {len(gone)} removed" if gone else "") + ".")
+    except Exception as e:
+        return False, str(e)
+    finally:
+        invalidate_subject_tree(user_id, course_id, level_key)
+
+
 def get_subjects_as_dict(user_id: str, course_id: str, level_key: str) -> dict:
     """Return {subject_key: label} dict for dropdowns."""
-    subjects = fetch_subjects(user_id, course_id, level_key)
-    return {s["subject_key"]: s["label"] for s in subjects}
+    return {s["subject_key"]: s["label"] for s in fetch_subject_tree(user_id, course_id, level_key)}
 
 
 def get_topics_for_subject(user_id: str, course_id: str, level_key: str, subject_key: str) -> list[str]:
@@ -234,7 +370,7 @@ def render_subject_manager(user_id: str, course_id: str, level_key: str, frozen:
     Full subject & topic management UI.
     If frozen=True, shows read-only view.
     """
-    subjects = fetch_subjects(user_id, course_id, level_key)
+    subjects = fetch_subject_tree(user_id, course_id, level_key)
 
     if frozen:
         st.info("🔒 This level is cleared and frozen. Subjects & topics are read-only.")
@@ -258,6 +394,18 @@ def render_subject_manager(user_id: str, course_id: str, level_key: str, frozen:
                 else:
                     st.warning("Fill in subject name and short code.")
 
+        if len(subjects) > 1:
+            with st.expander("🔀 Reorder Subjects", expanded=False):
+                order = st.multiselect(
+                    "Pick subjects in the new order", [x["subject_key"] for x in subjects],
+                    format_func=lambda k, m={x["subject_key"]: x["label"] for x in subjects}: m[k],
+                    key=f"subj_order_{level_key}")
+                if st.button("💾 Save Order", key=f"subj_order_btn_{level_key}",
+                             disabled=len(order) != len(subjects)):
+                    ok, msg = reorder_subjects(user_id, course_id, level_key, order)
+                    if ok: st.success(msg); st.rerun()
+                    else:  st.error(msg)
+
     st.markdown("---")
 
     for subj in subjects:
@@ -285,9 +433,29 @@ def render_subject_manager(user_id: str, course_id: str, level_key: str, frozen:
                 st.caption(f"🔒 Frozen · Target: {subj.get('target_hrs')} hrs")
 
             # Topics
-            topics = fetch_topics(user_id, course_id, level_key, skey)
+            topics = subj.get("topics") or []
             st.markdown(f"**Topics ({len(topics)})**")
 
+            if not sfrozen and topics:
+                with st.popover("🔀 Reorder / rename all"):
+                    st.caption("Edit names, change the order numbers, or delete rows — saved in one go.")
+                    grid = st.data_editor(
+                        pd.DataFrame({"Order": range(1, len(topics) + 1), "Topic": topics},
+                                     index=pd.Index(topics, name="was")),
+                        num_rows="dynamic", hide_index=True, use_container_width=True,
+                        column_config={"Order": st.column_config.NumberColumn(min_value=1, step=1)},
+                        key=f"topic_grid_{level_key}_{skey}")
+                    if st.button("💾 Save topics", key=f"topic_grid_save_{level_key}_{skey}"):
+                        g = grid.dropna(subset=["Topic"])
+                        g = g[g["Topic"].astype(str).str.strip() != ""]
+                        g = g.assign(Order=g["Order"].fillna(len(g) + 1)).sort_values("Order", kind="stable")
+                        renames = {str(was): str(new).strip() for was, new in zip(g.index, g["Topic"])
+                                   if isinstance(was, str) and was in topics}
+                        ok, msg = edit_topics(user_id, course_id, level_key, skey,
+                                              [str(t).strip() for t in g["Topic"]], renames)
+                        if ok: st.success(msg); st.rerun()
+                        else:  st.error(msg)
+
             if not sfrozen:
                 t_new = st.text_input("Add topic", placeholder="e.g. Ind AS 1 – Presentation of FS",
                                        key=f"topic_new_{level_key}_{skey}")
@@ -0,0 +1,177 @@
+"""
+synthetic.py — StudyTracker
+Realistic synthetic study histories for benchmarks and load tests:
+  - one user = profile + daily_log, revision_tracker, revision_sessions and
+    test_scores over 1–3 years across the TOPICS catalogue
+  - topics are read in syllabus order until their reading target is met,
+    then marked completed and revised on the CGSM-style widening gaps
+  - scale multiplies study sessions per day, revision sessions per round and
+    tests per week (1x ≈ one diligent student; 100x is a stress dataset)
+  - deterministic for a given seed
+
+    data = synth_user(scale=10, years=2, seed=7)
+    data["log"], data["rev"], data["rev_sess"], data["tst"]   # app-shaped frames
+    data["rows"]["daily_log"]                                  # insertable rows
+"""
+
+from __future__ import annotations
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from modules.course_config import SUBJECTS, TOPICS
+
+STUDY_DAY_PROB   = 0.72   # share of days with at least one session
+BASE_SESSIONS    = 2.0    # mean sessions on a study day at 1x
+BASE_TESTS_WEEK  = 1.2    # mean mock tests per week at 1x
+REVISION_GAPS    = (3, 7, 15, 30, 60, 120)
+
+
+def default_profile(user_id: str = "synthetic", username: str = "synthetic",
+                    exam: date | None = None) -> dict:
+    exam = exam or date(date.today().year + 1, 1, 1)
+    return {
+        "id": user_id, "username": username, "full_name": username.title(),
+        "email": f"{username}@example.com",
+        "exam_month": {1: "January", 5: "May", 9: "September"}.get(exam.month, "January"),
+        "exam_year": exam.year, "study_phase": "articleship", "prep_mode": "clearance",
+        "daily_study_hours": 6, "num_revisions": 6, "daily_rev_cap": 5,
+        "max_gap_days": 120, "growth_factor": 1.30, "r1_days": 3, "r2_days": 7,
+        "allow_backdate": False, "leaderboard_opt_in": True,
+    }
+
+
+def _topic_queue(rng: np.random.Generator, subjects) -> list[tuple[str, str, float]]:
+    """(subject, topic, hours needed) in a realistic interleaved reading order."""
+    per_subject = {s: list(TOPICS.get(s, [])) for s in subjects}
+    order = []
+    while any(per_subject.values()):
+        for s in subjects:
+            if per_subject[s]:
+                order.append((s, per_subject[s].pop(0), float(rng.uniform(3, 14))))
+    return order
+
+
+def synth_user(scale: float = 1.0, years: float = 2.0, seed: int = 0,
+               end: date | None = None, user_id: str = "synthetic",
+               subjects=None) -> dict:
+    """One user's full history ending at `end` (default today)."""
+    rng      = np.random.default_rng(seed)
+    subjects = list(subjects or SUBJECTS)
+    end      = end or date.today()
+    start    = end - timedelta(days=int(365 * years))
+    queue    = _topic_queue(rng, subjects)
+    progress = {(s, t): 0.0 for s, t, _ in queue}
+    done_on: dict = {}
+    first_on: dict = {}
+    qi = 0
+
+    log_rows, rev_rows, test_rows = [], [], []
+    day = start
+    while day <= end:
+        if rng.random() < STUDY_DAY_PROB:
+            n_sessions = max(1, int(rng.poisson(BASE_SESSIONS * scale)))
+            for _ in range(n_sessions):
+                if qi < len(queue):
+                    subj, topic, need = queue[qi]
+                else:                           # syllabus finished — extra reading on a random topic
+                    subj, topic, need = queue[int(rng.integers(len(queue)))]
+                hours = round(float(rng.choice([0.5, 1.0, 1.5, 2.0, 2.5, 3.0])), 1)
+                key = (subj, topic)
+                progress[key] += hours
+                first_on.setdefault(key, day)
+                completed = key in done_on or progress[key] >= need
+                if completed and key not in done_on:
+                    done_on[key] = day
+                    qi += 1
+                log_rows.append({
+                    "date": day.isoformat(), "subject": subj, "topic": topic,
+                    "hours": hours, "pages_done": int(rng.integers(2, 30)),
+                    "difficulty": int(rng.integers(1, 6)), "notes": "",
+                    "session_type": "reading",
+                    "topic_status": "completed" if completed else "reading",
+                    "completion_date": done_on[key].isoformat() if completed else None,
+                })
+        # mock tests
+        if day.weekday() == 6:
+            for _ in range(int(rng.poisson(BASE_TESTS_WEEK * scale))):
+                subj  = subjects[int(rng.integers(len(subjects)))]
+                marks = float(np.clip(rng.normal(55, 14), 5, 100))
+                test_rows.append({
+                    "date": day.isoformat(), "subject": subj,
+                    "test_name": f"{subj} mock {len(test_rows) + 1}",
+                    "marks": round(marks, 1), "max_marks": 100.0, "score_pct": round(marks, 1),
+                    "weak_areas": "", "strong_areas": "", "action_plan": "",
+                })
+        day += timedelta(days=1)
+
+    # revision rounds for completed topics (each round also logs a revision session)
+    rev_count: dict = {}
+    last_rev: dict = {}
+    per_round = max(1, int(round(scale)))
+    for key, completed in done_on.items():
+        when = completed
+        for rnd, gap in enumerate(REVISION_GAPS, start=1):
+            when = when + timedelta(days=int(gap + rng.integers(-1, 3)))
+            if when > end:
+                break
+            for _ in range(per_round):
+                hrs = round(float(rng.choice([0.5, 1.0, 1.5])), 1)
+                rev_rows.append({
+                    "subject": key[0], "topic": key[1], "round": rnd,
+                    "date": when.isoformat(), "hours": hrs,
+                    "difficulty": int(rng.integers(1, 6)), "notes": "", "status": "completed",
+                })
+                log_rows.append({
+                    "date": when.isoformat(), "subject": key[0], "topic": key[1],
+                    "hours": hrs, "pages_done": 0, "difficulty": int(rng.integers(1, 6)),
+                    "notes": "", "session_type": "revision", "topic_status": "completed",
+                    "completion_date": completed.isoformat(),
+                })
+            rev_count[key], last_rev[key] = rnd, when
+
+    tracker_rows = []
+    for subj, topic, _ in queue:
+        key = (subj, topic)
+        read_h = progress[key]
+        tracker_rows.append({
+            "subject": subj, "topic": topic,
+            "first_read": key in done_on,
+            "first_read_date": first_on[key].isoformat() if key in first_on else None,
+            "revision_count": rev_count.get(key, 0),
+            "last_revision_date": last_rev[key].isoformat() if key in last_rev else None,
+            "topic_status": ("completed" if key in done_on else
+                             "reading" if read_h > 0 else "not_started"),
+            "total_first_reading_time": round(read_h, 1),
+            "completion_date": done_on[key].isoformat() if key in done_on else None,
+        })
+
+    return {
+        "profile":  default_profile(user_id, user_id),
+        "rows":     {"daily_log": log_rows, "revision_tracker": tracker_rows,
+                     "revision_sessions": rev_rows, "test_scores": test_rows},
+        **frames_from_rows(log_rows, tracker_rows, rev_rows, test_rows),
+    }
+
+
+def frames_from_rows(log_rows, tracker_rows, rev_rows, test_rows) -> dict:
+    """DataFrames exactly as the app's _fetch_* functions return them."""
+    log = pd.DataFrame(log_rows)
+    if not log.empty:
+        log["date"]  = pd.to_datetime(log["date"])
+        log["hours"] = pd.to_numeric(log["hours"])
+        log = log.sort_values("date", ascending=False, kind="stable").reset_index(drop=True)
+    tst = pd.DataFrame(test_rows)
+    if not tst.empty:
+        tst["date"]      = pd.to_datetime(tst["date"])
+        tst["score_pct"] = pd.to_numeric(tst["score_pct"])
+        tst = tst.sort_values("date", ascending=False, kind="stable").reset_index(drop=True)
+    rev_sess = pd.DataFrame(rev_rows)
+    if not rev_sess.empty:
+        rev_sess = rev_sess.sort_values("date", ascending=False, kind="stable").reset_index(drop=True)
+    return {"log": log, "rev": pd.DataFrame(tracker_rows), "rev_sess": rev_sess, "tst": tst}
+
+
+def dataset_shape(data: dict) -> dict:
+    return {k: len(v) for k, v in data["rows"].items()}
@@ -0,0 +1,145 @@
+"""
+timing.py — StudyTracker
+Per-phase timing spans for every rerun:
+  - span("data_fetch") context manager / @timed("analytics.air_index")
+    decorator around the hot phases (auth gate, access checks, data fetch,
+    pendencies, analytics, each tab render, PDF render)
+  - durations go into a process-wide rolling window per phase
+    (SPAN_WINDOW samples); p50 / p95 / p99 are computed on read
+  - the admin Diagnostics tab shows the table + a histogram per phase and
+    exports everything (stats and raw samples) as JSON
+Spans nest freely — a tab's time includes the analytics it calls.
+"""
+
+from __future__ import annotations
+import functools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+import streamlit as st
+
+SPAN_WINDOW = 1000     # most recent samples kept per phase
+
+
+@st.cache_resource
+def _span_state() -> dict:
+    """Shared across all sessions (and worker threads) of this server process."""
+    return {"lock": threading.Lock(), "samples": {}, "totals": {}, "since": time.time()}
+
+
+def record_span(name: str, ms: float) -> None:
+    state = _span_state()
+    with state["lock"]:
+        q = state["samples"].get(name)
+        if q is None:
+            q = state["samples"][name] = deque(maxlen=SPAN_WINDOW)
+        q.append(ms)
+        state["totals"][name] = state["totals"].get(name, 0) + 1
+
+
+@contextmanager
+def span(name: str):
+    """Time the enclosed block as phase `name` (recorded even if it raises)."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, (time.perf_counter() - t0) * 1000)
+
+
+def timed(name: str):
+    """Decorator form of span()."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# READ SIDE
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _stats(samples) -> dict:
+    arr = np.fromiter(samples, dtype=float)
+    p50, p95, p99 = np.percentile(arr, [50, 95, 99])
+    return {"n": int(arr.size), "p50": round(float(p50), 2), "p95": round(float(p95), 2),
+            "p99": round(float(p99), 2), "max": round(float(arr.max()), 2),
+            "mean": round(float(arr.mean()), 2), "last": round(float(arr[-1]), 2)}
+
+
+def phase_stats(with_samples: bool = False) -> dict:
+    """{phase: {n, total, p50, p95, p99, max, mean, last[, samples]}} over the window (ms)."""
+    state = _span_state()
+    with state["lock"]:
+        snap = {k: list(v) for k, v in state["samples"].items() if v}
+        totals = dict(state["totals"])
+    out = {}
+    for name in sorted(snap):
+        out[name] = {**_stats(snap[name]), "total": totals.get(name, 0)}
+        if with_samples:
+            out[name]["samples"] = [round(x, 3) for x in snap[name]]
+    return out
+
+
+def export_json() -> str:
+    state = _span_state()
+    return json.dumps({
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "since":        datetime.fromtimestamp(state["since"], timezone.utc).isoformat(timespec="seconds"),
+        "window":       SPAN_WINDOW,
+        "unit":         "ms",
+        "phases":       phase_stats(with_samples=True),
+    }, indent=1)
+
+
+def reset_spans() -> None:
+    state = _span_state()
+    with state["lock"]:
+        state["samples"].clear()
+        state["totals"].clear()
+        state["since"] = time.time()
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# UI — admin Diagnostics tab
+# ══════════════════════════════════════════════════════════════════════════════
+
+def render_timing_panel():
+    """p50/p95/p99 per phase, one histogram on demand, JSON export."""
+    import pandas as pd
+    import plotly.express as px
+
+    st.markdown("#### ⏱️ Phase timings (rolling, all sessions)")
+    stats = phase_stats()
+    if not stats:
+        st.caption("No spans recorded yet.")
+        return
+    df = pd.DataFrame.from_dict(stats, orient="index")
+    df.index.name = "phase"
+    st.dataframe(df[["n", "total", "p50", "p95", "p99", "max", "mean", "last"]]
+                 .sort_values("p95", ascending=False),
+                 use_container_width=True)
+    st.caption(f"Milliseconds over the last ≤{SPAN_WINDOW} samples per phase. "
+               "Spans nest: tab.* includes the analytics.* it calls.")
+
+    c1, c2, c3 = st.columns([3, 1, 1])
+    phase = c1.selectbox("Histogram", list(stats), key="span_hist_phase")
+    with c2:
+        st.download_button("⬇️ Export JSON", export_json(), file_name="phase_timings.json",
+                           mime="application/json", key="span_export",
+                           use_container_width=True)
+    with c3:
+        st.button("♻️ Reset", key="span_reset", on_click=reset_spans, use_container_width=True)
+    samples = phase_stats(with_samples=True).get(phase, {}).get("samples", [])
+    if samples:
+        fig = px.histogram(x=samples, nbins=40, labels={"x": "ms"}, title=phase)
+        fig.update_layout(showlegend=False, height=260, margin=dict(t=40, b=30, l=30, r=10))
+        st.plotly_chart(fig, width='stretch')
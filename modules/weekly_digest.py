@@ -0,0 +1,300 @@
+"""
+weekly_digest.py — StudyTracker
+Batch weekly progress digest (dashboard PDF) for every subscribed user.
+
+    python -m modules.weekly_digest --out digests [--workers 4] [--limit 50]
+
+  - Loads all active users' data with a few bulk, paginated queries
+  - Computes the same metrics the dashboard hands to the PDF export
+    (reading / revision hours, avg score, days studied, dpd, pendencies)
+  - Renders PDFs in parallel across a process pool into --out/<date>/
+  - Prints per-user timing + throughput and writes digest_report.json
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+
+import pandas as pd
+import streamlit as st
+
+from modules.entitlements import parse_subscription
+
+_PAGE     = 1000   # PostgREST default max rows per request
+_ID_CHUNK = 200    # ids per .in_() filter — keeps the URL short
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# BULK LOADING
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _admin_client():
+    """Service-role client from .streamlit/secrets.toml (same keys as the app)."""
+    from modules.local_db import local_backend_path, create_local_client
+    path = local_backend_path(st.secrets)
+    if path:
+        return create_local_client(path)
+    from supabase import create_client
+    try:
+        key = st.secrets["SUPABASE_SERVICE_ROLE_KEY"]
+    except Exception:
+        key = st.secrets["SUPABASE_KEY"]
+    return create_client(st.secrets["SUPABASE_URL"], key)
+
+
+def _fetch_bulk(sb, table: str, cols: str, key: str, ids: list) -> list[dict]:
+    """All rows of `table` whose `key` is in ids — chunked + paginated.
+    Pages are ordered by (key, id) so .range() offsets are stable between requests."""
+    rows = []
+    for i in range(0, len(ids), _ID_CHUNK):
+        chunk = ids[i:i + _ID_CHUNK]
+        start = 0
+        while True:
+            r = sb.table(table).select(cols).in_(key, chunk) \
+                  .order(key).order("id").range(start, start + _PAGE - 1).execute()
+            batch = r.data or []
+            rows.extend(batch)
+            if len(batch) < _PAGE:
+                break
+            start += _PAGE
+    return rows
+
+
+def _fetch_bulk_with_fallback(sb, table, cols, base_cols, key, ids) -> list[dict]:
+    """Same column fallback as the app fetchers when migrations aren't run."""
+    try:
+        return _fetch_bulk(sb, table, cols, key, ids)
+    except Exception:
+        return _fetch_bulk(sb, table, base_cols, key, ids)
+
+
+def load_active_users(sb) -> list[dict]:
+    """Profiles of users with an active paid plan (approved + not expired)."""
+    rows, start = [], 0
+    while True:
+        batch = sb.table("approved_emails").select("*").eq("status", "approved") \
+                  .order("email").range(start, start + _PAGE - 1).execute().data or []
+        rows.extend(batch)
+        if len(batch) < _PAGE:
+            break
+        start += _PAGE
+    emails = [r["email"] for r in rows if parse_subscription(r)["active"]]
+    return _fetch_bulk(sb, "profiles", "*", "email", emails) if emails else []
+
+
+def load_user_frames(sb, user_ids: list) -> dict:
+    """
+    user_id → {log, tst, rev, rev_sess} DataFrames, shaped exactly like the
+    app's _fetch_logs / _fetch_scores / _fetch_revision / _fetch_rev_sessions.
+    Four bulk queries in total, regardless of user count.
+    """
+    logs = pd.DataFrame(_fetch_bulk_with_fallback(
+        sb, "daily_log",
+        "user_id,date,subject,topic,hours,pages_done,difficulty,notes,session_type,topic_status,completion_date",
+        "user_id,date,subject,topic,hours,pages_done,difficulty,notes",
+        "user_id", user_ids))
+    tsts = pd.DataFrame(_fetch_bulk(
+        sb, "test_scores",
+        "user_id,date,subject,test_name,marks,max_marks,score_pct,weak_areas,strong_areas,action_plan",
+        "user_id", user_ids))
+    revs = pd.DataFrame(_fetch_bulk_with_fallback(
+        sb, "revision_tracker",
+        "user_id,subject,topic,first_read,first_read_date,revision_count,last_revision_date,topic_status,total_first_reading_time,completion_date",
+        "user_id,subject,topic,first_read,first_read_date,revision_count,last_revision_date",
+        "user_id", user_ids))
+    try:
+        sess = pd.DataFrame(_fetch_bulk(
+            sb, "revision_sessions",
+            "user_id,subject,topic,round,date,hours,difficulty,notes,status",
+            "user_id", user_ids))
+    except Exception:
+        sess = pd.DataFrame()
+
+    def _split(df):
+        if df.empty or "user_id" not in df.columns:
+            return {}
+        return {u: g.drop(columns="user_id").reset_index(drop=True)
+                for u, g in df.groupby("user_id")}
+
+    by_log, by_tst, by_rev, by_sess = _split(logs), _split(tsts), _split(revs), _split(sess)
+    return {
+        u: {
+            "log":      _prep_log(by_log.get(u, pd.DataFrame())),
+            "tst":      _prep_scores(by_tst.get(u, pd.DataFrame())),
+            "rev":      _prep_revision(by_rev.get(u, pd.DataFrame())),
+            "rev_sess": by_sess.get(u, pd.DataFrame()),
+        }
+        for u in user_ids
+    }
+
+
+def _prep_log(df: pd.DataFrame) -> pd.DataFrame:
+    if not df.empty:
+        df["date"]  = pd.to_datetime(df["date"])
+        df["hours"] = pd.to_numeric(df["hours"])
+        df = df.sort_values("date", ascending=False).reset_index(drop=True)
+    if "session_type" not in df.columns:
+        df["session_type"] = "reading"
+    if "topic_status" not in df.columns:
+        df["topic_status"] = "not_started"
+    if "completion_date" not in df.columns:
+        df["completion_date"] = None
+    return df
+
+
+def _prep_scores(df: pd.DataFrame) -> pd.DataFrame:
+    if not df.empty:
+        df["date"]      = pd.to_datetime(df["date"])
+        df["score_pct"] = pd.to_numeric(df["score_pct"])
+        df = df.sort_values("date", ascending=False).reset_index(drop=True)
+    return df
+
+
+def _prep_revision(df: pd.DataFrame) -> pd.DataFrame:
+    if "topic_status" not in df.columns:
+        df["topic_status"] = "not_started"
+    if "total_first_reading_time" not in df.columns:
+        df["total_first_reading_time"] = 0.0
+    if "completion_date" not in df.columns:
+        df["completion_date"] = None
+    return df
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PER-USER RENDER (runs in a worker process)
+# ══════════════════════════════════════════════════════════════════════════════
+
+def render_user_digest(job: dict) -> dict:
+    """
+    Compute dashboard metrics + analytics for one user and write the PDF.
+    Top-level so ProcessPoolExecutor can pickle it; ReportLab styles are
+    built once per worker process by modules.pdf_report.
+    """
+    from modules.analytics import (
+        build_revision_pendencies, pendency_log_json, compute_dashboard_kpis,
+        compute_report_analytics, exam_date_from_profile
+    )
+    from modules.pdf_report import render_dashboard_pdf
+
+    t0 = time.perf_counter()
+    try:
+        prof, log, tst = job["prof"], job["log"], job["tst"]
+        rev, rev_sess  = job["rev"], job["rev_sess"]
+        exam_date = exam_date_from_profile(prof)
+        days_left = max((exam_date - date.today()).days, 0)
+        pend = (build_revision_pendencies(json.loads(pendency_log_json(log)), prof)
+                if not log.empty else pd.DataFrame())
+        kpis = compute_dashboard_kpis(log, tst, rev_sess, prof, days_left)
+        pdf  = render_dashboard_pdf(
+            log, tst, rev, rev_sess, pend, prof,
+            days_left=days_left, exam_date=exam_date, **kpis,
+            **compute_report_analytics(log, rev, rev_sess, pend, prof, days_left, exam_date),
+        )
+        with open(job["path"], "wb") as fh:
+            fh.write(pdf)
+        return {"user_id": job["user_id"], "path": job["path"], "ok": True,
+                "bytes": len(pdf), "rows": len(log),
+                "secs": round(time.perf_counter() - t0, 3), "error": ""}
+    except Exception as e:
+        return {"user_id": job["user_id"], "path": job["path"], "ok": False,
+                "bytes": 0, "rows": len(job.get("log", [])),
+                "secs": round(time.perf_counter() - t0, 3), "error": str(e)}
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# BATCH DRIVER
+# ══════════════════════════════════════════════════════════════════════════════
+
+def _safe_name(v) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", str(v or "")).strip("_")
+
+
+def _digest_filename(user: dict) -> str:
+    """'<username>_<user id>.pdf' with anything outside [A-Za-z0-9_-] replaced —
+    unique per user and never a path outside the output directory."""
+    name, uid = _safe_name(user.get("username"))[:40], _safe_name(user["id"])
+    return f"{name}_{uid}.pdf" if name else f"{uid}.pdf"
+
+
+def _pct(vals: list, q: float) -> float:
+    if not vals:
+        return 0.0
+    s = sorted(vals)
+    return s[min(int(round(q * (len(s) - 1))), len(s) - 1)]
+
+
+def run_weekly_digest(sb, out_dir: str, workers: int = None, limit: int = None) -> dict:
+    """Generate every active user's digest; returns the summary report dict."""
+    t_start = time.perf_counter()
+    users = load_active_users(sb)
+    if limit:
+        users = users[:limit]
+    user_ids = [u["id"] for u in users]
+    frames   = load_user_frames(sb, user_ids) if user_ids else {}
+    t_loaded = time.perf_counter()
+
+    day_dir = os.path.join(out_dir, date.today().isoformat())
+    os.makedirs(day_dir, exist_ok=True)
+
+    jobs = []
+    for u in users:
+        jobs.append({"user_id": u["id"], "prof": u,
+                     "path": os.path.join(day_dir, _digest_filename(u)), **frames[u["id"]]})
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futs = [pool.submit(render_user_digest, j) for j in jobs]
+        for f in as_completed(futs):
+            r = f.result()
+            results.append(r)
+            flag = "ok " if r["ok"] else "ERR"
+            print(f"  [{flag}] {r['user_id']}  {r['secs']:.2f}s  "
+                  f"{r['rows']} log rows  {r['error']}")
+
+    wall   = time.perf_counter() - t_start
+    render = time.perf_counter() - t_loaded
+    secs   = [r["secs"] for r in results if r["ok"]]
+    ok     = len(secs)
+    report = {
+        "date":           date.today().isoformat(),
+        "users":          len(jobs),
+        "ok":             ok,
+        "failed":         sum(not r["ok"] for r in results),
+        "workers":        workers or os.cpu_count(),
+        "load_secs":      round(t_loaded - t_start, 3),
+        "render_secs":    round(render, 3),
+        "wall_secs":      round(wall, 3),
+        "users_per_min":  round(ok / render * 60, 1) if render > 0 else 0.0,   # successful sends only
+        "per_user_p50":   _pct(secs, 0.50),
+        "per_user_p95":   _pct(secs, 0.95),
+        "per_user_max":   max(secs) if secs else 0.0,
+        "results":        sorted(results, key=lambda r: -r["secs"]),
+    }
+    with open(os.path.join(day_dir, "digest_report.json"), "w") as fh:
+        json.dump(report, fh, indent=2)
+    return report
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Render weekly dashboard PDFs for all active users.")
+    ap.add_argument("--out", default="digests", help="output directory")
+    ap.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    ap.add_argument("--limit", type=int, default=None, help="only the first N users")
+    args = ap.parse_args(argv)
+
+    rep = run_weekly_digest(_admin_client(), args.out, args.workers, args.limit)
+    print(f"\n{rep['ok']}/{rep['users']} digests in {rep['wall_secs']:.1f}s "
+          f"(load {rep['load_secs']:.1f}s, render {rep['render_secs']:.1f}s) — "
+          f"{rep['users_per_min']} users/min, per-user p50 {rep['per_user_p50']:.2f}s "
+          f"p95 {rep['per_user_p95']:.2f}s max {rep['per_user_max']:.2f}s")
+    if rep["failed"]:
+        print(f"{rep['failed']} failed — see digest_report.json")
+
+
+if __name__ == "__main__":
+    main()
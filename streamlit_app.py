@@ -1,11 +1,12 @@
 import streamlit as st
-import sys, os
+import sys, os, re
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from datetime import date, timedelta
+from modules.timing import span, timed
 
 st.set_page_config(
     page_title="StudyTracker",
@@ -15,8 +16,17 @@ st.set_page_config(
 )
 
 # ── SUPABASE ──────────────────────────────────────────────────────────────────
+# BACKEND = "local" (secrets or STUDYTRACKER_BACKEND env) swaps both clients for
+# the SQLite stand-in in modules/local_db.py — offline dev, benchmarks, load tests.
+def _local_backend_path():
+    from modules.local_db import local_backend_path
+    return local_backend_path(st.secrets)
+
 @st.cache_resource
 def init_supabase():
+    if _local_backend_path():
+        from modules.local_db import create_local_client
+        return create_local_client(_local_backend_path())
     from supabase import create_client
     url = st.secrets["SUPABASE_URL"]
     key = st.secrets["SUPABASE_KEY"]
@@ -26,6 +36,9 @@ def init_supabase():
 def init_supabase_admin():
     """Service-role client — bypasses RLS for admin inserts (signup profile creation).
     Add SUPABASE_SERVICE_ROLE_KEY to st.secrets. Falls back to anon key if not set."""
+    if _local_backend_path():
+        from modules.local_db import create_local_client
+        return create_local_client(_local_backend_path())
     from supabase import create_client
     url = st.secrets["SUPABASE_URL"]
     # Try service role key first; fall back to anon key
@@ -36,9 +49,11 @@ def init_supabase_admin():
     return create_client(url, key)
 
 try:
-    sb       = init_supabase()
-    sb_admin = init_supabase_admin()
+    from modules.query_trace import trace_client, begin_run as _trace_begin_run
+    sb       = trace_client(init_supabase(), "sb")
+    sb_admin = trace_client(init_supabase_admin(), "sb_admin")
     st.session_state["_sb_admin"] = sb_admin
+    _trace_begin_run()
 
 except Exception as e:
     st.error(f"Database connection failed: {e}")
@@ -61,6 +76,32 @@ try:
         fetch_subjects, fetch_topics, render_subject_manager,
         get_subjects_as_dict, get_topics_for_subject
     )
+    from modules.entitlements import parse_subscription, get_entitlement, invalidate_entitlement
+    from modules.referrals import (
+        resolve_referral_code, invalidate_referral_code, get_code_stats,
+        get_referral_totals, get_code_stats_page, get_recent_uses, REFERRAL_PAGE_SIZE
+    )
+    from modules.admin_users import (
+        fetch_user_page, fetch_status_counts, ADMIN_PAGE_SIZE,
+        STATUS_FILTERS, STATE_FILTERS, SORTS,
+        bulk_approve, bulk_extend, bulk_revoke, bulk_delete, bulk_summary
+    )
+    from modules.provisioning import (
+        start_provisioning, get_provisioning, retry_provisioning, render_provisioning_status
+    )
+    from modules.app_config import get_config, save_config, invalidate_config
+    from modules.pdf_jobs import pdf_data_version, submit_pdf_job, render_pdf_job
+    from modules.downsample import downsample_xy, bucket_daily
+    from modules.analytics import (
+        get_cgsm_gaps, get_revision_interval, get_revision_ratios,
+        compute_frp, compute_pwdam, detect_study_phase, compute_air_index,
+        compute_rpi, compute_stress_index, compute_execution_consistency,
+        compute_phase_info, compute_weekly_subject_balance, compute_exam_projection,
+        compute_revision_schedule, get_topic_status, get_tfr, get_completed_revisions,
+        memory_strength, build_revision_pendencies, pendency_log_json,
+        compute_dashboard_kpis, compute_report_analytics, exam_date_from_profile,
+        ACHIEVEMENTS, compute_achievements
+    )
     _MODULES_OK = True
 except Exception as _mod_err:
     _MODULES_OK = False
@@ -90,12 +131,7 @@ def fetch_approved_emails() -> list[str]:
 
 def is_approved_email(email: str) -> bool:
     """Return True if email is approved in DB or is the admin."""
-    email_clean = email.strip().lower()
-    admin = get_admin_email()
-    if admin and email_clean == admin:
-        return True  # admin always has access
-    approved = fetch_approved_emails()
-    return email_clean in approved
+    return _entitlement(email)["approved"]
 
 def approve_email(email: str, note: str = "", plan_key: str = "", plan_start_date: date = None, plan_end_date: date = None) -> tuple[bool, str]:
     """
@@ -130,6 +166,7 @@ def approve_email(email: str, note: str = "", plan_key: str = "", plan_start_dat
             payload["email"] = email_clean
             sb_admin.table("approved_emails").insert(payload).execute()
             _result = f"✅ {email_clean} approved and added"
+        invalidate_entitlement(email_clean)
 
         # Auto-validate referral
         if plan_key:
@@ -147,6 +184,7 @@ def revoke_email(email: str) -> tuple[bool, str]:
         fetch_approved_emails.clear()
         email_clean = email.strip().lower()
         sb_admin.table("approved_emails").update({"status": "revoked"}).eq("email", email_clean).execute()
+        invalidate_entitlement(email_clean)
         return True, f"🚫 {email_clean} access revoked"
     except Exception as _e:
         return False, f"Error: {_e}"
@@ -194,6 +232,7 @@ def get_or_create_referral_code(user_id: str, username: str) -> str | None:
                     "code": code,
                     "created_at": date.today().isoformat()
                 }).execute()
+                invalidate_referral_code(code)
                 return code
             except Exception:
                 continue  # collision — retry
@@ -207,24 +246,11 @@ def validate_referral_code(code: str) -> tuple[bool, str, str]:
     if len(code_clean) < 4:
         return False, "", "Code too short."
     try:
-        row = sb_admin.table("referral_codes").select("user_id, code").eq("code", code_clean).execute()
-        if not row.data:
+        # Single indexed lookup (referral_code_lookup view), cached per process
+        info = resolve_referral_code(code_clean)
+        if not info:
             return False, "", "❌ Invalid referral code — double-check and try again."
-        ref_user_id = row.data[0]["user_id"]
-        # Get referrer email from approved_emails via profiles
-        prof_row = sb_admin.table("profiles").select("id").eq("id", ref_user_id).execute()
-        # Get email from approved_emails using sub-select pattern via user_id in profiles
-        # We look up approved_emails by matching the referrer's profile
-        ae_row = sb_admin.table("approved_emails").select("email, status").execute()
-        # Match by getting referrer's profile email through auth (we stored uid in profiles)
-        # Simple approach: scan approved_emails for note containing the referrer uid
-        # Better: referral_codes stores user_id, profiles has same id, profiles may not have email col
-        # So we query auth.users via sb_admin service role
-        try:
-            auth_user = sb_admin.auth.admin.get_user_by_id(ref_user_id)
-            referrer_email = auth_user.user.email if auth_user.user else ""
-        except Exception:
-            referrer_email = ""
+        referrer_email = info.get("referrer_email", "")
         if not referrer_email:
             return False, "", "❌ Could not identify referrer. Please ask them for their code again."
         return True, referrer_email.lower(), ""
@@ -295,27 +321,27 @@ def auto_validate_referral(referred_email: str, plan_key: str):
             new_note = existing_note + f" | ref_bonus:{bonus_days}d:{date.today().isoformat()}"
             sb_admin.table("approved_emails").update({"note": new_note}).eq("email", referrer_email).execute()
             fetch_approved_emails.clear()
+            invalidate_entitlement(referrer_email)
     except Exception:
         pass
 
 def get_referral_stats(user_id: str) -> dict:
-    """Get referral stats for a user: total uses, validated, pending, bonus days earned."""
+    """Get referral stats for a user: total uses, validated, pending, bonus days earned.
+    Counts come from the database (referral_code_stats); "uses" is the latest page only."""
     try:
-        code_row = sb_admin.table("referral_codes").select("code").eq("user_id", user_id).execute()
-        if not code_row.data:
+        stats = get_code_stats(user_id)
+        code  = stats.get("code")
+        if not code:
             return {"code": None, "total": 0, "validated": 0, "pending": 0, "bonus_days": 0}
-        code = code_row.data[0]["code"]
-        uses = sb_admin.table("referral_uses").select("*").eq("referral_code", code).execute()
-        uses_data = uses.data or []
-        validated_count = sum(1 for u in uses_data if u.get("validated"))
+        uses_data, _ = get_recent_uses(code=code)
         cfg = get_pricing_cfg()
         bonus_per = int(cfg.get("referral_bonus_days", 30))
         return {
             "code":       code,
-            "total":      len(uses_data),
-            "validated":  validated_count,
-            "pending":    len(uses_data) - validated_count,
-            "bonus_days": validated_count * bonus_per,
+            "total":      int(stats.get("used", 0)),
+            "validated":  int(stats.get("validated", 0)),
+            "pending":    int(stats.get("pending", 0)),
+            "bonus_days": int(stats.get("validated", 0)) * bonus_per,
             "uses":       uses_data
         }
     except Exception:
@@ -354,37 +380,29 @@ _DEFAULT_PRICING_CONFIG = {
     "referral_min_plan": "3mo",   # minimum plan referral must have to count
 }
 
-@st.cache_data(ttl=120)
+def _merge_pricing(stored) -> dict:
+    """Deep merge the stored pricing row with defaults (once per config version)."""
+    cfg = dict(_DEFAULT_PRICING_CONFIG)
+    if isinstance(stored, dict):
+        cfg.update(stored)
+        if "plans" in stored:
+            cfg["plans"] = stored["plans"]
+    return cfg
+
 def fetch_pricing_config() -> dict:
-    """Load pricing config from Supabase app_config table. Falls back to defaults."""
-    import json
+    """
+    Pricing config from app_config, falling back to defaults.
+    Served from the process-wide versioned cache (modules.app_config) —
+    an admin save is picked up by every process within seconds.
+    """
     try:
-        row = sb_admin.table("app_config").select("value").eq("key", "pricing").execute()
-        if row.data:
-            stored = json.loads(row.data[0]["value"])
-            # Deep merge with defaults
-            cfg = dict(_DEFAULT_PRICING_CONFIG)
-            cfg.update(stored)
-            if "plans" in stored:
-                cfg["plans"] = stored["plans"]
-            return cfg
+        return get_config("pricing", build=_merge_pricing)
     except Exception:
-        pass
-    return dict(_DEFAULT_PRICING_CONFIG)
+        return dict(_DEFAULT_PRICING_CONFIG)
 
 def save_pricing_config(cfg: dict) -> tuple[bool, str]:
-    import json
-    try:
-        fetch_pricing_config.clear()
-        payload = json.dumps(cfg)
-        existing = sb_admin.table("app_config").select("key").eq("key", "pricing").execute()
-        if existing.data:
-            sb_admin.table("app_config").update({"value": payload}).eq("key", "pricing").execute()
-        else:
-            sb_admin.table("app_config").insert({"key": "pricing", "value": payload}).execute()
-        return True, "✅ Pricing config saved"
-    except Exception as e:
-        return False, f"Error: {e}"
+    ok, msg = save_config("pricing", cfg)
+    return ok, ("✅ Pricing config saved" if ok else msg)
 
 def get_pricing_cfg():
     return fetch_pricing_config()
@@ -395,108 +413,30 @@ def get_plans():
 def get_free_trial_days() -> int:
     return int(get_pricing_cfg().get("free_trial_days", 7))
 
-def _days_since_signup(email: str) -> int:
-    """Return how many days ago this email was first inserted into approved_emails."""
-    try:
-        row = sb_admin.table("approved_emails").select("approved_at").eq("email", email.strip().lower()).execute()
-        if row.data:
-            from datetime import datetime
-            signup_str = row.data[0].get("approved_at") or ""
-            if signup_str:
-                signup_dt = datetime.fromisoformat(signup_str[:10])
-                return (datetime.today() - signup_dt).days
-    except Exception:
-        pass
-    return 0
+# ── Entitlements: one approved_emails read per user, session-cached ─────────
+@timed("access_check")
+def _entitlement(email: str) -> dict:
+    """Resolved trial / approval / plan facts — see modules.entitlements."""
+    return get_entitlement(email, get_free_trial_days(), get_admin_email())
 
 def is_in_free_trial(email: str) -> bool:
     """True if user signed up within FREE_TRIAL_DAYS ago."""
-    return _days_since_signup(email) < get_free_trial_days()
+    return _entitlement(email)["in_trial"]
 
 def days_left_in_trial(email: str) -> int:
-    return max(0, get_free_trial_days() - _days_since_signup(email))
-
-def _get_subscription_row(email: str) -> dict:
-    """Return the full approved_emails row for this email."""
-    try:
-        row = sb_admin.table("approved_emails").select("*").eq("email", email.strip().lower()).execute()
-        if row.data:
-            return row.data[0]
-    except Exception:
-        pass
-    return {}
-
-def parse_subscription(row: dict) -> dict:
-    """
-    Parse plan_key, plan_start, plan_end, is_lifetime from the approved_emails row.
-    Stores dates in columns plan_start (DATE) and plan_end (DATE | NULL for lifetime).
-    Falls back to parsing legacy note field if columns missing.
-    Returns dict with keys: plan_key, plan_start, plan_end, is_lifetime, days_remaining, active
-    """
-    from datetime import datetime as _dt
-    plan_key   = (row.get("plan_key") or "").strip().lower()
-    plan_start = row.get("plan_start") or ""
-    plan_end   = row.get("plan_end")   or None
-
-    # Legacy fallback: parse note field
-    if not plan_key:
-        note = (row.get("note") or "").lower()
-        for k in ("life", "lifetime", "1yr", "3mo"):
-            if k in note:
-                plan_key = "life" if k in ("life","lifetime") else k
-                break
-
-    is_lifetime = plan_key in ("life", "lifetime")
-
-    # Parse plan_end date
-    end_dt = None
-    if plan_end and not is_lifetime:
-        try:
-            end_dt = _dt.fromisoformat(str(plan_end)[:10]).date()
-        except Exception:
-            pass
-
-    today = date.today()
-    if is_lifetime:
-        active        = bool(plan_key)
-        days_remaining = 99999
-    elif end_dt:
-        active        = today <= end_dt
-        days_remaining = max(0, (end_dt - today).days)
-    else:
-        # No expiry date stored — treat as active if plan_key present (legacy)
-        active        = bool(plan_key)
-        days_remaining = 0
-
-    return {
-        "plan_key":      plan_key,
-        "plan_start":    str(plan_start)[:10] if plan_start else "",
-        "plan_end":      str(end_dt) if end_dt else ("∞" if is_lifetime else ""),
-        "is_lifetime":   is_lifetime,
-        "days_remaining": days_remaining,
-        "active":        active,
-    }
+    return _entitlement(email)["trial_days_left"]
 
 def has_paid_plan(email: str) -> bool:
     """True if user has an active (non-expired) paid subscription."""
-    row = _get_subscription_row(email)
-    if not row:
-        return False
-    sub = parse_subscription(row)
-    return sub["active"]
+    return _entitlement(email)["has_plan"]
 
 def get_subscription_info(email: str) -> dict:
     """Return full parsed subscription info for display."""
-    row = _get_subscription_row(email)
-    return parse_subscription(row) if row else {}
+    return _entitlement(email)["sub"]
 
 def user_can_access(email: str) -> bool:
     """Full access gate: either in free trial OR has active paid plan."""
-    if is_in_free_trial(email):
-        return True
-    if not is_approved_email(email):
-        return False
-    return has_paid_plan(email)
+    return _entitlement(email)["can_access"]
 
 # ── Plan duration map: plan_key → days (None = lifetime) ──────────────────────
 PLAN_DURATION_DAYS = {"3mo": 90, "1yr": 365, "life": None}
@@ -1622,7 +1562,6 @@ def do_signup(email, password, username, full_name, exam_month, exam_year):
     When confirmation is ON:  res.session is None → shows "check your email" message.
     When confirmation is OFF: res.session exists  → shows "you're in, log in now" message.
     """
-    import time as _time
     email_clean = email.strip().lower()
 
     try:
@@ -1655,63 +1594,22 @@ def do_signup(email, password, username, full_name, exam_month, exam_year):
                     "approved_at": date.today().isoformat()
                 }).execute()
                 fetch_approved_emails.clear()
+                invalidate_entitlement(email_clean)
         except Exception:
             pass  # non-fatal
 
-        # ── Profile insert — sb_admin bypasses RLS entirely ───────────────────
-        # Retry loop handles the FK race condition where auth.sign_up() returns
-        # before the auth.users row is fully committed to the database.
-        _last_err = None
-        for _attempt in range(8):
-            try:
-                sb_admin.table("profiles").upsert({
-                    "id":         uid_val,
-                    "username":   username.strip(),
-                    "full_name":  full_name.strip(),
-                    "email":      email_clean,
-                    "exam_month": exam_month,
-                    "exam_year":  int(exam_year),
-                }).execute()
-                _last_err = None
-                break
-            except Exception as _ie:
-                _last_err = _ie
-                _err_str = str(_ie)
-                # RLS error — retrying won't help, fail immediately with clear message
-                if "42501" in _err_str or "row-level security" in _err_str.lower():
-                    return False, (
-                        "❌ Database permission error (RLS policy blocked the insert).\n\n"
-                        "**To fix:** Run `fix_rls_signup.sql` in Supabase → SQL Editor, "
-                        "then try signing up again."
-                    )
-                _time.sleep(1.5 + _attempt * 0.5)  # 1.5 s → 5 s backoff
-
-        if _last_err:
-            return False, (
-                f"Profile setup failed after retries — please contact admin. ({_last_err})"
-            )
-
-        # ── Revision tracker rows — sb_admin bypasses RLS ────────────────────
-        _rows = [
-            {"user_id": uid_val, "subject": s, "topic": t}
-            for s, tlist in TOPICS.items() for t in tlist
-        ]
-        _last_err2 = None
-        for _attempt2 in range(6):
-            try:
-                for _i in range(0, len(_rows), 50):
-                    sb_admin.table("revision_tracker") \
-                        .upsert(_rows[_i:_i+50], on_conflict="user_id,subject,topic") \
-                        .execute()
-                _last_err2 = None
-                break
-            except Exception as _ie2:
-                _last_err2 = _ie2
-                _time.sleep(1.5 + _attempt2 * 0.5)
-
-        if _last_err2:
-            # Non-fatal — tracker rows can be re-seeded later; don't block the user
-            pass
+        # ── Profile + revision tracker — provisioned in the background ───────
+        # Retries (FK race while auth.users commits) back off with jitter on a
+        # worker thread; the signup tab polls the job via provision_uid.
+        start_provisioning(sb_admin, {
+            "id":         uid_val,
+            "username":   username.strip(),
+            "full_name":  full_name.strip(),
+            "email":      email_clean,
+            "exam_month": exam_month,
+            "exam_year":  int(exam_year),
+        }, TOPICS)
+        st.session_state["provision_uid"] = uid_val
 
         st.session_state["show_how_to_use"] = True
 
@@ -1742,6 +1640,7 @@ def do_signup(email, password, username, full_name, exam_month, exam_year):
         return False, f"Error: {err}"
 
 
+@timed("auth.login")
 def do_login(email, password):
     """
     Sign in. Uses sb_admin for profile lookup so RLS cannot block it.
@@ -1762,6 +1661,11 @@ def do_login(email, password):
                 sb.auth.sign_out()
             except Exception:
                 pass
+            _pj = get_provisioning(uid_val)
+            if _pj and _pj["status"] in ("queued", "running"):
+                return False, "⚙️ Your account is still being set up — try again in a few seconds."
+            if _pj and retry_provisioning(sb_admin, uid_val):
+                return False, "⚙️ Finishing your account setup — try again in a few seconds."
             return False, (
                 "No profile found. Your signup may have been interrupted — "
                 "please sign up again (it will be quick since your email is registered)."
@@ -1770,8 +1674,9 @@ def do_login(email, password):
         profile_data = prof.data[0]
 
         # ── Access gate: free trial OR paid plan ──────────────────────────────
-        _in_trial = is_in_free_trial(email_clean)
-        _has_plan = has_paid_plan(email_clean)
+        _ent      = _entitlement(email_clean)
+        _in_trial = _ent["in_trial"]
+        _has_plan = _ent["has_plan"]
         if not _in_trial and not _has_plan:
             try:
                 sb.auth.sign_out()
@@ -1780,18 +1685,16 @@ def do_login(email, password):
             return False, "TRIAL_EXPIRED"  # special sentinel — handled in auth_page
 
         # ── Session state ─────────────────────────────────────────────────────
-        month_map = {"January": 1, "May": 5, "September": 9}
-        exam_m = month_map.get(profile_data.get("exam_month", "January"), 1)
-        exam_y = int(profile_data.get("exam_year", 2027))
-
-        st.session_state.exam_date          = date(exam_y, exam_m, 1)
+        st.session_state.exam_date          = exam_date_from_profile(profile_data)
         st.session_state.logged_in          = True
         st.session_state.user_id            = uid_val
         st.session_state.profile            = profile_data
         st.session_state["user_email"]      = email_clean
         st.session_state["in_free_trial"]   = _in_trial
-        st.session_state["trial_days_left"] = days_left_in_trial(email_clean)
-        st.session_state["sub_info"]        = get_subscription_info(email_clean)
+        st.session_state["trial_days_left"] = _ent["trial_days_left"]
+        st.session_state["sub_info"]        = _ent["sub"]
+        st.session_state.pop("signup_msg", None)
+        st.session_state.pop("provision_uid", None)
 
         # ── Load custom syllabus into SUBJECTS/TOPICS globals ─────────────────
         import json as _jsn
@@ -1838,6 +1741,8 @@ def do_logout():
     st.session_state.profile   = {}
     # Clear first-login guide flag on logout
     st.session_state.pop("show_how_to_use", None)
+    st.session_state.pop("dash_pdf_job", None)
+    st.session_state.pop("_enrolled_courses", None)
     st.rerun()
 
 
@@ -2174,706 +2079,6 @@ def dark_table(df, caption=""):
     """, unsafe_allow_html=True)
 
 
-# ══════════════════════════════════════════════════════════════════════════════
-# REVISION ENGINE — Controlled Growth Spaced Model (CGSM)
-# Based on the mathematical framework from the Study Strategy document.
-#
-# Core formula (non-exploding linear acceleration):
-#   d    = g2 − g1            (increment)
-#   Gap1 = g1                 (R1 gap, user-defined)
-#   Gap2 = g2                 (R2 gap, user-defined)
-#   Gapₙ = Gapₙ₋₁ + d × f   (controlled growth, f = growth factor)
-#
-# Hard guards:
-#   MaxGap ≤ min(120, DaysLeft/2)
-#   No revision beyond AttemptDate − 15 days
-# ══════════════════════════════════════════════════════════════════════════════
-
-def get_cgsm_gaps(g1: int, g2: int, num_rev: int, growth_factor: float = 1.30,
-                  max_gap: int = 120, days_left: int = None) -> list:
-    """
-    Controlled Growth Spaced Model — returns list of gap values (days) for R1..RN.
-
-    g1          : days gap before R1 (user-defined)
-    g2          : days gap before R2 (user-defined, measured from R1 date)
-    num_rev     : total number of revision rounds (1–10)
-    growth_factor: linear acceleration factor f (default 1.30)
-    max_gap     : hard cap on any single gap (default 120 days)
-    days_left   : if set, also caps at days_left/2
-
-    Returns: list of integer gap values, length = num_rev
-    """
-    if num_rev == 0:
-        return []
-    if num_rev == 1:
-        return [max(g1, 1)]
-
-    # Effective max gap: the tighter of the two caps
-    eff_max = max_gap
-    if days_left is not None and days_left > 0:
-        eff_max = min(eff_max, max(int(days_left / 2), g1 + 1))
-
-    d = g2 - g1   # base increment
-
-    gaps = [g1, g2]
-    for _ in range(2, num_rev):
-        next_gap = round(gaps[-1] + d * growth_factor)
-        next_gap = max(next_gap, gaps[-1] + 1)   # always strictly increasing
-        next_gap = min(next_gap, eff_max)          # hard ceiling
-        gaps.append(next_gap)
-
-    return gaps[:num_rev]
-
-
-def get_revision_interval(n: int, prof: dict = None, days_left: int = None) -> int:
-    """
-    Return gap (days) before revision round n (1-based).
-    Uses CGSM formula when profile has r1_days/r2_days/growth_factor.
-    Falls back to classic intervals for legacy profiles.
-    """
-    if prof is None:
-        prof = st.session_state.get("profile", {})
-
-    g1             = int(prof.get("r1_days", 3))
-    g2             = int(prof.get("r2_days", 7))
-    growth_factor  = float(prof.get("growth_factor", 1.30))
-    num_rev        = int(prof.get("num_revisions", 6))
-    max_gap        = int(prof.get("max_gap_days", 120))
-
-    gaps = get_cgsm_gaps(g1, g2, max(n, num_rev), growth_factor, max_gap, days_left)
-    if n <= len(gaps):
-        return gaps[n - 1]
-    return gaps[-1] if gaps else 7  # fallback
-
-
-def get_revision_ratios(r1_ratio: float, r2_ratio: float, num_rev: int) -> list:
-    """
-    Returns list of ratios (as decimals) for R1..RN.
-    R1, R2 set by user. R3+ decrease by 0.15× factor (later revisions are faster).
-    Min ratio = 0.10 (10% of TFR — always meaningful).
-    """
-    if num_rev == 0:
-        return []
-    ratios = [r1_ratio]
-    if num_rev >= 2:
-        ratios.append(r2_ratio)
-    for i in range(2, num_rev):
-        # Each subsequent revision is faster — decay by 15% of previous
-        next_r = round(ratios[-1] * 0.85, 4)
-        next_r = max(next_r, 0.10)   # floor at 10%
-        ratios.append(next_r)
-    return ratios
-
-
-# ══════════════════════════════════════════════════════════════════════════════
-# CA-GRADE ANALYTICS ENGINE
-# Implements: AIR Preparedness Index, RPI, PWDAM, Stress Index,
-#             Phase Detection, Retention Density, Subject Balance Detector
-# ══════════════════════════════════════════════════════════════════════════════
-
-def compute_frp(log_df: pd.DataFrame, prof: dict) -> float:
-    """
-    First Read Progress Ratio (FRP).
-    FRP = TotalFirstReadHoursCompleted / TotalFirstReadHoursRequired
-    Range: 0.0 → 1.0  (can exceed 1.0 if user overshot target; capped at 1.0)
-    """
-    if log_df.empty:
-        return 0.0
-    # Only reading sessions (not revision)
-    if "session_type" in log_df.columns:
-        read_log = log_df[log_df["session_type"] != "revision"]
-    else:
-        read_log = log_df
-
-    total_read_hrs = float(read_log["hours"].sum()) if not read_log.empty else 0.0
-    total_req_hrs  = sum(
-        int(prof.get(f"target_hrs_{s.lower()}", TARGET_HRS[s]))
-        for s in SUBJECTS
-    )
-    if total_req_hrs <= 0:
-        return 0.0
-    return min(total_read_hrs / total_req_hrs, 1.0)
-
-
-def compute_pwdam(frp: float, study_hours_today: float, phase: str) -> dict:
-    """
-    Progress-Weighted Dynamic Allocation Model (PWDAM).
-    Computes how to split today's study hours between revision and first read.
-
-    Formula (non-linear, exam-aligned):
-      RevisionShare = Base + (Max − Base) × FRP^1.3
-
-    Articleship:  Base=0.25, Max=0.70
-    Post-Art:     Base=0.40, Max=1.00
-
-    Returns dict with revision_hrs, first_read_hrs, revision_share_pct
-    """
-    if phase == "articleship":
-        base, max_share = 0.25, 0.70
-    else:
-        base, max_share = 0.40, 1.00
-
-    revision_share  = base + (max_share - base) * (frp ** 1.3)
-    revision_share  = min(revision_share, 1.0)
-    revision_hrs    = round(study_hours_today * revision_share, 2)
-    first_read_hrs  = round(max(study_hours_today - revision_hrs, 0.0), 2)
-
-    return {
-        "revision_share_pct": round(revision_share * 100, 1),
-        "revision_hrs":       revision_hrs,
-        "first_read_hrs":     first_read_hrs,
-    }
-
-
-def detect_study_phase(prof: dict) -> str:
-    """
-    Returns 'articleship' or 'post_articleship' based on profile settings.
-    Checks articleship_end_date; falls back to manual phase setting.
-    """
-    phase_manual = prof.get("study_phase", "articleship")
-    art_end = prof.get("articleship_end_date")
-    if art_end:
-        try:
-            end_dt = date.fromisoformat(str(art_end)[:10])
-            if date.today() >= end_dt:
-                return "post_articleship"
-            else:
-                return "articleship"
-        except:
-            pass
-    return phase_manual
-
-
-def compute_air_index(log_df: pd.DataFrame, rev_df: pd.DataFrame,
-                      rev_sess_df: pd.DataFrame, pend_df: pd.DataFrame,
-                      prof: dict) -> dict:
-    """
-    AIR Preparedness Index — per-subject and overall.
-
-    AIR = 0.35×Coverage + 0.30×RevisionDepth + 0.20×Consistency + 0.15×Balance
-    (normalized 0–100)
-
-    Returns dict with:
-      overall: float 0–100
-      per_subject: {s: float 0–100}
-      components: {coverage, revision_depth, consistency, balance}
-      color: hex string
-      label: text label
-    """
-    all_topics  = sum(len(v) for v in TOPICS.values())
-    num_rev     = int(prof.get("num_revisions", 6))
-
-    # ── Coverage Score: completed topics / total topics ────────────────────────
-    completed_count = 0
-    if not rev_df.empty and "topic_status" in rev_df.columns:
-        completed_count = int((rev_df["topic_status"] == "completed").sum())
-    coverage = completed_count / all_topics if all_topics > 0 else 0.0
-
-    # ── Revision Depth Score: completed revisions / max possible revisions ─────
-    total_rev_done = len(rev_sess_df) if not rev_sess_df.empty else 0
-    max_possible   = completed_count * num_rev
-    rev_depth      = min(total_rev_done / max_possible, 1.0) if max_possible > 0 else 0.0
-
-    # ── Consistency Score: 1 − (overdue / total_due) ───────────────────────────
-    overdue_count = 0
-    total_due     = 0
-    if not pend_df.empty:
-        total_due     = len(pend_df)
-        overdue_count = int((pend_df["days_overdue"] > 0).sum())
-    consistency   = (1 - overdue_count / total_due) if total_due > 0 else 1.0
-
-    # ── Balance Score: 1 − subject imbalance deviation ─────────────────────────
-    # Measure how evenly distributed revision effort is across subjects
-    if not rev_sess_df.empty and "subject" in rev_sess_df.columns and total_rev_done > 0:
-        subj_shares = {s: len(rev_sess_df[rev_sess_df["subject"] == s]) / total_rev_done
-                       for s in SUBJECTS}
-        ideal_share  = 1.0 / len(SUBJECTS)
-        deviation    = sum(abs(subj_shares.get(s, 0) - ideal_share) for s in SUBJECTS) / len(SUBJECTS)
-        balance      = max(0.0, 1.0 - deviation * 2)
-    else:
-        balance = 0.5  # neutral — no data yet
-
-    # ── Overall AIR ────────────────────────────────────────────────────────────
-    overall_raw = 0.35 * coverage + 0.30 * rev_depth + 0.20 * consistency + 0.15 * balance
-    overall     = round(overall_raw * 100, 1)
-
-    # ── Per-subject AIR ────────────────────────────────────────────────────────
-    per_subject = {}
-    for s in SUBJECTS:
-        n_topics  = len(TOPICS.get(s, []))
-        s_comp    = 0
-        if not rev_df.empty and "topic_status" in rev_df.columns:
-            s_comp = int(((rev_df["subject"] == s) & (rev_df["topic_status"] == "completed")).sum())
-        s_cov     = s_comp / n_topics if n_topics > 0 else 0.0
-
-        s_rev_done = len(rev_sess_df[rev_sess_df["subject"] == s]) if not rev_sess_df.empty and "subject" in rev_sess_df.columns else 0
-        s_max_rev  = s_comp * num_rev
-        s_depth    = min(s_rev_done / s_max_rev, 1.0) if s_max_rev > 0 else 0.0
-
-        s_overdue = 0
-        s_total_d = 0
-        if not pend_df.empty:
-            sp = pend_df[pend_df["subject"] == s]
-            s_total_d = len(sp)
-            s_overdue = int((sp["days_overdue"] > 0).sum())
-        s_cons = (1 - s_overdue / s_total_d) if s_total_d > 0 else 1.0
-
-        s_air = round((0.35 * s_cov + 0.30 * s_depth + 0.20 * s_cons + 0.15 * balance) * 100, 1)
-        per_subject[s] = s_air
-
-    # ── Color & label ──────────────────────────────────────────────────────────
-    if overall >= 80:
-        color, label = "#34D399", "STRONG"
-    elif overall >= 60:
-        color, label = "#FBBF24", "MODERATE"
-    elif overall >= 40:
-        color, label = "#F97316", "AT RISK"
-    else:
-        color, label = "#F87171", "CRITICAL"
-
-    return {
-        "overall":      overall,
-        "per_subject":  per_subject,
-        "components":   {
-            "coverage":      round(coverage * 100, 1),
-            "revision_depth":round(rev_depth * 100, 1),
-            "consistency":   round(consistency * 100, 1),
-            "balance":       round(balance * 100, 1),
-        },
-        "color": color,
-        "label": label,
-    }
-
-
-def compute_rpi(log_df: pd.DataFrame, rev_df: pd.DataFrame,
-                rev_sess_df: pd.DataFrame, pend_df: pd.DataFrame,
-                prof: dict) -> dict:
-    """
-    Readiness Probability Index (RPI) — the elite-level exam readiness score.
-
-    RPI = 0.30×C + 0.30×RD + 0.20×RDen + 0.10×Cons + 0.10×(1−ExpRisk)
-    (Range 0–1, displayed as 0–100)
-
-    C    = Coverage ratio
-    RD   = Revision Depth ratio
-    RDen = Retention Density (avg revision touches per topic)
-    Cons = Execution Consistency (days studied / elapsed days)
-    ExpRisk = Exposure Risk (% of completed topics not seen in >30 days)
-    """
-    all_topics  = sum(len(v) for v in TOPICS.values())
-    num_rev     = int(prof.get("num_revisions", 6))
-
-    # C — Coverage
-    completed_count = 0
-    if not rev_df.empty and "topic_status" in rev_df.columns:
-        completed_count = int((rev_df["topic_status"] == "completed").sum())
-    C = completed_count / all_topics if all_topics > 0 else 0.0
-
-    # RD — Revision Depth
-    total_rev_done = len(rev_sess_df) if not rev_sess_df.empty else 0
-    max_possible   = completed_count * num_rev
-    RD = min(total_rev_done / max_possible, 1.0) if max_possible > 0 else 0.0
-
-    # RDen — Retention Density (average touches per topic)
-    # Target: ≥4.0 by exam day
-    RDen_raw = total_rev_done / all_topics if all_topics > 0 else 0.0
-    # Normalize against target of 4.0
-    RDen = min(RDen_raw / 4.0, 1.0)
-
-    # Cons — Execution Consistency
-    if not log_df.empty and "date" in log_df.columns:
-        days_active    = log_df["date"].dt.date.nunique()
-        first_day      = log_df["date"].dt.date.min()
-        elapsed_days   = max((date.today() - first_day).days, 1)
-        Cons = min(days_active / elapsed_days, 1.0)
-    else:
-        Cons = 0.0
-
-    # ExpRisk — Exposure Risk
-    # % of completed topics whose last revision/read was >30 days ago
-    if not pend_df.empty and not pend_df.empty:
-        high_overdue   = int((pend_df["days_overdue"] > 30).sum()) if "days_overdue" in pend_df.columns else 0
-        tracked_topics = len(pend_df)
-        ExpRisk = high_overdue / tracked_topics if tracked_topics > 0 else 0.0
-    else:
-        ExpRisk = 0.0
-
-    # RPI formula
-    rpi_raw = 0.30 * C + 0.30 * RD + 0.20 * RDen + 0.10 * Cons + 0.10 * (1 - ExpRisk)
-    rpi     = round(rpi_raw * 100, 1)
-
-    # Interpretation
-    if rpi >= 80:
-        label, color = "HIGH CLEARANCE STABILITY", "#34D399"
-    elif rpi >= 65:
-        label, color = "COMPETITIVE — RISK EXISTS", "#60A5FA"
-    elif rpi >= 50:
-        label, color = "UNSTABLE", "#FBBF24"
-    else:
-        label, color = "STRUCTURALLY UNSAFE", "#F87171"
-
-    # Retention density value for milestone checking
-    days_left = max((get_exam_date() - date.today()).days, 0)
-    rden_milestone = None
-    if days_left <= 45:
-        rden_milestone = ("Exam − 45d target", 3.0)
-    elif days_left <= 90:
-        rden_milestone = ("Exam − 90d target", 2.0)
-    else:
-        rden_milestone = ("Exam day target", 4.0)
-
-    return {
-        "rpi":           rpi,
-        "label":         label,
-        "color":         color,
-        "components":    {
-            "coverage":     round(C * 100, 1),
-            "revision_depth": round(RD * 100, 1),
-            "retention_density": round(RDen_raw, 2),
-            "consistency":  round(Cons * 100, 1),
-            "exposure_risk":round(ExpRisk * 100, 1),
-        },
-        "rden_actual":   round(RDen_raw, 2),
-        "rden_milestone":rden_milestone,
-    }
-
-
-def compute_stress_index(pend_df: pd.DataFrame, log_df: pd.DataFrame,
-                          daily_cap: int) -> dict:
-    """
-    Stress Index = PlannedWork / RollingCapacity (14-day average)
-    > 1.3 → Plan is aggressive (warn)
-    > 1.5 → Critical — insufficient pace
-
-    Returns dict with stress_index, level ('normal'/'warn'/'critical'), message
-    """
-    # 14-day rolling average study hours
-    if log_df.empty:
-        rolling_avg = 0.0
-    else:
-        cutoff      = date.today() - timedelta(days=14)
-        recent      = log_df[log_df["date"].dt.date >= cutoff]
-        rolling_avg = float(recent["hours"].sum()) / 14.0 if not recent.empty else 0.0
-
-    # Planned daily work (overdue + today's due revisions)
-    planned_daily = 0
-    if not pend_df.empty:
-        overdue_count = int((pend_df["days_overdue"] >= 0).sum())
-        planned_daily = min(overdue_count, daily_cap)
-
-    # Stress = planned_daily / rolling_avg
-    stress = planned_daily / rolling_avg if rolling_avg > 0 else (1.0 if planned_daily == 0 else 2.0)
-
-    if stress >= 1.5:
-        level   = "critical"
-        color   = "#F87171"
-        message = "⚠️ Current pace insufficient for structured 2nd revision cycle"
-    elif stress >= 1.3:
-        level   = "warn"
-        color   = "#FBBF24"
-        message = "Plan may be aggressive — consider adjusting daily cap or revision settings"
-    else:
-        level   = "normal"
-        color   = "#34D399"
-        message = "Workload is sustainable"
-
-    return {
-        "stress_index":   round(stress, 2),
-        "rolling_avg_hrs":round(rolling_avg, 1),
-        "level":          level,
-        "color":          color,
-        "message":        message,
-    }
-
-
-def compute_execution_consistency(log_df: pd.DataFrame) -> dict:
-    """
-    Execution Consistency = DaysStudied / ElapsedDays
-    Brutally factual — no sugarcoating.
-    """
-    if log_df.empty:
-        return {"pct": 0, "days_studied": 0, "elapsed": 0, "color": "#F87171"}
-
-    days_studied = log_df["date"].dt.date.nunique()
-    first_day    = log_df["date"].dt.date.min()
-    elapsed      = max((date.today() - first_day).days + 1, 1)
-    pct          = round(days_studied / elapsed * 100, 1)
-
-    color = "#34D399" if pct >= 70 else "#FBBF24" if pct >= 50 else "#F87171"
-    return {"pct": pct, "days_studied": days_studied, "elapsed": elapsed, "color": color}
-
-
-def compute_phase_info(prof: dict, log_df: pd.DataFrame, days_left: int) -> dict:
-    """
-    Determine current preparation phase (A/B/C) and what it means.
-
-    Phase A — Coverage Phase:   FRP < 0.80
-    Phase B — Consolidation:    FRP >= 0.80
-    Phase C — Compression:      Last 60 days (auto, not optional)
-    """
-    frp   = compute_frp(log_df, prof)
-    phase = detect_study_phase(prof)
-
-    if days_left <= 60:
-        prep_phase = "C"
-        label      = "🔴 Phase C — COMPRESSION"
-        desc       = "Last 60 days: max gap ≤ 15 days, no new first reads, full revision intensity"
-        color      = "#F87171"
-    elif frp >= 0.80:
-        prep_phase = "B"
-        label      = "🟡 Phase B — CONSOLIDATION"
-        desc       = "Syllabus ≥80% done: revision dominant, gaps tightening, mock cycles increasing"
-        color      = "#FBBF24"
-    else:
-        prep_phase = "A"
-        label      = "🔵 Phase A — COVERAGE"
-        desc       = "First read priority, revision grows automatically with syllabus progress"
-        color      = "#60A5FA"
-
-    # Apply compression-mode gap cap in Phase C
-    effective_max_gap = 15 if prep_phase == "C" else int(prof.get("max_gap_days", 120))
-
-    return {
-        "prep_phase":        prep_phase,
-        "label":             label,
-        "desc":              desc,
-        "color":             color,
-        "frp":               frp,
-        "study_phase":       phase,
-        "effective_max_gap": effective_max_gap,
-    }
-
-
-def compute_weekly_subject_balance(rev_sess_df: pd.DataFrame) -> dict:
-    """
-    Weekly Subject Imbalance Detector — runs post-articleship only.
-    Checks if any subject's weekly revision share deviates >20% from ideal.
-
-    Returns list of flags: [{subject, share_pct, ideal_pct, flag, color}]
-    """
-    ideal = 1.0 / len(SUBJECTS)   # 20% each
-    result = {}
-
-    if rev_sess_df.empty or "subject" not in rev_sess_df.columns:
-        for s in SUBJECTS:
-            result[s] = {"share_pct": 0, "ideal_pct": ideal * 100,
-                          "flag": "no_data", "color": "#94A3B8"}
-        return result
-
-    # Last 7 days
-    cutoff  = date.today() - timedelta(days=7)
-    if "date" in rev_sess_df.columns:
-        try:
-            dates_col = pd.to_datetime(rev_sess_df["date"]).dt.date
-            weekly    = rev_sess_df[dates_col >= cutoff]
-        except:
-            weekly = rev_sess_df
-    else:
-        weekly = rev_sess_df
-
-    total_weekly = len(weekly) if not weekly.empty else 0
-
-    for s in SUBJECTS:
-        if total_weekly == 0:
-            share = 0.0
-        else:
-            s_count = len(weekly[weekly["subject"] == s]) if not weekly.empty else 0
-            share   = s_count / total_weekly
-
-        deviation = share - ideal
-        if deviation < -0.20:
-            flag, color = "under_revised", "#F87171"
-        elif deviation > 0.20:
-            flag, color = "over_focused", "#FBBF24"
-        else:
-            flag, color = "balanced", "#34D399"
-
-        result[s] = {
-            "share_pct": round(share * 100, 1),
-            "ideal_pct": round(ideal * 100, 1),
-            "flag":      flag,
-            "color":     color,
-        }
-
-    return result
-
-
-def compute_exam_projection(log_df: pd.DataFrame, rev_df: pd.DataFrame,
-                             prof: dict, days_left: int) -> dict:
-    """
-    Exam Readiness Projection — at current pace, what happens by exam day?
-
-    Returns:
-      - projected_frp_at_exam (0–1)
-      - projected_cycles_at_exam
-      - status: 'on_track' | 'at_risk' | 'critical'
-      - message: human readable summary
-    """
-    all_topics = sum(len(v) for v in TOPICS.values())
-
-    if log_df.empty or days_left <= 0:
-        return {
-            "status": "no_data",
-            "message": "Start logging study sessions to see your exam projection.",
-            "projected_frp": 0.0,
-            "projected_cycles": 0,
-        }
-
-    # 14-day rolling avg reading hours/day
-    if "session_type" in log_df.columns:
-        read_log = log_df[log_df["session_type"] != "revision"]
-    else:
-        read_log = log_df
-
-    cutoff       = date.today() - timedelta(days=14)
-    recent_read  = read_log[read_log["date"].dt.date >= cutoff]
-    daily_read_avg = float(recent_read["hours"].sum()) / 14.0 if not recent_read.empty else 0.0
-
-    # Current FRP and projected
-    frp_now      = compute_frp(log_df, prof)
-    total_req    = sum(int(prof.get(f"target_hrs_{s.lower()}", TARGET_HRS[s])) for s in SUBJECTS)
-    hrs_done     = frp_now * total_req
-    hrs_remaining= max(total_req - hrs_done, 0)
-
-    days_to_finish_fr = (hrs_remaining / daily_read_avg) if daily_read_avg > 0 else 9999
-    proj_frp     = min(frp_now + daily_read_avg * days_left / total_req, 1.0) if total_req > 0 else frp_now
-
-    # Revision cycles at exam
-    completed_count = int((rev_df["topic_status"] == "completed").sum()) if not rev_df.empty and "topic_status" in rev_df.columns else 0
-    num_rev         = int(prof.get("num_revisions", 6))
-    cutoff_rev      = date.today() - timedelta(days=14)
-    recent_rev      = log_df[(log_df.get("session_type") == "revision") if "session_type" in log_df.columns else pd.Series([False]*len(log_df))]
-    daily_rev_avg   = float(recent_rev["hours"].sum()) / 14.0 if not recent_rev.empty else 0.0
-    proj_rev_hrs    = daily_rev_avg * days_left
-    est_cycles      = round(proj_rev_hrs / max(completed_count * 1.5, 1), 1) if completed_count > 0 else 0.0
-
-    # Determine status
-    if proj_frp < 0.9 and days_left < 120:
-        status = "critical"
-        color  = "#F87171"
-        msg    = f"⚠️ At current pace, syllabus will be only {proj_frp*100:.0f}% complete by exam. Insufficient time for 2nd revision cycle."
-    elif days_to_finish_fr > days_left - 60:
-        status = "at_risk"
-        color  = "#FBBF24"
-        msg    = f"First read may complete too late — leaving < 60 days for consolidation. Increase daily reading hours."
-    elif est_cycles < 2:
-        status = "at_risk"
-        color  = "#FBBF24"
-        msg    = f"Projected only {est_cycles:.1f} revision cycles before exam. Most exams need minimum 3. Increase revision pace."
-    else:
-        status = "on_track"
-        color  = "#34D399"
-        msg    = f"On track — projected {est_cycles:.1f} revision cycles and {proj_frp*100:.0f}% first read by exam."
-
-    return {
-        "status":          status,
-        "color":           color,
-        "message":         msg,
-        "projected_frp":   round(proj_frp * 100, 1),
-        "projected_cycles":round(est_cycles, 1),
-        "daily_read_avg":  round(daily_read_avg, 1),
-        "days_to_finish_fr": int(days_to_finish_fr),
-    }
-
-
-def compute_revision_schedule(tfr: float, r1_ratio: float, r2_ratio: float,
-                               num_rev: int, completion_date: date,
-                               prof: dict = None, days_left: int = None) -> list:
-    """
-    Given TFR (hours), ratios, num revisions, and topic completion date,
-    returns list of dicts using CGSM gap formula:
-      {round: 1, duration_hrs: X, due_date: date, interval_days: N}
-    Uses get_cgsm_gaps() for non-exploding interval calculation.
-    """
-    if prof is None:
-        prof = st.session_state.get("profile", {})
-    g1            = int(prof.get("r1_days", 3))
-    g2            = int(prof.get("r2_days", 7))
-    growth_factor = float(prof.get("growth_factor", 1.30))
-    max_gap       = int(prof.get("max_gap_days", 120))
-    gaps      = get_cgsm_gaps(g1, g2, num_rev, growth_factor, max_gap, days_left)
-    ratios    = get_revision_ratios(r1_ratio, r2_ratio, num_rev)
-    schedule  = []
-    prev_date = completion_date
-    for i, ratio in enumerate(ratios):
-        rn        = i + 1
-        interval  = gaps[i] if i < len(gaps) else gaps[-1]
-        due       = prev_date + timedelta(days=interval)
-        duration  = round(tfr * ratio, 2)
-        schedule.append({
-            "round":         rn,
-            "label":         f"R{rn}",
-            "duration_hrs":  max(duration, 0.5),
-            "due_date":      due,
-            "interval_days": interval,
-            "ratio":         ratio,
-        })
-        prev_date = due
-    return schedule
-
-
-def get_topic_status(subject: str, topic: str, rev_df: pd.DataFrame) -> str:
-    """Returns 'not_started' | 'reading' | 'completed'"""
-    if rev_df.empty:
-        return "not_started"
-    row = rev_df[(rev_df["subject"] == subject) & (rev_df["topic"] == topic)]
-    if row.empty:
-        return "not_started"
-    status = row.iloc[0].get("topic_status", "not_started")
-    return status if status else "not_started"
-
-
-def get_tfr(subject: str, topic: str, log_df: pd.DataFrame) -> float:
-    """Returns Total First Reading hours (sum of all Reading sessions)."""
-    if log_df.empty:
-        return 0.0
-    mask = (
-        (log_df["subject"] == subject) &
-        (log_df["topic"]   == topic) &
-        ((log_df["session_type"] != "revision" if "session_type" in log_df.columns else pd.Series([True]*len(log_df))))
-    )
-    return float(log_df[mask]["hours"].sum())
-
-
-def get_completed_revisions(subject: str, topic: str, rev_sessions_df: pd.DataFrame) -> list:
-    """Returns list of completed revision dicts sorted by round."""
-    if rev_sessions_df.empty:
-        return []
-    rows = rev_sessions_df[
-        (rev_sessions_df["subject"] == subject) &
-        (rev_sessions_df["topic"]   == topic) &
-        (rev_sessions_df["status"]  == "completed")
-    ].sort_values("round")
-    return rows.to_dict("records")
-
-
-def memory_strength(revisions_done: int, last_revision_date, num_rev: int) -> tuple:
-    """
-    Memory Strength Indicator based on recency + depth.
-    Returns (strength_pct, label, color)
-    """
-    if revisions_done == 0 or last_revision_date is None:
-        return (0, "🧠 Unrevised", "#F87171")
-    # Days since last revision
-    if isinstance(last_revision_date, str):
-        last_dt = date.fromisoformat(last_revision_date[:10])
-    else:
-        last_dt = last_revision_date
-    days_ago   = (date.today() - last_dt).days
-    depth_pct  = min(revisions_done / num_rev * 100, 100)
-    # Decay: lose 1% per day since last revision, floored at 20%
-    decay      = max(0, days_ago * 0.8)
-    strength   = max(20.0, depth_pct - decay)
-    if strength >= 80:
-        return (strength, "💚 Strong",    "#34D399")
-    elif strength >= 55:
-        return (strength, "🔵 Moderate",  "#60A5FA")
-    elif strength >= 30:
-        return (strength, "🟡 Fading",    "#FBBF24")
-    else:
-        return (strength, "🔴 Weak",      "#F87171")
-
-
 @st.cache_data(ttl=300, show_spinner=False)
 def compute_revision_pendencies(rev_df_hash, log_df_hash, log_json):
     """
@@ -2881,84 +2086,8 @@ def compute_revision_pendencies(rev_df_hash, log_df_hash, log_json):
     Only topics with status='completed' are eligible for revision scheduling.
     """
     import json
-    rows_data = json.loads(log_json)
-    today = date.today()
-    rows  = []
-
-    from collections import defaultdict
-    topic_sessions = defaultdict(list)
-    topic_status_map = {}
-    topic_completion_date = {}
-    topic_tfr = defaultdict(float)
-
-    for r in rows_data:
-        key = (r["subject"], r["topic"])
-        d   = date.fromisoformat(str(r["date"])[:10])
-        st_type = r.get("session_type", "reading")
-        ts      = r.get("topic_status", "reading")
-        topic_status_map[key]  = ts
-        if st_type != "revision":
-            topic_tfr[key] += float(r.get("hours", 0))
-        if ts == "completed" and r.get("completion_date"):
-            topic_completion_date[key] = date.fromisoformat(r["completion_date"][:10])
-        topic_sessions[key].append((d, st_type))
-
-    for key, session_list in topic_sessions.items():
-        subj, topic = key
-        status = topic_status_map.get(key, "reading")
-
-        # Only schedule revisions for COMPLETED topics
-        if status != "completed":
-            continue
-
-        comp_date = topic_completion_date.get(key)
-        if not comp_date:
-            # Infer completion date as last reading session date
-            reading_dates = [d for d, st in session_list if st != "revision"]
-            if not reading_dates:
-                continue
-            comp_date = max(reading_dates)
-
-        # Count completed revisions
-        rev_dates = sorted([d for d, st in session_list if st == "revision"])
-        revs_done = len(rev_dates)
-
-        # Next due: apply CGSM schedule from completion_date
-        _prof_pend    = st.session_state.get("profile", {})
-        _g1           = int(_prof_pend.get("r1_days", 3))
-        _g2           = int(_prof_pend.get("r2_days", 7))
-        _gf           = float(_prof_pend.get("growth_factor", 1.30))
-        _mgap         = int(_prof_pend.get("max_gap_days", 120))
-        _nr           = max(int(_prof_pend.get("num_revisions", 6)), revs_done + 1)
-        _gaps         = get_cgsm_gaps(_g1, _g2, _nr, _gf, _mgap)
-        _round_idx    = revs_done  # 0-based index for next round
-        interval      = _gaps[_round_idx] if _round_idx < len(_gaps) else _gaps[-1]
-        base_date     = rev_dates[-1] if rev_dates else comp_date
-        due_date  = base_date + timedelta(days=interval)
-        days_diff = (today - due_date).days
-
-        rows.append({
-            "subject":        subj,
-            "topic":          topic,
-            "revisions_done": revs_done,
-            "completion_date": str(comp_date),
-            "last_studied":   base_date,
-            "due_date":       due_date,
-            "days_overdue":   days_diff,
-            "interval_days":  interval,
-            "round_label":    f"R{revs_done + 1}",
-            "status": (
-                "🔴 OVERDUE"    if days_diff > 0
-                else "🟡 DUE TODAY" if days_diff == 0
-                else "🟢 UPCOMING"
-            )
-        })
-
-    if not rows:
-        return pd.DataFrame()
-    df = pd.DataFrame(rows)
-    df = df.sort_values("days_overdue", ascending=False).reset_index(drop=True)
-    return df
+    return build_revision_pendencies(json.loads(log_json),
+                                     st.session_state.get("profile", {}))
 
 
 def get_pendencies(rev_df, log_df):
@@ -2966,14 +2095,8 @@ def get_pendencies(rev_df, log_df):
     if log_df.empty:
         return pd.DataFrame()
     try:
-        import json
-        cols = [c for c in ["subject","topic","date","hours","session_type",
-                             "topic_status","completion_date"] if c in log_df.columns]
-        log_mini = log_df[cols].copy()
-        if "date" in log_mini.columns:
-            log_mini["date"] = log_mini["date"].dt.strftime("%Y-%m-%d")
-        log_json = log_mini.to_json(orient="records")
-        return compute_revision_pendencies(len(rev_df), len(log_df), log_json)
+        return compute_revision_pendencies(len(rev_df), len(log_df),
+                                           pendency_log_json(log_df))
     except:
         return pd.DataFrame()
 
@@ -2985,10 +2108,7 @@ def update_profile(data):
         prof = sb.table("profiles").select("*").eq("id", uid()).execute()
         if prof.data:
             st.session_state.profile = prof.data[0]
-            month_map = {"January": 1, "May": 5, "September": 9}
-            exam_m = month_map.get(prof.data[0].get("exam_month", "January"), 1)
-            exam_y = int(prof.data[0].get("exam_year", 2027))
-            st.session_state.exam_date = date(exam_y, exam_m, 1)
+            st.session_state.exam_date = exam_date_from_profile(prof.data[0])
         return True, "Profile updated!"
     except Exception as e:
         err = str(e)
@@ -3082,59 +2202,6 @@ def get_level_info(total_hours: float) -> dict:
     }
 
 
-# ══════════════════════════════════════════════════════════════════════════════
-# ACHIEVEMENT SYSTEM
-# ══════════════════════════════════════════════════════════════════════════════
-ACHIEVEMENTS = {
-    "topics": [
-        {"id":"t1",  "icon":"📖", "name":"First Chapter",   "desc":"Complete your first topic",          "req": 1,  "type":"completed_topics"},
-        {"id":"t2",  "icon":"📚", "name":"Bookworm",         "desc":"Complete 5 topics",                  "req": 5,  "type":"completed_topics"},
-        {"id":"t3",  "icon":"🎓", "name":"Scholar",          "desc":"Complete 10 topics",                 "req":10,  "type":"completed_topics"},
-        {"id":"t4",  "icon":"🏛️", "name":"Academician",     "desc":"Complete 25 topics",                 "req":25,  "type":"completed_topics"},
-        {"id":"t5",  "icon":"👑", "name":"Grand Scholar",    "desc":"Complete all 86 topics",             "req":86,  "type":"completed_topics"},
-    ],
-    "revisions": [
-        {"id":"r1",  "icon":"🔄", "name":"First Revision",  "desc":"Complete your first revision",       "req": 1,  "type":"total_revisions"},
-        {"id":"r2",  "icon":"🔁", "name":"Revisionist",     "desc":"Complete 10 revisions",              "req":10,  "type":"total_revisions"},
-        {"id":"r3",  "icon":"💪", "name":"Iron Memory",     "desc":"Complete 25 revisions",              "req":25,  "type":"total_revisions"},
-        {"id":"r4",  "icon":"🧠", "name":"Mastermind",      "desc":"Complete 50 revisions",              "req":50,  "type":"total_revisions"},
-        {"id":"r5",  "icon":"⚡", "name":"Revision King",   "desc":"Complete 100 revisions",             "req":100, "type":"total_revisions"},
-    ],
-    "tests": [
-        {"id":"ts1", "icon":"✍️",  "name":"Test Pilot",     "desc":"Attempt your first mock test",       "req": 1,  "type":"total_tests"},
-        {"id":"ts2", "icon":"🎯",  "name":"Sharp Shooter",  "desc":"Score 60%+ on any test",             "req": 60, "type":"max_score"},
-        {"id":"ts3", "icon":"🏅",  "name":"Consistent",     "desc":"Attempt 5 tests",                    "req": 5,  "type":"total_tests"},
-        {"id":"ts4", "icon":"🥇",  "name":"Top Scorer",     "desc":"Score 80%+ on any test",             "req": 80, "type":"max_score"},
-        {"id":"ts5", "icon":"🏆",  "name":"Exam Ready",     "desc":"Avg score 70%+ across 10 tests",     "req": 70, "type":"avg_score_10"},
-    ],
-}
-
-def compute_achievements(log_df, rev_df, rev_sess_df, test_df):
-    """Returns dict of achievement_id -> bool (unlocked)."""
-    unlocked = {}
-    # Topics
-    completed_topics = 0
-    if not rev_df.empty and "topic_status" in rev_df.columns:
-        completed_topics = int((rev_df["topic_status"] == "completed").sum())
-    total_revisions = len(rev_sess_df) if not rev_sess_df.empty else 0
-    total_tests     = len(test_df) if not test_df.empty else 0
-    max_score       = float(test_df["score_pct"].max()) if not test_df.empty and "score_pct" in test_df.columns else 0
-    avg_score_10    = float(test_df["score_pct"].tail(10).mean()) if not test_df.empty and len(test_df) >= 10 else 0
-
-    vals = {
-        "completed_topics": completed_topics,
-        "total_revisions":  total_revisions,
-        "total_tests":      total_tests,
-        "max_score":        max_score,
-        "avg_score_10":     avg_score_10,
-    }
-    for cat, items in ACHIEVEMENTS.items():
-        for item in items:
-            v = vals.get(item["type"], 0)
-            unlocked[item["id"]] = v >= item["req"]
-    return unlocked, vals
-
-
 # ══════════════════════════════════════════════════════════════════════════════
 # PROFILE PAGE (full rewrite with tabs)
 # ══════════════════════════════════════════════════════════════════════════════
@@ -3876,8 +2943,9 @@ def profile_page(log_df, rev_df, rev_sess, test_df):
 # ADMIN PANEL — fully rewritten for speed and correct functionality
 #
 # Performance fixes:
-#   • User list cached in session_state — fetched once, not on every rerun
-#   • _days_since_signup() called once per batch via approved_at from the row itself
+#   • User list paged + filtered server-side (modules/admin_users.py);
+#     pages cached in session_state per filter set, cleared on any write
+#   • Trial days left / plan state computed by the admin_user_grid view
 #     (no extra DB query per user in a loop)
 #   • get_plans() called ONCE at top, stored in _P — not called inside loops
 #   • _render_pricing() preview is behind an expander — heavy iframe not always rendered
@@ -3892,34 +2960,68 @@ def profile_page(log_df, rev_df, rev_sess, test_df):
 # ══════════════════════════════════════════════════════════════════════════════
 
 def _admin_clear_user_cache():
-    """Targeted cache clear — only resets admin user list and email approval cache."""
+    """Targeted cache clear — only resets admin user pages/counts and email approval cache."""
     fetch_approved_emails.clear()
-    if "_admin_users" in st.session_state:
-        del st.session_state["_admin_users"]
+    invalidate_entitlement()
+    st.session_state.pop("_admin_users", None)
+    st.session_state.pop("_admin_counts", None)
 
 
-def _admin_get_users(force_refresh: bool = False):
-    """Fetch all approved_emails rows, cached in session_state for fast tab switching."""
-    if force_refresh or "_admin_users" not in st.session_state:
+def _admin_reset_page():
+    """Filters changed — jump back to page 1."""
+    st.session_state["adm_page"] = 1
+
+
+def _admin_get_users(search: str = "", status: str = "all", plan: str = "all",
+                     state: str = "all", sort: str = "newest", page: int = 1,
+                     force_refresh: bool = False):
+    """
+    One page of users for the given filters, fetched server-side.
+    Pages are cached in session_state per filter set for fast tab switching.
+    Returns (rows, total_matching, state_filter_supported).
+    """
+    key   = (search.strip().lower(), status, plan, state, sort, page)
+    cache = st.session_state.setdefault("_admin_users", {})
+    if force_refresh or key not in cache:
         try:
-            rows = sb_admin.table("approved_emails").select("*").order("approved_at", desc=True).execute()
-            st.session_state["_admin_users"] = rows.data or []
+            cache[key] = fetch_user_page(search, status, plan, state, sort, page - 1,
+                                         trial_days=get_free_trial_days())
         except Exception as _e:
-            st.session_state["_admin_users"] = []
             st.error(f"Could not fetch users: {_e}")
-    return st.session_state.get("_admin_users", [])
+            return [], 0, False
+    return cache[key]
 
 
-def _days_since_row(row: dict) -> int:
-    """Compute days since signup using the row's own approved_at — zero extra DB queries."""
-    from datetime import datetime as _dt
-    val = (row.get("approved_at") or "")
-    if not val:
-        return 0
+def _admin_validate_referrals(emails: list, plan_key: str):
+    """
+    Bulk counterpart of the per-approve referral check: one query finds which
+    of the approved emails have a pending referral; only those are validated.
+    """
+    if not emails:
+        return
     try:
-        return (_dt.today() - _dt.fromisoformat(str(val)[:10])).days
+        res = sb_admin.table("referral_uses").select("referred_email") \
+                .in_("referred_email", emails).eq("validated", False).execute()
     except Exception:
-        return 0
+        return
+    for _em in {r["referred_email"] for r in (res.data or [])}:
+        try:
+            auto_validate_referral(_em, plan_key)
+        except Exception:
+            pass
+
+
+def _admin_bulk_retry(emails: list):
+    """Re-select the failed emails of the last bulk run (widget-safe callback)."""
+    st.session_state["adm_bulk_sel"] = emails
+    st.session_state.pop("adm_bulk_report", None)
+
+
+def _admin_get_counts() -> dict:
+    """Pending / approved / revoked totals, cached alongside the user pages."""
+    if "_admin_counts" not in st.session_state:
+        st.session_state["_admin_counts"] = fetch_status_counts()
+    return st.session_state["_admin_counts"]
 
 
 _PLAN_DUR = {"3mo": 90, "1yr": 365, "life": None}
@@ -3936,18 +3038,201 @@ def _expire_label(plan_key: str, end_date_val) -> str:
     return end_date_val.strftime("%d %b %Y") if end_date_val else "—"
 
 
+def _admin_pending_row(_row: dict, _P: dict, _plan_keys: list):
+    """Card + approve/remove actions for one pending user."""
+    _em    = _row.get("email", "")
+    _at    = str(_row.get("approved_at", ""))[:10]
+    # trial_days_left is computed server-side (admin_user_grid view)
+    _tdays = int(_row.get("trial_days_left", 0))
+    _tc    = "34D399" if _tdays > 0 else "F87171"
+
+    st.markdown(f"""
+    <div style="background:rgba(251,191,36,0.06);border:1px solid rgba(251,191,36,0.25);
+                border-radius:10px;padding:10px 14px;margin-bottom:6px">
+      <span style="color:#FBBF24;font-size:13px;font-weight:700">{_em}</span>
+      <span style="color:#7BA7CC;font-size:11px;margin-left:10px">📅 Signed up: {_at}</span>
+      <span style="color:#{_tc};font-size:11px;margin-left:10px">🕐 Trial: {_tdays}d left</span>
+    </div>""", unsafe_allow_html=True)
+
+    _pa1, _pa2, _pa3 = st.columns([1.6, 1.4, 1.0])
+    with _pa1:
+        # format_func uses default arg to capture _P at definition time
+        _plan_sel = st.selectbox("Plan", _plan_keys,
+            format_func=lambda k, p=_P: f"{p[k]['label']} — ₹{p[k]['price']}",
+            key=f"plan_{_em}")
+    with _pa2:
+        _start_sel = st.date_input("Access starts", value=date.today(),
+            key=f"start_{_em}", help="Usually today — day payment received")
+    with _pa3:
+        _end_v = _end_date(_plan_sel, _start_sel)
+        _exp_p = _expire_label(_plan_sel, _end_v)
+        st.markdown(f"""
+        <div style="margin-top:26px;background:rgba(56,189,248,0.08);
+                    border:1px solid rgba(56,189,248,0.30);border-radius:8px;
+                    padding:8px 12px;text-align:center">
+            <div style="font-size:9px;color:#7BA7CC;font-weight:700;letter-spacing:1px;margin-bottom:2px">EXPIRES</div>
+            <div style="font-size:13px;font-weight:800;
+                        color:{'#FBBF24' if _PLAN_DUR.get(_plan_sel) is None else '#38BDF8'}">{_exp_p}</div>
+        </div>""", unsafe_allow_html=True)
+
+    _note_inp = st.text_input("Payment note (optional)",
+        placeholder="e.g. GPay ₹399 received 22 Feb 2026", key=f"note_{_em}")
+
+    _btn1, _btn2 = st.columns([1, 1])
+    with _btn1:
+        if st.button(f"✅ Approve {_em.split('@')[0]}", key=f"approve_{_em}", use_container_width=True):
+            _full_note = f"plan:{_plan_sel} start:{_start_sel.isoformat()} | {_note_inp}".strip()
+            _ok2, _msg2 = approve_email(_em, note=_full_note,
+                plan_key=_plan_sel, plan_start_date=_start_sel, plan_end_date=_end_v)
+            if _ok2:
+                auto_validate_referral(_em, _plan_sel)
+                st.success(f"✅ {_em} approved — {_P.get(_plan_sel,{}).get('label',_plan_sel)} · Expires: {_exp_p}")
+                _admin_clear_user_cache()
+                st.rerun()
+            else:
+                st.error(_msg2)
+    with _btn2:
+        if st.button("🗑 Remove", key=f"rm_pend_{_em}", use_container_width=True):
+            try:
+                sb_admin.table("approved_emails").delete().eq("email", _em).execute()
+                st.warning(f"🗑 {_em} removed")
+                _admin_clear_user_cache()
+                st.rerun()
+            except Exception as _de:
+                st.error(f"Error: {_de}")
+    st.markdown("<hr style='border-color:rgba(56,189,248,0.10);margin:8px 0'>", unsafe_allow_html=True)
+
+
+def _admin_active_row(_row: dict, _P: dict, _plan_keys: list):
+    """Card + extend/revoke/remove actions for one approved user."""
+    _em      = _row.get("email", "")
+    _at      = str(_row.get("approved_at", ""))[:10]
+    _sub     = parse_subscription(_row)
+    _pk      = _sub.get("plan_key", "")
+    _plan_lbl = _P.get(_pk, {}).get("label", "No Plan") if _pk else "No Plan"
+    _is_life  = _sub.get("is_lifetime", False)
+    _drem     = _sub.get("days_remaining", 0)
+    _end_str  = _sub.get("plan_end", "—")
+
+    if _is_life:
+        _ec = "#FBBF24"; _ei = "🏆"; _et = "Lifetime"
+    elif _drem <= 7:
+        _ec = "#F87171"; _ei = "⚠️"; _et = f"Expires in {_drem}d!"
+    elif _drem <= 30:
+        _ec = "#FBBF24"; _ei = "⏰"; _et = f"{_drem}d left"
+    else:
+        _ec = "#34D399"; _ei = "✅"; _et = f"{_drem}d left"
+
+    st.markdown(f"""
+    <div style="background:rgba(4,14,38,0.80);border:1px solid rgba(52,211,153,0.20);
+                border-radius:10px;padding:10px 14px;margin-bottom:4px">
+        <span style="color:#34D399;font-size:13px;font-weight:600">{_em}</span>
+        <span style="color:#38BDF8;font-size:11px;margin-left:10px;
+                     background:rgba(56,189,248,0.10);padding:2px 8px;border-radius:6px">{_plan_lbl}</span>
+        <span style="color:{_ec};font-size:11px;margin-left:8px;font-weight:700">{_ei} {_et}</span>
+        <span style="color:#7BA7CC;font-size:10px;margin-left:8px">{f'until {_end_str}' if not _is_life else ''}</span>
+        <span style="color:#3A5A7A;font-size:10px;margin-left:8px">approved:{_at}</span>
+    </div>""", unsafe_allow_html=True)
+
+    _ca, _cb, _cc = st.columns([1.8, 1, 1])
+    with _ca:
+        with st.expander(f"🔁 Extend / Change plan for {_em.split('@')[0]}"):
+            _ext_plan  = st.selectbox("New plan", _plan_keys,
+                format_func=lambda k, p=_P: f"{p[k]['label']} — ₹{p[k]['price']}",
+                key=f"ext_plan_{_em}")
+            _ext_start = st.date_input("New start date", value=date.today(), key=f"ext_start_{_em}")
+            _ext_end   = _end_date(_ext_plan, _ext_start)
+            _ext_exp   = _expire_label(_ext_plan, _ext_end)
+            _ext_note  = st.text_input("Note", placeholder="Renewal details", key=f"ext_note_{_em}")
+            st.caption(f"Will expire: **{_ext_exp}**")
+            if st.button("✅ Update Plan", key=f"ext_btn_{_em}", use_container_width=True):
+                _ok3, _msg3 = approve_email(_em, note=_ext_note,
+                    plan_key=_ext_plan, plan_start_date=_ext_start, plan_end_date=_ext_end)
+                if _ok3:
+                    st.success(f"✅ Updated: {_P.get(_ext_plan,{}).get('label',_ext_plan)} · Expires: {_ext_exp}")
+                    _admin_clear_user_cache()
+                    st.rerun()
+                else:
+                    st.error(_msg3)
+    with _cb:
+        if st.button("🚫 Revoke", key=f"revoke_{_em}", use_container_width=True):
+            _ok2, _msg2 = revoke_email(_em)
+            if _ok2:
+                st.warning(_msg2)
+                _admin_clear_user_cache()
+                st.rerun()
+    with _cc:
+        if st.button("🗑 Remove", key=f"rm_{_em}", use_container_width=True):
+            try:
+                sb_admin.table("approved_emails").delete().eq("email", _em).execute()
+                st.warning(f"🗑 {_em} removed")
+                _admin_clear_user_cache()
+                st.rerun()
+            except Exception as _de:
+                st.error(f"Error: {_de}")
+    st.markdown("<hr style='border-color:rgba(56,189,248,0.08);margin:4px 0'>", unsafe_allow_html=True)
+
+
+def _admin_revoked_row(_row: dict, _P: dict, _plan_keys: list):
+    """Row + re-approve/remove actions for one revoked user."""
+    _em = _row.get("email", "")
+    _at = str(_row.get("approved_at", ""))[:10]
+    _cr1, _cr2, _cr3, _cr4 = st.columns([1.8, 1.2, 0.9, 0.9])
+    _cr1.markdown(
+        f"<span style='color:#F87171;font-size:13px'>{_em}</span> "
+        f"<span style='color:#7BA7CC;font-size:11px'>{_at}</span>",
+        unsafe_allow_html=True)
+    with _cr2:
+        # Re-approve WITH plan — FIXED (was approve_email(_em) with no plan)
+        _ra_plan = st.selectbox("Plan", _plan_keys,
+            format_func=lambda k, p=_P: p[k]["label"],
+            key=f"ra_plan_{_em}")
+    with _cr3:
+        if st.button("✅ Re-approve", key=f"reapprove_{_em}", use_container_width=True):
+            _ra_end = _end_date(_ra_plan, date.today())
+            _ok2, _msg2 = approve_email(_em,
+                plan_key=_ra_plan, plan_start_date=date.today(), plan_end_date=_ra_end)
+            if _ok2:
+                st.success(f"{_msg2} · {_P.get(_ra_plan,{}).get('label',_ra_plan)}")
+                _admin_clear_user_cache()
+                st.rerun()
+            else:
+                st.error(_msg2)
+    with _cr4:
+        if st.button("🗑 Remove", key=f"rm_rev_{_em}", use_container_width=True):
+            try:
+                sb_admin.table("approved_emails").delete().eq("email", _em).execute()
+                st.warning(f"🗑 {_em} removed")
+                _admin_clear_user_cache()
+                st.rerun()
+            except Exception as _de:
+                st.error(f"Error: {_de}")
+
+
+
 def _render_admin_panel():
     """Admin Control Panel — fast, fully functional."""
 
     st.markdown('<div class="neon-header neon-header-glow">🔐 Admin Control Panel</div>',
                 unsafe_allow_html=True)
 
-    _adm_tab1, _adm_tab2, _adm_tab3 = st.tabs([
+    _adm_tab1, _adm_tab2, _adm_tab3, _adm_tab4 = st.tabs([
         "👥 User Management",
         "💰 Pricing Manager",
         "🎁 Referral Analytics",
+        "🩺 Diagnostics",
     ])
 
+    # ══════════════════════════════════════════════════════════════════════════
+    # TAB 4 — DIAGNOSTICS (query trace + phase timings)
+    # ══════════════════════════════════════════════════════════════════════════
+    with _adm_tab4:
+        from modules.query_trace import render_query_trace_panel
+        from modules.timing import render_timing_panel
+        render_query_trace_panel()
+        st.markdown("---")
+        render_timing_panel()
+
     # ══════════════════════════════════════════════════════════════════════════
     # TAB 1 — USER MANAGEMENT
     # ══════════════════════════════════════════════════════════════════════════
@@ -3959,19 +3244,15 @@ def _render_admin_panel():
             _admin_clear_user_cache()
             st.rerun()
 
-        # ── Fetch user list ONCE (cached in session_state) ─────────────────
-        _rows = _admin_get_users()
         _P    = get_plans()   # fetched once, bound to local var — never called inside loops
         _plan_keys = list(_P.keys())
 
-        _pending_rows  = [r for r in _rows if r.get("status") == "pending"]
-        _approved_rows = [r for r in _rows if r.get("status") == "approved"]
-        _revoked_rows  = [r for r in _rows if r.get("status") == "revoked"]
-
+        # ── Status counts: exact-count queries, never a full table load ────
+        _counts = _admin_get_counts()
         _m1, _m2, _m3 = st.columns(3)
-        _m1.metric("⏳ Pending",  len(_pending_rows))
-        _m2.metric("✅ Active",   len(_approved_rows))
-        _m3.metric("🚫 Revoked",  len(_revoked_rows))
+        _m1.metric("⏳ Pending",  _counts.get("pending", 0))
+        _m2.metric("✅ Active",   _counts.get("approved", 0))
+        _m3.metric("🚫 Revoked",  _counts.get("revoked", 0))
 
         st.markdown("---")
 
@@ -4011,192 +3292,111 @@ def _render_admin_panel():
         st.markdown("---")
 
         # ══════════════════════════════════════════════════════════════════
-        # PENDING REQUESTS
-        # ══════════════════════════════════════════════════════════════════
-        st.markdown("### 🕐 Pending Requests")
-        if not _pending_rows:
-            st.info("No pending requests right now.")
-        else:
-            st.warning(f"⚠️ {len(_pending_rows)} user(s) waiting for approval")
-            for _row in _pending_rows:
-                _em    = _row.get("email", "")
-                _at    = str(_row.get("approved_at", ""))[:10]
-                # Use row's own approved_at — ZERO extra DB queries per user
-                _tdays = max(0, get_free_trial_days() - _days_since_row(_row))
-                _tc    = "34D399" if _tdays > 0 else "F87171"
-
-                st.markdown(f"""
-                <div style="background:rgba(251,191,36,0.06);border:1px solid rgba(251,191,36,0.25);
-                            border-radius:10px;padding:10px 14px;margin-bottom:6px">
-                  <span style="color:#FBBF24;font-size:13px;font-weight:700">{_em}</span>
-                  <span style="color:#7BA7CC;font-size:11px;margin-left:10px">📅 Signed up: {_at}</span>
-                  <span style="color:#{_tc};font-size:11px;margin-left:10px">🕐 Trial: {_tdays}d left</span>
-                </div>""", unsafe_allow_html=True)
-
-                _pa1, _pa2, _pa3 = st.columns([1.6, 1.4, 1.0])
-                with _pa1:
-                    # format_func uses default arg to capture _P at definition time
-                    _plan_sel = st.selectbox("Plan", _plan_keys,
-                        format_func=lambda k, p=_P: f"{p[k]['label']} — ₹{p[k]['price']}",
-                        key=f"plan_{_em}")
-                with _pa2:
-                    _start_sel = st.date_input("Access starts", value=date.today(),
-                        key=f"start_{_em}", help="Usually today — day payment received")
-                with _pa3:
-                    _end_v = _end_date(_plan_sel, _start_sel)
-                    _exp_p = _expire_label(_plan_sel, _end_v)
-                    st.markdown(f"""
-                    <div style="margin-top:26px;background:rgba(56,189,248,0.08);
-                                border:1px solid rgba(56,189,248,0.30);border-radius:8px;
-                                padding:8px 12px;text-align:center">
-                        <div style="font-size:9px;color:#7BA7CC;font-weight:700;letter-spacing:1px;margin-bottom:2px">EXPIRES</div>
-                        <div style="font-size:13px;font-weight:800;
-                                    color:{'#FBBF24' if _PLAN_DUR.get(_plan_sel) is None else '#38BDF8'}">{_exp_p}</div>
-                    </div>""", unsafe_allow_html=True)
-
-                _note_inp = st.text_input("Payment note (optional)",
-                    placeholder="e.g. GPay ₹399 received 22 Feb 2026", key=f"note_{_em}")
-
-                _btn1, _btn2 = st.columns([1, 1])
-                with _btn1:
-                    if st.button(f"✅ Approve {_em.split('@')[0]}", key=f"approve_{_em}", use_container_width=True):
-                        _full_note = f"plan:{_plan_sel} start:{_start_sel.isoformat()} | {_note_inp}".strip()
-                        _ok2, _msg2 = approve_email(_em, note=_full_note,
-                            plan_key=_plan_sel, plan_start_date=_start_sel, plan_end_date=_end_v)
-                        if _ok2:
-                            auto_validate_referral(_em, _plan_sel)
-                            st.success(f"✅ {_em} approved — {_P.get(_plan_sel,{}).get('label',_plan_sel)} · Expires: {_exp_p}")
-                            _admin_clear_user_cache()
-                            st.rerun()
-                        else:
-                            st.error(_msg2)
-                with _btn2:
-                    if st.button("🗑 Remove", key=f"rm_pend_{_em}", use_container_width=True):
-                        try:
-                            sb_admin.table("approved_emails").delete().eq("email", _em).execute()
-                            st.warning(f"🗑 {_em} removed")
-                            _admin_clear_user_cache()
-                            st.rerun()
-                        except Exception as _de:
-                            st.error(f"Error: {_de}")
-                st.markdown("<hr style='border-color:rgba(56,189,248,0.10);margin:8px 0'>", unsafe_allow_html=True)
-
-        st.markdown("---")
-
-        # ══════════════════════════════════════════════════════════════════
-        # ACTIVE SUBSCRIBERS
+        # USER BROWSER — search / filter / sort / paging run in the database
         # ══════════════════════════════════════════════════════════════════
-        st.markdown("### ✅ Active Subscribers")
-        if not _approved_rows:
-            st.info("No approved users yet.")
-        else:
-            for _row in _approved_rows:
-                _em      = _row.get("email", "")
-                _at      = str(_row.get("approved_at", ""))[:10]
-                _sub     = parse_subscription(_row)
-                _pk      = _sub.get("plan_key", "")
-                _plan_lbl = _P.get(_pk, {}).get("label", "No Plan") if _pk else "No Plan"
-                _is_life  = _sub.get("is_lifetime", False)
-                _drem     = _sub.get("days_remaining", 0)
-                _end_str  = _sub.get("plan_end", "—")
-
-                if _is_life:
-                    _ec = "#FBBF24"; _ei = "🏆"; _et = "Lifetime"
-                elif _drem <= 7:
-                    _ec = "#F87171"; _ei = "⚠️"; _et = f"Expires in {_drem}d!"
-                elif _drem <= 30:
-                    _ec = "#FBBF24"; _ei = "⏰"; _et = f"{_drem}d left"
+        st.markdown("### 🔎 Users")
+        _f1, _f2, _f3, _f4, _f5 = st.columns([2.2, 1, 1.1, 1.3, 1.3])
+        _fq = _f1.text_input("Search email", placeholder="name@ or domain",
+                             key="adm_q", on_change=_admin_reset_page)
+        _fs = _f2.selectbox("Status", STATUS_FILTERS, format_func=str.title,
+                            key="adm_status", on_change=_admin_reset_page)
+        _fp = _f3.selectbox("Plan", ["all", *_plan_keys, "none"],
+                            format_func=lambda k, p=_P: ("All plans" if k == "all" else
+                                                          "No plan" if k == "none" else p[k]["label"]),
+                            key="adm_plan", on_change=_admin_reset_page)
+        _fx = _f4.selectbox("State", list(STATE_FILTERS), format_func=STATE_FILTERS.get,
+                            key="adm_state", on_change=_admin_reset_page)
+        _fo = _f5.selectbox("Sort", list(SORTS), format_func=lambda k: SORTS[k][0],
+                            key="adm_sort", on_change=_admin_reset_page)
+
+        _page = int(st.session_state.get("adm_page", 1))
+        _rows, _total, _state_ok = _admin_get_users(_fq, _fs, _fp, _fx, _fo, _page)
+        if _fx != "all" and not _state_ok:
+            st.caption("ℹ️ State filter needs the admin_user_grid view (run ADMIN_USERS_SQL).")
+
+        _n_pages = max(1, (_total - 1) // ADMIN_PAGE_SIZE + 1)
+        if _page > _n_pages:   # rows were removed since this page was chosen
+            st.session_state["adm_page"] = _n_pages
+            st.rerun()
+        st.caption(f"{_total} user(s) match · page {_page} of {_n_pages}")
+
+        # ── Bulk actions: one batched write for N users ───────────────────
+        with st.expander("⚡ Bulk actions", expanded=bool(st.session_state.get("adm_bulk_sel"))):
+            _sel_prev = st.session_state.get("adm_bulk_sel", [])
+            _bulk_opts = list(dict.fromkeys([*_sel_prev, *(r.get("email", "") for r in _rows)]))
+            _bk1, _bk2 = st.columns([3, 1])
+            with _bk2:
+                st.markdown("<div style='height:28px'></div>", unsafe_allow_html=True)
+                st.button("☑️ Select page", key="adm_bulk_page", use_container_width=True,
+                          on_click=st.session_state.__setitem__, args=("adm_bulk_sel", _bulk_opts))
+            _bulk_sel = _bk1.multiselect("Users", _bulk_opts, key="adm_bulk_sel")
+            _bulk_paste = st.text_area("…or paste emails (one per line / comma separated)",
+                                       key="adm_bulk_paste", height=80)
+            _bulk_emails = list(dict.fromkeys(
+                [*_bulk_sel, *(e for e in re.split(r"[\s,;]+", _bulk_paste) if "@" in e)]))
+
+            _bc1, _bc2, _bc3 = st.columns([1.2, 1.4, 1.2])
+            _bulk_act = _bc1.selectbox("Action", ["approve", "extend", "revoke", "delete"],
+                format_func=lambda a: {"approve": "✅ Approve", "extend": "🔁 Extend / change plan",
+                                       "revoke": "🚫 Revoke", "delete": "🗑 Delete"}[a],
+                key="adm_bulk_act")
+            if _bulk_act in ("approve", "extend"):
+                _bulk_plan = _bc2.selectbox("Plan", _plan_keys,
+                    format_func=lambda k, p=_P: f"{p[k]['label']} — ₹{p[k]['price']}",
+                    key="adm_bulk_plan")
+                _bulk_start = _bc3.date_input("Access starts", value=date.today(), key="adm_bulk_start")
+                _bulk_end   = _end_date(_bulk_plan, _bulk_start)
+                _bulk_note  = st.text_input("Payment note (optional)", key="adm_bulk_note",
+                                            placeholder="e.g. GPay batch 22 Feb 2026")
+                st.caption(f"Will expire: **{_expire_label(_bulk_plan, _bulk_end)}**")
+            _bulk_confirm = (_bulk_act != "delete" or
+                             st.checkbox("I understand deleted rows cannot be restored",
+                                         key="adm_bulk_confirm"))
+
+            if st.button(f"Run on {len(_bulk_emails)} user(s)", key="adm_bulk_run", type="primary",
+                         disabled=not _bulk_emails or not _bulk_confirm, use_container_width=True):
+                if _bulk_act in ("approve", "extend"):
+                    _fn  = bulk_approve if _bulk_act == "approve" else bulk_extend
+                    _rep = _fn(_bulk_emails, _bulk_plan, _bulk_start, _bulk_end,
+                               note=f"plan:{_bulk_plan} start:{_bulk_start.isoformat()} | {_bulk_note}".strip())
+                    _admin_validate_referrals(_rep["done"], _bulk_plan)
+                elif _bulk_act == "revoke":
+                    _rep = bulk_revoke(_bulk_emails)
                 else:
-                    _ec = "#34D399"; _ei = "✅"; _et = f"{_drem}d left"
-
-                st.markdown(f"""
-                <div style="background:rgba(4,14,38,0.80);border:1px solid rgba(52,211,153,0.20);
-                            border-radius:10px;padding:10px 14px;margin-bottom:4px">
-                    <span style="color:#34D399;font-size:13px;font-weight:600">{_em}</span>
-                    <span style="color:#38BDF8;font-size:11px;margin-left:10px;
-                                 background:rgba(56,189,248,0.10);padding:2px 8px;border-radius:6px">{_plan_lbl}</span>
-                    <span style="color:{_ec};font-size:11px;margin-left:8px;font-weight:700">{_ei} {_et}</span>
-                    <span style="color:#7BA7CC;font-size:10px;margin-left:8px">{f'until {_end_str}' if not _is_life else ''}</span>
-                    <span style="color:#3A5A7A;font-size:10px;margin-left:8px">approved:{_at}</span>
-                </div>""", unsafe_allow_html=True)
-
-                _ca, _cb, _cc = st.columns([1.8, 1, 1])
-                with _ca:
-                    with st.expander(f"🔁 Extend / Change plan for {_em.split('@')[0]}"):
-                        _ext_plan  = st.selectbox("New plan", _plan_keys,
-                            format_func=lambda k, p=_P: f"{p[k]['label']} — ₹{p[k]['price']}",
-                            key=f"ext_plan_{_em}")
-                        _ext_start = st.date_input("New start date", value=date.today(), key=f"ext_start_{_em}")
-                        _ext_end   = _end_date(_ext_plan, _ext_start)
-                        _ext_exp   = _expire_label(_ext_plan, _ext_end)
-                        _ext_note  = st.text_input("Note", placeholder="Renewal details", key=f"ext_note_{_em}")
-                        st.caption(f"Will expire: **{_ext_exp}**")
-                        if st.button("✅ Update Plan", key=f"ext_btn_{_em}", use_container_width=True):
-                            _ok3, _msg3 = approve_email(_em, note=_ext_note,
-                                plan_key=_ext_plan, plan_start_date=_ext_start, plan_end_date=_ext_end)
-                            if _ok3:
-                                st.success(f"✅ Updated: {_P.get(_ext_plan,{}).get('label',_ext_plan)} · Expires: {_ext_exp}")
-                                _admin_clear_user_cache()
-                                st.rerun()
-                            else:
-                                st.error(_msg3)
-                with _cb:
-                    if st.button("🚫 Revoke", key=f"revoke_{_em}", use_container_width=True):
-                        _ok2, _msg2 = revoke_email(_em)
-                        if _ok2:
-                            st.warning(_msg2)
-                            _admin_clear_user_cache()
-                            st.rerun()
-                with _cc:
-                    if st.button("🗑 Remove", key=f"rm_{_em}", use_container_width=True):
-                        try:
-                            sb_admin.table("approved_emails").delete().eq("email", _em).execute()
-                            st.warning(f"🗑 {_em} removed")
-                            _admin_clear_user_cache()
-                            st.rerun()
-                        except Exception as _de:
-                            st.error(f"Error: {_de}")
-                st.markdown("<hr style='border-color:rgba(56,189,248,0.08);margin:4px 0'>", unsafe_allow_html=True)
+                    _rep = bulk_delete(_bulk_emails)
+                for _em in _rep["done"]:
+                    invalidate_entitlement(_em)
+                _admin_clear_user_cache()
+                st.session_state["adm_bulk_report"] = _rep
+                st.session_state.pop("adm_bulk_sel", None)
+                st.rerun()
 
-        # ══════════════════════════════════════════════════════════════════
-        # REVOKED USERS
-        # ══════════════════════════════════════════════════════════════════
-        if _revoked_rows:
-            st.markdown("---")
-            st.markdown("### 🚫 Revoked Users")
-            for _row in _revoked_rows:
-                _em = _row.get("email", "")
-                _at = str(_row.get("approved_at", ""))[:10]
-                _cr1, _cr2, _cr3, _cr4 = st.columns([1.8, 1.2, 0.9, 0.9])
-                _cr1.markdown(
-                    f"<span style='color:#F87171;font-size:13px'>{_em}</span> "
-                    f"<span style='color:#7BA7CC;font-size:11px'>{_at}</span>",
-                    unsafe_allow_html=True)
-                with _cr2:
-                    # Re-approve WITH plan — FIXED (was approve_email(_em) with no plan)
-                    _ra_plan = st.selectbox("Plan", _plan_keys,
-                        format_func=lambda k, p=_P: p[k]["label"],
-                        key=f"ra_plan_{_em}")
-                with _cr3:
-                    if st.button("✅ Re-approve", key=f"reapprove_{_em}", use_container_width=True):
-                        _ra_end = _end_date(_ra_plan, date.today())
-                        _ok2, _msg2 = approve_email(_em,
-                            plan_key=_ra_plan, plan_start_date=date.today(), plan_end_date=_ra_end)
-                        if _ok2:
-                            st.success(f"{_msg2} · {_P.get(_ra_plan,{}).get('label',_ra_plan)}")
-                            _admin_clear_user_cache()
-                            st.rerun()
-                        else:
-                            st.error(_msg2)
-                with _cr4:
-                    if st.button("🗑 Remove", key=f"rm_rev_{_em}", use_container_width=True):
-                        try:
-                            sb_admin.table("approved_emails").delete().eq("email", _em).execute()
-                            st.warning(f"🗑 {_em} removed")
-                            _admin_clear_user_cache()
-                            st.rerun()
-                        except Exception as _de:
-                            st.error(f"Error: {_de}")
+            _last = st.session_state.get("adm_bulk_report")
+            if _last:
+                _all_ok, _bmsg = bulk_summary(_last)
+                (st.success if _all_ok else st.error)(_bmsg)
+                if _last["skipped"]:
+                    st.caption("Not found: " + ", ".join(_last["skipped"]))
+                if _last["failed"]:
+                    st.dataframe(pd.DataFrame(
+                        [{"Email": _e, "Error": _err} for _e, _err in _last["failed"].items()]),
+                        use_container_width=True, hide_index=True)
+                    st.button("↻ Retry failed", key="adm_bulk_retry",
+                              on_click=_admin_bulk_retry, args=(list(_last["failed"]),))
+
+        if not _rows:
+            st.info("No users match these filters.")
+        for _row in _rows:
+            _st = _row.get("status")
+            if _st == "pending":
+                _admin_pending_row(_row, _P, _plan_keys)
+            elif _st == "approved":
+                _admin_active_row(_row, _P, _plan_keys)
+            elif _st == "revoked":
+                _admin_revoked_row(_row, _P, _plan_keys)
+
+        if _n_pages > 1:
+            st.number_input("Page", min_value=1, max_value=_n_pages, step=1, key="adm_page")
 
         st.markdown("---")
         st.markdown("""
@@ -4280,7 +3480,6 @@ def _render_admin_panel():
                 })
                 if _sv_ok:
                     st.success(_sv_msg)
-                    fetch_pricing_config.clear()
                     st.rerun()
                 else:
                     st.error(_sv_msg)
@@ -4299,21 +3498,52 @@ def _render_admin_panel():
         if st.button("🔄 Refresh", key="admin_ref_refresh"):
             st.rerun()
 
+        # Totals, per-code counts and the uses feed are all aggregated /
+        # paginated in the database — load time is independent of volume.
         try:
-            _all_codes = sb_admin.table("referral_codes").select("*").execute().data or []
-            _all_uses  = sb_admin.table("referral_uses").select("*").order("used_at", desc=True).execute().data or []
+            _ref_tot = get_referral_totals()
         except Exception as _re:
-            _all_codes = []; _all_uses = []
+            _ref_tot = {"codes": 0, "uses": 0, "validated": 0, "pending": 0}
             st.error(f"Could not load referral data: {_re}")
 
-        _ra1, _ra2, _ra3 = st.columns(3)
-        _ra1.metric("🔑 Total Codes",      len(_all_codes))
-        _ra2.metric("📨 Total Uses",        len(_all_uses))
-        _ra3.metric("✅ Validated (paid)",  sum(1 for u in _all_uses if u.get("validated")))
+        _ra1, _ra2, _ra3, _ra4 = st.columns(4)
+        _ra1.metric("🔑 Total Codes",      int(_ref_tot.get("codes", 0)))
+        _ra2.metric("📨 Total Uses",        int(_ref_tot.get("uses", 0)))
+        _ra3.metric("✅ Validated (paid)",  int(_ref_tot.get("validated", 0)))
+        _ra4.metric("⏳ Pending",           int(_ref_tot.get("pending", 0)))
+
+        _PS = REFERRAL_PAGE_SIZE
+
+        # ── Per-code leaderboard ─────────────────────────────────────────────
+        try:
+            _cs_page = st.session_state.get("admin_ref_code_page", 1)
+            _cs_rows, _cs_total = get_code_stats_page(page=_cs_page - 1)
+            if _cs_rows:
+                st.markdown("---")
+                st.markdown("**🏅 Codes by Usage**")
+                st.dataframe(pd.DataFrame([{
+                    "Code":      r.get("code", ""),
+                    "Used":      r.get("used", 0),
+                    "Validated": r.get("validated", 0),
+                    "Pending":   r.get("pending", 0),
+                    "Created":   str(r.get("created_at", ""))[:10],
+                } for r in _cs_rows]), use_container_width=True, hide_index=True)
+                if _cs_total > _PS:
+                    st.number_input("Page", min_value=1, max_value=(_cs_total - 1) // _PS + 1,
+                                    step=1, key="admin_ref_code_page")
+        except Exception:
+            st.caption("Per-code stats need the referral_code_stats view (see REFERRAL_SQL).")
+
+        _use_page = st.session_state.get("admin_ref_use_page", 1)
+        try:
+            _page_uses, _uses_total = get_recent_uses(page=_use_page - 1)
+        except Exception as _re:
+            _page_uses, _uses_total = [], 0
+            st.error(f"Could not load referral uses: {_re}")
 
-        if _all_uses:
+        if _page_uses:
             st.markdown("---")
-            st.markdown("**📋 All Referral Uses**")
+            st.markdown(f"**📋 Recent Referral Uses** — {_uses_total} total")
             st.dataframe(pd.DataFrame([{
                 "Code":           u.get("referral_code", ""),
                 "Referred Email": u.get("referred_email", ""),
@@ -4322,11 +3552,17 @@ def _render_admin_panel():
                 "Plan":           u.get("plan_used", "—") or "—",
                 "Status":         "✅ Validated" if u.get("validated") else "⏳ Pending",
                 "Validated At":   str(u.get("validated_at", ""))[:10] if u.get("validated_at") else "—",
-            } for u in _all_uses]), use_container_width=True, hide_index=True)
+            } for u in _page_uses]), use_container_width=True, hide_index=True)
+            if _uses_total > _PS:
+                st.number_input("Page", min_value=1, max_value=(_uses_total - 1) // _PS + 1,
+                                step=1, key="admin_ref_use_page")
 
             st.markdown("---")
             st.markdown("**🔧 Manually Validate a Referral**")
-            _pending_uses = [u for u in _all_uses if not u.get("validated")]
+            try:
+                _pending_uses, _ = get_recent_uses(pending_only=True, page_size=100)
+            except Exception:
+                _pending_uses = []
             if _pending_uses:
                 _mv_opts = {f"{u['referred_email']} (code: {u['referral_code']})": u for u in _pending_uses}
                 _mv_sel  = st.selectbox("Select pending referral", list(_mv_opts.keys()), key="manual_val_sel")
@@ -4540,7 +3776,8 @@ def _trial_expired_screen(email: str):
     st.markdown("<br>", unsafe_allow_html=True)
     if st.button("🔄 I've paid — Check my access", use_container_width=True):
         fetch_approved_emails.clear()
-        fetch_pricing_config.clear()
+        invalidate_config("pricing")
+        invalidate_entitlement(email)
         st.cache_data.clear()
         st.rerun()
     if st.button("🚪 Sign out", use_container_width=True):
@@ -4620,11 +3857,13 @@ def auth_page():
             with tab1:
                 with st.form("login_form"):
                     st.markdown("<div style='height:4px'></div>", unsafe_allow_html=True)
-                    email    = st.text_input("Email", placeholder="your@email.com", label_visibility="collapsed")
+                    email    = st.text_input("Email", placeholder="your@email.com", label_visibility="collapsed",
+                                             key="login_email")
                     st.markdown("<div style='height:2px'></div>", unsafe_allow_html=True)
-                    password = st.text_input("Password", type="password", placeholder="Password", label_visibility="collapsed")
+                    password = st.text_input("Password", type="password", placeholder="Password", label_visibility="collapsed",
+                                             key="login_password")
                     st.markdown("<div style='height:6px'></div>", unsafe_allow_html=True)
-                    submitted = st.form_submit_button("LOGIN →", use_container_width=True)
+                    submitted = st.form_submit_button("LOGIN →", use_container_width=True, key="login_submit")
                     if submitted:
                         if not email or not password:
                             st.warning("Please fill in both fields.")
@@ -4687,10 +3926,16 @@ def auth_page():
                                         record_referral_use(ref_code_input.strip().upper(),
                                                             email2.strip().lower(), _ref_referrer)
                                         st.success("🎁 Referral accepted!")
-                                st.success(msg)
+                                st.session_state["signup_msg"] = msg
                             else:
                                 st.error(msg)
 
+                # Outside the form so the status poller survives its reruns
+                if st.session_state.get("signup_msg"):
+                    st.success(st.session_state["signup_msg"])
+                if st.session_state.get("provision_uid"):
+                    render_provisioning_status(st.session_state["provision_uid"])
+
             st.markdown('</div>', unsafe_allow_html=True)
 
     if st.session_state.get("show_paywall_email"):
@@ -4703,837 +3948,28 @@ def auth_page():
 # ══════════════════════════════════════════════════════════════════════════════
 def generate_dashboard_pdf(log, tst, rev, rev_sess, pend,
                             prof, days_left, total_reading_hrs,
-                            total_rev_hrs, avg_score, days_studied, dpd):
-    import io
-    import pandas as pd
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib import colors
-    from reportlab.lib.units import cm, mm
-    from reportlab.platypus import (
-        SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle,
-        HRFlowable, KeepTogether
+                            total_rev_hrs, avg_score, days_studied, dpd,
+                            exam_date=None, progress=None):
+    """
+    Compute the analytics the report needs, then hand pure data to
+    modules.pdf_report (styles/palette/flowables are built once per process).
+    exam_date / progress let the background worker run this without
+    touching session_state: progress(frac, stage) reports render stages.
+    """
+    from modules.pdf_report import render_dashboard_pdf
+
+    if progress:
+        progress(0.15, "Computing analytics…")
+    exam_date = exam_date or get_exam_date()
+
+    return render_dashboard_pdf(
+        log, tst, rev, rev_sess, pend, prof,
+        days_left=days_left, exam_date=exam_date,
+        total_reading_hrs=total_reading_hrs, total_rev_hrs=total_rev_hrs,
+        avg_score=avg_score, days_studied=days_studied, dpd=dpd,
+        progress=progress,
+        **compute_report_analytics(log, rev, rev_sess, pend, prof, days_left, exam_date),
     )
-    from reportlab.lib.styles import ParagraphStyle
-    from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-    from reportlab.graphics.shapes import Drawing, Rect, Circle, String, Line
-    from reportlab.graphics import renderPDF
-    from reportlab.platypus.flowables import Flowable
-
-    # ── Palette ────────────────────────────────────────────────────────────────
-    BG     = colors.HexColor("#020B18")
-    CARD   = colors.HexColor("#061434")
-    CARD2  = colors.HexColor("#071838")
-    NAVY2  = colors.HexColor("#0A1F55")
-    CYAN   = colors.HexColor("#38BDF8")
-    CYAN_L = colors.HexColor("#7DD3FC")
-    GREEN  = colors.HexColor("#34D399")
-    GOLD   = colors.HexColor("#FBBF24")
-    RED    = colors.HexColor("#F87171")
-    PURPLE = colors.HexColor("#818CF8")
-    ORANGE = colors.HexColor("#F97316")
-    BLUE   = colors.HexColor("#60A5FA")
-    MUTED  = colors.HexColor("#6B91B8")
-    BODY   = colors.HexColor("#B8D4F0")
-    BORDER = colors.HexColor("#0E3C8C")
-    WHITE  = colors.HexColor("#FFFFFF")
-    DKRED  = colors.HexColor("#2A0808")
-    DKRED2 = colors.HexColor("#180606")
-    LTRED  = colors.HexColor("#FFB3B3")
-    TRACK  = colors.HexColor("#0E2040")   # progress bar background track
-
-    SUBJ_CLR = {"FR": CYAN_L, "AFM": GREEN, "AA": GOLD, "DT": RED, "IDT": BLUE}
-
-    # ── Page setup ─────────────────────────────────────────────────────────────
-    PW, PH = A4
-    LM = RM = 1.4 * cm
-    TM = BM = 1.6 * cm
-    W  = PW - LM - RM
-
-    buf = io.BytesIO()
-    doc = SimpleDocTemplate(buf, pagesize=A4,
-                             leftMargin=LM, rightMargin=RM,
-                             topMargin=TM,  bottomMargin=BM)
-
-    # ── Styles ─────────────────────────────────────────────────────────────────
-    def PS(name, **kw):
-        base = dict(fontName="Helvetica", fontSize=8.5, textColor=BODY,
-                    leading=12, spaceAfter=0, spaceBefore=0)
-        base.update(kw)
-        return ParagraphStyle(name, **base)
-
-    S_H1   = PS("h1",  fontName="Helvetica-Bold", fontSize=18, textColor=CYAN_L, leading=22)
-    S_H2   = PS("h2",  fontName="Helvetica-Bold", fontSize=10, textColor=CYAN, spaceBefore=6, spaceAfter=3)
-    S_H3   = PS("h3",  fontName="Helvetica-Bold", fontSize=9,  textColor=CYAN_L, spaceAfter=3)
-    S_BODY = PS("bd",  fontSize=8,  textColor=BODY,  leading=12)
-    S_SML  = PS("sm",  fontSize=7,  textColor=MUTED, leading=10)
-    S_LBL  = PS("lb",  fontName="Helvetica-Bold", fontSize=7, textColor=MUTED)
-    S_MONO = PS("mn",  fontName="Courier-Bold",   fontSize=8, textColor=CYAN_L)
-
-    def sp(h=5): return Spacer(1, h)
-
-    # ── Real graphical progress bar (Flowable) ─────────────────────────────────
-    class ProgressBar(Flowable):
-        """Renders a real filled rect progress bar, not ASCII art."""
-        def __init__(self, pct, width, height=7, clr=None, track_clr=None, radius=3):
-            Flowable.__init__(self)
-            self.pct       = max(0.0, min(pct, 100.0))
-            self.bar_width = width
-            self.height    = height
-            self.clr       = clr or CYAN
-            self.track_clr = track_clr or TRACK
-            self.radius    = radius
-
-        def draw(self):
-            c = self.canv
-            # Track (background)
-            c.setFillColor(self.track_clr)
-            c.roundRect(0, 0, self.bar_width, self.height,
-                        self.radius, fill=1, stroke=0)
-            # Fill
-            fill_w = max(self.bar_width * self.pct / 100, self.height if self.pct > 0 else 0)
-            if fill_w > 0:
-                c.setFillColor(self.clr)
-                c.roundRect(0, 0, fill_w, self.height,
-                            self.radius, fill=1, stroke=0)
-            # Percentage label
-            c.setFillColor(WHITE)
-            c.setFont("Helvetica-Bold", 5.5)
-            lbl = f"{self.pct:.0f}%"
-            c.drawCentredString(self.bar_width / 2, 1.3, lbl)
-
-        def wrap(self, *args):
-            return (self.bar_width, self.height)
-
-    # ── Section header helper ──────────────────────────────────────────────────
-    def sec(title):
-        return [
-            sp(6),
-            HRFlowable(width=W, color=BORDER, thickness=0.5),
-            sp(3),
-            Paragraph(title, S_H2),
-        ]
-
-    # ── Card table helper ──────────────────────────────────────────────────────
-    def ctable(data, cw, extras=None):
-        base = [
-            ("BACKGROUND",    (0,0),(-1,-1), CARD),
-            ("GRID",          (0,0),(-1,-1), 0.5, BORDER),
-            ("LEFTPADDING",   (0,0),(-1,-1), 8),
-            ("RIGHTPADDING",  (0,0),(-1,-1), 8),
-            ("TOPPADDING",    (0,0),(-1,-1), 7),
-            ("BOTTOMPADDING", (0,0),(-1,-1), 7),
-            ("VALIGN",        (0,0),(-1,-1), "TOP"),
-        ]
-        if extras:
-            base.extend(extras)
-        t = Table(data, cw)
-        t.setStyle(TableStyle(base))
-        return t
-
-    # ── Pre-compute accurate stats ─────────────────────────────────────────────
-    name_str  = prof.get("full_name", "Student")
-    uname_str = prof.get("username", "")
-    exam_date = get_exam_date()
-    num_rev   = int(prof.get("num_revisions", 6))
-
-    prof_tgt  = {s: int(prof.get(f"target_hrs_{s.lower()}", TARGET_HRS[s]))
-                 for s in SUBJECTS}
-
-    # Reading hours (exclude revision sessions)
-    rlog = (log[log["session_type"] != "revision"]
-            if not log.empty and "session_type" in log.columns else log)
-    sh   = (rlog.groupby("subject")["hours"].sum()
-            if not rlog.empty else pd.Series(dtype=float))
-
-    # Topics studied (unique topics in reading log per subject)
-    topics_studied_by_subj = {}
-    if not rlog.empty:
-        for s in SUBJECTS:
-            topics_studied_by_subj[s] = rlog[rlog["subject"] == s]["topic"].nunique()
-    else:
-        topics_studied_by_subj = {s: 0 for s in SUBJECTS}
-
-    # Completed topics per subject (from revision_tracker)
-    comp_by_s = {s: 0 for s in SUBJECTS}
-    if not rev.empty and "topic_status" in rev.columns:
-        for s in SUBJECTS:
-            comp_by_s[s] = int(
-                ((rev["subject"]==s) & (rev["topic_status"]=="completed")).sum())
-
-    comp_total = sum(comp_by_s.values())
-    all_topics = sum(len(v) for v in TOPICS.values())
-    ov_cnt     = int((pend["days_overdue"] > 0).sum()) if not pend.empty else 0
-
-    # Unique topics revised per subject (from pend / rev_sess)
-    topics_revised_by_subj = {s: 0 for s in SUBJECTS}
-    if not pend.empty and "revisions_done" in pend.columns:
-        for s in SUBJECTS:
-            s_pend = pend[pend["subject"] == s]
-            topics_revised_by_subj[s] = int((s_pend["revisions_done"] > 0).sum())
-    elif not rev_sess.empty and "subject" in rev_sess.columns:
-        for s in SUBJECTS:
-            topics_revised_by_subj[s] = rev_sess[rev_sess["subject"] == s]["topic"].nunique()
-
-    # Revision depth per subject: avg(revisions_done / num_rev) across completed topics
-    rev_depth_by_subj = {s: 0.0 for s in SUBJECTS}
-    if not pend.empty and "revisions_done" in pend.columns:
-        for s in SUBJECTS:
-            s_pend = pend[(pend["subject"] == s) & (pend["revisions_done"] > 0)]
-            if len(s_pend) > 0 and num_rev > 0:
-                avg_rounds = s_pend["revisions_done"].mean()
-                rev_depth_by_subj[s] = min(avg_rounds / num_rev * 100, 100)
-
-    air  = compute_air_index(log, rev, rev_sess, pend, prof)
-    rpi  = compute_rpi(log, rev, rev_sess, pend, prof)
-    cons = compute_execution_consistency(log)
-    frp  = compute_frp(log, prof)
-
-    g1   = int(prof.get("r1_days", 3))
-    g2   = int(prof.get("r2_days", 7))
-    gf   = float(prof.get("growth_factor", 1.30))
-    mgap = int(prof.get("max_gap_days", 120))
-    gaps = get_cgsm_gaps(g1, g2, num_rev, gf, mgap, days_left)
-
-    rpi_val  = rpi["rpi"]
-    rpi_clr  = colors.HexColor(rpi["color"]) if isinstance(rpi["color"], str) else rpi["color"]
-    rcomp    = rpi["components"]
-    rden     = rpi["rden_actual"]
-    rmile    = rpi["rden_milestone"]
-    cons_clr = colors.HexColor(cons["color"]) if isinstance(cons["color"], str) else cons["color"]
-
-    # ── Page background ────────────────────────────────────────────────────────
-    def dark_page(cv, doc_obj):
-        cv.saveState()
-        cv.setFillColor(BG)
-        cv.rect(0, 0, PW, PH, fill=1, stroke=0)
-        cv.setFillColor(CYAN)
-        cv.rect(0, PH - 2.5*mm, PW, 2.5*mm, fill=1, stroke=0)
-        cv.setFillColor(NAVY2)
-        cv.rect(0, 0, PW, 9*mm, fill=1, stroke=0)
-        cv.setFillColor(MUTED)
-        cv.setFont("Helvetica", 6.5)
-        cv.drawString(LM, 3*mm,
-            f"StudyTracker  |  {name_str}  |  "
-            f"Generated {date.today().strftime('%d %B %Y')}")
-        cv.drawRightString(PW - RM, 3*mm, f"Page {doc_obj.page}")
-        cv.restoreState()
-
-    story = []
-
-    # ══════════════════════════════════════════════════════════════════════════
-    # 1. HEADER
-    # ══════════════════════════════════════════════════════════════════════════
-    initial = name_str[0].upper() if name_str else "S"
-    av = Drawing(44, 44)
-    av.add(Circle(22, 22, 21, fillColor=colors.HexColor("#1A4E8A"),
-                  strokeColor=CYAN, strokeWidth=2))
-    av.add(String(22, 14, initial, fontSize=20, fontName="Helvetica-Bold",
-                  fillColor=WHITE, textAnchor="middle"))
-
-    hdr_data = [[
-        av,
-        [
-            Paragraph(name_str, S_H1),
-            Paragraph(f"@{uname_str}  |  StudyTracker Dashboard Report",
-                      PS("hs", fontSize=8, textColor=MUTED)),
-            sp(2),
-            Paragraph(f"Exam: <b>{exam_date.strftime('%B %Y')}</b>  |  "
-                      f"Generated: {date.today().strftime('%d %b %Y')}",
-                      PS("hd", fontSize=8, textColor=BODY)),
-        ],
-        [
-            Paragraph("DAYS LEFT", S_LBL),
-            Paragraph(str(days_left),
-                      PS("dl", fontName="Helvetica-Bold", fontSize=28,
-                         textColor=WHITE, leading=32, alignment=TA_CENTER)),
-            Paragraph(exam_date.strftime("%b %Y").upper(),
-                      PS("dm", fontSize=8, textColor=CYAN, alignment=TA_CENTER)),
-        ],
-    ]]
-    hdr_t = Table(hdr_data, colWidths=[55, W-55-90, 90])
-    hdr_t.setStyle(TableStyle([
-        ("BACKGROUND",    (0,0),(-1,-1), CARD),
-        ("BACKGROUND",    (2,0),(2,0),   NAVY2),
-        ("GRID",          (0,0),(-1,-1), 0.5, BORDER),
-        ("VALIGN",        (0,0),(-1,-1), "MIDDLE"),
-        ("ALIGN",         (2,0),(2,0),   "CENTER"),
-        ("LEFTPADDING",   (0,0),(-1,-1), 8),
-        ("RIGHTPADDING",  (0,0),(-1,-1), 8),
-        ("TOPPADDING",    (0,0),(-1,-1), 10),
-        ("BOTTOMPADDING", (0,0),(-1,-1), 10),
-        ("LINEABOVE",     (0,0),(-1,0),  3, CYAN),
-    ]))
-    story.append(hdr_t)
-    story.append(sp(8))
-
-    # ══════════════════════════════════════════════════════════════════════════
-    # 2. KPI CARDS
-    # ══════════════════════════════════════════════════════════════════════════
-    story += sec("Key Performance Metrics")
-
-    sc_clr = (GREEN if avg_score >= 60 else GOLD if avg_score >= 40 else RED)
-    kpi_row = [[
-        [Paragraph("Days Left", S_LBL),
-         Paragraph(str(days_left), PS("kv1",fontName="Helvetica-Bold",fontSize=18,textColor=CYAN_L,leading=22)),
-         Paragraph("to exam", S_SML)],
-        [Paragraph("Reading Hours", S_LBL),
-         Paragraph(f"{total_reading_hrs:.0f}h", PS("kv2",fontName="Helvetica-Bold",fontSize=18,textColor=CYAN_L,leading=22)),
-         Paragraph(f"{dpd}h/day needed", S_SML)],
-        [Paragraph("Revision Hours", S_LBL),
-         Paragraph(f"{total_rev_hrs:.1f}h", PS("kv3",fontName="Helvetica-Bold",fontSize=18,textColor=GREEN,leading=22)),
-         Paragraph("logged", S_SML)],
-        [Paragraph("Avg Test Score", S_LBL),
-         Paragraph(f"{avg_score:.1f}%", PS("kv4",fontName="Helvetica-Bold",fontSize=18,textColor=sc_clr,leading=22)),
-         Paragraph("Target 60%+", S_SML)],
-        [Paragraph("Topics Completed", S_LBL),
-         Paragraph(f"{comp_total}", PS("kv5",fontName="Helvetica-Bold",fontSize=18,textColor=CYAN_L,leading=22)),
-         Paragraph(f"of {all_topics} total", S_SML)],
-    ]]
-    kpi_t = Table(kpi_row, colWidths=[W/5]*5)
-    kpi_t.setStyle(TableStyle([
-        ("BACKGROUND",    (0,0),(-1,-1), CARD),
-        ("GRID",          (0,0),(-1,-1), 0.5, BORDER),
-        ("VALIGN",        (0,0),(-1,-1), "TOP"),
-        ("LEFTPADDING",   (0,0),(-1,-1), 9),
-        ("RIGHTPADDING",  (0,0),(-1,-1), 6),
-        ("TOPPADDING",    (0,0),(-1,-1), 9),
-        ("BOTTOMPADDING", (0,0),(-1,-1), 9),
-        ("LINEABOVE",     (0,0),(-1,0),  2.5, CYAN),
-    ]))
-    story.append(kpi_t)
-    story.append(sp(8))
-
-    # ══════════════════════════════════════════════════════════════════════════
-    # 3. SUBJECT READING PROGRESS — with real graphical progress bars
-    # ══════════════════════════════════════════════════════════════════════════
-    story += sec("First Reading Progress by Subject")
-
-    sub_hdr = [[
-        Paragraph("Subject",         PS("sh1",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
-        Paragraph("Hours Done",      PS("sh2",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
-        Paragraph("Target",          PS("sh3",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
-        Paragraph("Reading Progress",PS("sh4",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
-        Paragraph("Topics",          PS("sh5",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
-        Paragraph("Completed",       PS("sh6",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
-    ]]
-    BAR_W_SUB = W * 0.30  # width available for the progress bar column
-    sub_cw  = [W*0.25, W*0.09, W*0.08, BAR_W_SUB, W*0.12, W*0.16]
-    sub_rows = []
-
-    for s in SUBJECTS:
-        done   = float(sh.get(s, 0)) if hasattr(sh, "get") else 0.0
-        tgt    = prof_tgt[s]
-        hrs_pct = min(done / tgt * 100, 100) if tgt > 0 else 0
-        n_c    = comp_by_s.get(s, 0)
-        n_t    = len(TOPICS.get(s, []))
-        n_stud = topics_studied_by_subj.get(s, 0)
-        clr    = SUBJ_CLR[s]
-        # Dual bar: hours % in bar, show studied topics count as context
-        sub_rows.append([
-            Paragraph(f'<b>{SUBJ_FULL[s]}</b>', PS(f"sn{s}", fontSize=8.5, textColor=clr)),
-            Paragraph(f"{done:.0f}h",   S_BODY),
-            Paragraph(f"{tgt}h",        S_BODY),
-            ProgressBar(hrs_pct, BAR_W_SUB - 14, height=9, clr=clr),
-            Paragraph(f"{n_stud}/{n_t}", S_BODY),
-            Paragraph(f"{n_c} done",
-                      PS(f"sc{s}", fontName="Helvetica-Bold", fontSize=8.5,
-                         textColor=GREEN if n_c == n_t else (GOLD if n_c > 0 else MUTED))),
-        ])
-
-    sub_t = Table(sub_hdr + sub_rows, colWidths=sub_cw)
-    sub_t.setStyle(TableStyle([
-        ("BACKGROUND",    (0,0),(-1,0),  NAVY2),
-        ("BACKGROUND",    (0,1),(-1,-1), CARD),
-        ("ROWBACKGROUNDS",(0,1),(-1,-1), [CARD, CARD2]),
-        ("GRID",          (0,0),(-1,-1), 0.5, BORDER),
-        ("FONTNAME",      (0,0),(-1,0),  "Helvetica-Bold"),
-        ("TEXTCOLOR",     (0,0),(-1,0),  CYAN),
-        ("FONTSIZE",      (0,0),(-1,0),  7.5),
-        ("VALIGN",        (0,0),(-1,-1), "MIDDLE"),
-        ("LEFTPADDING",   (0,0),(-1,-1), 7),
-        ("RIGHTPADDING",  (0,0),(-1,-1), 7),
-        ("TOPPADDING",    (0,0),(-1,-1), 7),
-        ("BOTTOMPADDING", (0,0),(-1,-1), 7),
-        ("ALIGN",         (1,0),(-1,-1), "CENTER"),
-        ("LINEABOVE",     (0,0),(-1,0),  2, CYAN),
-    ]))
-    story.append(sub_t)
-    story.append(sp(8))
-
-    # ══════════════════════════════════════════════════════════════════════════
-    # 4. AIR PREPAREDNESS INDEX
-    # ══════════════════════════════════════════════════════════════════════════
-    story += sec("AIR Preparedness Index")
-
-    air_comp = air["components"]
-    ov_air   = air["overall"]
-    ov_air_clr = (GREEN if ov_air>=80 else GOLD if ov_air>=60 else ORANGE if ov_air>=40 else RED)
-
-    air_cells = []
-    for s in SUBJECTS:
-        s_air = air["per_subject"].get(s, 0)
-        clr   = (GREEN if s_air>=80 else GOLD if s_air>=60 else ORANGE if s_air>=40 else RED)
-        sl    = ("STRONG" if s_air>=80 else "MODERATE" if s_air>=60 else "AT RISK" if s_air>=40 else "CRITICAL")
-        air_cells.append([
-            Paragraph(s, PS(f"as{s}", fontName="Helvetica-Bold", fontSize=11, textColor=clr, alignment=TA_CENTER)),
-            Paragraph(f"{s_air:.0f}",
-                      PS(f"av{s}", fontName="Helvetica-Bold", fontSize=22, textColor=WHITE, leading=26, alignment=TA_CENTER)),
-            Paragraph(sl,  PS(f"al{s}", fontName="Helvetica-Bold", fontSize=7, textColor=clr, alignment=TA_CENTER)),
-            sp(3),
-            ProgressBar(s_air, W/5 - 14, height=8, clr=clr),
-        ])
-
-    air_row = Table([air_cells], colWidths=[W/5]*5)
-    air_row_ts = [
-        ("BACKGROUND",    (0,0),(-1,-1), CARD),
-        ("GRID",          (0,0),(-1,-1), 0.5, BORDER),
-        ("VALIGN",        (0,0),(-1,-1), "TOP"),
-        ("TOPPADDING",    (0,0),(-1,-1), 8),
-        ("BOTTOMPADDING", (0,0),(-1,-1), 10),
-        ("LEFTPADDING",   (0,0),(-1,-1), 7),
-        ("RIGHTPADDING",  (0,0),(-1,-1), 7),
-    ]
-    for i, s in enumerate(SUBJECTS):
-        air_row_ts.append(("LINEABOVE", (i,0),(i,0), 3, SUBJ_CLR[s]))
-    air_row.setStyle(TableStyle(air_row_ts))
-    story.append(air_row)
-    story.append(sp(4))
-
-    # Overall AIR summary with bars
-    AIR_BAR_W = W * 0.13
-    air_sum = [[
-        Paragraph("OVERALL AIR", PS("oa_lbl",fontName="Helvetica-Bold",fontSize=7.5,textColor=MUTED)),
-        Paragraph("Coverage",    PS("oa_c1", fontName="Helvetica-Bold",fontSize=7,textColor=MUTED)),
-        Paragraph("Rev Depth",   PS("oa_c2", fontName="Helvetica-Bold",fontSize=7,textColor=MUTED)),
-        Paragraph("Consistency", PS("oa_c3", fontName="Helvetica-Bold",fontSize=7,textColor=MUTED)),
-        Paragraph("Balance",     PS("oa_c4", fontName="Helvetica-Bold",fontSize=7,textColor=MUTED)),
-        Paragraph("Label",       PS("oa_c5", fontName="Helvetica-Bold",fontSize=7,textColor=MUTED)),
-    ],[
-        [Paragraph(f"{ov_air:.0f}/100",
-                  PS("oa_v",fontName="Helvetica-Bold",fontSize=14,textColor=ov_air_clr)),
-         sp(3),
-         ProgressBar(ov_air, W*0.16, height=8, clr=ov_air_clr)],
-        [Paragraph(f"{air_comp['coverage']:.0f}%",
-                  PS("oa_cv",fontName="Helvetica-Bold",fontSize=11,textColor=CYAN_L)),
-         sp(3),
-         ProgressBar(air_comp['coverage'], AIR_BAR_W, height=7, clr=CYAN_L)],
-        [Paragraph(f"{air_comp['revision_depth']:.0f}%",
-                  PS("oa_rv",fontName="Helvetica-Bold",fontSize=11,textColor=GREEN)),
-         sp(3),
-         ProgressBar(air_comp['revision_depth'], AIR_BAR_W, height=7, clr=GREEN)],
-        [Paragraph(f"{air_comp['consistency']:.0f}%",
-                  PS("oa_cs",fontName="Helvetica-Bold",fontSize=11,textColor=GOLD)),
-         sp(3),
-         ProgressBar(air_comp['consistency'], AIR_BAR_W, height=7, clr=GOLD)],
-        [Paragraph(f"{air_comp.get('balance',0):.0f}%",
-                  PS("oa_bl",fontName="Helvetica-Bold",fontSize=11,textColor=PURPLE)),
-         sp(3),
-         ProgressBar(air_comp.get('balance',0), AIR_BAR_W, height=7, clr=PURPLE)],
-        Paragraph(air["label"],
-                  PS("oa_ll",fontName="Helvetica-Bold",fontSize=9,textColor=ov_air_clr)),
-    ]]
-    air_sum_t = Table(air_sum, colWidths=[W*0.18,W*0.15,W*0.15,W*0.15,W*0.15,W*0.22])
-    air_sum_t.setStyle(TableStyle([
-        ("BACKGROUND",    (0,0),(-1,0),  NAVY2),
-        ("BACKGROUND",    (0,1),(-1,1),  CARD2),
-        ("GRID",          (0,0),(-1,-1), 0.5, BORDER),
-        ("FONTNAME",      (0,0),(-1,0),  "Helvetica-Bold"),
-        ("VALIGN",        (0,0),(-1,-1), "MIDDLE"),
-        ("LEFTPADDING",   (0,0),(-1,-1), 8),
-        ("TOPPADDING",    (0,0),(-1,-1), 7),
-        ("BOTTOMPADDING", (0,0),(-1,-1), 10),
-        ("LINEABOVE",     (0,0),(-1,0),  2, ov_air_clr),
-    ]))
-    story.append(air_sum_t)
-    story.append(sp(8))
-
-    # ══════════════════════════════════════════════════════════════════════════
-    # 5. RPI + ANALYTICS with graphical bars
-    # ══════════════════════════════════════════════════════════════════════════
-    story += sec("Readiness Probability Index (RPI) & Analytics")
-
-    frp_pct = frp * 100
-    ov_clr  = RED if ov_cnt > 0 else GREEN
-    COMP_BAR_W = W * 0.24
-
-    rpi_data = [[
-        # Card A: RPI score
-        [
-            Paragraph("RPI SCORE", S_LBL),
-            Paragraph(f"{rpi_val:.0f}",
-                      PS("rv",fontName="Helvetica-Bold",fontSize=30,textColor=WHITE,leading=34)),
-            Paragraph("/ 100", PS("r100",fontSize=8,textColor=MUTED)),
-            sp(4),
-            ProgressBar(rpi_val, W*0.20, height=10, clr=rpi_clr),
-            sp(3),
-            Paragraph(rpi["label"],
-                      PS("rl",fontName="Helvetica-Bold",fontSize=8,textColor=rpi_clr)),
-            Paragraph(f"Ret Density: {rden:.2f}  target: {rmile[1]:.1f}", S_SML),
-        ],
-        # Card B: components with bars
-        [
-            Paragraph("COMPONENTS", S_LBL),
-            sp(4),
-            Paragraph(f"Coverage:    {rcomp['coverage']:.0f}%",
-                      PS("rc1",fontName="Courier",fontSize=8,textColor=CYAN_L)),
-            ProgressBar(rcomp['coverage'], COMP_BAR_W, height=7, clr=CYAN_L),
-            sp(3),
-            Paragraph(f"Rev Depth:   {rcomp['revision_depth']:.0f}%",
-                      PS("rc2",fontName="Courier",fontSize=8,textColor=GREEN)),
-            ProgressBar(rcomp['revision_depth'], COMP_BAR_W, height=7, clr=GREEN),
-            sp(3),
-            Paragraph(f"Consistency: {rcomp['consistency']:.0f}%",
-                      PS("rc3",fontName="Courier",fontSize=8,textColor=GOLD)),
-            ProgressBar(rcomp['consistency'], COMP_BAR_W, height=7, clr=GOLD),
-            sp(3),
-            Paragraph(f"Exp Risk:    {rcomp['exposure_risk']:.0f}%",
-                      PS("rc4",fontName="Courier",fontSize=8,textColor=RED)),
-            ProgressBar(rcomp['exposure_risk'], COMP_BAR_W, height=7, clr=RED),
-        ],
-        # Card C: consistency
-        [
-            Paragraph("CONSISTENCY", S_LBL),
-            Paragraph(f"{cons['pct']:.0f}%",
-                      PS("cv",fontName="Helvetica-Bold",fontSize=26,textColor=cons_clr,leading=30)),
-            Paragraph("Execution Rate", PS("cle",fontSize=7,textColor=MUTED)),
-            sp(4),
-            ProgressBar(cons['pct'], W*0.20, height=10, clr=cons_clr),
-            sp(5),
-            Paragraph(f"{cons['days_studied']} days studied", S_SML),
-            Paragraph(f"of {cons['elapsed']} days elapsed",  S_SML),
-        ],
-        # Card D: FRP + overdue
-        [
-            Paragraph("SYLLABUS & OVERDUE", S_LBL),
-            sp(2),
-            Paragraph(f"{frp_pct:.0f}%",
-                      PS("fv",fontName="Helvetica-Bold",fontSize=22,textColor=CYAN_L,leading=26)),
-            Paragraph("First Read Progress", PS("fl",fontSize=7,textColor=MUTED)),
-            ProgressBar(frp_pct, W*0.22, height=9, clr=CYAN_L),
-            sp(5),
-            Paragraph(str(ov_cnt),
-                      PS("ov",fontName="Helvetica-Bold",fontSize=22,textColor=ov_clr,leading=26)),
-            Paragraph("Overdue Revisions" if ov_cnt > 0 else "All On Track",
-                      PS("ovl",fontName="Helvetica-Bold",fontSize=7,textColor=ov_clr)),
-            Paragraph(f"{comp_total}/{all_topics} topics done",
-                      PS("td",fontSize=7,textColor=MUTED)),
-        ],
-    ]]
-
-    rpi_t = Table(rpi_data, colWidths=[W*0.22, W*0.28, W*0.24, W*0.26])
-    rpi_ts = [
-        ("BACKGROUND",    (0,0),(-1,-1), CARD),
-        ("GRID",          (0,0),(-1,-1), 0.5, BORDER),
-        ("VALIGN",        (0,0),(-1,-1), "TOP"),
-        ("LEFTPADDING",   (0,0),(-1,-1), 9),
-        ("RIGHTPADDING",  (0,0),(-1,-1), 9),
-        ("TOPPADDING",    (0,0),(-1,-1), 9),
-        ("BOTTOMPADDING", (0,0),(-1,-1), 9),
-        ("LINEABOVE",     (0,0),(0,0),   3, rpi_clr),
-        ("LINEABOVE",     (1,0),(1,0),   3, CYAN),
-        ("LINEABOVE",     (2,0),(2,0),   3, cons_clr),
-        ("LINEABOVE",     (3,0),(3,0),   3, PURPLE),
-    ]
-    rpi_t.setStyle(TableStyle(rpi_ts))
-    story.append(rpi_t)
-    story.append(sp(8))
-
-    # ══════════════════════════════════════════════════════════════════════════
-    # 6. REVISION PROGRESS — accurate: topics revised / topics completed
-    # ══════════════════════════════════════════════════════════════════════════
-    story += sec("Revision Progress by Subject")
-
-    rv_hdr = [[
-        Paragraph("Subject",        PS("rvh1",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
-        Paragraph("Completed",      PS("rvh2",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
-        Paragraph("Revised ≥1×",   PS("rvh3",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
-        Paragraph("Revision Depth", PS("rvh4",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
-        Paragraph("Overdue",        PS("rvh5",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
-        Paragraph("Coverage",       PS("rvh6",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
-    ]]
-    REV_BAR_W = W * 0.22
-    rv_cw = [W*0.22, W*0.10, W*0.11, W*0.10, W*0.10, REV_BAR_W + W*0.02]
-    rv_rows = []
-
-    for s in SUBJECTS:
-        s_comp    = comp_by_s.get(s, 0)
-        s_revised = topics_revised_by_subj.get(s, 0)
-        s_depth   = rev_depth_by_subj.get(s, 0.0)
-        # coverage = how many completed topics have been revised at least once
-        s_cov_pct = min(s_revised / s_comp * 100, 100) if s_comp > 0 else 0
-        s_ov      = int((pend[pend["subject"]==s]["days_overdue"] > 0).sum()) if not pend.empty else 0
-        clr       = SUBJ_CLR[s]
-        ov_c      = RED if s_ov > 0 else GREEN
-
-        rv_rows.append([
-            Paragraph(f'<b>{SUBJ_FULL[s]}</b>', PS(f"rvs{s}", fontSize=8.5, textColor=clr)),
-            Paragraph(f"{s_comp}", S_BODY),
-            Paragraph(f"{s_revised}/{s_comp}",
-                      PS(f"rvr{s}", fontName="Helvetica-Bold", fontSize=8,
-                         textColor=GREEN if s_revised == s_comp and s_comp > 0 else BODY)),
-            Paragraph(f"{s_depth:.0f}%",
-                      PS(f"rvd{s}", fontName="Helvetica-Bold", fontSize=8, textColor=clr)),
-            Paragraph(f"{'⚠ ' if s_ov>0 else ''}{s_ov}",
-                      PS(f"rvo{s}", fontName="Helvetica-Bold", fontSize=8, textColor=ov_c)),
-            ProgressBar(s_cov_pct, REV_BAR_W, height=9, clr=clr),
-        ])
-
-    rv_all = Table(rv_hdr + rv_rows, colWidths=rv_cw)
-    rv_all.setStyle(TableStyle([
-        ("BACKGROUND",    (0,0),(-1,0),  NAVY2),
-        ("BACKGROUND",    (0,1),(-1,-1), CARD),
-        ("ROWBACKGROUNDS",(0,1),(-1,-1), [CARD, CARD2]),
-        ("GRID",          (0,0),(-1,-1), 0.5, BORDER),
-        ("FONTNAME",      (0,0),(-1,0),  "Helvetica-Bold"),
-        ("TEXTCOLOR",     (0,0),(-1,0),  CYAN),
-        ("FONTSIZE",      (0,0),(-1,0),  7.5),
-        ("VALIGN",        (0,0),(-1,-1), "MIDDLE"),
-        ("LEFTPADDING",   (0,0),(-1,-1), 7),
-        ("RIGHTPADDING",  (0,0),(-1,-1), 7),
-        ("TOPPADDING",    (0,0),(-1,-1), 7),
-        ("BOTTOMPADDING", (0,0),(-1,-1), 7),
-        ("ALIGN",         (1,0),(4,-1),  "CENTER"),
-        ("LINEABOVE",     (0,0),(-1,0),  2, GREEN),
-    ]))
-    story.append(rv_all)
-    story.append(sp(8))
-
-    # ══════════════════════════════════════════════════════════════════════════
-    # 7. DANGER ZONE
-    # ══════════════════════════════════════════════════════════════════════════
-    story += sec("Danger Zone — Needs Immediate Attention")
-
-    if not pend.empty:
-        overdue_df = pend[pend["days_overdue"] > 0].nlargest(10, "days_overdue")
-    else:
-        overdue_df = pd.DataFrame()
-
-    never_rev = pd.DataFrame()
-    if not rev.empty and "revision_count" in rev.columns and "topic_status" in rev.columns:
-        never_rev = rev[(rev["topic_status"]=="completed") & (rev["revision_count"]==0)]
-
-    if overdue_df.empty and never_rev.empty:
-        story.append(ctable(
-            [[Paragraph("All on track — no overdue revisions!", S_BODY)]], [W],
-            extras=[("LINEABOVE",(0,0),(-1,0),3,GREEN)]))
-    else:
-        if not overdue_df.empty:
-            story.append(Paragraph("Overdue Revisions", S_H3))
-            story.append(sp(3))
-            dz_hdr = [[
-                Paragraph("Topic",     PS("dzh1",fontName="Helvetica-Bold",fontSize=8,textColor=RED)),
-                Paragraph("Subject",   PS("dzh2",fontName="Helvetica-Bold",fontSize=8,textColor=RED)),
-                Paragraph("Round",     PS("dzh3",fontName="Helvetica-Bold",fontSize=8,textColor=RED)),
-                Paragraph("Days Late", PS("dzh4",fontName="Helvetica-Bold",fontSize=8,textColor=RED)),
-                Paragraph("Urgency",   PS("dzh5",fontName="Helvetica-Bold",fontSize=8,textColor=RED)),
-            ]]
-            dz_cw = [W*0.44,W*0.13,W*0.12,W*0.14,W*0.17]
-            dz_rows = []
-            for _, row in overdue_df.iterrows():
-                dov = int(row["days_overdue"])
-                urg = ("CRITICAL" if dov>14 else "HIGH" if dov>7 else "MEDIUM")
-                uc  = (RED if dov>14 else GOLD if dov>7 else ORANGE)
-                sc  = SUBJ_CLR.get(str(row["subject"]), BODY)
-                dz_rows.append([
-                    Paragraph(str(row["topic"])[:55], S_BODY),
-                    Paragraph(str(row["subject"]),
-                              PS(f"dzs{dov}", fontName="Helvetica-Bold", fontSize=8, textColor=sc)),
-                    Paragraph(str(row["round_label"]), S_BODY),
-                    Paragraph(f"{dov}d",
-                              PS(f"dzd{dov}", fontName="Helvetica-Bold", fontSize=9, textColor=uc)),
-                    Paragraph(urg,
-                              PS(f"dzu{dov}", fontName="Helvetica-Bold", fontSize=7.5, textColor=uc)),
-                ])
-            dz_t = Table(dz_hdr+dz_rows, colWidths=dz_cw)
-            dz_t.setStyle(TableStyle([
-                ("BACKGROUND",    (0,0),(-1,0),  DKRED),
-                ("BACKGROUND",    (0,1),(-1,-1), DKRED2),
-                ("ROWBACKGROUNDS",(0,1),(-1,-1), [DKRED2, colors.HexColor("#120404")]),
-                ("GRID",          (0,0),(-1,-1), 0.5, colors.HexColor("#3A1010")),
-                ("TEXTCOLOR",     (0,1),(-1,-1), LTRED),
-                ("FONTNAME",      (0,0),(-1,0),  "Helvetica-Bold"),
-                ("VALIGN",        (0,0),(-1,-1), "MIDDLE"),
-                ("LEFTPADDING",   (0,0),(-1,-1), 7),
-                ("RIGHTPADDING",  (0,0),(-1,-1), 7),
-                ("TOPPADDING",    (0,0),(-1,-1), 6),
-                ("BOTTOMPADDING", (0,0),(-1,-1), 6),
-                ("ALIGN",         (1,0),(-1,-1), "CENTER"),
-                ("LINEABOVE",     (0,0),(-1,0),  3, RED),
-            ]))
-            story.append(dz_t)
-            story.append(sp(6))
-
-        if not never_rev.empty:
-            story.append(Paragraph("Completed Topics — Never Revised", S_H3))
-            story.append(sp(3))
-            nr_hdr = [[
-                Paragraph("Topic",   PS("nrh1",fontName="Helvetica-Bold",fontSize=8,textColor=GOLD)),
-                Paragraph("Subject", PS("nrh2",fontName="Helvetica-Bold",fontSize=8,textColor=GOLD)),
-            ]]
-            nr_rows = []
-            for _, row in never_rev.head(10).iterrows():
-                sc = SUBJ_CLR.get(str(row.get("subject","")), BODY)
-                nr_rows.append([
-                    Paragraph(str(row.get("topic",""))[:65], S_BODY),
-                    Paragraph(str(row.get("subject","")),
-                              PS(f"nrs_{row.get('subject','')}", fontName="Helvetica-Bold",
-                                 fontSize=8, textColor=sc)),
-                ])
-            nr_t = Table(nr_hdr+nr_rows, colWidths=[W*0.72,W*0.28])
-            nr_t.setStyle(TableStyle([
-                ("BACKGROUND",    (0,0),(-1,0),  colors.HexColor("#2A1A00")),
-                ("BACKGROUND",    (0,1),(-1,-1), colors.HexColor("#140E00")),
-                ("ROWBACKGROUNDS",(0,1),(-1,-1), [colors.HexColor("#140E00"),colors.HexColor("#0E0900")]),
-                ("GRID",          (0,0),(-1,-1), 0.5, colors.HexColor("#3A2800")),
-                ("TEXTCOLOR",     (0,1),(-1,-1), colors.HexColor("#FFD580")),
-                ("VALIGN",        (0,0),(-1,-1), "MIDDLE"),
-                ("LEFTPADDING",   (0,0),(-1,-1), 7),
-                ("TOPPADDING",    (0,0),(-1,-1), 6),
-                ("BOTTOMPADDING", (0,0),(-1,-1), 6),
-                ("LINEABOVE",     (0,0),(-1,0),  3, GOLD),
-            ]))
-            story.append(nr_t)
-
-    story.append(sp(8))
-
-    # ══════════════════════════════════════════════════════════════════════════
-    # 8. TEST SCORES
-    # ══════════════════════════════════════════════════════════════════════════
-    story += sec("Test Score History")
-
-    if tst.empty:
-        story.append(ctable([[Paragraph("No test scores logged yet.", S_BODY)]], [W]))
-    else:
-        ts_hdr = [[
-            Paragraph("Date",      PS("tsh1",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
-            Paragraph("Subject",   PS("tsh2",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
-            Paragraph("Test Name", PS("tsh3",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
-            Paragraph("Marks",     PS("tsh4",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
-            Paragraph("Score",     PS("tsh5",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
-            Paragraph("Bar",       PS("tsh6",fontName="Helvetica-Bold",fontSize=8,textColor=CYAN)),
-        ]]
-        SCORE_BAR_W = W * 0.14
-        ts_cw = [W*0.11, W*0.09, W*0.34, W*0.13, W*0.11, SCORE_BAR_W + W*0.02]
-        ts_rows = []
-        for _, row in tst.sort_values("date", ascending=False).iterrows():
-            sc   = float(row.get("score_pct", 0))
-            sc_c = (GREEN if sc >= 60 else GOLD if sc >= 40 else RED)
-            sc2  = SUBJ_CLR.get(str(row.get("subject","")), BODY)
-            ts_rows.append([
-                Paragraph(str(row["date"])[:10], S_BODY),
-                Paragraph(str(row.get("subject","")),
-                          PS(f"tss{sc:.0f}", fontName="Helvetica-Bold", fontSize=8, textColor=sc2)),
-                Paragraph(str(row.get("test_name",""))[:40], S_BODY),
-                Paragraph(f"{row.get('marks','')}/{row.get('max_marks','')}", S_BODY),
-                Paragraph(f"{sc:.0f}%",
-                          PS(f"tsv{sc:.0f}", fontName="Helvetica-Bold", fontSize=9, textColor=sc_c)),
-                ProgressBar(sc, SCORE_BAR_W, height=8, clr=sc_c),
-            ])
-        ts_t = Table(ts_hdr+ts_rows, colWidths=ts_cw)
-        ts_t.setStyle(TableStyle([
-            ("BACKGROUND",    (0,0),(-1,0),  NAVY2),
-            ("BACKGROUND",    (0,1),(-1,-1), CARD),
-            ("ROWBACKGROUNDS",(0,1),(-1,-1), [CARD,CARD2]),
-            ("GRID",          (0,0),(-1,-1), 0.5, BORDER),
-            ("FONTNAME",      (0,0),(-1,0),  "Helvetica-Bold"),
-            ("TEXTCOLOR",     (0,0),(-1,0),  CYAN),
-            ("FONTSIZE",      (0,0),(-1,0),  7.5),
-            ("VALIGN",        (0,0),(-1,-1), "MIDDLE"),
-            ("LEFTPADDING",   (0,0),(-1,-1), 7),
-            ("RIGHTPADDING",  (0,0),(-1,-1), 7),
-            ("TOPPADDING",    (0,0),(-1,-1), 6),
-            ("BOTTOMPADDING", (0,0),(-1,-1), 6),
-            ("ALIGN",         (1,0),(4,-1),  "CENTER"),
-            ("LINEABOVE",     (0,0),(-1,0),  2, CYAN),
-        ]))
-        story.append(ts_t)
-        story.append(sp(4))
-
-        scores_list = [float(r.get("score_pct",0)) for _,r in tst.iterrows()]
-        best   = max(scores_list); worst = min(scores_list)
-        passed = sum(1 for s in scores_list if s>=60)
-        stat_data = [[
-            Paragraph(f"Tests: {len(ts_rows)}", PS("st1",fontName="Helvetica-Bold",fontSize=8,textColor=BODY)),
-            Paragraph(f"Best: {best:.0f}%",    PS("st2",fontName="Helvetica-Bold",fontSize=8,textColor=GREEN)),
-            Paragraph(f"Worst: {worst:.0f}%",  PS("st3",fontName="Helvetica-Bold",fontSize=8,textColor=RED)),
-            Paragraph(f"Passed: {passed}/{len(ts_rows)}",
-                      PS("st4",fontName="Helvetica-Bold",fontSize=8,
-                         textColor=(GREEN if passed==len(ts_rows) else GOLD))),
-            Paragraph(f"Average: {avg_score:.1f}%",
-                      PS("st5",fontName="Helvetica-Bold",fontSize=8,textColor=sc_clr)),
-        ]]
-        stat_t = Table(stat_data, colWidths=[W*0.2]*5)
-        stat_t.setStyle(TableStyle([
-            ("BACKGROUND",    (0,0),(-1,-1), CARD2),
-            ("GRID",          (0,0),(-1,-1), 0.5, BORDER),
-            ("LEFTPADDING",   (0,0),(-1,-1), 8),
-            ("TOPPADDING",    (0,0),(-1,-1), 6),
-            ("BOTTOMPADDING", (0,0),(-1,-1), 6),
-            ("VALIGN",        (0,0),(-1,-1), "MIDDLE"),
-        ]))
-        story.append(stat_t)
-
-    story.append(sp(8))
-
-    # ══════════════════════════════════════════════════════════════════════════
-    # 9. CGSM REVISION GAP SCHEDULE
-    # ══════════════════════════════════════════════════════════════════════════
-    story += sec("CGSM Revision Gap Schedule")
-
-    cfg_data = [[
-        Paragraph(f"R1 Gap: {g1}d",      S_MONO),
-        Paragraph(f"R2 Gap: {g2}d",      S_MONO),
-        Paragraph(f"Growth: {gf}x",      S_MONO),
-        Paragraph(f"Max Cap: {mgap}d",   S_MONO),
-        Paragraph(f"Mode: {prof.get('prep_mode','clearance').upper()}", S_MONO),
-    ]]
-    cfg_t = Table(cfg_data, colWidths=[W/5]*5)
-    cfg_t.setStyle(TableStyle([
-        ("BACKGROUND",    (0,0),(-1,-1), CARD2),
-        ("GRID",          (0,0),(-1,-1), 0.5, BORDER),
-        ("LEFTPADDING",   (0,0),(-1,-1), 8),
-        ("TOPPADDING",    (0,0),(-1,-1), 7),
-        ("BOTTOMPADDING", (0,0),(-1,-1), 7),
-        ("VALIGN",        (0,0),(-1,-1), "MIDDLE"),
-    ]))
-    story.append(cfg_t)
-    story.append(sp(5))
-
-    gap_clrs = [CYAN if g<30 else GOLD if g<60 else ORANGE for g in gaps]
-    GAP_BAR_W = W / max(len(gaps), 1) - 14
-    gap_cells = []
-    for i,(g,gc) in enumerate(zip(gaps,gap_clrs)):
-        gap_cells.append([
-            Paragraph(f"R{i+1}", PS(f"gr{i}",fontName="Helvetica-Bold",fontSize=9,textColor=gc,alignment=TA_CENTER)),
-            Paragraph(str(g),    PS(f"gv{i}",fontName="Helvetica-Bold",fontSize=20,textColor=WHITE,leading=24,alignment=TA_CENTER)),
-            Paragraph("days",    PS(f"gd{i}",fontSize=7,textColor=MUTED,alignment=TA_CENTER)),
-            sp(2),
-            ProgressBar(min(g/mgap*100,100), GAP_BAR_W, height=6, clr=gc),
-        ])
-
-    gap_t = Table([gap_cells], colWidths=[W/len(gaps)]*len(gaps))
-    gap_ts = [
-        ("BACKGROUND",    (0,0),(-1,-1), CARD),
-        ("GRID",          (0,0),(-1,-1), 0.5, BORDER),
-        ("VALIGN",        (0,0),(-1,-1), "TOP"),
-        ("TOPPADDING",    (0,0),(-1,-1), 9),
-        ("BOTTOMPADDING", (0,0),(-1,-1), 9),
-        ("LEFTPADDING",   (0,0),(-1,-1), 7),
-        ("RIGHTPADDING",  (0,0),(-1,-1), 7),
-    ]
-    for i,gc in enumerate(gap_clrs):
-        gap_ts.append(("LINEABOVE",(i,0),(i,0),3,gc))
-    gap_t.setStyle(TableStyle(gap_ts))
-    story.append(gap_t)
-    story.append(sp(5))
-    story.append(Paragraph(
-        "  →  ".join([f"R{i+1}: {g}d" for i,g in enumerate(gaps)]),
-        S_MONO))
-
-    # ── Build ──────────────────────────────────────────────────────────────────
-    doc.build(story, onFirstPage=dark_page, onLaterPages=dark_page)
-    buf.seek(0)
-    return buf.read()
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -5552,16 +3988,17 @@ def dashboard(log, tst, rev, rev_sess, pend):
     else:
         read_log = log
 
-    total_reading_hrs = float(read_log["hours"].sum()) if not read_log.empty else 0.0
-    avg_score   = float(tst["score_pct"].mean()) if not tst.empty else 0.0
     sh          = read_log.groupby("subject")["hours"].sum() if not read_log.empty else pd.Series(dtype=float)
-    total_target = sum(prof_targets.values())
-    need        = max(total_target - total_reading_hrs, 0)
-    dpd         = round(need / days_left, 1) if days_left > 0 else 0
-    days_studied = log["date"].dt.date.nunique() if not log.empty else 0
+
+    # Headline KPIs — shared with the PDF report and the weekly digest job
+    _kpi              = compute_dashboard_kpis(log, tst, rev_sess, prof, days_left)
+    total_reading_hrs = _kpi["total_reading_hrs"]
+    avg_score         = _kpi["avg_score"]
+    dpd               = _kpi["dpd"]
+    days_studied      = _kpi["days_studied"]
 
     # Revision stats (pre-fetched, no extra DB call)
-    total_rev_hrs = float(rev_sess["hours"].sum()) if not rev_sess.empty and "hours" in rev_sess.columns else 0.0
+    total_rev_hrs = _kpi["total_rev_hrs"]
     rev_sh    = rev_sess.groupby("subject")["hours"].sum() if not rev_sess.empty and "subject" in rev_sess.columns else pd.Series(dtype=float)
 
     # ── Dashboard header — Refresh · PDF · Logout ───────────────────────────
@@ -5573,23 +4010,28 @@ def dashboard(log, tst, rev, rev_sess, pend):
             st.cache_data.clear()
             st.rerun()
     with h_pdf:
+        # Rendered on the background PDF pool — the session stays responsive.
+        # Same data + same day → cached bytes, no re-render.
         if st.button("🖨️", key="dash_pdf", help="Export Dashboard as PDF"):
-            try:
-                pdf_bytes = generate_dashboard_pdf(
-                    log, tst, rev, rev_sess, pend,
-                    prof, days_left, total_reading_hrs, total_rev_hrs,
-                    avg_score, days_studied, dpd
-                )
-                st.download_button(
-                    label="📥 Download PDF",
-                    data=pdf_bytes,
-                    file_name=f"CA_Final_Dashboard_{date.today().strftime('%Y%m%d')}.pdf",
-                    mime="application/pdf",
-                    key="dash_pdf_dl",
-                    use_container_width=True,
-                )
-            except Exception as _pdf_err:
-                st.error(f"PDF error: {_pdf_err}")
+            _exam_pdf = get_exam_date()
+            _pdf_ver  = pdf_data_version(
+                log, tst, rev, rev_sess, pend,
+                extra=(sorted(prof.items()), days_left, _exam_pdf),
+            )
+            st.session_state["dash_pdf_job"] = submit_pdf_job(
+                uid(), _pdf_ver, generate_dashboard_pdf,
+                log, tst, rev, rev_sess, pend,
+                dict(prof), days_left, total_reading_hrs, total_rev_hrs,
+                avg_score, days_studied, dpd,
+                exam_date=_exam_pdf,
+            )
+        if st.session_state.get("dash_pdf_job"):
+            render_pdf_job(
+                st.session_state["dash_pdf_job"],
+                file_name=f"CA_Final_Dashboard_{date.today().strftime('%Y%m%d')}.pdf",
+                key="dash_pdf_dl",
+                state_key="dash_pdf_job",
+            )
     with h_logout:
         if st.button("🚪", key="dash_logout", help="Sign Out"):
             do_logout()
@@ -6212,6 +4654,10 @@ def dashboard(log, tst, rev, rev_sess, pend):
 # ══════════════════════════════════════════════════════════════════════════════
 # LOG STUDY
 # ══════════════════════════════════════════════════════════════════════════════
+# Daily-hours chart windows: label → days back (None = all history)
+_HOURS_WINDOWS = {"Last 30 Days": 30, "Last 90 Days": 90, "Last 12 Months": 365, "All Time": None}
+
+
 def log_study(existing_log, rev_df, rev_sess):
     st.markdown('<div class="neon-header neon-header-glow">📝 Log Study Session</div>', unsafe_allow_html=True)
 
@@ -6475,15 +4921,24 @@ def log_study(existing_log, rev_df, rev_sess):
         dark_table(r[show_cols],
                    caption=f"{len(existing_log)} total sessions · {_reading_hrs_cap:.1f}h first reading")
 
-    # ── Daily Hours — Last 30 Days (moved from Dashboard) ────────────────────
+    # ── Daily Hours — selectable window (moved from Dashboard) ───────────────
+    # Long windows are bucketed (day → week → month) so the chart never ships
+    # more than MAX_CHART_BARS bars per subject, however long the history.
     if not existing_log.empty:
         st.markdown("---")
-        st.markdown('<div class="neon-header neon-header-glow">📈 Daily Hours — Last 30 Days</div>', unsafe_allow_html=True)
-        _start30 = date.today() - timedelta(days=29)
-        _d30 = existing_log[existing_log["date"].dt.date >= _start30]
+        _hh, _hw = st.columns([4, 1])
+        with _hw:
+            _win = st.selectbox("Window", list(_HOURS_WINDOWS), index=0,
+                                key="daily_hours_window", label_visibility="collapsed")
+        with _hh:
+            st.markdown(f'<div class="neon-header neon-header-glow">📈 Daily Hours — {_win}</div>', unsafe_allow_html=True)
+        _win_days = _HOURS_WINDOWS[_win]
+        _d30 = (existing_log if _win_days is None else
+                existing_log[existing_log["date"].dt.date >= date.today() - timedelta(days=_win_days - 1)])
         if not _d30.empty:
-            _grp30 = _d30.groupby([_d30["date"].dt.date, "subject"])["hours"].sum().reset_index()
+            _grp30, _bucket = bucket_daily(_d30, "date", "hours", "subject")
             _grp30.columns = ["Date", "Subject", "Hours"]
+            _per = "" if _bucket == "day" else f" (avg/day per {_bucket})"
             _fig30 = go.Figure()
             for s in SUBJECTS:
                 _sub30 = _grp30[_grp30["Subject"] == s].sort_values("Date")
@@ -6493,18 +4948,18 @@ def log_study(existing_log, rev_df, rev_sess):
                     x=_sub30["Date"], y=_sub30["Hours"],
                     name=SUBJ_FULL[s],
                     marker=dict(color=COLORS[s], opacity=0.85, line=dict(width=0)),
-                    hovertemplate=f"<b>{SUBJ_FULL[s]}</b><br>%{{x}}<br>%{{y:.1f}}h<extra></extra>"
+                    hovertemplate=f"<b>{SUBJ_FULL[s]}</b><br>%{{x|%d %b %Y}}<br>%{{y:.1f}}h{_per}<extra></extra>"
                 ))
             _fig30.add_hline(y=6, line_dash="dash", line_color="#FBBF24", line_width=1.5,
                              annotation_text="6h daily target", annotation_font_color="#FBBF24",
                              annotation_font_size=10)
             _fig30.update_layout(barmode="stack", bargap=0.25, hovermode="x unified", transition=dict(duration=0))
-            apply_theme(_fig30, title="Daily Hours — Last 30 Days")
+            apply_theme(_fig30, title=f"Daily Hours — {_win}{_per}")
             _fig30.update_traces(marker_line_width=0)
             _fig30.update_yaxes(rangemode="tozero")
             st.plotly_chart(_fig30, width='stretch')
         else:
-            st.info("📊 No sessions logged in the last 30 days.")
+            st.info(f"📊 No sessions logged in the {_win.lower()}.")
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -6595,7 +5050,8 @@ def add_test_score(tst):
             st.markdown('<div class="neon-header">📈 Score Trend</div>', unsafe_allow_html=True)
             fig3 = go.Figure()
             for s in SUBJECTS:
-                df_s = tst[tst["subject"] == s].sort_values("date")
+                df_s = downsample_xy(tst[tst["subject"] == s].sort_values("date"),
+                                     "date", "score_pct")
                 if df_s.empty:
                     continue
                 fig3.add_trace(go.Scatter(
@@ -7128,6 +5584,24 @@ def revision(log_df, rev_df, rev_sess_df, pend):
         else:
             st.info("No topics match the selected filter.")
 
+    # ── Revision sessions over time — all-time, LTTB-downsampled ────────────
+    if not rev_sess_df.empty and "date" in rev_sess_df.columns:
+        _rv_daily = (pd.to_datetime(rev_sess_df["date"]).dt.normalize()
+                     .value_counts().sort_index().rename_axis("Date").reset_index(name="Sessions"))
+        _rv_daily["Total"] = _rv_daily["Sessions"].cumsum()
+        _rv_plot = downsample_xy(_rv_daily, "Date", "Total")
+        st.markdown("---")
+        st.markdown('<div class="neon-header neon-header-glow">📈 Revision Sessions — All Time</div>', unsafe_allow_html=True)
+        _rv_fig = go.Figure(go.Scatter(
+            x=_rv_plot["Date"], y=_rv_plot["Total"], mode="lines",
+            line=dict(color="#34D399", width=2), fill="tozeroy",
+            hovertemplate="%{x|%d %b %Y}<br>%{y} sessions total<extra></extra>",
+        ))
+        apply_theme(_rv_fig, title="Cumulative Revision Sessions")
+        _rv_fig.update_layout(transition=dict(duration=0))
+        _rv_fig.update_yaxes(rangemode="tozero")
+        st.plotly_chart(_rv_fig, width='stretch')
+
 # ══════════════════════════════════════════════════════════════════════════════
 # MY DATA
 # ══════════════════════════════════════════════════════════════════════════════
@@ -7275,9 +5749,13 @@ def leaderboard():
 # ══════════════════════════════════════════════════════════════════════════════
 st.markdown(GLASSY_CSS, unsafe_allow_html=True)
 
-if not st.session_state.logged_in:
+with span("auth_gate"):
+    _logged_in   = bool(st.session_state.logged_in)
+    _needs_setup = _logged_in and _MODULES_OK and needs_course_setup(st.session_state.get("user_id", ""))
+
+if not _logged_in:
     auth_page()
-elif _MODULES_OK and needs_course_setup(st.session_state.get("user_id", "")):
+elif _needs_setup:
     # ── COURSE SELECTION SCREEN — shown to new users before main app ──────────
     render_first_login_course_selection(st.session_state.get("user_id", ""))
 else:
@@ -7303,11 +5781,13 @@ else:
         )
 
     # ── Fetch ALL data once — shared across every tab (no duplicate DB calls) ──
-    _log_h    = get_logs()
-    _tst_h    = get_scores()
-    _rev_h    = get_rev_sessions()
-    _revt_h   = get_revision()
-    _pend_h   = get_pendencies(_revt_h, _log_h)
+    with span("data_fetch"):
+        _log_h    = get_logs()
+        _tst_h    = get_scores()
+        _rev_h    = get_rev_sessions()
+        _revt_h   = get_revision()
+    with span("get_pendencies"):
+        _pend_h   = get_pendencies(_revt_h, _log_h)
 
     # ── XP info for header ─────────────────────────────────────────────────────
     _read_h = float(_log_h["hours"].sum()) if not _log_h.empty else 0.0
@@ -7649,24 +6129,24 @@ else:
 
     _ti = _make_tabs(_admin_tabs if _is_admin_user else _base_tabs)
 
-    with _ti["📊  Dashboard"]:
+    with _ti["📊  Dashboard"], span("tab.dashboard"):
         dashboard(_log_h, _tst_h, _revt_h, _rev_h, _pend_h)
 
-    with _ti["📝  Log Study"]:
+    with _ti["📝  Log Study"], span("tab.log_study"):
         log_study(_log_h, _revt_h, _rev_h)
 
-    with _ti["🔄  Revision"]:
+    with _ti["🔄  Revision"], span("tab.revision"):
         revision(_log_h, _revt_h, _rev_h, _pend_h)
 
-    with _ti["🏆  Add Score"]:
+    with _ti["🏆  Add Score"], span("tab.add_score"):
         add_test_score(_tst_h)
 
-    with _ti["💰  Pricing"]:
+    with _ti["💰  Pricing"], span("tab.pricing"):
         _render_pricing(user_email=_logged_email)
 
-    with _ti["👤  Account"]:
+    with _ti["👤  Account"], span("tab.account"):
         profile_page(_log_h, _revt_h, _rev_h, _tst_h)
 
     if _is_admin_user:
-        with _ti["🔐  Admin"]:
+        with _ti["🔐  Admin"], span("tab.admin"):
             _render_admin_panel()
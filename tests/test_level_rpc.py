@@ -0,0 +1,78 @@
+"""
+test_level_rpc.py — StudyTracker
+clear_level_and_advance on the local SQLite stand-in: all four writes
+land together or not at all.
+"""
+
+import sqlite3
+
+import pytest
+
+from modules.local_db import connect, create_local_client, rpc_clear_level_and_advance
+
+USER, COURSE, LEVEL = "u1", "ca", "ca_inter"
+TABLES = ("level_history", "user_courses", "user_subjects", "user_topics")
+
+
+def _seed(conn, enrolled: bool = True):
+    if enrolled:
+        conn.execute("INSERT INTO user_courses (user_id, course_id, current_level) VALUES (?, ?, ?)",
+                     (USER, COURSE, LEVEL))
+    conn.execute("INSERT INTO level_history (user_id, course_id, level_key, cleared_at, cleared, notes) "
+                 "VALUES (?, ?, ?, '2025-01-01', 0, 'attempt 1')", (USER, COURSE, LEVEL))
+    conn.execute("INSERT INTO user_subjects (user_id, course_id, level_key, subject_key, label) "
+                 "VALUES (?, ?, ?, 'fr', 'Financial Reporting')", (USER, COURSE, LEVEL))
+    conn.execute("INSERT INTO user_topics (user_id, course_id, level_key, subject_key, topic) "
+                 "VALUES (?, ?, ?, 'fr', 'Ind AS 115')", (USER, COURSE, LEVEL))
+
+
+def _snapshot(conn) -> dict:
+    return {t: [tuple(r) for r in conn.execute(f"SELECT * FROM {t} ORDER BY id")] for t in TABLES}
+
+
+@pytest.fixture
+def conn():
+    c = connect()
+    yield c
+    c.close()
+
+
+def test_advances_and_freezes(conn):
+    _seed(conn)
+    assert rpc_clear_level_and_advance(conn, USER, COURSE, LEVEL, "ca_final", "passed") == "advanced"
+    assert conn.execute("SELECT current_level FROM user_courses").fetchone()[0] == "ca_final"
+    assert tuple(conn.execute("SELECT cleared, notes FROM level_history").fetchone()) == (1, "passed")
+    assert conn.execute("SELECT frozen FROM user_subjects").fetchone()[0] == 1
+    assert conn.execute("SELECT frozen FROM user_topics").fetchone()[0] == 1
+
+
+@pytest.mark.parametrize("next_level", ["ca_final", None])
+def test_not_enrolled_changes_nothing(conn, next_level):
+    _seed(conn, enrolled=False)
+    before = _snapshot(conn)
+    with pytest.raises(sqlite3.IntegrityError, match="not enrolled"):
+        rpc_clear_level_and_advance(conn, USER, COURSE, LEVEL, next_level, "passed")
+    assert _snapshot(conn) == before
+
+
+def test_failure_on_last_write_rolls_back_earlier_ones(conn):
+    _seed(conn)
+    conn.execute("CREATE TRIGGER fail_course_update BEFORE UPDATE ON user_courses "
+                 "BEGIN SELECT RAISE(ABORT, 'disk full'); END")
+    before = _snapshot(conn)
+    with pytest.raises(sqlite3.Error, match="disk full"):
+        rpc_clear_level_and_advance(conn, USER, COURSE, LEVEL, "ca_final", "passed")
+    assert _snapshot(conn) == before
+    assert not conn.in_transaction
+
+
+def test_client_rpc_reports_error_and_changes_nothing(tmp_path):
+    sb = create_local_client(str(tmp_path / "rpc.db"))
+    _seed(sb._conn, enrolled=False)
+    before = _snapshot(sb._conn)
+    with pytest.raises(Exception, match="not enrolled"):
+        sb.rpc("clear_level_and_advance", {
+            "p_user_id": USER, "p_course_id": COURSE, "p_level_key": LEVEL,
+            "p_next_level": "ca_final", "p_notes": "passed",
+        }).execute()
+    assert _snapshot(sb._conn) == before
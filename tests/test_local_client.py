@@ -0,0 +1,59 @@
+"""
+test_local_client.py — StudyTracker
+LocalClient behaves like PostgREST where the app relies on it (errors, or_ filters).
+"""
+
+import pytest
+
+from modules.local_db import LocalAPIError, create_local_client
+
+
+@pytest.fixture
+def sb(tmp_path):
+    sb = create_local_client(str(tmp_path / "local.db"))
+    sb.table("daily_log").insert([
+        {"user_id": "u1", "date": "2026-01-01", "subject": "FR", "topic": "Ind AS 115", "hours": 1},
+        {"user_id": "u2", "date": "2026-01-02", "subject": "DT", "topic": "TDS", "hours": 2},
+    ]).execute()
+    return sb
+
+
+def test_unknown_write_column_is_rejected(sb):
+    with pytest.raises(LocalAPIError) as e:
+        sb.table("daily_log").insert({"user_id": "u1", "not_a_column": 1}).execute()
+    assert e.value.code == "PGRST204"
+    with pytest.raises(LocalAPIError):
+        sb.table("daily_log").update({"not_a_column": 1}).eq("user_id", "u1").execute()
+    cols = {r[1] for r in sb._conn.execute("PRAGMA table_info(daily_log)")}
+    assert "not_a_column" not in cols
+
+
+@pytest.mark.parametrize("verb", ["update", "delete"])
+def test_unfiltered_write_is_refused(sb, verb):
+    q = sb.table("daily_log")
+    q = q.update({"hours": 9}) if verb == "update" else q.delete()
+    with pytest.raises(LocalAPIError) as e:
+        q.execute()
+    assert e.value.code == "21000"
+    assert [r["hours"] for r in sb.table("daily_log").select("hours").order("date").execute().data] == [1, 2]
+
+
+def test_filtered_update_returns_rows(sb):
+    res = sb.table("daily_log").update({"hours": 3}).eq("user_id", "u1").execute()
+    assert [(r["user_id"], r["hours"]) for r in res.data] == [("u1", 3)]
+
+
+def test_or_filter_matches_any_condition(sb):
+    sb.table("referral_uses").insert([
+        {"referral_code": "A1", "referred_email": "p@x.com", "validated": None},
+        {"referral_code": "A1", "referred_email": "q@x.com", "validated": False},
+        {"referral_code": "A1", "referred_email": "r@x.com", "validated": True},
+    ]).execute()
+    pending = sb.table("referral_uses").select("referred_email") \
+                .or_("validated.is.null,validated.eq.false").order("referred_email").execute()
+    assert [r["referred_email"] for r in pending.data] == ["p@x.com", "q@x.com"]
+    rows = sb.table("daily_log").select("user_id").eq("subject", "FR") \
+             .or_("hours.gte.2,topic.in.(\"Ind AS 115\",TDS)").execute()
+    assert [r["user_id"] for r in rows.data] == ["u1"]
+    with pytest.raises(LocalAPIError):
+        sb.table("daily_log").select("*").or_("nope.eq.1").execute()
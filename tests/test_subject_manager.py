@@ -0,0 +1,58 @@
+"""
+test_subject_manager.py — StudyTracker
+edit_topics on LocalClient: renames keep the existing row, writes only
+touch topic / position.
+"""
+
+import pytest
+import streamlit as st
+
+from modules.local_db import create_local_client
+from modules.subject_manager import edit_topics
+
+SCOPE = {"user_id": "u1", "course_id": "ca", "level_key": "ca_final", "subject_key": "fr"}
+
+
+@pytest.fixture
+def sb(tmp_path):
+    sb = create_local_client(str(tmp_path / "topics.db"))
+    sb.table("user_subjects").insert({**SCOPE, "label": "FR"}).execute()
+    sb.table("user_topics").insert([
+        {**SCOPE, "topic": t, "position": i, "frozen": t == "B"} for i, t in enumerate("ABCD")
+    ]).execute()
+    st.session_state["_sb_admin"] = sb
+    yield sb
+    st.session_state.pop("_sb_admin", None)
+
+
+def _rows(sb) -> dict:
+    rows = sb.table("user_topics").select("id,topic,position,frozen").order("position").execute().data
+    return {r["topic"]: r for r in rows}
+
+
+def test_rename_reorder_delete(sb):
+    before = _rows(sb)
+    ok, msg = edit_topics(*SCOPE.values(), ["C", "B2", "A", "E"], {"B": "B2"})
+    assert ok, msg
+    after = _rows(sb)
+    assert list(after) == ["C", "B2", "A", "E"]
+    assert after["B2"]["id"] == before["B"]["id"]
+    assert after["B2"]["frozen"]                         # existing value kept
+    assert not after["E"]["frozen"]
+    assert "1 renamed" in msg and "1 removed" in msg     # D
+
+
+def test_swap_names(sb):
+    before = _rows(sb)
+    ok, msg = edit_topics(*SCOPE.values(), ["B", "A", "C", "D"], {"A": "B", "B": "A"})
+    assert ok, msg
+    after = _rows(sb)
+    assert list(after) == ["B", "A", "C", "D"]
+    assert after["B"]["id"] == before["A"]["id"] and after["A"]["id"] == before["B"]["id"]
+
+
+def test_rename_onto_existing_topic_is_refused(sb):
+    before = _rows(sb)
+    ok, _ = edit_topics(*SCOPE.values(), ["C", "B", "D"], {"A": "C"})
+    assert not ok
+    assert _rows(sb) == before
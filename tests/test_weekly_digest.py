@@ -0,0 +1,28 @@
+"""
+test_weekly_digest.py — StudyTracker
+The digest loads every active user even past PostgREST's 1000-row cap.
+"""
+
+from datetime import date
+
+from modules.local_db import create_local_client
+from modules.weekly_digest import load_active_users
+
+N_USERS = 1205
+
+
+def test_load_active_users_pages_past_max_rows(tmp_path):
+    sb = create_local_client(str(tmp_path / "digest.db"), max_rows=1000)
+    today = date.today().isoformat()
+    emails = [f"student{i:05d}@example.com" for i in range(N_USERS)]
+    sb.table("approved_emails").insert([{
+        "email": e, "status": "approved", "approved_at": today,
+        "plan_key": "life", "plan_start": today, "plan_end": None,
+    } for e in emails]).execute()
+    sb.table("approved_emails").insert({"email": "waiting@example.com", "status": "pending"}).execute()
+    sb.table("profiles").insert([{"id": f"u{i:05d}", "username": f"s{i:05d}", "email": e}
+                                 for i, e in enumerate(emails)]).execute()
+
+    assert len(sb.table("approved_emails").select("*").execute().data) == 1000   # the cap bites
+    users = load_active_users(sb)
+    assert sorted(u["email"] for u in users) == emails